@@ -0,0 +1,368 @@
+"""
+**benchmarks.py - Performance benchmarks for the model layer**
+
+**Purpose**
+- Times the model's indexes, caches and concurrent paths on synthetic data at production
+  scale, next to the approach each one replaced where that still runs in reasonable time.
+- Correctness checks live in tests/ and run under pytest; these only measure.
+
+**Usage**
+- ``python bench/benchmarks.py --help`` lists the benchmarks (run from the repository root, like main.py)
+- ``python bench/benchmarks.py sku-catalog --skus 1000000``
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))  # Model package
+
+from model.change_log import ChangeLog, read_changes, segment_paths
+from model.demand_forecast import DemandForecaster, DemandHistory, day_number
+from model.inventory_snapshot import InventorySnapshot, write_snapshot
+from model.money import cents_to_decimal, format_money, grouped_totals, valuation
+from model.order_ids import OrderIdAllocator
+from model.order_lines import OrderLineStore
+from model.parallel_search import ShardedSearch
+from model.report_export import INVENTORY_HEADER, export_rows, inventory_report_rows
+from model.sku_catalog import OUT_OF_STOCK, UNKNOWN_SKU, BloomFilter, LocalSkuCatalog, sku_filter_for, sku_state
+from remote.model_client import ModelClient
+
+
+def bench_order_ids(thread_counts, ids_per_thread, block_sizes):
+    """Allocates concurrently from many threads and checks every ID is unique."""
+    directory = tempfile.mkdtemp()
+    for block_size in block_sizes:
+        for threads in thread_counts:
+            allocator = OrderIdAllocator(path=os.path.join(directory, f"bench-{block_size}-{threads}.hwm"), block_size=block_size)
+            results = [None] * threads
+
+            def worker(slot):
+                results[slot] = [allocator.allocate_number() for _ in range(ids_per_thread)]
+
+            workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            allocated = [number for numbers in results for number in numbers]
+            assert len(set(allocated)) == len(allocated), "duplicate order number"
+            assert all(numbers == sorted(numbers) for numbers in results), "non-monotonic thread"
+            print(f"block {block_size:5d}  {threads:3d} threads: {len(allocated) / elapsed:12,.0f} IDs/s "
+                  f"({allocator.blocks_reserved} blocks reserved)")
+
+
+def bench_parallel_search(rows, queries, max_shards):
+    """Writes a synthetic snapshot and times each query with 1..max_shards shards."""
+    categories = ["Hammer", "Drill", "Saw", "Wrench", "Pliers", "Level", "Clamp", "Gloves"]
+    path = os.path.join(tempfile.mkdtemp(), "bench.snap")
+    data = [
+        [categories[i % 8], f"{categories[i % 8]} model {i}", f"{categories[i % 8][:3].upper()}-{i % 10000:04d}",
+         100 + i % 9973, i % 97]
+        for i in range(rows)
+    ]
+    write_snapshot(data, path, (0, 0))
+    del data
+    snapshot = InventorySnapshot(path)
+
+    shard_counts = sorted({1, 2, max_shards} | {n for n in (4, 8, 16) if n < max_shards})
+    for shards in shard_counts:
+        search = ShardedSearch(snapshot, shards, min_rows=0)
+        search.search_positions("warm-up")  # Start the workers outside the timing
+        for query in queries:
+            start = time.perf_counter()
+            matches = len(search.search_positions(query))
+            print(f"{shards:3d} shards  {query!r:28} {matches:9,d} matches  {time.perf_counter() - start:7.3f}s")
+        search.close()
+    snapshot.close()
+
+
+def bench_money(skus):
+    """Times exact valuation and category totals in cents against the old float-dollar loop."""
+    rng = np.random.default_rng(265)
+    prices = rng.integers(50, 100_000, skus, dtype=np.int64)
+    quantities = rng.integers(0, 500, skus, dtype=np.int64)
+    categories = rng.integers(0, 40, skus)
+
+    start = time.perf_counter()
+    total = valuation(prices, quantities)
+    valued = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_category = grouped_totals(categories, prices * quantities, 40)
+    grouped = time.perf_counter() - start
+    assert int(by_category.sum()) == total
+
+    start = time.perf_counter()
+    float_total = 0.0
+    for price, quantity in zip((prices / 100).tolist(), quantities.tolist()):
+        float_total += price * quantity  # What the float-dollar model did
+    looped = time.perf_counter() - start
+
+    print(f"{skus:,} SKUs: valuation {valued * 1000:.1f} ms, 40 category totals {grouped * 1000:.1f} ms, "
+          f"float loop {looped * 1000:.0f} ms")
+    print(f"exact total {format_money(total, grouped=True)}, float loop off by "
+          f"{abs(Decimal(float_total) - cents_to_decimal(total)):.6f} dollars")
+
+
+def bench_order_lines(order_count, lines_per_order, sku_count):
+    """Times indexed lookups against scanning every order's lines."""
+    rng = random.Random(265)
+    skus = [f"SKU-{code:06d}" for code in range(sku_count)]
+    statuses = ["Pending", "Shipped", "Delivered"]
+    orders = [
+        (f"ORD-{number:07d}", [(rng.choice(skus), rng.randint(1, 50), rng.randint(100, 20000)) for _ in range(lines_per_order)],
+         rng.choice(statuses))
+        for number in range(order_count)
+    ]
+
+    start = time.perf_counter()
+    store = OrderLineStore()
+    for order_id, lines, status in orders:
+        store.add_order(order_id, lines, status)
+    print(f"{order_count:,} orders, {len(store):,} lines loaded in {time.perf_counter() - start:.2f}s")
+
+    probes = rng.sample(skus, 1000)
+    start = time.perf_counter()
+    indexed = [(store.orders_with(sku, "Pending"), store.committed(sku)) for sku in probes]
+    indexed_time = (time.perf_counter() - start) / len(probes)
+
+    start = time.perf_counter()
+    scanned = []
+    for sku in probes[:20]:
+        pending = [order_id for order_id, lines, status in orders
+                   if status == "Pending" and any(line[0] == sku for line in lines)]
+        committed = sum(line[1] for _, lines, status in orders if status != "Delivered" for line in lines if line[0] == sku)
+        scanned.append((pending, committed))
+    scan_time = (time.perf_counter() - start) / 20
+    assert scanned == indexed[:20]
+    print(f"pending orders + committed quantity per SKU: {indexed_time * 1e6:.1f} us indexed, "
+          f"{scan_time * 1e3:.1f} ms scanning ({scan_time / indexed_time:,.0f}x)")
+
+
+def bench_sku_catalog(sku_count, line_count):
+    """Times checking order lines with the index, the old linear scan and a Bloom filter."""
+    rng = random.Random(265)
+
+    def make_sku(code):  # AAA-0000, AAA-0001, ... AAB-0000, ...
+        group = code // 10000
+        return f"{chr(65 + group // 676 % 26)}{chr(65 + group // 26 % 26)}{chr(65 + group % 26)}-{code % 10000:04d}"
+
+    rows = [["Item", "", make_sku(code), 1999, rng.randint(0, 5)] for code in range(sku_count)]
+    skus = [row[2] for row in rows]
+    lines = [rng.choice(skus) if rng.random() < 0.9 else f"ZZZ-{rng.randint(0, 9999):04d}" for _ in range(line_count)]
+
+    start = time.perf_counter()
+    catalog = LocalSkuCatalog(rows)
+    catalog.state(lines[0])  # Builds the index
+    print(f"index over {sku_count:,} SKUs built in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    states = [sku_state(sku, catalog) for sku in lines]
+    indexed = (time.perf_counter() - start) / line_count
+    print(f"{line_count:,} lines checked: {indexed * 1e6:.2f} us per line "
+          f"({states.count(UNKNOWN_SKU):,} unknown, {states.count(OUT_OF_STOCK):,} out of stock)")
+
+    start = time.perf_counter()
+    for sku in lines[:20]:
+        next((row for row in rows if row[2] == sku), None)
+    scanned = (time.perf_counter() - start) / 20
+    print(f"linear scan (the old check_order_validity): {scanned * 1e3:.2f} ms per line ({scanned / indexed:,.0f}x)")
+
+    start = time.perf_counter()
+    bloom = sku_filter_for(rows)
+    built = time.perf_counter() - start
+    wire = BloomFilter.from_dict(bloom.to_dict())
+    start = time.perf_counter()
+    misses = [f"QQQ-{number:04d}" for number in range(10000)]
+    false_positives = sum(1 for sku in misses if sku in wire)
+    per_check = (time.perf_counter() - start) / len(misses)
+    assert all(sku in wire for sku in skus[:10000])
+    print(f"Bloom filter: {len(bloom.data) / 1024:,.0f} KiB, {bloom.hashes} hashes, built in {built:.2f}s, "
+          f"{per_check * 1e6:.2f} us per check, {false_positives / len(misses):.2%} false positives")
+
+
+def bench_demand_forecast(sku_count, days, events_per_sku):
+    """Times a forecast over a synthetic history."""
+    rng = np.random.default_rng(265)
+    history = DemandHistory()
+    history.skus = [f"SKU-{code:06d}" for code in range(sku_count)]
+    history.sku_ids = {sku: code for code, sku in enumerate(history.skus)}
+    total = sku_count * events_per_sku
+    today = day_number()
+    history._codes = array("l", rng.integers(0, sku_count, total).tolist())
+    history._days = array("l", (today - rng.integers(0, days, total)).tolist())
+    history._quantities = array("d", rng.integers(1, 5, total).astype(float).tolist())
+    history.version = 1
+    rows = [["Item", "", sku, 1.0, int(qty)] for sku, qty in zip(history.skus, rng.integers(0, 40, sku_count))]
+
+    forecaster = DemandForecaster(history, window_days=days)
+    start = time.perf_counter()
+    suggestions = forecaster.recommendations(rows)
+    print(f"{sku_count:,} SKUs x {days} days, {total:,} events: {time.perf_counter() - start:.3f}s "
+          f"({len(suggestions):,} SKUs to reorder)")
+    start = time.perf_counter()
+    forecaster.recommendations(rows)
+    print(f"cached: {time.perf_counter() - start:.3f}s")
+
+
+def bench_report_export(row_count):
+    """Times a streaming export of row_count inventory rows to CSV and to XLSX."""
+    inventory = [["Hammer", f"Hammer model {i}", f"HAM-{i % 10000:04d}", 1499, i % 50] for i in range(1000)]
+    directory = tempfile.mkdtemp()
+    try:
+        for name in ("export.csv", "export.xlsx"):
+            path = os.path.join(directory, name)
+            positions = (i % 1000 for i in range(row_count))
+            start = time.perf_counter()
+            count = export_rows(path, INVENTORY_HEADER, inventory_report_rows(inventory, positions))
+            print(f"{name}: {count:,} rows in {time.perf_counter() - start:.2f}s, {os.path.getsize(path) / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_change_log(changes, segment_kib):
+    """Times appending changes and streaming them back, with the reader's peak memory."""
+    directory = tempfile.mkdtemp(prefix="contractor-plus-changes-")
+    try:
+        log = ChangeLog(directory, segment_bytes=segment_kib * 1024)
+        start = time.perf_counter()
+        for number in range(changes):
+            log.append("inventory.changed", sku=f"SKU-{number % 5000:06d}", price=1999, quantity=number % 97,
+                       old_price=1999, old_quantity=number % 89)
+        elapsed = time.perf_counter() - start
+        log.close()
+        print(f"appended {changes:,} changes in {elapsed:.2f}s ({changes / elapsed:,.0f}/s) "
+              f"into {len(segment_paths(directory))} segments")
+
+        start = time.perf_counter()
+        count = sum(1 for _ in read_changes(0, directory))
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        sum(1 for _ in read_changes(0, directory))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"read {count:,} changes in {elapsed:.2f}s, peak reader memory {peak / 1024:.0f} KiB")
+
+        start = time.perf_counter()
+        resumed = next(read_changes(changes - 10, directory))["seq"]
+        print(f"resume from sequence {changes - 10:,}: first change {resumed:,} after "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def server_throughput(host, port, clients, requests):
+    """
+    Runs `clients` threads, each with its own ModelClient, issuing a mix of searches
+    (half of them repeated, so cacheable), validations and status changes.
+    Returns requests per second across all clients.
+    """
+    queries = ["drill", "HAM-", "qty<5", "sku:SAW- price>=9"]
+    statuses = ["Pending", "Processing", "Shipped"]
+
+    def worker(number):
+        client = ModelClient(host, port, pool_size=1)
+        for i in range(requests):
+            if i % 10 == 0:
+                client.change_order_status("ORD141", statuses[(number + i) % 3], user=f"bench-{number}")
+            elif i % 10 == 1:
+                client.validate_order([["HAM-0001", 2], ["DRL-0007", 1]])
+            else:
+                client.search_inventory(queries[i % len(queries)])
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * requests / (time.perf_counter() - start)
+
+
+def bench_server(host, port, clients, requests, spawn_server):
+    """Runs the throughput test with one client and with `clients` clients."""
+    if spawn_server:
+        from remote.model_server import ModelServer
+
+        ready = threading.Event()
+        threading.Thread(target=lambda: asyncio.run(ModelServer().serve(host, port, ready)), daemon=True).start()
+        ready.wait(10)
+
+    for count in sorted({1, clients}):
+        rate = server_throughput(host, port, count, requests)
+        print(f"{count:3d} clients x {requests} requests: {rate:,.0f} requests/s")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmarks for the model layer")
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+
+    command = benchmarks.add_parser("order-ids", help="order ID allocation under contention")
+    command.add_argument("--threads", type=int, default=16)
+    command.add_argument("--ids", type=int, default=20000, help="IDs allocated per thread")
+    command.set_defaults(run=lambda args: bench_order_ids(sorted({1, 2, 4, 8, args.threads}), args.ids, [1, 100, 1000]))
+
+    command = benchmarks.add_parser("parallel-search", help="sharded inventory search, 1..N shards")
+    command.add_argument("--rows", type=int, default=1_000_000)
+    command.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    command.set_defaults(run=lambda args: bench_parallel_search(
+        args.rows, ["drill", "qty<5 price>=50", "model 12345"], args.shards))
+
+    command = benchmarks.add_parser("money", help="exact money totals over a large catalog")
+    command.add_argument("--skus", type=int, default=1_000_000)
+    command.set_defaults(run=lambda args: bench_money(args.skus))
+
+    command = benchmarks.add_parser("order-lines", help="order line indexes against a full scan")
+    command.add_argument("--orders", type=int, default=200_000)
+    command.add_argument("--lines", type=int, default=5, help="lines per order")
+    command.add_argument("--skus", type=int, default=50_000)
+    command.set_defaults(run=lambda args: bench_order_lines(args.orders, args.lines, args.skus))
+
+    command = benchmarks.add_parser("sku-catalog", help="live SKU checks against a large catalog")
+    command.add_argument("--skus", type=int, default=1_000_000)
+    command.add_argument("--lines", type=int, default=100_000)
+    command.set_defaults(run=lambda args: bench_sku_catalog(args.skus, args.lines))
+
+    command = benchmarks.add_parser("demand-forecast", help="demand forecast over a synthetic history")
+    command.add_argument("--skus", type=int, default=100_000)
+    command.add_argument("--days", type=int, default=84)
+    command.add_argument("--events", type=int, default=20, help="demand events per SKU")
+    command.set_defaults(run=lambda args: bench_demand_forecast(args.skus, args.days, args.events))
+
+    command = benchmarks.add_parser("report-export", help="streaming CSV and XLSX export")
+    command.add_argument("--rows", type=int, default=1_000_000)
+    command.set_defaults(run=lambda args: bench_report_export(args.rows))
+
+    command = benchmarks.add_parser("change-log", help="writing and reading back the change log")
+    command.add_argument("--changes", type=int, default=200_000)
+    command.add_argument("--segment-kib", type=int, default=1024)
+    command.set_defaults(run=lambda args: bench_change_log(args.changes, args.segment_kib))
+
+    command = benchmarks.add_parser("server-throughput", help="requests per second against the model server")
+    command.add_argument("--host", default="127.0.0.1")
+    command.add_argument("--port", type=int, default=8765)
+    command.add_argument("--clients", type=int, default=8)
+    command.add_argument("--requests", type=int, default=500)
+    command.add_argument("--spawn-server", action="store_true", help="start a server in this process first")
+    command.set_defaults(run=lambda args: bench_server(args.host, args.port, args.clients, args.requests, args.spawn_server))
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = build_parser().parse_args()
+    arguments.run(arguments)
@@ -0,0 +1,328 @@
+"""
+**cli.py - Command-line entry point**
+
+**Purpose**
+- Works with the inventory and orders without the GUI: search inventory, validate an
+  order file, list pending orders and print reports.
+- Imports only the model layer (and the model client when CONTRACTOR_PLUS_SERVER is set),
+  never PyQt6, so a command starts in well under 100 ms.
+- ``selfcheck`` verifies that no model module pulls in PyQt6 and that startup stays within
+  its time budget.
+
+**Usage**
+- ``python src/cli.py search "qty<5 price>=20"``
+- ``python src/cli.py validate order.txt``
+- ``python src/cli.py pending``
+- ``python src/cli.py on-order DRL-0008``
+- ``python src/cli.py changes --after 1200 --follow``
+- ``python src/cli.py report stock --output stock.xlsx``
+- ``python src/cli.py selfcheck``
+"""
+import argparse
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_BUDGET_MS = 100  # A command (interpreter start included) must finish within this
+
+
+def open_client():
+    """Returns a ModelClient for CONTRACTOR_PLUS_SERVER, or None to use the local data."""
+    if not os.environ.get("CONTRACTOR_PLUS_SERVER"):
+        return None  # Skip importing the HTTP client entirely
+    from remote.model_client import client_from_environment
+
+    return client_from_environment(watch=False)
+
+
+def open_orders(client):
+    """Returns the work orders, from the shared server or the local journal."""
+    if client:
+        return client.get_orders()
+    from model.order_journal import OrderJournal, load_order_manager
+
+    journal = OrderJournal()
+    try:
+        return load_order_manager(journal).get_orders()
+    finally:
+        journal.close()
+
+
+def open_material_orders(client):
+    """Returns the material orders, including those placed, from the shared server or the local journal."""
+    from model.incoming_orders import load_placed_orders, merge_orders, orders
+
+    if client:
+        merge_orders(client.get_material_orders())
+    else:
+        load_placed_orders()
+    return orders
+
+
+def print_rows(rows):
+    """Prints inventory rows as an aligned table."""
+    from model.money import format_money
+
+    for name, description, sku, price, quantity in rows:
+        print(f"{sku:<10} {name[:20]:<20} {description[:32]:<32} {format_money(price):>10} {quantity:>6}")
+
+
+def command_search(args, client):
+    if client:
+        rows = client.search_inventory(args.query)
+    else:
+        from model.inventory import search_inventory_positions
+        from model.inventory_snapshot import load_inventory
+
+        inventory = load_inventory()
+        rows = [inventory[position] for position in search_inventory_positions(args.query, inventory)]
+    print_rows(rows[:args.limit])
+    shown = f", showing {args.limit}" if len(rows) > args.limit else ""
+    print(f"{len(rows)} matching items{shown}")
+    return 0
+
+
+def command_validate(args, client):
+    from model.sku_order import order_summary, read_order_file, validate_entries
+
+    try:
+        entries, line_errors = read_order_file(args.path)
+    except OSError as error:
+        print(f"cannot read {args.path}: {error.strerror}", file=sys.stderr)
+        return 2
+    errors, valid_entries = validate_entries(entries, client)
+    for message in line_errors + errors:
+        print(message)
+    if valid_entries:
+        print(order_summary(valid_entries))
+    print(f"{len(valid_entries)} valid lines, {len(line_errors) + len(errors)} problems")
+    return 1 if line_errors or errors else 0
+
+
+def command_pending(args, client):
+    from model.money import format_money
+
+    orders = [order for order in open_orders(client) if order.status == "Pending"]
+    print(f"Pending work orders ({len(orders)})")
+    for order in orders:
+        print(f"  {order.order_id:<8} {order.date}  {order.shipping_type:<10} {format_money(order.price):>10}")
+
+    material = [order for order in open_material_orders(client) if order["status"] == "Pending"]
+    print(f"Pending material orders ({len(material)})")
+    for order in material:
+        print(f"  {order['id']:<8} arrives {order['arrival']}  {order['items']} items")
+    return 0
+
+
+def command_on_order(args, client):
+    from model.inventory_data import inventory_data
+    from model.money import format_money
+    from model.order_lines import load_order_lines
+
+    store = load_order_lines(open_material_orders(client), inventory_data)
+    sku = args.sku.upper()
+    lines = store.lines_with(sku, args.status)
+    for order_id, quantity, unit_price in lines:
+        print(f"  {order_id:<8} {store.status(order_id):<10} {quantity:>6} x {format_money(unit_price):>10}")
+    print(f"{len(store.orders_with(sku, args.status))} material orders include {sku}; "
+          f"{store.committed(sku)} units on order (not yet delivered)")
+    return 0
+
+
+def command_changes(args, client):
+    import json
+    import time
+
+    from model.change_log import ChangeReader, ChangesPruned
+
+    reader = ChangeReader(args.after)
+    printed = 0
+    try:
+        while True:
+            for change in reader.changes():
+                print(json.dumps(change), flush=args.follow)
+                printed += 1
+                if args.limit and printed >= args.limit:
+                    return 0
+            if not args.follow:
+                return 0
+            time.sleep(args.poll)
+    except ChangesPruned as error:
+        print(f"{error}; start again from {error.first_available - 1}", file=sys.stderr)
+        return 3
+    except KeyboardInterrupt:
+        print(f"stopped after sequence {reader.position}", file=sys.stderr)
+        return 0
+
+
+def export_report(path, header, rows):
+    """Writes the full report rows to a .csv or .xlsx file."""
+    from model.report_export import export_rows
+
+    count = export_rows(path, header, rows)
+    print(f"Exported {count} rows to {path}")
+
+
+def report_stock(args, client):
+    from model.inventory import stock_value, stock_value_by_category
+    from model.inventory_data import inventory_data
+    from model.money import format_money
+
+    for category, value in stock_value_by_category(inventory_data).items():
+        print(f"{category:<20} {format_money(value, grouped=True):>14}")
+    out_of_stock = sum(1 for row in inventory_data if row[4] == 0)
+    print(f"{'Total':<20} {format_money(stock_value(inventory_data), grouped=True):>14}"
+          f"  ({len(inventory_data)} SKUs, {out_of_stock} out of stock)")
+    if args.output:
+        from model.report_export import INVENTORY_HEADER, inventory_report_rows
+
+        export_report(args.output, INVENTORY_HEADER, inventory_report_rows(inventory_data, range(len(inventory_data))))
+
+
+def report_orders(args, client):
+    from model.money import format_money
+    from model.order import totals_by_status
+
+    orders = open_orders(client)
+    counts = {}
+    for order in orders:
+        counts[order.status] = counts.get(order.status, 0) + 1
+    for status, total in totals_by_status(orders).items():
+        print(f"{status:<12} {counts[status]:>5} orders {format_money(total, grouped=True):>14}")
+    if args.output:
+        from model.report_export import ORDER_HEADER, order_report_rows
+
+        export_report(args.output, ORDER_HEADER, order_report_rows(orders))
+
+
+def report_locations(args, client):
+    from model.inventory_data import inventory_data
+    from model.inventory_locations import load_location_stock
+
+    stock = load_location_stock(inventory_data)
+    for location in stock.locations:
+        low = stock.low_stock_at(location)
+        print(f"{location} carries {len(stock.skus_at(location))} SKUs, {len(low)} low")
+        for sku, quantity in low:
+            print(f"  {sku:<10} {quantity:>4} here, {stock.total(sku) - quantity:>4} elsewhere")
+    if args.output:
+        rows = ([location, sku, quantity, stock.total(sku)]
+                for location in stock.locations for sku, quantity in stock.low_stock_at(location))
+        export_report(args.output, ["Location", "SKU", "Quantity Here", "Total On Hand"], rows)
+
+
+REPORTS = {"stock": report_stock, "orders": report_orders, "locations": report_locations}
+
+
+def command_report(args, client):
+    REPORTS[args.kind](args, client)
+    return 0
+
+
+# Modules checked by selfcheck: every model module, and the model client the CLI may use
+SELFCHECK_PACKAGES = ["model", "remote"]
+
+
+def command_selfcheck(args, client):
+    import subprocess
+    import time
+
+    failures = 0
+    probe = (
+        "import sys; sys.path.insert(0, {src!r}); import {module}; "
+        "print(','.join(sorted(name for name in sys.modules if name.split('.')[0] == 'PyQt6')))"
+    )
+    for package in SELFCHECK_PACKAGES:
+        for filename in sorted(os.listdir(os.path.join(SRC_DIR, package))):
+            if not filename.endswith(".py") or filename == "__init__.py":
+                continue
+            module = f"{package}.{filename[:-3]}"
+            result = subprocess.run(
+                [sys.executable, "-c", probe.format(src=SRC_DIR, module=module)],
+                capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                failures += 1
+                print(f"FAIL {module}: import failed\n{result.stderr.strip()}")
+            elif result.stdout.strip():
+                failures += 1
+                print(f"FAIL {module} imports {result.stdout.strip()}")
+            else:
+                print(f"ok   {module} is Qt-free")
+
+    # Startup: the fastest of a few runs of a real command, interpreter start included
+    environment = dict(os.environ)
+    environment.pop("CONTRACTOR_PLUS_SERVER", None)  # Time the local path
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "search", "HAM-", "--limit", "1"],
+            capture_output=True, text=True, env=environment,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            print(f"FAIL cli search exited with {result.returncode}\n{result.stderr.strip()}")
+            return 1
+    fastest = min(timings)
+    status = "ok  " if fastest < args.budget_ms else "FAIL"
+    failures += fastest >= args.budget_ms
+    print(f"{status} cli search starts and finishes in {fastest:.0f} ms (budget {args.budget_ms} ms)")
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Contractor Plus from the command line")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="search inventory (same query syntax as the Inventory window)")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=50, help="most rows to print")
+    search.set_defaults(run=command_search)
+
+    validate = commands.add_parser("validate", help="validate an order file of 'SKU quantity' lines")
+    validate.add_argument("path")
+    validate.set_defaults(run=command_validate)
+
+    pending = commands.add_parser("pending", help="list pending work orders and material orders")
+    pending.set_defaults(run=command_pending)
+
+    on_order = commands.add_parser("on-order", help="list the material orders that include a SKU")
+    on_order.add_argument("sku")
+    on_order.add_argument("--status", help='only orders in this status, e.g. "Pending"')
+    on_order.set_defaults(run=command_on_order)
+
+    changes = commands.add_parser("changes", help="print logged changes as JSON lines, for reporting tools")
+    changes.add_argument("--after", type=int, default=0, help="last sequence number already seen")
+    changes.add_argument("--follow", action="store_true", help="keep waiting for new changes")
+    changes.add_argument("--limit", type=int, default=0, help="stop after this many changes")
+    changes.add_argument("--poll", type=float, default=0.5, help="seconds between checks with --follow")
+    changes.set_defaults(run=command_changes)
+
+    report = commands.add_parser("report", help="print a stock, order or location report")
+    report.add_argument("kind", choices=list(REPORTS))
+    report.add_argument("--output", help="also export the full list to a .csv or .xlsx file")
+    report.set_defaults(run=command_report)
+
+    selfcheck = commands.add_parser("selfcheck", help="check model imports are Qt-free and startup is fast")
+    selfcheck.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    selfcheck.add_argument("--runs", type=int, default=5)
+    selfcheck.set_defaults(run=command_selfcheck)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    client = open_client() if args.command != "selfcheck" else None
+    try:
+        return args.run(args, client)
+    except ConnectionError as error:  # The shared server stopped answering (ServerUnavailable)
+        print(error, file=sys.stderr)
+        return 2
+    finally:
+        if client:
+            client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
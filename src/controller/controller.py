@@ -1,10 +1,55 @@
-from PyQt6.QtWidgets import QApplication
+import time
+from typing import Optional
+
+from PyQt6.QtWidgets import QApplication, QMessageBox
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 from view.inventory_window import InventoryWindow
 from view.main_window import MainWindow
 from view.order_window import OrderWindow
 from view.inventory_order_window import InventoryOrderWindow
-from model.sku_order import handle_order_submission
+from view.view_lifecycle import NavigationTrace, close_view
+from view.order_submission import handle_order_submission
+from model.order_journal import OrderJournal, load_order_manager
+from model.demand_forecast import ConsumptionHistory, DemandForecaster
+from model.inventory_data import inventory_data
+from model.inventory_locations import load_location_stock
+from model.incoming_orders import load_placed_orders, merge_orders, orders as incoming_orders
+from model.arrival_scheduler import ArrivalScheduler
+from model.order_ids import OrderIdAllocator, highest_number
+from model.order_lines import load_order_lines
+from model.change_log import ChangeLog, ChangeCapture
+from model.data_refresher import DataRefresher, JournalTailSource, LocationStockSource, ServerEventSource, refresh_interval_ms
+from remote.model_client import RemoteOrderManager, ServerUnavailable, client_from_environment
+
+
+def load_order_store(model_client):
+    """
+    Opens the order store: the shared server's orders when there is a client, otherwise the
+    journal-backed local orders. Returns (journal, order_manager). Safe to run on a worker thread.
+    """
+    if model_client:
+        manager = RemoteOrderManager(model_client)
+        manager.get_orders()  # Warms the client's read cache for the dashboard
+        return None, manager  # The server journals status changes
+    journal = OrderJournal()  # Durable log of order status changes
+    return journal, load_order_manager(journal)  # Persisted orders plus replayed changes
+
+
+def load_demand_forecast():
+    """
+    Reads the stock consumption in the change log and fits the forecast once.
+    Returns (history, forecaster). Safe to run on a worker thread.
+    """
+    history = ConsumptionHistory()
+    history.catch_up()
+    forecaster = DemandForecaster(history)
+    forecaster.targets()  # Fit now so the first suggestion is a cache hit
+    return history, forecaster
+
+
+class RefreshSignals(QObject):
+    fetched = pyqtSignal(list)  # (order, old_status) pairs fetched on a worker thread
 
 
 class Controller:
@@ -18,37 +63,153 @@ class Controller:
     - Routes user actions (like button clicks) to the appropriate view logic.
     - Instantiates and displays different views: MainWindow, OrderWindow, InventoryWindow, and InventoryOrderWindow.
     - Handles coordination between the views and the backend logic (model layer).
+    - Owns the shared OrderManager and its status journal so every window sees the same orders.
     
     """
-    def __init__(self) -> None:
-        """Initialize the Controller."""
-        self.home_view: MainWindow
-        self.order_view: OrderWindow
-        self.search_view: InventoryOrderWindow
-        self.inventory_view: InventoryWindow 
+    def __init__(self, model_client=None, preloaded=None) -> None:
+        """
+        Initialize the Controller.
+
+        Args:
+            model_client: Client for the shared model server, or None to use CONTRACTOR_PLUS_SERVER.
+            preloaded: Results of the login window's background preload ("orders", "demand");
+                anything missing is loaded here instead.
+        """
+        # One live window per kind; opening a kind again replaces (and tears down) the old one
+        self.home_view: Optional[MainWindow] = None
+        self.order_view: Optional[OrderWindow] = None
+        self.search_view: Optional[InventoryOrderWindow] = None
+        self.inventory_view: Optional[InventoryWindow] = None
+        self.navigation_trace = NavigationTrace()  # Live widget and memory report per navigation, in debug mode
+
+        self.current_user: str = "unknown"  # Set by the login window after a successful login
+
+        preloaded = preloaded or {}
+
+        # With CONTRACTOR_PLUS_SERVER set, the shared model server owns the data instead of this process
+        self.model_client = model_client or client_from_environment()
+        self.journal, self.order_manager = preloaded.get("orders") or load_order_store(self.model_client)
+        self.reported_outages = 0
+        if self.model_client:
+            self.order_manager.error_listeners.append(self.show_server_error)  # Server went away mid-session
+
+        # Stock consumption history and the forecast that suggests reorder quantities from it
+        self.demand_history, self.demand_forecaster = preloaded.get("demand") or load_demand_forecast()
+
+        # Quantities per yard and truck; their totals stay mirrored in inventory_data
+        self.location_stock = load_location_stock(inventory_data)
+
+        # Material orders placed in earlier runs or on other desktops: the shared server's, or the local journal's
+        if self.model_client:
+            try:
+                merge_orders(self.model_client.get_material_orders())
+            except ServerUnavailable:
+                pass  # Only the seed shipments for now; the order views report the outage
+        else:
+            load_placed_orders()
+
+        # New material order IDs; the existing orders are only scanned on the very first run
+        self.order_ids = OrderIdAllocator(seed=lambda: highest_number(order["id"] for order in incoming_orders))
+
+        # Shipped material orders are received into inventory when their arrival date comes
+        self.arrival_scheduler = ArrivalScheduler(incoming_orders)
+        self.arrival_timer = QTimer()
+        self.arrival_timer.setSingleShot(True)
+        self.arrival_timer.timeout.connect(self.receive_arrivals)
+        self.arm_arrival_timer()
+
+        # Material order lines indexed by order and by SKU (what is on order, and where)
+        self.order_lines = load_order_lines(incoming_orders, inventory_data)
+        self.arrival_scheduler.listeners.append(self.order_lines.on_shipment_received)
+
+        # Every inventory and order change, for accounting and reporting tools to tail (a shared server logs its own)
+        self.change_log = None
+        if not self.model_client:
+            self.change_log = ChangeLog()
+            ChangeCapture(self.change_log, inventory_data).attach(self.order_manager, self.arrival_scheduler, self.location_stock)
+
+        # Pick up order and stock changes made by other desktops (shared journal or shared server, shared stock file)
+        self.refresher = DataRefresher()
+        if self.model_client:
+            server_events = ServerEventSource(self.model_client)  # Fetches on a worker thread...
+            self.refresh_signals = RefreshSignals()
+            self.refresh_signals.fetched.connect(self.refresher.deliver)  # ...delivered on the GUI thread (queued)
+            server_events.listeners.append(self.refresh_signals.fetched.emit)
+            self.refresher.add_source(server_events)
+        else:
+            self.refresher.add_source(JournalTailSource(self.journal, self.order_manager))
+        self.refresher.add_source(LocationStockSource(self.location_stock.file))
+        self.refresh_timer = QTimer()
+        self.refresh_timer.timeout.connect(self.refresher.tick)
+        if refresh_interval_ms():
+            self.refresh_timer.start(refresh_interval_ms())
+
+    def show_server_error(self, message: str) -> None:
+        """
+        Tell the user the shared model server is not answering, once per outage (shown after
+        the current slot returns, so it never opens inside a model or paint callback).
+        """
+        if self.model_client.outages <= self.reported_outages:
+            return  # Already told about this outage
+        self.reported_outages = self.model_client.outages
+        QTimer.singleShot(0, lambda: QMessageBox.warning(
+            QApplication.activeWindow(), "Server Unavailable",
+            f"{message}\n\nShowing the last data received. Changes are not saved until the server is back.",
+        ))
+
+    def arm_arrival_timer(self) -> None:
+        """Sleep until the next scheduled arrival (re-checking at least hourly)."""
+        next_due = self.arrival_scheduler.next_due()
+        if next_due is None:
+            return  # Nothing in transit
+        delay = min(max(next_due - time.time(), 0), 3600)
+        self.arrival_timer.start(int(delay * 1000))
+
+    def receive_arrivals(self) -> None:
+        """Receive every shipment that is due, then wait for the next one."""
+        self.arrival_scheduler.receive_due()
+        self.arm_arrival_timer()
+
+    def show_view(self, name: str, view_class):
+        """
+        Open a new view in the attribute called name, closing and deleting the window it replaces
+        and removing that window's model callbacks.
+        """
+        old_view = getattr(self, name)
+        if old_view is not None:
+            setattr(self, name, None)
+            close_view(old_view)
+        view = view_class(self)
+        setattr(self, name, view)
+        view.show()
+        if self.navigation_trace.enabled:
+            QTimer.singleShot(0, lambda: self.navigation_trace.record(name))  # After the old window is deleted
+        return view
 
     def open_home(self) -> None:
         """Open the main/home window."""
-        self.home_view = MainWindow(self)
-        self.home_view.show()
+        self.show_view("home_view", MainWindow)
 
     def open_order(self) -> None:
         """Open the outgoing orders window."""
-        self.order_view = OrderWindow(self)
-        self.order_view.show()
+        self.show_view("order_view", OrderWindow)
 
     def open_search(self) -> None:
         """Open the inventory ordering/search window."""
-        self.search_view = InventoryOrderWindow(self)
-        self.search_view.show()
+        self.show_view("search_view", InventoryOrderWindow)
 
     def open_inventory(self) -> None:
         """Open the inventory view window."""
-        self.inventory_view = InventoryWindow(self)
-        self.inventory_view.show()
+        self.show_view("inventory_view", InventoryWindow)
 
     def exit_app(self) -> None:
         """Quit the application."""
+        if self.journal:
+            self.journal.close()  # Commit any status changes still waiting for a group commit
+        if self.change_log:
+            self.change_log.close()
+        if self.model_client:
+            self.model_client.close()
         QApplication.quit()
 
     def clear_search(self) -> None:
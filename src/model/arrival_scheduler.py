@@ -0,0 +1,98 @@
+"""
+**arrival_scheduler.py - Receives incoming shipments into inventory when they arrive**
+
+**Purpose**
+- Keeps shipped incoming orders in a min-heap keyed by arrival time, so the next arrival
+  is always at the top and nothing has to scan the whole list.
+- receive_due() marks every due shipment Delivered and adds its lines to stock in one
+  atomic inventory change; the caller only needs to wake up at next_due().
+- Remembers which shipments were received (under the data directory), so a shipment is
+  never received into stock a second time after a restart, or by a second desktop sharing
+  the directory: receiving happens under an inter-process lock, after re-reading the file.
+- Has no Qt dependency; the controller drives it with a single-shot timer.
+"""
+import heapq
+import itertools
+import json
+import time
+
+from model.inventory_data import receive_quantities
+from model.order_history import date_to_timestamp
+from model.storage import atomic_write, data_path, lock_file, unlock_file
+
+RECEIVED_NAME = "received_shipments.json"
+
+
+class ArrivalScheduler:
+    def __init__(self, shipments, path=None):
+        """
+        Schedules every "Shipped" shipment (dicts like those in incoming_orders.orders).
+        Shipments received in an earlier run (recorded in path, by default in the data
+        directory) are marked Delivered, with the date they arrived, instead.
+        """
+        self.path = path or data_path(RECEIVED_NAME)
+        self._heap = []  # (arrival timestamp, sequence, shipment)
+        self._sequence = itertools.count()  # Tie-breaker so shipments never get compared
+        self.listeners = []  # Callbacks (shipment, missing_skus) run after a shipment is received
+        self.received = self._load_received()  # Shipment ID -> arrival date, for every shipment received
+        for shipment in shipments:
+            if shipment["id"] in self.received:
+                shipment["status"] = "Delivered"
+                shipment["arrival"] = self.received[shipment["id"]]
+            elif shipment["status"] == "Shipped":
+                self.schedule(shipment)
+
+    def _load_received(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return dict(json.load(file)["received"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}  # First run, or an unreadable file
+
+    def schedule(self, shipment):
+        """Adds a shipment to the heap at its arrival date."""
+        heapq.heappush(self._heap, (date_to_timestamp(shipment["arrival"]), next(self._sequence), shipment))
+
+    def next_due(self):
+        """Returns the timestamp of the next arrival, or None if nothing is scheduled."""
+        return self._heap[0][0] if self._heap else None
+
+    def receive_due(self, now=None):
+        """
+        Receives every shipment whose arrival time has passed. Returns the received shipments.
+        Shipments another desktop already received are marked Delivered without touching stock.
+        """
+        now = time.time() if now is None else now
+        if not self._heap or self._heap[0][0] > now:
+            return []  # Nothing due: no need to take the lock
+        received = []
+        with open(self.path + ".lock", "a+b") as lock:
+            lock_file(lock)  # Desktops sharing the data directory receive one at a time
+            try:
+                self.received.update(self._load_received())  # Including what others received since we last looked
+                while self._heap and self._heap[0][0] <= now:
+                    _arrival, _sequence, shipment = heapq.heappop(self._heap)
+                    if shipment["status"] != "Shipped":
+                        continue  # Changed by someone else since it was scheduled
+                    if shipment["id"] in self.received:
+                        shipment["status"] = "Delivered"  # Another desktop received it into the shared stock
+                        shipment["arrival"] = self.received[shipment["id"]]
+                        continue
+                    missing = receive_quantities(shipment.get("lines", []))
+                    shipment["status"] = "Delivered"
+                    self.received[shipment["id"]] = shipment["arrival"]
+                    received.append(shipment)
+                    for listener in self.listeners:
+                        listener(shipment, missing)
+                if received:
+                    self._save_received()  # Before the lock is released, so the next desktop sees them
+            finally:
+                unlock_file(lock)
+        return received
+
+    def _save_received(self):
+        """Records the received shipments so a restart does not receive them again."""
+        try:
+            atomic_write(self.path, json.dumps({"received": self.received}).encode("utf-8"))
+        except OSError:
+            pass  # Read-only data directory; the stock is still received for this session
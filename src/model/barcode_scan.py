@@ -0,0 +1,114 @@
+"""
+**barcode_scan.py - Telling barcode scans apart from typing**
+
+**Purpose**
+- USB barcode scanners "type" a whole SKU plus Enter within a few milliseconds; people
+  need well over 30 ms per key. ScanDetector buffers keys and only accepts a buffer as a
+  scan when every key, and the Enter, arrived within max_gap_ms of the one before.
+- Repeated scans of the same SKU are coalesced into one quantity, and a batch of scans is
+  validated in one pass against the SKU index (format, then existence).
+- Has no Qt dependency: key streams are plain (timestamp_ms, text) pairs, so scan input
+  can be generated and replayed offscreen (see tests/test_scan_replay.py).
+"""
+import random
+
+from model.order_entries import SKU_PATTERN
+from model.sku_index import sku_index_for
+
+SCAN_MAX_GAP_MS = 30  # Scanners send keys every few ms; anything slower was typed
+SCAN_MIN_LENGTH = 4  # Shorter bursts are key bounce or shortcuts, not barcodes
+TERMINATORS = ("\r", "\n")  # The Enter a scanner sends after each barcode
+
+
+class ScanDetector:
+    def __init__(self, max_gap_ms=SCAN_MAX_GAP_MS, min_length=SCAN_MIN_LENGTH):
+        """
+        Creates a detector. Feed it every key with its timestamp in milliseconds.
+        """
+        self.max_gap_ms = max_gap_ms
+        self.min_length = min_length
+        self._buffer = []  # Keys of the burst in progress
+        self._last_time = None  # Timestamp of the previous key
+        self.scans = 0  # Scans accepted so far
+        self.ignored_keys = 0  # Keys dropped as typing (too slow, or too short a burst)
+
+    def feed(self, text, timestamp):
+        """
+        Adds one key (its text, "\\r" for Enter). Returns the scanned code, upper-cased,
+        when the key completes a scan; otherwise None.
+        """
+        in_burst = self._last_time is not None and timestamp - self._last_time <= self.max_gap_ms
+        self._last_time = timestamp
+
+        if text in TERMINATORS:
+            code = "".join(self._buffer).strip().upper()
+            self._buffer = []
+            if in_burst and len(code) >= self.min_length:
+                self.scans += 1
+                return code
+            self.ignored_keys += len(code) + 1
+            return None
+
+        if self._buffer and not in_burst:
+            self.ignored_keys += len(self._buffer)  # Typed by hand; start over from this key
+            self._buffer = []
+        self._buffer.append(text)
+        return None
+
+
+def replay(events, detector=None):
+    """Feeds (timestamp_ms, text) key events to a detector and returns the scanned codes."""
+    detector = detector or ScanDetector()
+    scans = []
+    for timestamp, text in events:
+        code = detector.feed(text, timestamp)
+        if code:
+            scans.append(code)
+    return scans
+
+
+def scan_events(codes, start_ms=0, key_gap_ms=4, scan_gap_ms=600, jitter_ms=0, seed=265):
+    """
+    Returns (timestamp_ms, text) events for a scanner reading each code followed by Enter:
+    key_gap_ms between keys (plus up to jitter_ms) and scan_gap_ms between barcodes.
+    """
+    rng = random.Random(seed)
+    events = []
+    now = start_ms
+    for code in codes:
+        for text in list(code) + ["\r"]:
+            events.append((now, text))
+            now += key_gap_ms + (rng.uniform(0, jitter_ms) if jitter_ms else 0)
+        now += scan_gap_ms
+    return events
+
+
+def typed_events(text, start_ms=0, key_gap_ms=180):
+    """Returns (timestamp_ms, text) events for a person typing the text (newlines as Enter)."""
+    return [(start_ms + number * key_gap_ms, "\r" if key == "\n" else key) for number, key in enumerate(text)]
+
+
+def coalesce_scans(codes):
+    """Returns (code, count) pairs, one per distinct code, in the order first scanned."""
+    counts = {}
+    for code in codes:
+        counts[code] = counts.get(code, 0) + 1
+    return list(counts.items())
+
+
+def validate_scans(counts, rows):
+    """
+    Validates coalesced (code, count) pairs against the inventory rows in one pass and returns
+    order form lines [sku, quantity text, error].
+    """
+    index = sku_index_for(rows)
+    lines = []
+    for code, count in counts:
+        if not SKU_PATTERN.fullmatch(code):
+            error = f"Scanned '{code}' is not a valid SKU (expected ABC-1234)"
+        elif code not in index:
+            error = f"Scanned '{code}' is not in the inventory"
+        else:
+            error = ""
+        lines.append([code, str(count), error])
+    return lines
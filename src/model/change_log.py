@@ -0,0 +1,313 @@
+"""
+**change_log.py - Change-data-capture log of every inventory and order change**
+
+**Purpose**
+- Appends one JSON line per model change to a log that accounting and reporting tools
+  can tail, instead of re-reading all the data. Every record carries a sequence number
+  that only ever increases, a timestamp and a type:
+
+  - ``inventory.added``          sku, name, description, price, quantity
+  - ``inventory.changed``        sku, price, quantity, old_price, old_quantity
+  - ``order.added``              order_id, date, shipping_type, price, status
+  - ``order.status``             order_id, from, to, user
+  - ``material_order.added``     order_id, lines, arrival, status, plus user when placed in the app
+  - ``material_order.status``    order_id, status
+
+  Prices are integer cents, as everywhere in the model.
+- The log is split into segment files named after their first sequence number, so a reader
+  resuming from sequence N opens the right file straight away. Full segments are removed
+  once the log is over its size limit or older than its age limit.
+- Several desktops sharing a data directory append under an inter-process file lock, so
+  sequence numbers stay unique and in order.
+- Records are flushed to the operating system as they are written and synced when a segment
+  is closed; the order journal, not this log, is what makes status changes durable.
+
+**Usage**
+- ``for change in read_changes(after=last_seen): ...`` streams changes, one line in memory
+  at a time. ``ChangeReader`` keeps its place between calls for tailing.
+- ``python src/cli.py changes --after 0 --follow`` tails the log from the command line.
+- ``python bench/benchmarks.py change-log`` benchmarks writing and reading back 200k changes.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+
+from model.incoming_orders import incoming_order_listeners
+from model.inventory_data import inventory_listeners
+from model.storage import data_path, lock_file, unlock_file
+
+CHANGE_LOG_NAME = "changes"  # Directory inside the data directory
+SEGMENT_PREFIX = "changes-"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_BYTES = 4 * 1024 * 1024  # Start a new segment once the current one reaches this size
+MAX_LOG_BYTES = 256 * 1024 * 1024  # Remove the oldest segments beyond this total size...
+MAX_AGE_DAYS = 90  # ...or once they are older than this
+SEQ_START = len(b'{"seq":')  # Every line starts with its sequence number
+
+
+class ChangesPruned(Exception):
+    """The changes a reader asked for have already been removed from the log."""
+
+    def __init__(self, after, first_available):
+        super().__init__(f"changes after {after} are no longer in the log (the oldest kept is {first_available})")
+        self.after = after
+        self.first_available = first_available
+
+
+def segment_paths(directory):
+    """Returns (first sequence number, path) of every segment in the directory, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = []
+    for name in names:
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            number = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            if number.isdigit():
+                segments.append((int(number), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def _segment_path(directory, first_sequence):
+    return os.path.join(directory, f"{SEGMENT_PREFIX}{first_sequence:012d}{SEGMENT_SUFFIX}")
+
+
+def _complete_length(path):
+    """
+    Returns (length of the file up to its last complete line, sequence number on that line).
+    The sequence is None for an empty segment.
+    """
+    with open(path, "rb") as file:
+        size = file.seek(0, os.SEEK_END)
+        chunk = 4096
+        while True:
+            start = max(0, size - chunk)
+            file.seek(start)
+            tail = file.read(size - start)
+            end = tail.rfind(b"\n")  # End of the last complete line
+            if end >= 0:
+                begin = tail.rfind(b"\n", 0, end) + 1
+                if begin > 0 or start == 0:
+                    return start + end + 1, json.loads(tail[begin:end])["seq"]
+            if start == 0:
+                return 0, None  # No complete line at all
+            chunk *= 4
+
+
+class ChangeLog:
+    def __init__(self, directory=None, segment_bytes=SEGMENT_BYTES, max_bytes=MAX_LOG_BYTES, max_age_days=MAX_AGE_DAYS):
+        """
+        Opens (or creates) the change log in directory, by default data/changes.
+        """
+        self.directory = directory or data_path(CHANGE_LOG_NAME)
+        os.makedirs(self.directory, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+        self._lock = threading.Lock()  # One thread of this process appends at a time
+        self._lock_file = open(os.path.join(self.directory, "changes.lock"), "a+b")  # ...and one process
+        self._file = None  # Current segment, opened for appending
+        self._size = 0  # Bytes in the current segment, as far as this process knows
+        self.last_sequence = 0
+        self._closed = False
+        atexit.register(self.close)  # Sync the last segment on a normal exit
+
+    def append(self, kind, **fields):
+        """Appends one change record and returns its sequence number."""
+        with self._lock:
+            if self._closed:
+                raise ValueError("change log is closed")
+            lock_file(self._lock_file)
+            try:
+                self._catch_up()
+                sequence = self.last_sequence + 1
+                line = json.dumps({"seq": sequence, "ts": time.time(), "type": kind, **fields},
+                                  separators=(",", ":")).encode("utf-8") + b"\n"
+                if self._file is None or self._size >= self.segment_bytes:
+                    self._roll(sequence)
+                self._file.write(line)
+                self._file.flush()  # Visible to readers in other processes right away
+                self._size += len(line)
+                self.last_sequence = sequence
+            finally:
+                unlock_file(self._lock_file)
+        return sequence
+
+    def _catch_up(self):
+        """
+        Brings this process up to date with the log on disk, which another process may have
+        appended to or rolled over since our last write. Caller holds both locks.
+        """
+        if self._file is not None and os.fstat(self._file.fileno()).st_size == self._size < self.segment_bytes:
+            return  # Nobody else has written; the common case costs one fstat
+        segments = segment_paths(self.directory)
+        if not segments:
+            self._close_segment()
+            return
+        first, path = segments[-1]
+        length, sequence = _complete_length(path)
+        if self._file is None or self._file.name != path:
+            self._close_segment()
+            self._file = open(path, "ab")
+        if os.fstat(self._file.fileno()).st_size != length:
+            self._file.truncate(length)  # Drop a line torn by a crash mid-write
+        self._size = length
+        self.last_sequence = sequence if sequence is not None else first - 1
+
+    def _roll(self, first_sequence):
+        """Closes the current segment and starts a new one. Caller holds both locks."""
+        self._close_segment()
+        self._file = open(_segment_path(self.directory, first_sequence), "ab")
+        self._size = 0
+        self.prune()
+
+    def _close_segment(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def prune(self, now=None):
+        """
+        Removes the oldest segments while the log is over max_bytes or they are older than
+        max_age_days. The newest segment is always kept. Returns the number removed.
+        """
+        now = time.time() if now is None else now
+        segments = segment_paths(self.directory)[:-1]  # Never the segment being written
+        sizes = {}
+        for _first, path in segments:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        total = sum(sizes.values()) + self._size
+        removed = 0
+        for _first, path in segments:
+            if path not in sizes:
+                continue
+            too_old = now - os.path.getmtime(path) > self.max_age_days * 86400
+            if total <= self.max_bytes and not too_old:
+                break  # Segments are oldest first; the rest are newer and within the limits
+            try:
+                os.remove(path)
+            except OSError:
+                break  # Still open somewhere (Windows); try again on the next roll
+            total -= sizes[path]
+            removed += 1
+        return removed
+
+    def close(self):
+        """Syncs and closes the current segment. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._close_segment()
+            self._lock_file.close()
+
+
+class ChangeReader:
+    def __init__(self, after=0, directory=None):
+        """
+        Reads changes with sequence numbers above after. position is the last sequence number
+        delivered, so a tool can save it and resume from it later.
+        """
+        self.directory = directory or data_path(CHANGE_LOG_NAME)
+        self.position = after
+        self._first = None  # First sequence number of the segment being read
+        self._path = None
+        self._offset = 0  # Bytes of that segment already read
+
+    def _locate(self, segments):
+        """Picks the segment holding the change after position."""
+        firsts = [first for first, _path in segments]
+        if firsts[0] > self.position + 1:
+            raise ChangesPruned(self.position, firsts[0])
+        self._first, self._path = segments[bisect_right(firsts, self.position + 1) - 1]
+        self._offset = 0
+
+    def changes(self):
+        """
+        Yields every change currently in the log after position, oldest first, and stops at the
+        end; call again later to get newer changes. Raises ChangesPruned if retention already
+        removed changes that were never read.
+        """
+        segments = segment_paths(self.directory)
+        if not segments:
+            return
+        if self._path is None or not os.path.exists(self._path):
+            self._locate(segments)
+
+        while True:
+            with open(self._path, "rb") as file:
+                file.seek(self._offset)
+                for raw in file:
+                    if not raw.endswith(b"\n"):
+                        break  # Still being written; pick it up next time
+                    self._offset += len(raw)
+                    if int(raw[SEQ_START:raw.index(b",")]) <= self.position:
+                        continue  # Already delivered; skip it without decoding
+                    change = json.loads(raw)
+                    self.position = change["seq"]
+                    yield change
+            later = [segment for segment in segment_paths(self.directory) if segment[0] > self._first]
+            if not later:
+                return
+            self._first, self._path = later[0]
+            self._offset = 0
+
+
+def read_changes(after=0, directory=None):
+    """Yields the changes after the given sequence number that are in the log now."""
+    return ChangeReader(after, directory).changes()
+
+
+class ChangeCapture:
+    '''
+    Listens to the model and appends every change to a ChangeLog.
+    '''
+    def __init__(self, log, rows):
+        self.log = log
+        self.rows = rows  # inventory_data
+        self.location_stock = None  # Whose reloads of other desktops' stock are not logged again
+
+    def attach(self, order_manager=None, arrival_scheduler=None, location_stock=None):
+        """Starts capturing inventory changes, material orders and (if given) work order changes."""
+        self.location_stock = location_stock
+        inventory_listeners.append(self.on_inventory_changed)
+        incoming_order_listeners.append(self.on_material_order_added)
+        if order_manager is not None:
+            order_manager.listeners.append(self.on_status_change)
+            order_manager.added_listeners.append(self.on_order_added)
+        if arrival_scheduler is not None:
+            arrival_scheduler.listeners.append(self.on_shipment_received)
+
+    def on_inventory_changed(self, position, old_row):
+        if self.location_stock is not None and self.location_stock.applying_saved:
+            return  # Another desktop's change, already in the log it shares with this one
+        name, description, sku, price, quantity = self.rows[position]
+        if old_row is None:
+            self.log.append("inventory.added", sku=sku, name=name, description=description, price=price, quantity=quantity)
+        else:
+            self.log.append("inventory.changed", sku=sku, price=price, quantity=quantity,
+                            old_price=old_row[3], old_quantity=old_row[4])
+
+    def on_order_added(self, order):
+        self.log.append("order.added", order_id=order.order_id, date=order.date, shipping_type=order.shipping_type,
+                        price=order.price, status=order.status)
+
+    def on_status_change(self, order, old_status, new_status, user, timestamp):
+        self.log.append("order.status", order_id=order.order_id, user=user, **{"from": old_status, "to": new_status})
+
+    def on_material_order_added(self, shipment):
+        placed_by = {"user": shipment["user"]} if "user" in shipment else {}  # Seed shipments have no user
+        self.log.append("material_order.added", order_id=shipment["id"], arrival=shipment["arrival"],
+                        status=shipment["status"], lines=shipment["lines"], **placed_by)
+
+    def on_shipment_received(self, shipment, missing):
+        self.log.append("material_order.status", order_id=shipment["id"], status=shipment["status"])
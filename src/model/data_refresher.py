@@ -0,0 +1,183 @@
+"""
+**data_refresher.py - Periodic refresh of data changed outside this window**
+
+**Purpose**
+- Other desktops change orders too: through the same data directory (their status changes
+  land in the shared journal) or through the shared model server. They also move stock
+  between locations, and the quantities they save reach the shared location stock file.
+- On every tick each source compares a cheap stamp (a file's size and mtime, or the
+  server version the client already tracks); only when it moved does the source fetch the
+  changed rows, apply them to the model and hand them to the listeners (the open views).
+  Stock changes reach the views through the inventory and location stock listeners instead.
+- The server is never called on the ticking (GUI) thread: changed orders are fetched on a
+  worker thread and delivered to the listeners once they arrive (see deliver()).
+- With nothing changed a tick is one stat() call or one integer comparison.
+
+**Usage**
+- The controller ticks it on a timer; ``CONTRACTOR_PLUS_REFRESH_MS`` sets the interval
+  (default 2000, 0 turns refreshing off).
+"""
+import os
+import threading
+from collections import deque
+
+DEFAULT_INTERVAL_MS = 2000
+
+
+def refresh_interval_ms():
+    """Returns the configured refresh interval in milliseconds (0 means disabled)."""
+    try:
+        return max(0, int(os.environ.get("CONTRACTOR_PLUS_REFRESH_MS", DEFAULT_INTERVAL_MS)))
+    except ValueError:
+        return DEFAULT_INTERVAL_MS
+
+
+class JournalTailSource:
+    def __init__(self, journal, manager):
+        """
+        Follows the order status journal for changes written by other processes.
+        Reading continues where the journal's replay stopped; everything before it is already loaded.
+        """
+        self.journal = journal
+        self.manager = manager
+        self.last_stamp = self.stamp()
+
+    def stamp(self):
+        """Size and modification time of the journal: changes whenever anyone appends or compacts."""
+        try:
+            status = os.stat(self.journal.path)
+        except OSError:
+            return None
+        return status.st_size, status.st_mtime_ns
+
+    def fetch_changes(self):
+        """
+        Applies the journal lines added since the last fetch to the manager (under the journal's
+        lock; a compaction by another desktop is noticed from the journal's generation).
+        Returns (order, old_status) for every order whose status actually changed.
+        """
+        return self.journal.catch_up(self.manager)
+
+
+class LocationStockSource:
+    def __init__(self, stock_file):
+        """
+        Follows the location stock file (a LocationStockFile) for quantities other desktops saved.
+        """
+        self.stock_file = stock_file
+        self.last_stamp = stock_file.stamp()
+
+    def stamp(self):
+        return self.stock_file.stamp()
+
+    def fetch_changes(self):
+        """
+        Applies the saved quantities that changed to the store. Returns no order changes: the
+        store's listeners (and the inventory listeners of the rows it mirrors into) update the views.
+        """
+        self.stock_file.reload()
+        return []
+
+
+class ServerEventSource:
+    def __init__(self, client):
+        """
+        Follows the shared model server. The client's watcher thread already long-polls for
+        changes; this collects the changed order IDs it reports.
+        """
+        self.client = client
+        self.listeners = []  # Callbacks (changes) run on the fetch thread with the orders it fetched
+        self._changed = deque()  # Order IDs reported by the watcher thread, not yet fetched
+        self._received = 0  # Number of pushes from the watcher; the stamp
+        self._fetching = False  # True while a fetch thread is running
+        self._lock = threading.Lock()
+        client.listeners.append(self._on_server_changes)
+        self.last_stamp = self.stamp()
+
+    def _on_server_changes(self, version, changes):
+        """ModelClient listener (watcher thread)."""
+        with self._lock:
+            self._changed.extend(key for _version, kind, key in changes if kind == "order")
+            self._received += 1
+
+    def stamp(self):
+        """Counts the server's change pushes, so a tick only has to compare one integer."""
+        return self._received
+
+    def fetch_changes(self):
+        """
+        Starts fetching each changed order once on a background thread and returns no changes
+        now; the listeners get the (order, None) pairs (the old status is unknown) when they
+        arrive. A fetch already running also fetches the orders reported since it started.
+        """
+        with self._lock:
+            if self._fetching:
+                return []
+            self._fetching = True
+        threading.Thread(target=self._fetch, name="server-events", daemon=True).start()
+        return []
+
+    def _fetch(self):
+        changes = []
+        try:
+            while True:
+                with self._lock:
+                    order_ids = list(dict.fromkeys(self._changed))  # De-duplicated, in order
+                    self._changed.clear()
+                    if not order_ids:
+                        self._fetching = False  # With the lock held, so no reported ID is left behind
+                        break
+                for number, order_id in enumerate(order_ids):
+                    try:
+                        order, _status = self.client.get_order(order_id)
+                    except ConnectionError:  # ServerUnavailable
+                        with self._lock:  # Try the rest again on the next tick
+                            self._changed.extendleft(reversed(order_ids[number:]))
+                            self._received += 1
+                            self._fetching = False
+                        return
+                    changes.append((order, None))
+        except BaseException:
+            with self._lock:
+                self._fetching = False
+            raise
+        finally:
+            if changes:
+                for listener in self.listeners:
+                    listener(changes)
+
+
+class DataRefresher:
+    def __init__(self):
+        """
+        Holds the refresh sources and the listeners that apply their changes to open views.
+        """
+        self.sources = []
+        self.listeners = []  # Callbacks (changes) with a list of (order, old_status) pairs
+
+    def add_source(self, source):
+        self.sources.append(source)
+
+    def tick(self):
+        """
+        Checks every source's stamp and fetches from the ones that moved.
+        Returns the number of changed rows passed to the listeners.
+        """
+        changes = []
+        for source in self.sources:
+            stamp = source.stamp()
+            if stamp == source.last_stamp:
+                continue  # Nothing new: the common case, a stat() or an integer comparison
+            source.last_stamp = stamp
+            changes.extend(source.fetch_changes())
+        self.deliver(changes)
+        return len(changes)
+
+    def deliver(self, changes):
+        """
+        Passes changed rows to the listeners. Sources fetching in the background hand their
+        results here on the thread that ticks (the controller queues them onto the GUI thread).
+        """
+        if changes:
+            for listener in self.listeners:
+                listener(changes)
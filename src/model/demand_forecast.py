@@ -0,0 +1,200 @@
+"""
+**demand_forecast.py - Per-SKU demand forecasts and suggested reorder quantities**
+
+**Purpose**
+- Builds a daily demand series for every SKU from stock consumption and fits exponential
+  smoothing with weekly seasonal factors, for all SKUs at once as NumPy matrix operations
+  (one vector step per day, never a Python loop per SKU).
+- Turns the forecast into a recommended order quantity per SKU: expected demand over the
+  supplier lead time, plus safety stock for the chosen service level, less what is on hand
+  and already on order.
+- Forecasts are cached until the history changes (new consumption is read).
+
+**History providers**
+- Any object with ``version`` (changes whenever events are added), ``skus`` (SKU per code)
+  and ``demand_arrays()`` returning NumPy arrays ``(codes, days, quantities)``.
+- DemandHistory below is the in-memory provider; ``python bench/benchmarks.py demand-forecast``
+  benchmarks a 100k-SKU forecast.
+- ConsumptionHistory fills one from the change log (see change_log.py): every quantity
+  decrease of an inventory row is demand on the day it happened. Material orders and
+  receipts are never demand, so placing a suggested reorder cannot raise the next suggestion.
+  The log lives in the data directory, so the history survives restarts and includes the
+  consumption of every desktop (or model server) sharing that directory.
+"""
+import math
+import time
+from array import array
+
+import numpy as np
+
+from model.change_log import ChangeReader, ChangesPruned
+
+SECONDS_PER_DAY = 86400
+
+
+def day_number(timestamp=None):
+    """Returns the day number (days since the epoch) of a timestamp, default now."""
+    return int((time.time() if timestamp is None else timestamp) // SECONDS_PER_DAY)
+
+
+class DemandHistory:
+    def __init__(self):
+        """
+        Creates an empty history of (SKU, day, quantity) demand events, stored in compact arrays.
+        """
+        self.sku_ids = {}  # SKU -> integer code
+        self.skus = []  # Integer code -> SKU
+        self._codes = array("l")
+        self._days = array("l")
+        self._quantities = array("d")
+        self.version = 0  # Bumped whenever events are added
+
+    def record(self, sku, quantity, day=None):
+        """Adds one demand event for a SKU (today unless a day number is given)."""
+        code = self.sku_ids.get(sku)
+        if code is None:
+            code = self.sku_ids[sku] = len(self.skus)
+            self.skus.append(sku)
+        self._codes.append(code)
+        self._days.append(day_number() if day is None else day)
+        self._quantities.append(quantity)
+        self.version += 1
+
+    def demand_arrays(self):
+        """Returns the events as NumPy arrays (codes, days, quantities), without copying."""
+        return (
+            np.frombuffer(self._codes, dtype="l"),  # array("l") and NumPy "l" are both C long
+            np.frombuffer(self._days, dtype="l"),
+            np.frombuffer(self._quantities, dtype=np.float64),
+        )
+
+
+class ConsumptionHistory(DemandHistory):
+    def __init__(self, directory=None):
+        """
+        Creates a demand history read from the change log in directory (by default the data
+        directory's). Nothing is read until catch_up() is called.
+        """
+        super().__init__()
+        self.reader = ChangeReader(directory=directory)
+
+    def catch_up(self):
+        """
+        Records the stock consumed since the last call: each inventory.changed record whose
+        quantity went down. Returns the number of demand events added.
+        """
+        added = 0
+        while True:
+            try:
+                for change in self.reader.changes():
+                    if change["type"] != "inventory.changed":
+                        continue
+                    used = change["old_quantity"] - change["quantity"]
+                    if used > 0:
+                        self.record(change["sku"], used, day_number(change["ts"]))
+                        added += 1
+                return added
+            except ChangesPruned as error:
+                self.reader.position = error.first_available - 1  # Older segments expired: start from the oldest kept
+
+
+def demand_matrix(history, window_days, end_day):
+    """
+    Returns a (SKUs x window_days) matrix of daily demand for the days ending at end_day,
+    summing every event in one vectorized pass.
+    """
+    codes, days, quantities = history.demand_arrays()
+    offsets = days - (end_day - window_days + 1)
+    keep = (offsets >= 0) & (offsets < window_days)
+    flat = codes[keep] * window_days + offsets[keep]
+    sums = np.bincount(flat, weights=quantities[keep], minlength=len(history.skus) * window_days)
+    return sums.reshape(len(history.skus), window_days)
+
+
+def fit_seasonal_smoothing(demand, first_weekday, alpha=0.2, gamma=0.1):
+    """
+    Fits exponential smoothing with multiplicative weekly seasonal factors to every row of the
+    demand matrix at once. first_weekday is the weekday (0 = Monday) of the first column.
+    Returns (level, seasonal, sigma): the final level per SKU, a (SKUs x 7) matrix of weekday
+    factors indexed by weekday, and the standard deviation of the one-step forecast errors.
+    """
+    skus, window = demand.shape
+    weeks = max(1, window // 7)
+
+    # Start from the average day and each weekday's share of the first weeks
+    start = demand[:, :weeks * 7]
+    level = start.mean(axis=1)
+    by_weekday = start.reshape(skus, weeks, 7).mean(axis=1) if window >= 7 else np.ones((skus, 7))
+    seasonal = np.divide(by_weekday, level[:, None], out=np.ones((skus, 7)), where=level[:, None] > 0)
+    seasonal = np.roll(seasonal, first_weekday, axis=1)  # Column k now holds weekday k
+    seasonal = np.maximum(seasonal, 0.1)  # Keep quiet days from collapsing to a zero factor
+
+    squared_error = np.zeros(skus)
+    for t in range(window):
+        weekday = (first_weekday + t) % 7
+        factor = seasonal[:, weekday]
+        actual = demand[:, t]
+        squared_error += (actual - level * factor) ** 2
+        level = alpha * (actual / factor) + (1 - alpha) * level
+        ratio = np.divide(actual, level, out=factor.copy(), where=level > 0)
+        seasonal[:, weekday] = np.maximum(gamma * ratio + (1 - gamma) * factor, 0.1)
+
+    sigma = np.sqrt(squared_error / window)
+    return level, seasonal, sigma
+
+
+class DemandForecaster:
+    def __init__(self, history, lead_time_days=7, service_z=1.65, window_days=84, alpha=0.2, gamma=0.1):
+        """
+        Forecasts demand from a history provider. service_z is the safety-stock factor
+        (1.65 covers about 95% of lead-time demand).
+        """
+        self.history = history
+        self.lead_time_days = lead_time_days
+        self.service_z = service_z
+        self.window_days = window_days
+        self.alpha = alpha
+        self.gamma = gamma
+        self._cache = None  # (history version, end day, lead time) -> per-code targets
+
+    def targets(self, lead_time_days=None):
+        """
+        Returns the stock target per history SKU code: forecast demand over the lead time plus
+        safety stock. Cached until the history changes or the day rolls over.
+        """
+        lead = self.lead_time_days if lead_time_days is None else lead_time_days
+        end_day = day_number()
+        key = (self.history.version, end_day, lead)
+        if self._cache is not None and self._cache[0] == key:
+            return self._cache[1]
+
+        demand = demand_matrix(self.history, self.window_days, end_day)
+        first_weekday = (end_day - self.window_days + 1 + 3) % 7  # Day 0 was a Thursday
+        level, seasonal, sigma = fit_seasonal_smoothing(demand, first_weekday, self.alpha, self.gamma)
+
+        upcoming = (end_day + 1 + np.arange(lead) + 3) % 7  # Weekdays of the lead-time days
+        forecast = level * seasonal[:, upcoming].sum(axis=1)
+        targets = forecast + self.service_z * sigma * math.sqrt(lead)
+        self._cache = (key, targets)
+        return targets
+
+    def recommendations(self, rows, lead_time_days=None, on_order=None):
+        """
+        Returns (sku, quantity) suggestions, in row order, for every inventory row whose
+        on-hand quantity is below its stock target. on_order, if given, returns the units of
+        a SKU already ordered (e.g. OrderLineStore.committed); they count as on hand.
+        """
+        if not self.history.skus or not len(rows):
+            return []
+        targets = self.targets(lead_time_days)
+        sku_ids = self.history.sku_ids
+        codes = np.fromiter((sku_ids.get(row[2], -1) for row in rows), dtype=np.int_, count=len(rows))
+        on_hand = np.fromiter((row[4] for row in rows), dtype=np.float64, count=len(rows))
+        if on_order is not None:
+            on_hand += np.fromiter((on_order(row[2]) for row in rows), dtype=np.float64, count=len(rows))
+
+        known = codes >= 0
+        shortfall = np.zeros(len(rows))
+        shortfall[known] = targets[codes[known]] - on_hand[known]
+        quantities = np.ceil(np.maximum(shortfall, 0)).astype(np.int64)
+        return [(rows[position][2], int(quantities[position])) for position in np.flatnonzero(quantities)]
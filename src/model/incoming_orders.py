@@ -1,13 +1,118 @@
+"""
+**incoming_orders.py - Material orders and their shipments**
+
+**Purpose**
+- Holds the material orders in one list: the seed shipments plus every order placed since.
+- Placed orders are appended to a journal under the data directory (one JSON line each,
+  under an inter-process lock), so they survive a restart and every desktop sharing the
+  directory, or the shared model server, loads the same orders.
+"""
+import datetime
+import json
+import os
+
+from model.storage import data_path, lock_file, unlock_file
+
+PLACED_ORDERS_NAME = "placed_orders.jsonl"
+
+
+def _days_from_today(days):
+    """Returns the ISO date the given number of days from today (negative for past dates)."""
+    return (datetime.date.today() + datetime.timedelta(days=days)).isoformat()
+
+
 # ===Order data held in a list===
+# Seed arrivals are relative to today: delivered shipments arrived in the past and shipped ones
+# are still on their way, so starting the app never receives the same seed shipment again
+# Each shipment lists its (SKU, quantity) lines; "items" is the number of lines
 orders = [
-            {"id": "ORD-001", "arrival": "2025-05-01", "status": "Pending", "items": 3},
-            {"id": "ORD-002", "arrival": "2025-05-04", "status": "Shipped", "items": 7},
-            {"id": "ORD-003", "arrival": "2025-05-10", "status": "Delivered", "items": 5},
-            {"id": "ORD-004", "arrival": "2025-05-12", "status": "Pending", "items": 2},
-            {"id": "ORD-005", "arrival": "2025-05-15", "status": "Shipped", "items": 9},
-            {"id": "ORD-006", "arrival": "2025-05-17", "status": "Delivered", "items": 6},
-            {"id": "ORD-007", "arrival": "2025-05-18", "status": "Pending", "items": 4},
-            {"id": "ORD-008", "arrival": "2025-05-20", "status": "Shipped", "items": 1},
-            {"id": "ORD-009", "arrival": "2025-05-22", "status": "Delivered", "items": 8},
-            {"id": "ORD-010", "arrival": "2025-05-25", "status": "Pending", "items": 3},
-        ]
\ No newline at end of file
+            {"id": "ORD-001", "arrival": _days_from_today(9), "status": "Pending", "items": 3, "lines": [("CRD-0042", 40), ("KNF-0020", 5), ("WBR-0051", 5)]},
+            {"id": "ORD-002", "arrival": _days_from_today(1), "status": "Shipped", "items": 7, "lines": [("PVC-0069", 5), ("PLR-0013", 5), ("BRH-0047", 20), ("RAK-0075", 20), ("DRL-0008", 5), ("STF-0065", 10), ("CLP-0028", 5)]},
+            {"id": "ORD-003", "arrival": _days_from_today(-10), "status": "Delivered", "items": 5, "lines": [("PWR-0071", 10), ("BLT-0055", 40), ("DRL-0008", 40), ("SHV-0073", 25), ("TPM-0016", 5)]},
+            {"id": "ORD-004", "arrival": _days_from_today(11), "status": "Pending", "items": 2, "lines": [("PCK-0074", 20), ("RAK-0075", 5)]},
+            {"id": "ORD-005", "arrival": _days_from_today(3), "status": "Shipped", "items": 9, "lines": [("CLP-0029", 25), ("SDR-0006", 12), ("TRW-0072", 25), ("LVL-0018", 50), ("MSK-0038", 40), ("SCR-0054", 10), ("LVL-0019", 5), ("CPR-0070", 25), ("TPM-0016", 25)]},
+            {"id": "ORD-006", "arrival": _days_from_today(-5), "status": "Delivered", "items": 6, "lines": [("RTS-0082", 5), ("SND-0025", 25), ("BRH-0048", 5), ("PLR-0013", 25), ("PWR-0071", 10), ("INS-0092", 20)]},
+            {"id": "ORD-007", "arrival": _days_from_today(13), "status": "Pending", "items": 4, "lines": [("FCP-0088", 12), ("PVC-0069", 20), ("BLT-0055", 25), ("LBL-0100", 20)]},
+            {"id": "ORD-008", "arrival": _days_from_today(5), "status": "Shipped", "items": 1, "lines": [("BRH-0047", 12)]},
+            {"id": "ORD-009", "arrival": _days_from_today(-2), "status": "Delivered", "items": 8, "lines": [("GLV-0032", 20), ("SAW-0024", 12), ("LMB-0090", 40), ("LBL-0100", 20), ("WRN-0011", 12), ("PCK-0074", 25), ("TLB-0039", 5), ("BLD-0068", 5)]},
+            {"id": "ORD-010", "arrival": _days_from_today(16), "status": "Pending", "items": 3, "lines": [("WKL-0066", 50), ("SCR-0054", 12), ("SAW-0022", 10)]},
+        ]
+
+incoming_order_listeners = []  # Callbacks (order) run after a new material order is added
+
+LEAD_TIME_DAYS = 7  # Expected days from placing a material order to its arrival
+
+
+def add_incoming_order(order_id, entries, placed=None, user=None, record=True, path=None):
+    """
+    Adds a newly placed material order as a Pending shipment and returns it.
+    The order is recorded in the placed orders journal unless record is False (a desktop
+    using the shared server, which records the orders it places itself).
+    """
+    placed = placed or datetime.date.today()
+    order = {
+        "id": order_id,
+        "arrival": (placed + datetime.timedelta(days=LEAD_TIME_DAYS)).isoformat(),
+        "status": "Pending",
+        "items": len(entries),
+        "lines": [tuple(entry) for entry in entries],
+    }
+    if user is not None:
+        order["user"] = user
+    if record:
+        _record_order(order, path or data_path(PLACED_ORDERS_NAME))
+    orders.append(order)
+    for listener in incoming_order_listeners:
+        listener(order)
+    return order
+
+
+def _record_order(order, path):
+    """Appends one order to the journal; desktops placing orders at once write one at a time."""
+    with open(path + ".lock", "a+b") as lock:
+        lock_file(lock)
+        try:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(order) + "\n")
+                file.flush()
+                os.fsync(file.fileno())  # Placed is placed, even if the app crashes right after
+        finally:
+            unlock_file(lock)
+
+
+def load_placed_orders(path=None):
+    """
+    Adds the orders recorded in the placed orders journal (by this desktop in an earlier run,
+    or by another desktop or the server sharing the data directory) to orders.
+    Returns the orders added.
+    """
+    try:
+        with open(path or data_path(PLACED_ORDERS_NAME), "r", encoding="utf-8") as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        return []  # Nothing placed yet
+    recorded = []
+    for line in lines:
+        try:
+            recorded.append(json.loads(line))
+        except ValueError:
+            continue  # A line cut short by a crash mid-write; that order was never confirmed
+    return merge_orders(recorded)
+
+
+def merge_orders(shipments):
+    """
+    Adds the shipments (dicts like those in orders, e.g. as read back from JSON) whose IDs are
+    not in orders yet. Returns the shipments added. Listeners are not called: these orders
+    were placed before this desktop started.
+    """
+    known = {order["id"] for order in orders}
+    added = []
+    for shipment in shipments:
+        if shipment["id"] in known:
+            continue
+        order = dict(shipment, lines=[tuple(line) for line in shipment["lines"]])
+        orders.append(order)
+        known.add(order["id"])
+        added.append(order)
+    return added
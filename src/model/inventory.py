@@ -1,13 +1,74 @@
+import model.inventory_data as inventory_model
+from model.money import cents_array, group_codes, grouped_totals, valuation
+from model.parallel_search import sharded_search_for
+from model.search_cache import cached_positions, inventory_search_cache
+
+
+def inventory_rows_version(rows):
+    """
+    Returns the data version of a row sequence for search caching: inventory_version for the
+    live inventory list, the checksum for an (immutable) snapshot, or None if unknown.
+    """
+    if rows is inventory_model.inventory_data:
+        return inventory_model.inventory_version
+    return getattr(rows, "checksum", None)
+
+
+def search_inventory_positions(query, inventory_data):
+    """
+    Returns the positions of the items matching the query, in their original order.
+    Cached per data version; large snapshot-backed catalogs are searched in parallel shards
+    when CONTRACTOR_PLUS_SEARCH_SHARDS is set.
+    """
+    sharded = sharded_search_for(inventory_data)
+    with inventory_model.inventory_read_lock(inventory_data):  # Version and rows stay in step
+        return cached_positions(
+            inventory_search_cache, "inventory", query, inventory_data, inventory_rows_version(inventory_data),
+            search=sharded.search_positions if sharded else None,
+        )
 
 
 def search_inventory(query, inventory_data):
     """
     Searches the inventory data for items that match the query. The search is case-insensitive.
+    Plain text matches any field; field clauses such as "sku:HAM- qty<5 price>=20" filter on typed columns.
+    Results are cached per data version, so a repeated search does not rescan the rows.
+    """
+    with inventory_model.inventory_read_lock(inventory_data):
+        positions = search_inventory_positions(query, inventory_data)
+
+        # Return the matching items in their original order
+        return [inventory_data[position] for position in positions]
+
+
+def price_quantity_columns(inventory_data):
+    """
+    Returns (price cents, quantities) of every row as int64 arrays.
+    Snapshots provide them straight from the file; live rows are read in one pass.
+    """
+    if hasattr(inventory_data, "numeric_columns"):
+        return inventory_data.numeric_columns()
+    with inventory_model.inventory_read_lock(inventory_data):  # Prices and quantities from the same moment
+        count = len(inventory_data)
+        return (
+            cents_array((row[3] for row in inventory_data), count),
+            cents_array((row[4] for row in inventory_data), count),
+        )
+
+
+def stock_value(inventory_data):
+    """
+    Returns the exact value of the stock on hand (price x quantity over every row), in cents.
+    """
+    return valuation(*price_quantity_columns(inventory_data))
+
+
+def stock_value_by_category(inventory_data):
+    """
+    Returns {category: stock value in cents}, in first-seen category order.
     """
-    query = query.lower()  # Convert the search query to lowercase for case-insensitive comparison
-    
-    # Return a list of items where any field in the item contains the query string
-    return [
-        item for item in inventory_data  # Loop through each item in the inventory data
-        if any(query in str(field).lower() for field in item)  # Check if the query exists in any field (case-insensitive)
-    ]
+    with inventory_model.inventory_read_lock(inventory_data):
+        prices, quantities = price_quantity_columns(inventory_data)
+        names, codes = group_codes(row[0] for row in inventory_data)
+    totals = grouped_totals(codes, prices * quantities, len(names))
+    return dict(zip(names, totals.tolist()))
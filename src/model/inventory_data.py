@@ -1,128 +1,220 @@
+import threading
+from contextlib import nullcontext
+
+from model.rw_lock import ReadWriteLock
+from model.sku_index import sku_index_for
+
 
 # ===Inventory Data held in a list===
+# Each row is [name, description, sku, price in cents, quantity]
 inventory_data = [
-                ["Hammer", "16oz claw hammer", "HAM-0001", 14.99, 25],
-                ["Hammer", "20oz framing hammer", "HAM-0002", 19.99, 0],
-                ["Hammer", "Sledgehammer 10lb", "HAM-0003", 32.50, 7],
-                ["Screwdriver", "Flathead 4-inch", "SDR-0004", 4.25, 50],
-                ["Screwdriver", "Phillips 3-inch", "SDR-0005", 4.50, 42],
-                ["Screwdriver", "Precision set (6pc)", "SDR-0006", 9.75, 12],
-                ["Drill", "Cordless 18V drill", "DRL-0007", 59.99, 15],
-                ["Drill", "Corded drill 500W", "DRL-0008", 39.99, 5],
-                ["Drill", "Drill bit set (20pc)", "DRL-0009", 14.95, 0],
-                ["Wrench", "Adjustable wrench 8-inch", "WRN-0010", 7.99, 34],
-                ["Wrench", "Socket set (24pc)", "WRN-0011", 27.50, 13],
-                ["Wrench", "Torque wrench", "WRN-0012", 45.00, 6],
-                ["Pliers", "Needle nose", "PLR-0013", 6.75, 17],
-                ["Pliers", "Slip joint", "PLR-0014", 6.95, 28],
-                ["Pliers", "Linesman", "PLR-0015", 8.25, 11],
-                ["Tape Measure", "25ft locking", "TPM-0016", 5.99, 100],
-                ["Tape Measure", "100ft open reel", "TPM-0017", 15.99, 7],
-                ["Level", "24-inch spirit level", "LVL-0018", 12.99, 10],
-                ["Level", "Laser level kit", "LVL-0019", 49.99, 3],
-                ["Utility Knife", "Retractable", "KNF-0020", 4.99, 60],
-                ["Utility Knife", "Folding pocket knife", "KNF-0021", 6.25, 0],
-                ["Saw", "Hand saw 15-inch", "SAW-0022", 9.99, 19],
-                ["Saw", "Hacksaw", "SAW-0023", 7.99, 23],
-                ["Saw", "Circular saw 7.25-inch", "SAW-0024", 89.99, 4],
-                ["Sander", "Orbital sander", "SND-0025", 39.99, 6],
-                ["Sander", "Belt sander", "SND-0026", 44.99, 2],
-                ["Clamp", "C-clamp 4-inch", "CLP-0027", 3.25, 30],
-                ["Clamp", "Bar clamp 12-inch", "CLP-0028", 7.50, 14],
-                ["Clamp", "Spring clamp", "CLP-0029", 1.75, 40],
-                ["Gloves", "Nitrile work gloves", "GLV-0030", 1.50, 200],
-                ["Gloves", "Leather palm gloves", "GLV-0031", 3.25, 120],
-                ["Gloves", "Cut-resistant gloves", "GLV-0032", 6.75, 0],
-                ["Goggles", "Safety goggles", "GOG-0033", 4.50, 36],
-                ["Goggles", "Anti-fog wraparound", "GOG-0034", 6.25, 28],
-                ["Helmet", "Hard hat - white", "HMT-0035", 11.95, 20],
-                ["Helmet", "Hard hat - yellow", "HMT-0036", 11.95, 15],
-                ["Mask", "Dust mask (box of 20)", "MSK-0037", 14.99, 18],
-                    ["Mask", "Respirator w/ filters", "MSK-0038", 24.99, 4],
-                    ["Toolbox", "Plastic toolbox 16-inch", "TLB-0039", 12.95, 16],
-                    ["Toolbox", "Metal toolbox 20-inch", "TLB-0040", 28.99, 0],
-                    ["Cord", "50ft extension cord", "CRD-0041", 19.99, 8],
-                    ["Cord", "100ft extension cord", "CRD-0042", 34.50, 0],
-                    ["Flashlight", "LED rechargeable", "FLS-0043", 16.95, 11],
-                    ["Flashlight", "Mini pocket light", "FLS-0044", 6.50, 29],
-                    ["Chisel", "Wood chisel set (4pc)", "CHS-0045", 15.25, 10],
-                    ["Chisel", "Cold chisel 8-inch", "CHS-0046", 5.99, 13],
-                    ["Brush", "Wire brush", "BRH-0047", 2.25, 33],
-                    ["Brush", "Paint brush 2-inch", "BRH-0048", 1.99, 48],
-                    ["Ladder", "6ft fiberglass ladder", "LDR-0049", 79.99, 5],
-                    ["Ladder", "10ft aluminum ladder", "LDR-0050", 119.99, 2],
-                    ["Wheelbarrow", "6 cu ft steel", "WBR-0051", 89.99, 4],
-                    ["Concrete", "Quick-mix 80lb bag", "CNM-0052", 6.50, 92],
-                    ["Nails", "3-inch framing nails (5lb)", "NAL-0053", 7.99, 35],
-                    ["Screws", "1.25in wood screws (box)", "SCR-0054", 5.25, 60],
-                    ["Bolts", "3/8\" hex bolts (box)", "BLT-0055", 8.95, 45],
-                    ["Tarps", "10x12 waterproof tarp", "TRP-0056", 9.99, 9],
-                    ["Paint", "Interior flat white (gal)", "PNT-0057", 17.99, 26],
-                    ["Paint", "Exterior weatherproof (gal)", "PNT-0058", 22.50, 14],
-                    ["Paint Roller", "9-inch roller set", "PNR-0059", 7.95, 22],
-                    ["Paint Tray", "Plastic tray", "PNY-0060", 2.75, 30],
-                    ["Caulk", "Silicone white", "CLK-0061", 3.50, 80],
-                    ["Caulk Gun", "Dripless", "CLG-0062", 6.99, 18],
-                    ["Putty Knife", "Flexible 3-inch", "PTK-0063", 2.25, 27],
-                    ["Measuring Wheel", "Distance measuring wheel", "MWL-0064", 49.99, 3],
-                    ["Stud Finder", "Electronic stud finder", "STF-0065", 21.99, 6],
-                    ["Work Light", "Tripod LED light", "WKL-0066", 34.99, 4],
-                    ["Angle Grinder", "4.5\" angle grinder", "ANG-0067", 42.95, 8],
-                    ["Circular Saw Blade", "7.25\" 24T", "BLD-0068", 9.25, 16],
-                    ["PVC Pipe", "1\" x 10ft", "PVC-0069", 6.99, 42],
-                    ["Copper Pipe", "3/4\" x 10ft", "CPR-0070", 22.00, 0],
-                    ["Pipe Wrench", "14-inch", "PWR-0071", 18.50, 12],
-                    ["Trowel", "Masonry trowel", "TRW-0072", 5.75, 20],
-                    ["Shovel", "Round point", "SHV-0073", 14.99, 9],
-                    ["Pickaxe", "36\" handle", "PCK-0074", 24.95, 3],
-                    ["Rake", "24-tine leaf rake", "RAK-0075", 8.95, 10],
-                    ["Wheel", "Replacement wheel 10\"", "WHL-0076", 11.50, 6],
-                    ["Fuel Can", "5-gallon red", "FLC-0077", 17.99, 4],
-                    ["Toolbelt", "Leather 11-pocket", "TLB-0078", 29.99, 15],
-                    ["Hose", "Contractor garden hose 50ft", "HSE-0079", 21.95, 0],
-                    ["Hose Nozzle", "Adjustable spray", "HSN-0080", 3.95, 24],
-                    ["Tarp Clips", "Heavy duty clips (4)", "TPC-0081", 5.99, 13],
-                    ["Ratcheting Straps", "2\" x 27ft (2 pack)", "RTS-0082", 18.50, 7],
-                    ["Plastic Sheeting", "6 mil 10x25ft", "PLS-0083", 14.75, 5],
-                    ["Bucket", "5-gallon heavy-duty", "BKT-0084", 3.50, 88],
-                    ["Work Shirt", "Hi-vis long sleeve", "WKS-0085", 15.99, 20],
-                    ["Ear Protection", "Over-ear muffs", "EPR-0086", 8.99, 17],
-                    ["Knee Pads", "Foam padded", "KNP-0087", 9.50, 11],
-                    ["Fence Post", "Steel 6ft", "FCP-0088", 7.25, 0],
-                    ["Rebar", "1/2\" x 10ft", "RBR-0089", 6.50, 39],
-                    ["Lumber", "2x4x8 SPF stud", "LMB-0090", 3.85, 94],
-                    ["Drywall", "1/2\" x 4x8 sheet", "DRW-0091", 13.50, 40],
-                    ["Insulation", "R-13 Kraft roll", "INS-0092", 34.99, 8],
-                    ["Roofing Nails", "1.25in coil (7200ct)", "RFN-0093", 21.99, 26],
-                    ["PVC Cement", "8oz blue", "PVC-0094", 4.99, 0],
-                    ["Paint Masker", "Tape + film tool", "PMK-0095", 12.75, 10],
-                    ["Wire Spool", "14/2 Romex 50ft", "WIR-0096", 36.50, 6],
-                    ["Breaker", "15 amp single pole", "BRK-0097", 5.99, 17],
-                    ["Outlet Box", "PVC 1-gang", "OTB-0098", 1.45, 60],
-                    ["Switch", "Single pole toggle", "SWT-0099", 1.25, 80],
-                    ["Light Bulb", "LED A19 60W equivalent", "LBL-0100", 1.99, 50],
-                    ["Extension Ladder", "24ft aluminum", "LAD-0101", 179.00, 0],
+                ["Hammer", "16oz claw hammer", "HAM-0001", 1499, 25],
+                ["Hammer", "20oz framing hammer", "HAM-0002", 1999, 0],
+                ["Hammer", "Sledgehammer 10lb", "HAM-0003", 3250, 7],
+                ["Screwdriver", "Flathead 4-inch", "SDR-0004", 425, 50],
+                ["Screwdriver", "Phillips 3-inch", "SDR-0005", 450, 42],
+                ["Screwdriver", "Precision set (6pc)", "SDR-0006", 975, 12],
+                ["Drill", "Cordless 18V drill", "DRL-0007", 5999, 15],
+                ["Drill", "Corded drill 500W", "DRL-0008", 3999, 5],
+                ["Drill", "Drill bit set (20pc)", "DRL-0009", 1495, 0],
+                ["Wrench", "Adjustable wrench 8-inch", "WRN-0010", 799, 34],
+                ["Wrench", "Socket set (24pc)", "WRN-0011", 2750, 13],
+                ["Wrench", "Torque wrench", "WRN-0012", 4500, 6],
+                ["Pliers", "Needle nose", "PLR-0013", 675, 17],
+                ["Pliers", "Slip joint", "PLR-0014", 695, 28],
+                ["Pliers", "Linesman", "PLR-0015", 825, 11],
+                ["Tape Measure", "25ft locking", "TPM-0016", 599, 100],
+                ["Tape Measure", "100ft open reel", "TPM-0017", 1599, 7],
+                ["Level", "24-inch spirit level", "LVL-0018", 1299, 10],
+                ["Level", "Laser level kit", "LVL-0019", 4999, 3],
+                ["Utility Knife", "Retractable", "KNF-0020", 499, 60],
+                ["Utility Knife", "Folding pocket knife", "KNF-0021", 625, 0],
+                ["Saw", "Hand saw 15-inch", "SAW-0022", 999, 19],
+                ["Saw", "Hacksaw", "SAW-0023", 799, 23],
+                ["Saw", "Circular saw 7.25-inch", "SAW-0024", 8999, 4],
+                ["Sander", "Orbital sander", "SND-0025", 3999, 6],
+                ["Sander", "Belt sander", "SND-0026", 4499, 2],
+                ["Clamp", "C-clamp 4-inch", "CLP-0027", 325, 30],
+                ["Clamp", "Bar clamp 12-inch", "CLP-0028", 750, 14],
+                ["Clamp", "Spring clamp", "CLP-0029", 175, 40],
+                ["Gloves", "Nitrile work gloves", "GLV-0030", 150, 200],
+                ["Gloves", "Leather palm gloves", "GLV-0031", 325, 120],
+                ["Gloves", "Cut-resistant gloves", "GLV-0032", 675, 0],
+                ["Goggles", "Safety goggles", "GOG-0033", 450, 36],
+                ["Goggles", "Anti-fog wraparound", "GOG-0034", 625, 28],
+                ["Helmet", "Hard hat - white", "HMT-0035", 1195, 20],
+                ["Helmet", "Hard hat - yellow", "HMT-0036", 1195, 15],
+                ["Mask", "Dust mask (box of 20)", "MSK-0037", 1499, 18],
+                    ["Mask", "Respirator w/ filters", "MSK-0038", 2499, 4],
+                    ["Toolbox", "Plastic toolbox 16-inch", "TLB-0039", 1295, 16],
+                    ["Toolbox", "Metal toolbox 20-inch", "TLB-0040", 2899, 0],
+                    ["Cord", "50ft extension cord", "CRD-0041", 1999, 8],
+                    ["Cord", "100ft extension cord", "CRD-0042", 3450, 0],
+                    ["Flashlight", "LED rechargeable", "FLS-0043", 1695, 11],
+                    ["Flashlight", "Mini pocket light", "FLS-0044", 650, 29],
+                    ["Chisel", "Wood chisel set (4pc)", "CHS-0045", 1525, 10],
+                    ["Chisel", "Cold chisel 8-inch", "CHS-0046", 599, 13],
+                    ["Brush", "Wire brush", "BRH-0047", 225, 33],
+                    ["Brush", "Paint brush 2-inch", "BRH-0048", 199, 48],
+                    ["Ladder", "6ft fiberglass ladder", "LDR-0049", 7999, 5],
+                    ["Ladder", "10ft aluminum ladder", "LDR-0050", 11999, 2],
+                    ["Wheelbarrow", "6 cu ft steel", "WBR-0051", 8999, 4],
+                    ["Concrete", "Quick-mix 80lb bag", "CNM-0052", 650, 92],
+                    ["Nails", "3-inch framing nails (5lb)", "NAL-0053", 799, 35],
+                    ["Screws", "1.25in wood screws (box)", "SCR-0054", 525, 60],
+                    ["Bolts", "3/8\" hex bolts (box)", "BLT-0055", 895, 45],
+                    ["Tarps", "10x12 waterproof tarp", "TRP-0056", 999, 9],
+                    ["Paint", "Interior flat white (gal)", "PNT-0057", 1799, 26],
+                    ["Paint", "Exterior weatherproof (gal)", "PNT-0058", 2250, 14],
+                    ["Paint Roller", "9-inch roller set", "PNR-0059", 795, 22],
+                    ["Paint Tray", "Plastic tray", "PNY-0060", 275, 30],
+                    ["Caulk", "Silicone white", "CLK-0061", 350, 80],
+                    ["Caulk Gun", "Dripless", "CLG-0062", 699, 18],
+                    ["Putty Knife", "Flexible 3-inch", "PTK-0063", 225, 27],
+                    ["Measuring Wheel", "Distance measuring wheel", "MWL-0064", 4999, 3],
+                    ["Stud Finder", "Electronic stud finder", "STF-0065", 2199, 6],
+                    ["Work Light", "Tripod LED light", "WKL-0066", 3499, 4],
+                    ["Angle Grinder", "4.5\" angle grinder", "ANG-0067", 4295, 8],
+                    ["Circular Saw Blade", "7.25\" 24T", "BLD-0068", 925, 16],
+                    ["PVC Pipe", "1\" x 10ft", "PVC-0069", 699, 42],
+                    ["Copper Pipe", "3/4\" x 10ft", "CPR-0070", 2200, 0],
+                    ["Pipe Wrench", "14-inch", "PWR-0071", 1850, 12],
+                    ["Trowel", "Masonry trowel", "TRW-0072", 575, 20],
+                    ["Shovel", "Round point", "SHV-0073", 1499, 9],
+                    ["Pickaxe", "36\" handle", "PCK-0074", 2495, 3],
+                    ["Rake", "24-tine leaf rake", "RAK-0075", 895, 10],
+                    ["Wheel", "Replacement wheel 10\"", "WHL-0076", 1150, 6],
+                    ["Fuel Can", "5-gallon red", "FLC-0077", 1799, 4],
+                    ["Toolbelt", "Leather 11-pocket", "TLB-0078", 2999, 15],
+                    ["Hose", "Contractor garden hose 50ft", "HSE-0079", 2195, 0],
+                    ["Hose Nozzle", "Adjustable spray", "HSN-0080", 395, 24],
+                    ["Tarp Clips", "Heavy duty clips (4)", "TPC-0081", 599, 13],
+                    ["Ratcheting Straps", "2\" x 27ft (2 pack)", "RTS-0082", 1850, 7],
+                    ["Plastic Sheeting", "6 mil 10x25ft", "PLS-0083", 1475, 5],
+                    ["Bucket", "5-gallon heavy-duty", "BKT-0084", 350, 88],
+                    ["Work Shirt", "Hi-vis long sleeve", "WKS-0085", 1599, 20],
+                    ["Ear Protection", "Over-ear muffs", "EPR-0086", 899, 17],
+                    ["Knee Pads", "Foam padded", "KNP-0087", 950, 11],
+                    ["Fence Post", "Steel 6ft", "FCP-0088", 725, 0],
+                    ["Rebar", "1/2\" x 10ft", "RBR-0089", 650, 39],
+                    ["Lumber", "2x4x8 SPF stud", "LMB-0090", 385, 94],
+                    ["Drywall", "1/2\" x 4x8 sheet", "DRW-0091", 1350, 40],
+                    ["Insulation", "R-13 Kraft roll", "INS-0092", 3499, 8],
+                    ["Roofing Nails", "1.25in coil (7200ct)", "RFN-0093", 2199, 26],
+                    ["PVC Cement", "8oz blue", "PVC-0094", 499, 0],
+                    ["Paint Masker", "Tape + film tool", "PMK-0095", 1275, 10],
+                    ["Wire Spool", "14/2 Romex 50ft", "WIR-0096", 3650, 6],
+                    ["Breaker", "15 amp single pole", "BRK-0097", 599, 17],
+                    ["Outlet Box", "PVC 1-gang", "OTB-0098", 145, 60],
+                    ["Switch", "Single pole toggle", "SWT-0099", 125, 80],
+                    ["Light Bulb", "LED A19 60W equivalent", "LBL-0100", 199, 50],
+                    ["Extension Ladder", "24ft aluminum", "LAD-0101", 17900, 0],
                 ]
 
+inventory_version = 0  # Bumped on every change made through the functions below
+inventory_listeners = []  # Callbacks (position, old_row) run after a row changes; old_row is None for new rows
+inventory_lock = ReadWriteLock()  # Readers share it; each change below holds it exclusively while rows change
+inventory_notify_lock = threading.RLock()  # Listeners hear about changes in the order they were made
+
+
+def inventory_read_lock(rows):
+    """
+    Returns a context holding the inventory read lock when rows is the live inventory_data list
+    (snapshots never change, so reading them needs no lock).
+    """
+    return inventory_lock.read() if rows is inventory_data else nullcontext()
+
+
+def _notify(position, old_row):
+    """Tells every listener which row changed. Called after the write lock is released."""
+    for listener in inventory_listeners:
+        listener(position, old_row)
+
+
+def update_inventory_item(position, price=None, quantity=None):
+    """
+    Changes the price (in cents) and/or quantity of the item at the given position in inventory_data.
+    """
+    global inventory_version
+    with inventory_notify_lock:
+        with inventory_lock.write():
+            item = inventory_data[position]
+            old_item = list(item)  # Copy of the row before the change, for listeners keeping aggregates
+            if price is not None:
+                item[3] = price
+            if quantity is not None:
+                item[4] = quantity
+            inventory_version += 1
+        _notify(position, old_item)
+
+
+def receive_quantities(lines):
+    """
+    Adds received (sku, quantity) lines to stock as one atomic change: every quantity is
+    applied under the inventory write lock before any listener runs. Returns the SKUs not in inventory.
+    """
+    global inventory_version
+    totals = {}  # Position -> quantity received, so a SKU on several lines changes once
+    missing = []
+    with inventory_notify_lock:
+        with inventory_lock.write():
+            index = sku_index_for(inventory_data)
+            for sku, quantity in lines:
+                position = index.lookup(sku)
+                if position is None:
+                    missing.append(sku)
+                else:
+                    totals[position] = totals.get(position, 0) + quantity
+            changed = []  # (position, old_row) per updated row
+            for position, quantity in totals.items():
+                changed.append((position, list(inventory_data[position])))
+                inventory_data[position][4] += quantity
+            inventory_version += 1
+        for position, old_row in changed:
+            _notify(position, old_row)
+    return missing
+
+
+def add_inventory_item(name, description, sku, price, quantity):
+    """
+    Appends a new item to inventory_data and returns its position. price is in cents.
+    """
+    global inventory_version
+    with inventory_notify_lock:
+        with inventory_lock.write():
+            inventory_data.append([name, description, sku, price, quantity])
+            position = len(inventory_data) - 1
+            inventory_version += 1
+        _notify(position, None)
+    return position
+
 
-def check_order_validity(entries):
+def check_order_validity(entries, inventory=None):
     """
     Checks the validity of order entries by comparing the SKU against the inventory.
+    The inventory defaults to inventory_data but may be any row sequence, such as a snapshot.
     Returns lists of errors and valid entries.
     """
+    if inventory is None:
+        inventory = inventory_data
     errors = []  # Initialize an empty list to collect errors
     valid_entries = []  # Initialize an empty list to collect valid entries
 
-    # Loop through each SKU and quantity in the provided entries
-    for sku, qty in entries:
-        # Find the item by SKU from the inventory data. SKU is at index 2 in each item.
-        item = next((item for item in inventory_data if item[2] == sku), None)  # item[2] is the SKU
+    # Loop through each SKU and quantity in the provided entries (no row changes halfway through)
+    with inventory_read_lock(inventory):
+        index = sku_index_for(inventory)  # Hash lookup per entry instead of scanning every row
+        for sku, qty in entries:
+            # Find the item by SKU from the inventory data. SKU is at index 2 in each item.
+            position = index.lookup(sku)
+            item = inventory[position] if position is not None else None
+            if item and item[2] != sku:
+                item = None  # The index ignores case; an order must name the SKU exactly
         
-        if not item:  # If the item wasn't found (i.e., item is None)
-            errors.append(f"SKU: {sku} not found in inventory.")  # Add an error message to the errors list
-            continue  # Skip to the next entry
+            if not item:  # If the item wasn't found (i.e., item is None)
+                errors.append(f"SKU: {sku} not found in inventory.")  # Add an error message to the errors list
+                continue  # Skip to the next entry
         
-        # If valid, add the SKU and quantity to the valid entries list
-        valid_entries.append((sku, qty))
+            # If valid, add the SKU and quantity to the valid entries list
+            valid_entries.append((sku, qty))
     
     return errors, valid_entries  # Return the list of errors and valid entries
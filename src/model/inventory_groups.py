@@ -0,0 +1,70 @@
+"""
+**inventory_groups.py - Category groups with running aggregates**
+
+**Purpose**
+- Groups inventory rows by their first field (Hammer, Drill, Saw, ...).
+- Keeps total units, stock value and out-of-stock SKU count per group, adjusted
+  incrementally when a row's price or quantity changes instead of re-scanning the catalog.
+"""
+from bisect import insort
+
+
+class InventoryGroup:
+    def __init__(self, name):
+        """
+        Aggregates for one category. positions are the row positions in the category, in row order.
+        """
+        self.name = name
+        self.positions = []
+        self.units = 0  # Total quantity on hand
+        self.value = 0  # Sum of price x quantity, in cents
+        self.out_of_stock = 0  # Number of SKUs with zero quantity
+
+    def add(self, row, sign=1):
+        """Adds (sign=1) or removes (sign=-1) one row's contribution to the aggregates."""
+        quantity = int(row[4])
+        self.units += sign * quantity
+        self.value += sign * int(row[3]) * quantity
+        self.out_of_stock += sign * (quantity == 0)
+
+
+class GroupIndex:
+    def __init__(self, rows):
+        """
+        Builds the groups for a row sequence in one pass.
+        """
+        self.rows = rows
+        self.groups = {}  # Category name -> InventoryGroup, in first-seen order
+        for position, row in enumerate(rows):
+            group = self._group(row[0])
+            group.positions.append(position)
+            group.add(row)
+
+    def _group(self, name):
+        """Returns the group for a category, creating it if needed."""
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = InventoryGroup(name)
+        return group
+
+    def update_row(self, position, old_row, new_row):
+        """
+        Applies one row change to the aggregates. old_row is None for a newly added row.
+        Returns the names of the groups that changed.
+        """
+        changed = []
+        if old_row is not None:
+            old_group = self.groups[old_row[0]]
+            old_group.add(old_row, sign=-1)
+            changed.append(old_group.name)
+            if old_row[0] != new_row[0]:
+                old_group.positions.remove(position)  # Category renamed: move the row
+                old_row = None
+
+        new_group = self._group(new_row[0])
+        if old_row is None:
+            insort(new_group.positions, position)  # Keep row order within the group
+        new_group.add(new_row)
+        if new_group.name not in changed:
+            changed.append(new_group.name)
+        return changed
@@ -0,0 +1,349 @@
+"""
+**inventory_locations.py - Stock held per location (yards and trucks)**
+
+**Purpose**
+- Keeps a quantity per (SKU, location) pair, stored sparsely: only the locations that carry
+  a SKU have an entry, indexed both by SKU and by location.
+- Maintains each SKU's total on hand incrementally and mirrors it into the quantity column
+  of inventory_data, so existing views, searches and aggregates keep showing the total.
+- Answers "where is HAM-0003 available" and "what is low at Truck 1" from indexes updated on
+  every change, never by scanning the catalog.
+- Saves the quantities per location under the data directory shortly after each change (one
+  write for a burst of changes), so adjustments and transfers survive a restart, and reloads
+  the quantities other desktops sharing the directory saved (see data_refresher.py). A save
+  merges this desktop's changes into the file under an inter-process lock, so two desktops
+  saving at once both keep their changes.
+
+**Usage**
+- ``load_location_stock(inventory_data)`` loads the saved quantities (on the first run it splits
+  the catalog's quantities across LOCATIONS) and keeps them and the rows in step from then on.
+"""
+import atexit
+import json
+import os
+import threading
+import zlib
+
+from model.inventory_data import inventory_listeners, update_inventory_item
+from model.sku_index import sku_index_for
+from model.storage import atomic_write, data_path, lock_file, unlock_file
+
+LOCATIONS = ["Main Yard", "North Yard", "Truck 1", "Truck 2"]
+LOW_STOCK_THRESHOLDS = {"Main Yard": 3, "North Yard": 3, "Truck 1": 1, "Truck 2": 1}  # At or below this, a location is low
+RECEIVING_LOCATION = "Main Yard"  # Where shipments and other changes made without a location land
+
+STOCK_FILE_NAME = "location_stock.json"
+
+
+class LocationStock:
+    def __init__(self, locations=LOCATIONS, thresholds=LOW_STOCK_THRESHOLDS):
+        """
+        Creates an empty store for the given locations and their low stock thresholds.
+        """
+        self.locations = list(locations)
+        self.thresholds = dict(thresholds)
+        self.by_sku = {}  # SKU -> {location: quantity}, only for the locations carrying it
+        self.by_location = {location: {} for location in self.locations}  # Location -> {SKU: quantity}
+        self.totals = {}  # SKU -> quantity on hand across every location
+        self.low = {location: set() for location in self.locations}  # Location -> SKUs at or below its threshold
+        self.out_of_stock = set()  # SKUs with nothing on hand anywhere
+        self.listeners = []  # Callbacks (sku, location, old_quantity, new_quantity) run after each change
+        self.version = 0  # Bumped on every change
+        self.alerts_version = 0  # Bumped only when a low stock alert appears, goes away or changes quantity
+        self.rows = None  # Inventory rows whose quantity column mirrors the totals, once attached
+        self.file = None  # LocationStockFile saving the store, once attached
+        self.applying_saved = False  # True while applying changes another desktop saved (and logged)
+        self._syncing = False  # True while writing a total back to the rows
+
+    def is_low(self, location, quantity):
+        """Returns True if the quantity counts as low stock at the location."""
+        return quantity <= self.thresholds.get(location, 0)
+
+    def quantity(self, sku, location):
+        """Returns the quantity of the SKU at the location (0 if the location does not carry it)."""
+        return self.by_sku.get(sku.upper(), {}).get(location, 0)
+
+    def total(self, sku):
+        """Returns the SKU's quantity on hand across every location."""
+        return self.totals.get(sku.upper(), 0)
+
+    def where_available(self, sku):
+        """Returns [(location, quantity)] for the locations holding the SKU, in location order."""
+        held = self.by_sku.get(sku.upper(), {})
+        return [(location, held[location]) for location in self.locations if held.get(location, 0) > 0]
+
+    def skus_at(self, location):
+        """Returns {SKU: quantity} for every SKU the location carries (do not modify)."""
+        return self.by_location[location]
+
+    def low_stock_at(self, location):
+        """Returns [(sku, quantity)] of the SKUs that are low at the location, sorted by SKU."""
+        quantities = self.by_location[location]
+        return [(sku, quantities[sku]) for sku in sorted(self.low[location])]
+
+    def set_quantity(self, sku, location, quantity):
+        """
+        Sets the quantity of a SKU at a location (the location starts carrying it if it did not).
+        Updates the SKU's total, the low and out-of-stock indexes, and the mirrored inventory row.
+        """
+        if location not in self.by_location:
+            raise KeyError(f"unknown location: {location}")
+        if quantity < 0:
+            raise ValueError(f"quantity at {location} cannot be negative")
+        sku = sku.upper()
+        held = self.by_sku.setdefault(sku, {})
+        old_quantity = held.get(location)
+        held[location] = quantity
+        self.by_location[location][sku] = quantity
+        self._update_indexes(sku, location, old_quantity or 0, quantity)
+        if old_quantity is None or old_quantity != quantity:
+            self._changed(sku, location, old_quantity or 0, quantity)
+
+    def adjust(self, sku, location, delta):
+        """Adds delta (negative to remove stock) to the SKU's quantity at the location."""
+        self.set_quantity(sku, location, self.quantity(sku, location) + delta)
+
+    def transfer(self, sku, source, destination, quantity):
+        """Moves stock between locations; the SKU's total does not change."""
+        if quantity > self.quantity(sku, source):
+            raise ValueError(f"only {self.quantity(sku, source)} of {sku} at {source}")
+        self.adjust(sku, source, -quantity)
+        self.adjust(sku, destination, quantity)
+
+    def _update_indexes(self, sku, location, old_quantity, quantity):
+        """Applies one quantity change to the totals and the alert indexes."""
+        was_low, was_out = sku in self.low[location], sku in self.out_of_stock
+        total = self.totals.get(sku, 0) + quantity - old_quantity
+        self.totals[sku] = total
+        if total == 0:
+            self.out_of_stock.add(sku)
+        else:
+            self.out_of_stock.discard(sku)
+        if self.is_low(location, quantity):
+            self.low[location].add(sku)
+        else:
+            self.low[location].discard(sku)
+        if was_low or sku in self.low[location] or was_out != (total == 0):
+            self.alerts_version += 1
+
+    def _changed(self, sku, location, old_quantity, quantity):
+        self.version += 1
+        self._mirror(sku)
+        for listener in self.listeners:
+            listener(sku, location, old_quantity, quantity)
+
+    def _mirror(self, sku):
+        """Writes the SKU's new total into the attached inventory row, if it differs."""
+        if self.rows is None:
+            return
+        position = sku_index_for(self.rows).lookup(sku)
+        if position is not None and self.rows[position][4] != self.totals[sku]:
+            self._syncing = True
+            try:
+                update_inventory_item(position, quantity=self.totals[sku])
+            finally:
+                self._syncing = False
+
+    def attach(self, rows):
+        """
+        Mirrors totals into rows (inventory_data) from now on, and attributes quantity changes
+        made directly to the rows (e.g. received shipments) to RECEIVING_LOCATION. Rows whose
+        quantity differs from the SKU's total (saved quantities from an earlier run) are updated.
+        """
+        self.rows = rows
+        for sku in self.totals:
+            self._mirror(sku)
+        inventory_listeners.append(self.on_inventory_changed)
+
+    def on_inventory_changed(self, position, old_row):
+        """Inventory listener: bring the locations in line with a row's new total quantity."""
+        if self._syncing:
+            return  # Our own write-back
+        sku = str(self.rows[position][2]).upper()
+        delta = int(self.rows[position][4]) - self.totals.get(sku, 0)
+        if delta >= 0:
+            if delta or sku not in self.by_sku:
+                self.adjust(sku, RECEIVING_LOCATION, delta)
+            return
+        # Stock went down without a location: take it from the receiving location first
+        for location in [RECEIVING_LOCATION] + [other for other in self.locations if other != RECEIVING_LOCATION]:
+            taken = min(-delta, self.quantity(sku, location))
+            if taken:
+                self.adjust(sku, location, -taken)
+                delta += taken
+            if not delta:
+                break
+
+
+def seed_locations(stock, rows):
+    """
+    Splits each row's quantity across the locations: every SKU is carried at the receiving
+    yard, about half also at the second yard, and some small lots ride on the trucks.
+    The split depends only on the SKU, so it is the same on every run.
+    """
+    yards = [location for location in stock.locations if location.endswith("Yard") and location != RECEIVING_LOCATION]
+    trucks = [location for location in stock.locations if location.startswith("Truck")]
+    for row in rows:
+        sku, remaining = str(row[2]), int(row[4])
+        spread = zlib.crc32(sku.encode("utf-8"))
+        if yards and spread % 2 == 0:
+            share = remaining * 2 // 5
+            stock.set_quantity(sku, yards[spread // 2 % len(yards)], share)
+            remaining -= share
+        if trucks and spread % 5 < len(trucks):
+            share = min(3, remaining // 4)
+            stock.set_quantity(sku, trucks[spread % 5], share)
+            remaining -= share
+        stock.set_quantity(sku, RECEIVING_LOCATION, remaining)
+
+
+class LocationStockFile:
+    def __init__(self, path=None, save_delay=0.5):
+        """
+        Saves a LocationStock to a JSON file (by default in the data directory). save_delay is
+        how long after a change the file is written, so a burst of changes is written once.
+        """
+        self.path = path or data_path(STOCK_FILE_NAME)
+        self.save_delay = save_delay
+        self.stock = None  # Store being saved, set by attach()
+        self._lock = threading.Lock()  # Guards the timer
+        self._save_lock = threading.Lock()  # One save or reload at a time
+        self._timer = None  # Pending save, if any
+        self.saved = {}  # SKU -> {location: quantity} as last read from or written to the file
+
+    def load(self, stock):
+        """
+        Sets the saved quantities on the store (locations it does not have are skipped).
+        Returns False if there is no readable saved copy.
+        """
+        saved = self._read()
+        if saved is None:
+            return False
+        for sku, held in saved.items():
+            for location, quantity in held.items():
+                if location in stock.by_location:
+                    stock.set_quantity(sku, location, quantity)
+                    self.saved.setdefault(sku, {})[location] = quantity
+        return True
+
+    def _read(self):
+        """Returns the saved {SKU: {location: quantity}}, or None if there is no readable file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)["stock"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def stamp(self):
+        """Size and modification time of the file: changes whenever any desktop saves."""
+        try:
+            status = os.stat(self.path)
+        except OSError:
+            return None
+        return status.st_size, status.st_mtime_ns
+
+    def reload(self):
+        """
+        Applies the quantities other desktops saved since this one last read or wrote the file.
+        Each quantity moves by the other desktop's difference, so changes made here and not yet
+        saved are kept. Run it on the thread that owns the store: its listeners update views.
+        Returns the number of quantities changed.
+        """
+        saved = self._read()
+        if saved is None or self.stock is None:
+            return 0
+        changed = 0
+        with self._save_lock:
+            self.stock.applying_saved = True  # Not a change made here: not saved again, not logged again
+            try:
+                for sku, held in saved.items():
+                    known = self.saved.setdefault(sku, {})
+                    for location, quantity in held.items():
+                        if location not in self.stock.by_location or known.get(location) == quantity:
+                            continue
+                        delta = quantity - known.get(location, 0)
+                        known[location] = quantity
+                        self.stock.set_quantity(sku, location, max(0, self.stock.quantity(sku, location) + delta))
+                        changed += 1
+            finally:
+                self.stock.applying_saved = False
+        return changed
+
+    def attach(self, stock):
+        """Saves the store shortly after every change from now on, and once more at exit."""
+        self.stock = stock
+        stock.file = self
+        stock.listeners.append(self._on_change)
+        atexit.register(self.flush)
+
+    def _on_change(self, sku, location, old_quantity, quantity):
+        """LocationStock listener: schedules a save unless one is already pending."""
+        if self.stock.applying_saved:
+            return  # Already in the file
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Writes a pending save now."""
+        with self._lock:
+            if self._timer is None:
+                return
+            self._timer.cancel()
+            self._timer = None  # Changes from here on schedule the next save
+        self.save()
+
+    def save(self):
+        """
+        Merges the quantities changed here into the file. Under an inter-process lock the file is
+        read again and each quantity that differs from what this desktop last read or wrote moves
+        by this desktop's difference, so quantities other desktops saved meanwhile are kept (and
+        reach this store with the next reload). Nothing is written if nothing changed here.
+        Returns False if the file could not be written (the changes are written with the next one).
+        """
+        with self._save_lock:
+            stock = {sku: dict(held) for sku, held in list(self.stock.by_sku.items())}  # Copies; changes may continue
+            try:
+                with open(self.path + ".lock", "a+b") as lock:
+                    lock_file(lock)  # Desktops sharing the data directory save one at a time
+                    try:
+                        merged = self._read()
+                        if merged is None:
+                            merged, changed = stock, stock  # First save, or an unreadable file: ours is the file
+                        else:
+                            changed = {}
+                            for sku, held in stock.items():
+                                known = self.saved.get(sku, {})
+                                for location, quantity in held.items():
+                                    if known.get(location) != quantity:
+                                        on_file = merged.setdefault(sku, {})
+                                        on_file[location] = max(0, on_file.get(location, 0) + quantity - known.get(location, 0))
+                                        changed.setdefault(sku, {})[location] = quantity
+                        if changed:
+                            atomic_write(self.path, json.dumps({"version": 1, "stock": merged}).encode("utf-8"))
+                    finally:
+                        unlock_file(lock)
+            except OSError:
+                return False
+            for sku, held in changed.items():
+                self.saved.setdefault(sku, {}).update(held)  # Other desktops' differences stay for reload()
+        return True
+
+
+def load_location_stock(rows, path=None):
+    """
+    Returns a LocationStock attached to the rows and saved after every change. It holds the
+    saved quantities if there are any (SKUs added to the catalog since are seeded); on the
+    first run it is seeded from the rows.
+    """
+    stock = LocationStock()
+    stock_file = LocationStockFile(path)
+    loaded = stock_file.load(stock)
+    seed_locations(stock, [row for row in rows if str(row[2]).upper() not in stock.by_sku] if loaded else rows)
+    stock.attach(rows)
+    stock_file.attach(stock)
+    if not loaded:
+        stock_file.save()  # The first split is kept from now on
+    return stock
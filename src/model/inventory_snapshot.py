@@ -0,0 +1,235 @@
+"""
+**inventory_snapshot.py - Memory-mapped binary inventory snapshot**
+
+**Purpose**
+- Stores the inventory in a versioned binary file that opens instantly with ``mmap``,
+  so startup does not scale with catalog size.
+- Rows are decoded one at a time on access; nothing is deserialized up front.
+- Opening checks only the header, the layout and the file length, so a cold start reads no
+  more than the first and last record. The checksum over the whole file is checked right after
+  a rebuild, and otherwise in the background during login (``verify_inventory``).
+
+**File layout (version 2, little-endian)**
+- Header: magic, format version, row count, CRC32 of everything after the header,
+  source stamp (mtime + size of the source data) and the offset of the string region.
+- Numeric region: one fixed-width record per row holding price (in cents), quantity and the
+  (offset, length) of the row's name, description and SKU in the string region.
+- String region: UTF-8 bytes of every string, back to back.
+"""
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Sequence
+
+from model.storage import atomic_write, data_path
+
+MAGIC = b"CPINVSNP"
+FORMAT_VERSION = 2  # Version 2 stores prices as integer cents instead of float dollars
+
+HEADER = struct.Struct("<8sHxxIIQQQ")  # magic, version, row count, checksum, source mtime, source size, string offset
+RECORD = struct.Struct("<qq6I")  # price in cents, quantity, (offset, length) x 3 strings
+RECORD_FIELDS = [("price", "<i8"), ("quantity", "<i8"), ("spans", "<u4", 6)]  # The same record as a numpy dtype
+
+SNAPSHOT_NAME = "inventory.snap"
+SOURCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory_data.py")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing pieces, has the wrong format or fails its checksum."""
+
+
+def source_stamp():
+    """
+    Returns (mtime_ns, size) of the inventory source file, used to detect stale snapshots.
+    """
+    stat = os.stat(SOURCE_FILE)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_snapshot(rows, path, stamp):
+    """
+    Writes the rows [name, description, sku, price, quantity] to a snapshot file atomically.
+    """
+    records = bytearray()
+    strings = bytearray()
+
+    for name, description, sku, price, quantity in rows:
+        spans = []
+        for text in (name, description, sku):
+            encoded = str(text).encode("utf-8")
+            spans += [len(strings), len(encoded)]  # Where this string lives in the string region
+            strings += encoded
+        records += RECORD.pack(int(price), int(quantity), *spans)
+
+    body = bytes(records) + bytes(strings)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(rows), zlib.crc32(body),
+        stamp[0], stamp[1], HEADER.size + len(records),
+    )
+    atomic_write(path, header + body)
+
+
+class InventorySnapshot(Sequence):
+    '''
+    Read-only, list-like view of a snapshot file. Indexing returns the same
+    [name, description, sku, price, quantity] rows as inventory_data, decoded on demand.
+    '''
+    def __init__(self, path, verify=False):
+        """
+        Opens and maps the snapshot. Raises SnapshotError if it is not a valid snapshot of the current version.
+        The header, layout and file length are always checked; the checksum of the whole file (which reads
+        every page) only with verify, or later with verify().
+        """
+        self.path = path
+        self.sku_index = None  # Built on first use by sku_index_for; goes away with the snapshot
+        self.verified = False  # Checksum checked
+        with open(path, "rb") as file:
+            try:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as error:  # Empty file
+                raise SnapshotError(f"{path} is empty") from error
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{path} is truncated")
+
+        magic, version, self.row_count, self.checksum, mtime, size, self._strings_offset = HEADER.unpack_from(self._map, 0)
+        self.source_stamp = (mtime, size)
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f"{path} is not a version {FORMAT_VERSION} inventory snapshot")
+        if self._strings_offset != HEADER.size + self.row_count * RECORD.size or self._strings_offset > len(self._map):
+            self.close()
+            raise SnapshotError(f"{path} has an inconsistent layout")
+        if self._strings_end() != len(self._map):
+            self.close()
+            raise SnapshotError(f"{path} is truncated or has trailing data")
+        if verify:
+            try:
+                self.verify()
+            except SnapshotError:
+                self.close()
+                raise
+
+    def _strings_end(self):
+        """Returns where the string region should end: strings are written row by row, so the
+        last row's last span ends it. Reads one record, not the file."""
+        if not self.row_count:
+            return self._strings_offset
+        spans = RECORD.unpack_from(self._map, self._strings_offset - RECORD.size)[2:]
+        return self._strings_offset + max(offset + length for offset, length in zip(spans[::2], spans[1::2]))
+
+    def verify(self):
+        """Checks the checksum of everything after the header. Raises SnapshotError if it does not match."""
+        if not self.verified:
+            if zlib.crc32(self._map[HEADER.size:]) != self.checksum:
+                raise SnapshotError(f"{self.path} failed its checksum")
+            self.verified = True
+
+    def __len__(self):
+        return self.row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.row_count))]
+        if index < 0:
+            index += self.row_count
+        if not 0 <= index < self.row_count:
+            raise IndexError("snapshot row out of range")
+
+        price, quantity, *spans = RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+        name, description, sku = (self._string(spans[i], spans[i + 1]) for i in (0, 2, 4))
+        return [name, description, sku, price, quantity]
+
+    def numeric_columns(self):
+        """
+        Returns (price cents, quantities) of every row as int64 arrays, read straight from the
+        numeric region without decoding any row.
+        """
+        import numpy as np  # Only needed here; keeps opening a snapshot cheap
+
+        records = np.frombuffer(self._map, dtype=np.dtype(RECORD_FIELDS), count=self.row_count, offset=HEADER.size)
+        columns = records["price"].copy(), records["quantity"].copy()
+        del records  # Release the buffer so the map can still be closed
+        return columns
+
+    def _string(self, offset, length):
+        """Decodes one string from the string region."""
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    @property
+    def closed(self):
+        return self._map.closed
+
+    def close(self):
+        """Unmaps the file."""
+        self.sku_index = None
+        self._map.close()
+
+
+_opened = {}  # Path -> snapshot already mapped by load_inventory, shared by every caller
+
+
+def load_inventory(path=None, rebuild=True):
+    """
+    Returns the inventory rows for the views and the search/validation functions.
+
+    Opens the snapshot if it matches the current source data. If the snapshot is missing,
+    corrupt or stale it is rebuilt from inventory_data (when rebuild is True). If the
+    snapshot cannot be written, the in-memory inventory_data list is returned instead.
+    Once the inventory has been changed in this process, the live list is returned, since
+    a snapshot of the source data would no longer match it. A snapshot that is already open
+    and still current is returned again rather than mapped and verified a second time.
+    """
+    inventory_module = sys.modules.get("model.inventory_data")
+    if inventory_module is not None and inventory_module.inventory_version:
+        return inventory_module.inventory_data  # Edited in memory; the live rows are the truth
+
+    path = path or data_path(SNAPSHOT_NAME)
+    stamp = source_stamp()
+
+    snapshot = _opened.get(path)
+    if snapshot is not None and not snapshot.closed and snapshot.source_stamp == stamp:
+        return snapshot
+
+    try:
+        snapshot = InventorySnapshot(path)
+        if snapshot.source_stamp == stamp:
+            _opened[path] = snapshot
+            return snapshot
+        snapshot.close()  # Stale: the source data changed since the snapshot was written
+    except (OSError, SnapshotError):
+        pass  # Missing or unreadable snapshot; fall through to a rebuild
+
+    from model.inventory_data import inventory_data  # Only needed on the fallback path
+
+    if not rebuild:
+        return inventory_data
+    try:
+        write_snapshot(inventory_data, path, stamp)
+        snapshot = _opened[path] = InventorySnapshot(path, verify=True)  # Check what was just written
+        return snapshot
+    except (OSError, SnapshotError):
+        return inventory_data  # Read-only disk or similar; the in-memory list still works
+
+
+def verify_inventory(rows, path=None):
+    """
+    Checks the checksum of rows returned by load_inventory, off the GUI thread (the login
+    preload does this). A snapshot that fails is rebuilt; returns the rows to use.
+    """
+    if not isinstance(rows, InventorySnapshot):
+        return rows
+    try:
+        rows.verify()
+        return rows
+    except SnapshotError:
+        path = path or rows.path
+        if _opened.get(path) is rows:
+            del _opened[path]
+        os.remove(path)  # The next load_inventory rebuilds it; views still mapping it keep their copy
+        return load_inventory(path)
@@ -1,3 +1,15 @@
+import itertools
+import threading
+import time
+
+from model.money import cents_array, format_money, group_codes, grouped_totals
+from model.order_history import StatusHistory, date_to_timestamp
+from model.rw_lock import ReadWriteLock
+from model.search_query import compile_query
+
+_versions = itertools.count(1)  # Process-wide, so versions never repeat across OrderManager instances
+
+
 class Order:
     def __init__(self, order_id, date, shipping_type, price, status="Pending"):
         """
@@ -7,7 +19,7 @@ class Order:
         self.order_id = order_id  # Store the order's unique ID
         self.date = date  # Store the order's date as a string
         self.shipping_type = shipping_type  # Store the shipping type (Standard, Express, etc.)
-        self.price = price  # Store the price of the order
+        self.price = price  # Store the price of the order, in cents
         self.status = status  # Store the order's status (default to 'Pending')
 
     def change_status(self, new_status):
@@ -20,7 +32,7 @@ class Order:
         """
         String representation of the order for easy printing.
         """
-        return f"ID: {self.order_id} | Date: {self.date} | Shipping: {self.shipping_type} | Price: ${self.price:.2f} | Status: {self.status}"
+        return f"ID: {self.order_id} | Date: {self.date} | Shipping: {self.shipping_type} | Price: {format_money(self.price)} | Status: {self.status}"
 
 class OrderManager:
     def __init__(self):
@@ -28,71 +40,166 @@ class OrderManager:
         Initializes an OrderManager instance with an empty list of orders.
         """
         self.orders = []  # List to hold all the orders managed by this instance
+        self._positions = {}  # order_id -> position in self.orders, for O(1) lookups
+        self.listeners = []  # Callbacks (order, old_status, new_status, user, timestamp) run after each status change
+        self.added_listeners = []  # Callbacks (order) run after add_order
+        self.history = StatusHistory()  # Time-travel record of every order's status
+        self.version = next(_versions)  # Changes on every mutation; search caches key on it
+        self.lock = ReadWriteLock()  # Readers share it; adding an order or changing a status holds it exclusively
+        self._notify_lock = threading.RLock()  # Listeners (the journal) hear about changes in the order they were made
 
-    def add_order(self, order: Order):
+    def add_order(self, order: Order, timestamp=None):
         """
         Adds a new order to the orders list.
-        """
-        self.orders.append(order)  # Add the provided order to the list of orders
+        Its history starts at the timestamp, or at the order date if none is given.
+        """
+        if timestamp is None:
+            timestamp = date_to_timestamp(order.date)
+        with self._notify_lock:
+            with self.lock.write():
+                self._positions.setdefault(order.order_id, len(self.orders))  # Remember where the order lives (first one wins, as before)
+                self.orders.append(order)  # Add the provided order to the list of orders
+                self.version = next(_versions)
+                self.history.record(order.order_id, order.status, timestamp)
+            for listener in self.added_listeners:
+                listener(order)
 
     def get_orders(self):
         """
         Returns the orders sorted by date (newest first).
         """
-        return sorted(self.orders, key=lambda x: x.date, reverse=True)  # Sort orders by date in descending order
+        with self.lock.read():
+            return sorted(self.orders, key=lambda x: x.date, reverse=True)  # Sort orders by date in descending order
 
     def get_order_by_id(self, order_id):
         """
         Returns the order that matches the provided order ID.
         If no order is found, returns None.
         """
-        for order in self.orders:
-            if order.order_id == order_id:
-                return order  # Return the matching order
-        return None  # Return None if no matching order is found
+        with self.lock.read():
+            position = self._positions.get(order_id)
+            if position is None:
+                return None  # Return None if no matching order is found
+            return self.orders[position]  # Return the matching order
+
+    def position_of(self, order_id):
+        """
+        Returns the order's position in the orders list, or None if there is no such order.
+        """
+        return self._positions.get(order_id)
+
+    def change_order_status(self, order_id, new_status, user=None):
+        """
+        Changes the status of an order and notifies the listeners (such as the journal).
+        Returns the order, or None if no order has that ID.
+        """
+        with self._notify_lock:
+            with self.lock.write():  # Check and change in one step, so two changes cannot both start from the same status
+                timestamp = time.time()
+                order = self.get_order_by_id(order_id)
+                if order is None or order.status == new_status:
+                    return order  # Nothing to change
+
+                old_status = order.status
+                self.apply_status_change(order_id, new_status, timestamp)
+            for listener in self.listeners:  # Readers are no longer held up while these run
+                listener(order, old_status, new_status, user, timestamp)
+        return order
+
+    def apply_status_change(self, order_id, new_status, timestamp):
+        """
+        Sets an order's status and records it in the history, without notifying listeners.
+        Used for replaying changes that are already journaled.
+        """
+        with self.lock.write():
+            order = self.get_order_by_id(order_id)
+            if order is None:
+                return None
+            order.change_status(new_status)
+            self.version = next(_versions)
+            self.history.record(order_id, new_status, timestamp)
+        return order
+
+    def status_at(self, order_id, timestamp):
+        """
+        Returns what the order's status was at the timestamp (None if it did not exist yet).
+        """
+        with self.lock.read():
+            return self.history.status_at(order_id, timestamp)
+
+    def count_by_status_at(self, timestamp):
+        """
+        Returns {status: order count} as of the timestamp, e.g. Pending orders at close of day.
+        """
+        with self.lock.read():
+            return self.history.count_by_status_at(timestamp)
+
+    def totals_by_status(self):
+        """
+        Returns {status: total order value in cents}, summed exactly in one vectorized pass.
+        """
+        with self.lock.read():
+            return totals_by_status(self.orders)
     
     def seed_orders(self):
         """
         Seeds the orders list with hardcoded order data for testing or initial setup.
         """
-        # Sample order data as tuples (order_id, date, shipping_type, price, status)
+        # Sample order data as tuples (order_id, date, shipping_type, price in cents, status)
         orders_data = [
-            ("ORD123", "2025-04-10", "Standard", 45.99, "Delivered"),
-            ("ORD124", "2025-04-11", "Express", 99.49, "Delivered"),
-            ("ORD125", "2025-04-12", "Standard", 34.76, "Delivered"),
-            ("ORD126", "2025-04-15", "Air", 89.65, "Delivered"),
-            ("ORD127", "2025-04-17", "Overnight", 156.23, "Delivered"),
-            ("ORD128", "2025-04-18", "Standard", 1564.56, "Delivered"),
-            ("ORD129", "2025-04-19", "Express", 274.89, "Delivered"),
-            ("ORD130", "2025-04-20", "Standard", 67.45, "Delivered"),
-            ("ORD131", "2025-04-21", "Air", 512.30, "Delivered"),
-            ("ORD132", "2025-04-22", "Overnight", 321.99, "Delivered"),
-            ("ORD133", "2025-04-23", "Standard", 278.00, "Delivered"),
-            ("ORD134", "2025-04-24", "Express", 899.99, "Delivered"),
-            ("ORD135", "2025-04-25", "Air", 1034.56, "Delivered"),
-            ("ORD136", "2025-04-26", "Overnight", 425.65, "Delivered"),
-            ("ORD137", "2025-04-27", "Standard", 121.70, "Delivered"),
-            ("ORD138", "2025-04-28", "Express", 1350.45, "Delivered"),
-            ("ORD139", "2025-04-29", "Air", 199.89, "Pending"),
-            ("ORD140", "2025-04-30", "Overnight", 465.30, "Delivered"),
-            ("ORD141", "2025-05-01", "Standard", 76.22, "Pending"),
-            ("ORD142", "2025-05-02", "Express", 154.50, "Shipped"),
-            ("ORD143", "2025-05-03", "Air", 875.80, "Processing"),
-            ("ORD144", "2025-05-04", "Overnight", 654.35, "Delivered"),
-            ("ORD145", "2025-05-05", "Standard", 48.99, "Shipped"),
-            ("ORD146", "2025-05-06", "Express", 264.55, "Delivered"),
-            ("ORD147", "2025-05-07", "Air", 340.80, "Shipped"),
-            ("ORD148", "2025-05-08", "Overnight", 199.95, "Delivered"),
-            ("ORD149", "2025-05-09", "Standard", 550.33, "Shipped"),
-            ("ORD150", "2025-05-10", "Express", 1234.80, "Pending"),
-            ("ORD151", "2025-05-11", "Air", 657.20, "Delivered"),
-            ("ORD152", "2025-05-12", "Overnight", 782.11, "Delivered"),
-            ("ORD153", "2025-05-13", "Standard", 899.95, "Pending"),
-            ("ORD154", "2025-05-14", "Express", 389.60, "Pending"),
-            ("ORD155", "2025-05-15", "Overnight", 512.75, "Pending"),
+            ("ORD123", "2025-04-10", "Standard", 4599, "Delivered"),
+            ("ORD124", "2025-04-11", "Express", 9949, "Delivered"),
+            ("ORD125", "2025-04-12", "Standard", 3476, "Delivered"),
+            ("ORD126", "2025-04-15", "Air", 8965, "Delivered"),
+            ("ORD127", "2025-04-17", "Overnight", 15623, "Delivered"),
+            ("ORD128", "2025-04-18", "Standard", 156456, "Delivered"),
+            ("ORD129", "2025-04-19", "Express", 27489, "Delivered"),
+            ("ORD130", "2025-04-20", "Standard", 6745, "Delivered"),
+            ("ORD131", "2025-04-21", "Air", 51230, "Delivered"),
+            ("ORD132", "2025-04-22", "Overnight", 32199, "Delivered"),
+            ("ORD133", "2025-04-23", "Standard", 27800, "Delivered"),
+            ("ORD134", "2025-04-24", "Express", 89999, "Delivered"),
+            ("ORD135", "2025-04-25", "Air", 103456, "Delivered"),
+            ("ORD136", "2025-04-26", "Overnight", 42565, "Delivered"),
+            ("ORD137", "2025-04-27", "Standard", 12170, "Delivered"),
+            ("ORD138", "2025-04-28", "Express", 135045, "Delivered"),
+            ("ORD139", "2025-04-29", "Air", 19989, "Pending"),
+            ("ORD140", "2025-04-30", "Overnight", 46530, "Delivered"),
+            ("ORD141", "2025-05-01", "Standard", 7622, "Pending"),
+            ("ORD142", "2025-05-02", "Express", 15450, "Shipped"),
+            ("ORD143", "2025-05-03", "Air", 87580, "Processing"),
+            ("ORD144", "2025-05-04", "Overnight", 65435, "Delivered"),
+            ("ORD145", "2025-05-05", "Standard", 4899, "Shipped"),
+            ("ORD146", "2025-05-06", "Express", 26455, "Delivered"),
+            ("ORD147", "2025-05-07", "Air", 34080, "Shipped"),
+            ("ORD148", "2025-05-08", "Overnight", 19995, "Delivered"),
+            ("ORD149", "2025-05-09", "Standard", 55033, "Shipped"),
+            ("ORD150", "2025-05-10", "Express", 123480, "Pending"),
+            ("ORD151", "2025-05-11", "Air", 65720, "Delivered"),
+            ("ORD152", "2025-05-12", "Overnight", 78211, "Delivered"),
+            ("ORD153", "2025-05-13", "Standard", 89995, "Pending"),
+            ("ORD154", "2025-05-14", "Express", 38960, "Pending"),
+            ("ORD155", "2025-05-15", "Overnight", 51275, "Pending"),
         ]
 
         # Add each seed order to the orders list
         for order_data in orders_data:
             # Each order_data is a tuple with order_id, date, shipping_type, price, and status
             self.add_order(Order(order_data[0], order_data[1], order_data[2], order_data[3], order_data[4]))
+
+
+def search_orders(query, orders):
+    """
+    Returns the orders matching the query, keeping their order. The search is case-insensitive.
+    Plain text matches any displayed column; field clauses such as "status:pending date>=2025-05-01" filter on typed columns.
+    """
+    return compile_query(query, "orders").filter(orders)
+
+
+def totals_by_status(orders):
+    """
+    Returns {status: total order value in cents} for a list of orders.
+    """
+    statuses, codes = group_codes(order.status for order in orders)
+    prices = cents_array((order.price for order in orders), len(orders))
+    return dict(zip(statuses, grouped_totals(codes, prices, len(statuses)).tolist()))
@@ -0,0 +1,56 @@
+"""
+**order_entries.py - Plain-data order lines for the material order form**
+
+**Purpose**
+- Parses pasted "SKU<TAB>qty" text into order lines and validates each line.
+- Has no Qt dependency, so it can run on a worker thread or from scripts.
+"""
+import re
+
+SKU_PATTERN = re.compile(r"^[A-Z]{3}-\d{4}$")  # Same format the entry form has always enforced
+LINE_SPLIT = re.compile(r"[\t,;]|\s+")  # Spreadsheets paste tabs; also accept commas, semicolons or spaces
+
+
+def validate_line(sku, qty_text, catalog=None):
+    """
+    Returns an error message for one (sku, quantity text) line, or "" if it is valid.
+    Blank lines are not errors; they are simply skipped on submit. With a catalog (see
+    sku_catalog.py) SKUs that are not in the inventory are errors too.
+    """
+    if not sku and not qty_text:
+        return ""
+    if not SKU_PATTERN.fullmatch(sku):
+        return f"'{sku}' is not a valid SKU (expected ABC-1234)"
+    if catalog is not None and sku not in catalog:
+        return f"'{sku}' is not in the inventory"
+    if not qty_text.isdigit():
+        return f"'{qty_text}' is not a valid quantity"
+    return ""
+
+
+def parse_entry_lines(text, catalog=None):
+    """
+    Splits pasted text into [sku, qty_text, error] lines. Empty lines are dropped and
+    SKUs are upper-cased; anything unparseable is kept with an error so it can be fixed.
+    """
+    lines = []
+    for raw in text.splitlines():
+        raw = raw.strip()
+        if not raw:
+            continue
+        fields = [field for field in LINE_SPLIT.split(raw) if field]
+        sku = fields[0].upper()
+        qty_text = fields[1] if len(fields) > 1 else ""
+        error = validate_line(sku, qty_text, catalog)
+        if not error and len(fields) > 2:
+            error = f"Unexpected extra fields: {' '.join(fields[2:])}"
+        lines.append([sku, qty_text, error])
+    return lines
+
+
+def entries_to_submit(lines):
+    """
+    Returns (sku, quantity) pairs for every filled-in line whose quantity is a number,
+    matching what the entry form has always submitted.
+    """
+    return [(sku, int(qty_text)) for sku, qty_text, _error in lines if sku and qty_text.isdigit()]
@@ -0,0 +1,148 @@
+"""
+**order_history.py - Time-travel status history for orders**
+
+**Purpose**
+- Keeps every order's status history as two compact arrays: timestamps and status codes.
+- "What was the status of ORD142 at time T" is a binary search in that order's arrays.
+- "How many orders were Pending at time T" is a binary search in a cumulative
+  count index that is extended as changes arrive.
+"""
+from array import array
+from bisect import bisect_right, insort
+from datetime import datetime
+
+STATUSES = ["Pending", "Processing", "Shipped", "Delivered"]  # Known statuses get fixed codes 0-3
+
+
+def date_to_timestamp(date):
+    """
+    Converts a 'YYYY-MM-DD' order date to a POSIX timestamp (local midnight).
+    """
+    return datetime.strptime(date, "%Y-%m-%d").timestamp()
+
+
+class StatusHistory:
+    def __init__(self):
+        """
+        Creates an empty history. Each order gets a pair of arrays:
+        timestamps ('d') and status codes ('b'), always kept in time order.
+        """
+        self.names = list(STATUSES)  # Status code -> status name
+        self.codes = {name: code for code, name in enumerate(self.names)}  # Status name -> code
+        self._times = {}  # order_id -> array('d') of change timestamps
+        self._states = {}  # order_id -> array('b') of status codes
+
+        # Global, time-ordered list of transitions feeding the cumulative index
+        self._event_times = array("d")
+        self._event_from = array("b")  # -1 when the order did not exist before
+        self._event_to = array("b")
+        self._cumulative = [array("l", [0]) for _ in self.names]  # Per status: count after the first k events
+
+    def _code(self, status):
+        """Returns the code for a status, registering statuses not seen before."""
+        code = self.codes.get(status)
+        if code is None:
+            code = len(self.names)
+            self.names.append(status)
+            self.codes[status] = code
+            self._cumulative.append(array("l", [0] * len(self._cumulative[0])))
+        return code
+
+    def record(self, order_id, status, timestamp):
+        """
+        Records that the order entered the status at the timestamp.
+        """
+        code = self._code(status)
+        times = self._times.setdefault(order_id, array("d"))
+        states = self._states.setdefault(order_id, array("b"))
+
+        position = bisect_right(times, timestamp)
+        previous = states[position - 1] if position else -1  # Status just before this change
+        times.insert(position, timestamp)
+        states.insert(position, code)
+
+        if position < len(times) - 1:
+            # Changed the past: the next change for this order now starts from this status
+            self._rebuild_events()
+        else:
+            self._add_event(timestamp, previous, code)
+
+    def _add_event(self, timestamp, previous, code):
+        """Adds one transition to the global log and extends (or rebuilds) the cumulative index."""
+        if self._event_times and timestamp < self._event_times[-1]:
+            # Out of time order (e.g. an old journal entry): rare, so rebuild from scratch
+            events = list(zip(self._event_times, self._event_from, self._event_to))
+            insort(events, (timestamp, previous, code))
+            self._load_events(events)
+            return
+
+        self._event_times.append(timestamp)
+        self._event_from.append(previous)
+        self._event_to.append(code)
+        for status_code, counts in enumerate(self._cumulative):
+            delta = (status_code == code) - (status_code == previous)
+            counts.append(counts[-1] + delta)
+
+    def _rebuild_events(self):
+        """Regenerates the global transition log from the per-order arrays."""
+        events = []
+        for order_id, times in self._times.items():
+            states = self._states[order_id]
+            previous = -1
+            for timestamp, code in zip(times, states):
+                events.append((timestamp, previous, code))
+                previous = code
+        events.sort()
+        self._load_events(events)
+
+    def _load_events(self, events):
+        """Replaces the global log with the given (timestamp, from, to) events and recomputes the index."""
+        self._event_times = array("d")
+        self._event_from = array("b")
+        self._event_to = array("b")
+        self._cumulative = [array("l", [0]) for _ in self.names]
+        for timestamp, previous, code in events:
+            self._add_event(timestamp, previous, code)
+
+    def status_at(self, order_id, timestamp):
+        """
+        Returns the order's status at the timestamp, or None if it did not exist yet.
+        """
+        times = self._times.get(order_id)
+        if not times:
+            return None
+        position = bisect_right(times, timestamp)
+        if position == 0:
+            return None
+        return self.names[self._states[order_id][position - 1]]
+
+    def count_by_status_at(self, timestamp):
+        """
+        Returns {status: number of orders in that status} as of the timestamp.
+        """
+        events_before = bisect_right(self._event_times, timestamp)
+        return {name: self._cumulative[code][events_before] for code, name in enumerate(self.names)}
+
+    def transitions(self, order_id):
+        """
+        Returns the order's full history as a list of (timestamp, status) pairs.
+        """
+        times = self._times.get(order_id, ())
+        states = self._states.get(order_id, ())
+        return [(timestamp, self.names[code]) for timestamp, code in zip(times, states)]
+
+    def to_dict(self):
+        """Returns the history in a JSON-friendly form, used by the journal snapshot."""
+        return {order_id: self.transitions(order_id) for order_id in self._times}
+
+    def load_dict(self, data):
+        """Restores history saved by to_dict(), replacing anything recorded so far."""
+        self._times.clear()
+        self._states.clear()
+        for order_id, transitions in data.items():
+            times = self._times.setdefault(order_id, array("d"))
+            states = self._states.setdefault(order_id, array("b"))
+            for timestamp, status in sorted(transitions):
+                times.append(timestamp)
+                states.append(self._code(status))
+        self._rebuild_events()
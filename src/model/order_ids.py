@@ -0,0 +1,78 @@
+"""
+**order_ids.py - Collision-free order ID allocation**
+
+**Purpose**
+- Hands out new order IDs in the existing display format (``ORD-011``) without scanning
+  the existing orders for the highest number.
+- Each thread reserves a block of numbers at a time and then allocates from it with no
+  locking at all; only reserving a block touches the shared high-water mark file, under
+  an inter-process file lock, so several desktops never receive the same number.
+- IDs from one thread are strictly increasing and every ID is unique. Numbers reserved but
+  never used (when the app exits mid-block) are simply skipped.
+
+**Usage**
+- ``python bench/benchmarks.py order-ids --threads 16 --ids 20000`` runs the contention benchmark.
+"""
+import threading
+
+from model.storage import atomic_write, data_path, lock_file, unlock_file
+
+HIGH_WATER_NAME = "order_ids.hwm"
+
+
+class OrderIdAllocator:
+    def __init__(self, prefix="ORD-", width=3, path=None, block_size=20, seed=None):
+        """
+        Creates an allocator for IDs like f"{prefix}{number:0{width}d}".
+
+        path is the high-water mark file (the highest number ever reserved). seed, a callable
+        returning the highest number already in use, is only consulted when that file does not
+        exist yet, i.e. on the very first run.
+        """
+        self.prefix = prefix
+        self.width = width
+        self.path = path or data_path(HIGH_WATER_NAME)
+        self.block_size = block_size
+        self.seed = seed
+        self._reserve_lock = threading.Lock()  # One thread at a time reads and advances the mark
+        self._local = threading.local()  # Each thread's current block: next number and end (exclusive)
+        self.blocks_reserved = 0
+
+    def _reserve_block(self):
+        """Advances the persisted high-water mark by one block and returns the block's range."""
+        with self._reserve_lock, open(self.path + ".lock", "a+b") as lock:
+            lock_file(lock)  # Other processes allocating from the same data directory wait here
+            try:
+                try:
+                    with open(self.path, "rb") as file:
+                        high_water = int(file.read() or 0)
+                except FileNotFoundError:
+                    high_water = self.seed() if self.seed else 0
+                atomic_write(self.path, str(high_water + self.block_size).encode("ascii"))
+            finally:
+                unlock_file(lock)
+            self.blocks_reserved += 1
+        return high_water + 1, high_water + self.block_size + 1
+
+    def allocate_number(self):
+        """Returns the next unused order number for the calling thread."""
+        local = self._local
+        number = getattr(local, "next", None)
+        if number is None or number >= local.end:
+            number, local.end = self._reserve_block()
+        local.next = number + 1
+        return number
+
+    def allocate(self):
+        """Returns a new order ID in the display format."""
+        return self.format(self.allocate_number())
+
+    def format(self, number):
+        return f"{self.prefix}{number:0{self.width}d}"
+
+
+def highest_number(order_ids, prefix="ORD-"):
+    """Returns the highest number among IDs with the prefix, for seeding a new allocator."""
+    numbers = [int(order_id[len(prefix):]) for order_id in order_ids
+               if order_id.startswith(prefix) and order_id[len(prefix):].isdigit()]
+    return max(numbers, default=0)
@@ -0,0 +1,392 @@
+"""
+**order_journal.py - Append-only journal of order status changes**
+
+**Purpose**
+- Records every status transition (timestamp, user, order, old and new status) as one JSON line.
+- Batches fsyncs: lines are group-committed on a short timer or once a batch fills up,
+  so rapid status edits do not each pay a disk flush.
+- On startup the journal is replayed onto the persisted (or seeded) orders, and every
+  so often it is compacted into a snapshot so replay stays short. Compaction runs on the
+  group-commit thread, never in the caller of a status change.
+- Several desktops can share one data directory. Appending, reading the lines other desktops
+  added (catch_up) and compacting all hold an inter-process lock, and compaction first catches
+  up with everyone else's lines so none are lost when the file is emptied.
+- The journal starts with a header line holding its generation, which every compaction bumps
+  and also writes into the snapshot, so a reader knows the file was compacted (and that the
+  snapshot covers the lines it had not read) without guessing from the file size.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from model.money import to_cents
+from model.order import Order, OrderManager
+from model.storage import atomic_write, data_path, lock_file, unlock_file
+
+JOURNAL_NAME = "order_status.journal"
+SNAPSHOT_NAME = "orders.snapshot.json"
+
+
+def _header_line(generation):
+    """Returns the first line of a journal of the given generation."""
+    return (json.dumps({"generation": generation}, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _read_header(file):
+    """
+    Returns (generation, header length) of an open journal. A journal written before
+    generations existed has no header and counts as generation 0.
+    """
+    file.seek(0)
+    first = file.readline()
+    try:
+        header = json.loads(first)
+    except ValueError:
+        return 0, 0  # Empty, or a torn first line
+    if isinstance(header, dict) and "generation" in header:
+        return header["generation"], len(first)
+    return 0, 0
+
+
+class OrderJournal:
+    def __init__(self, path=None, snapshot_path=None, flush_interval=0.05, max_batch=64, compact_every=1000):
+        """
+        Opens (or creates) the journal file and starts the group-commit thread.
+
+        flush_interval is the longest a change waits before being synced, max_batch the number
+        of pending changes that forces an early sync, and compact_every the number of changes
+        after which the journal is folded into the snapshot.
+        """
+        self.path = path or data_path(JOURNAL_NAME)
+        self.snapshot_path = snapshot_path or data_path(SNAPSHOT_NAME)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+
+        self._file = open(self.path, "ab")
+        self._io_lock = threading.Lock()  # Serializes writes, syncs, reads and truncation of the file
+        self._lock_file = open(f"{self.path}.lock", "a+b")  # ...across processes, taken inside _io_lock
+        self._condition = threading.Condition()  # Guards the pending batch and the counters below
+        self._pending = []  # Encoded lines waiting for the next group commit
+        self._appended = 0  # Lines handed to the journal
+        self._durable = 0  # Lines written and synced
+        self._flush_requested = False
+        self._compact_requested = False  # Set by record(); the writer thread compacts
+        self._closed = False
+        self.records_since_compaction = 0
+        self.manager = None  # OrderManager being journaled, set by attach()
+        self.writer_id = uuid.uuid4().hex[:12]  # Tags this process's lines for readers following the file
+        self.generation = 0  # Generation of the journal as this process last read it
+        self.snapshot_generation = 0  # Generation recorded in the last snapshot this process read or wrote
+        self._read_offset = 0  # End of the lines this process has applied
+        self._caught_up = []  # (order, old_status) applied by a compaction, not yet returned by catch_up()
+
+        with self._locked(), open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self._file.write(_header_line(0))  # New journal
+                self._file.flush()
+            self.generation, _header = _read_header(file)
+            self._read_offset = os.fstat(file.fileno()).st_size
+
+        self._writer = threading.Thread(target=self._write_loop, name="order-journal", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)  # Don't lose the last batch on a normal exit
+
+    @contextmanager
+    def _locked(self):
+        """
+        Holds the journal against this process's other threads and against other processes.
+        Every read, write and truncation of the file happens inside it.
+        """
+        with self._io_lock:
+            lock_file(self._lock_file)
+            try:
+                yield
+            finally:
+                unlock_file(self._lock_file)
+
+    def attach(self, manager: OrderManager):
+        """
+        Starts journaling every status change made through the manager.
+        """
+        self.manager = manager
+        manager.listeners.append(self._on_status_change)
+
+    def _on_status_change(self, order, old_status, new_status, user, timestamp):
+        """Listener registered on the OrderManager."""
+        self.record(order.order_id, old_status, new_status, user, timestamp)
+
+    def record(self, order_id, old_status, new_status, user, timestamp=None):
+        """
+        Queues one status transition. It becomes durable at the next group commit.
+        """
+        entry = {
+            "ts": timestamp if timestamp is not None else time.time(),
+            "user": user,
+            "order_id": order_id,
+            "from": old_status,
+            "to": new_status,
+            "writer": self.writer_id,
+        }
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+
+        with self._condition:
+            if self._closed:
+                raise ValueError("journal is closed")
+            self._pending.append(line)
+            self._appended += 1
+            self.records_since_compaction += 1
+            if self.manager is not None and self.records_since_compaction >= self.compact_every:
+                self._compact_requested = True  # Done by the writer thread after its next batch
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify_all()  # Wake the writer to start (or cut short) its timer
+
+    def _write_loop(self):
+        """
+        Group-commit thread: waits for changes, collects a batch, writes it and syncs once,
+        and compacts the journal when record() asked for it.
+        """
+        while True:
+            with self._condition:
+                while not (self._pending or self._closed or self._compact_requested):
+                    self._condition.wait()
+                if self._pending:
+                    # Give more changes a short window to join this batch
+                    deadline = time.monotonic() + self.flush_interval
+                    while len(self._pending) < self.max_batch and not (self._closed or self._flush_requested):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                elif self._closed:
+                    return  # Closed and nothing left to write
+
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+                compact = self._compact_requested and not self._closed
+                self._compact_requested = False
+                # Take the I/O lock before letting go of the batch: compact() needs both locks, so
+                # it cannot snapshot and truncate between this handoff and the write below
+                self._io_lock.acquire()
+
+            try:
+                lock_file(self._lock_file)  # Other desktops may be compacting the same file
+                try:
+                    self._write_batch(batch)
+                finally:
+                    unlock_file(self._lock_file)
+            finally:
+                self._io_lock.release()
+
+            with self._condition:
+                self._durable += len(batch)
+                self._condition.notify_all()
+
+            if compact and self.manager is not None:
+                try:
+                    self.compact(self.manager)
+                except OSError:
+                    pass  # Disk trouble; the journal is still complete, so try again at the next threshold
+
+    def _write_batch(self, batch):
+        """Appends lines and syncs them. Caller holds the I/O lock and the file lock."""
+        if batch:
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def flush(self):
+        """
+        Forces a group commit now and waits until everything recorded so far is on disk.
+        """
+        with self._condition:
+            target = self._appended
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._durable < target and self._writer.is_alive():
+                self._condition.wait(0.1)
+
+    def replay(self, manager: OrderManager):
+        """
+        Applies every journaled transition, in order, onto the manager's orders.
+        A torn last line from a crash is ignored. Returns the number of changes applied.
+
+        A journal older than the snapshot loaded before it (the process stopped between writing
+        the snapshot and emptying the journal) is already in the snapshot, so it is emptied instead.
+        """
+        applied = 0
+        with self._locked(), open(self.path, "rb") as file:
+            generation, header = _read_header(file)
+            if generation < self.snapshot_generation:
+                self._start_generation(self.snapshot_generation)
+                return 0
+            file.seek(header)
+            for raw in file:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue  # Partially written line
+                # Apply directly so replay isn't journaled again, keeping the original timestamp
+                if manager.apply_status_change(entry["order_id"], entry["to"], entry["ts"]) is not None:
+                    applied += 1
+            self.generation = generation
+            self._read_offset = file.tell()  # catch_up() continues from here
+        return applied
+
+    def catch_up(self, manager: OrderManager):
+        """
+        Applies the status changes other desktops added to the journal since the last call onto
+        the manager, and the compaction snapshot first if someone compacted the journal meanwhile.
+        Returns (order, old_status) for every order whose status actually changed.
+        """
+        self.flush()  # Our own changes must be in the file before another desktop's snapshot is applied
+        with self._locked():
+            changes = self._caught_up + self._catch_up(manager)
+            self._caught_up = []
+        return changes
+
+    def _catch_up(self, manager):
+        """Reads the journal to its end and applies what this process has not seen. Caller holds the lock."""
+        changes = []
+        with open(self.path, "rb") as file:
+            generation, header = _read_header(file)
+            compacted = generation != self.generation
+            if compacted:
+                # Someone else compacted the journal: their snapshot holds the lines we had not read
+                changes.extend(self._apply_snapshot(manager))
+                self.generation, self._read_offset = generation, header
+            file.seek(self._read_offset)
+            data = file.read()
+        complete = data.rfind(b"\n") + 1  # Leave a half-written last line for the next call
+        self._read_offset += complete
+
+        for raw in data[:complete].splitlines():
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if entry.get("writer") == self.writer_id and not compacted:
+                continue  # Our own change, already applied (after a snapshot it has to be applied again)
+            changes.extend(self._apply(manager, entry["order_id"], entry["to"], entry["ts"]))
+        return changes
+
+    def _apply_snapshot(self, manager):
+        """Brings statuses up to date with the compaction snapshot."""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return []
+        self.snapshot_generation = snapshot.get("generation", 0)
+        changes = []
+        taken_at = snapshot.get("taken_at", 0)
+        for order_id, _date, _shipping, _price, status in snapshot["orders"]:
+            changes.extend(self._apply(manager, order_id, status, taken_at))
+        return changes
+
+    @staticmethod
+    def _apply(manager, order_id, status, timestamp):
+        """Applies one status unless the order already has it."""
+        order = manager.get_order_by_id(order_id)
+        if order is None or order.status == status:
+            return []
+        old_status = order.status
+        manager.apply_status_change(order_id, status, timestamp)  # Not re-journaled
+        return [(order, old_status)]
+
+    def load_snapshot(self, manager: OrderManager):
+        """
+        Adds the orders from the last compaction snapshot to the manager.
+        Returns False if there is no usable snapshot.
+        """
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        legacy_prices = snapshot.get("version", 1) < 3  # Before version 3 prices were float dollars
+        for order_id, date, shipping_type, price, status in snapshot["orders"]:
+            if legacy_prices:
+                price = to_cents(price)
+            manager.add_order(Order(order_id, date, shipping_type, price, status))
+        if "history" in snapshot:
+            with manager.lock.write():
+                manager.history.load_dict(snapshot["history"])  # Version 1 snapshots have no history
+        self.snapshot_generation = snapshot.get("generation", 0)  # Snapshots before version 4 have none
+        return True
+
+    def compact(self, manager: OrderManager):
+        """
+        Writes the manager's current orders to the snapshot and empties the journal.
+        Normally called on the writer thread; safe to call from any thread.
+        """
+        with self._condition:  # Hold off new records so none fall between snapshot and truncate
+            batch, self._pending = self._pending, []
+            with self._locked():  # No other desktop appends or compacts until the journal is emptied
+                self._write_batch(batch)  # Journal is complete up to this point
+                # Other desktops' lines we have not read yet would be lost with the journal: apply
+                # them first (catch_up() hands them to the views later)
+                self._caught_up.extend(self._catch_up(manager))
+                generation = self.generation + 1
+
+                with manager.lock.read():  # Orders and history from the same moment
+                    snapshot = {
+                        "version": 4,
+                        "generation": generation,  # The journal generation that continues this snapshot
+                        "taken_at": time.time(),
+                        "orders": [
+                            [order.order_id, order.date, order.shipping_type, order.price, order.status]
+                            for order in manager.orders
+                        ],
+                        "history": manager.history.to_dict(),  # Keeps time-travel queries working after compaction
+                    }
+                    atomic_write(self.snapshot_path, json.dumps(snapshot).encode("utf-8"))
+                self.snapshot_generation = generation
+                self._start_generation(generation)  # Everything in the journal is now in the snapshot
+
+            self._durable += len(batch)
+            self.records_since_compaction = 0
+            self._condition.notify_all()
+
+    def _start_generation(self, generation):
+        """Empties the journal and starts it again at the given generation. Caller holds the lock."""
+        header = _header_line(generation)
+        self._file.truncate(0)
+        self._file.write(header)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.generation = generation
+        self._read_offset = len(header)
+
+    def close(self):
+        """
+        Commits any pending changes and closes the file. Safe to call more than once.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+        with self._io_lock:
+            self._file.close()
+            self._lock_file.close()
+
+
+def load_order_manager(journal: OrderJournal):
+    """
+    Builds the OrderManager for the application: the compacted snapshot (or the seed data
+    on first run), plus every change journaled since. The journal is attached afterwards
+    so new status changes are recorded.
+    """
+    manager = OrderManager()
+    if not journal.load_snapshot(manager):
+        manager.seed_orders()
+    journal.replay(manager)
+    journal.attach(manager)
+    return manager
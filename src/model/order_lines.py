@@ -0,0 +1,202 @@
+"""
+**order_lines.py - Line-item store with order and SKU indexes**
+
+**Purpose**
+- Keeps every order line (order, SKU, quantity, unit price in cents) as compact column
+  arrays, one entry per line, instead of only an item count or a total per order.
+- A forward index (order -> its lines) and a reverse index (SKU -> the lines that order it)
+  are extended on every insert, so "which pending orders include DRL-0008", an order's
+  lines and its total cost only touch the lines in the answer, never the whole store.
+- The committed quantity per SKU (units on orders that have not been delivered yet) is
+  kept as a running total, updated when an order is added or changes status.
+
+**Usage**
+- ``load_order_lines(incoming_orders.orders, inventory_data)`` builds the store; the
+  controller keeps it current from the incoming order and arrival listeners.
+- ``python bench/benchmarks.py order-lines`` compares an indexed lookup with a full scan.
+"""
+from array import array
+
+from model.incoming_orders import incoming_order_listeners
+from model.sku_index import sku_index_for
+
+OPEN_STATUSES = {"Pending", "Processing", "Shipped"}  # Lines on these orders count as committed
+
+
+class OrderLineStore:
+    def __init__(self):
+        """
+        Creates an empty store. Orders and SKUs get integer codes in the order they are first seen.
+        """
+        self.order_ids = []  # Order code -> order ID
+        self.order_codes = {}  # Order ID -> order code
+        self.skus = []  # SKU code -> SKU
+        self.sku_ids = {}  # SKU -> SKU code
+
+        # One entry per line, column by column
+        self._line_orders = array("l")  # Order code
+        self._line_skus = array("l")  # SKU code
+        self._line_quantities = array("q")
+        self._line_prices = array("q")  # Unit price in cents
+
+        self._order_lines = []  # Order code -> array of its line numbers (forward index)
+        self._sku_lines = []  # SKU code -> array of line numbers ordering it (reverse index)
+        self._order_status = []  # Order code -> status
+        self._order_totals = array("q")  # Order code -> sum of quantity x unit price, in cents
+        self._committed = array("q")  # SKU code -> units on open orders
+        self.version = 0  # Bumped on every change
+        self.rows = None  # Inventory rows new material orders are priced from, once attached
+
+    def __len__(self):
+        """Returns the number of lines in the store."""
+        return len(self._line_orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.order_codes
+
+    def _sku_code(self, sku):
+        """Returns the code for a SKU, registering SKUs not seen before."""
+        code = self.sku_ids.get(sku)
+        if code is None:
+            code = self.sku_ids[sku] = len(self.skus)
+            self.skus.append(sku)
+            self._sku_lines.append(array("l"))
+            self._committed.append(0)
+        return code
+
+    def add_order(self, order_id, lines, status="Pending"):
+        """
+        Adds an order's (sku, quantity, unit price in cents) lines. Raises ValueError if the
+        order is already in the store.
+        """
+        if order_id in self.order_codes:
+            raise ValueError(f"order {order_id} is already in the line store")
+        order_code = self.order_codes[order_id] = len(self.order_ids)
+        self.order_ids.append(order_id)
+        self._order_status.append(status)
+        order_lines = array("l")
+        total = 0
+        is_open = status in OPEN_STATUSES
+
+        for sku, quantity, unit_price in lines:
+            sku_code = self._sku_code(sku)
+            line = len(self._line_orders)
+            self._line_orders.append(order_code)
+            self._line_skus.append(sku_code)
+            self._line_quantities.append(quantity)
+            self._line_prices.append(unit_price)
+            order_lines.append(line)
+            self._sku_lines[sku_code].append(line)
+            total += quantity * unit_price
+            if is_open:
+                self._committed[sku_code] += quantity
+
+        self._order_lines.append(order_lines)
+        self._order_totals.append(total)
+        self.version += 1
+
+    def set_status(self, order_id, status):
+        """
+        Records an order's new status, moving its quantities in or out of the committed
+        totals when it opens or closes. Returns False if the order is not in the store.
+        """
+        order_code = self.order_codes.get(order_id)
+        if order_code is None:
+            return False
+        was_open = self._order_status[order_code] in OPEN_STATUSES
+        self._order_status[order_code] = status
+        sign = (status in OPEN_STATUSES) - was_open
+        if sign:
+            for line in self._order_lines[order_code]:
+                self._committed[self._line_skus[line]] += sign * self._line_quantities[line]
+        self.version += 1
+        return True
+
+    def status(self, order_id):
+        """Returns the order's status, or None if it is not in the store."""
+        order_code = self.order_codes.get(order_id)
+        return None if order_code is None else self._order_status[order_code]
+
+    def lines_for(self, order_id):
+        """Returns the order's lines as (sku, quantity, unit price) tuples (empty if unknown)."""
+        order_code = self.order_codes.get(order_id)
+        if order_code is None:
+            return []
+        return [
+            (self.skus[self._line_skus[line]], self._line_quantities[line], self._line_prices[line])
+            for line in self._order_lines[order_code]
+        ]
+
+    def order_total(self, order_id):
+        """Returns the order's total cost in cents (0 if unknown)."""
+        order_code = self.order_codes.get(order_id)
+        return 0 if order_code is None else self._order_totals[order_code]
+
+    def lines_with(self, sku, status=None):
+        """
+        Returns (order_id, quantity, unit price) for every line ordering the SKU, oldest order
+        first, optionally only on orders in the given status.
+        """
+        sku_code = self.sku_ids.get(sku)
+        if sku_code is None:
+            return []
+        found = []
+        for line in self._sku_lines[sku_code]:
+            order_code = self._line_orders[line]
+            if status is None or self._order_status[order_code] == status:
+                found.append((self.order_ids[order_code], self._line_quantities[line], self._line_prices[line]))
+        return found
+
+    def orders_with(self, sku, status=None):
+        """
+        Returns the IDs of the orders that include the SKU, oldest first, optionally only
+        those in the given status (e.g. "Pending").
+        """
+        order_ids = []
+        for order_id, _quantity, _price in self.lines_with(sku, status):
+            if not order_ids or order_ids[-1] != order_id:  # An order's lines are stored together
+                order_ids.append(order_id)
+        return order_ids
+
+    def committed(self, sku):
+        """Returns the units of the SKU on orders that are not delivered yet."""
+        sku_code = self.sku_ids.get(sku)
+        return 0 if sku_code is None else self._committed[sku_code]
+
+    def attach(self, rows):
+        """Adds every material order placed from now on, priced from rows (inventory_data)."""
+        self.rows = rows
+        incoming_order_listeners.append(self.on_order_added)
+
+    def on_order_added(self, shipment):
+        """Incoming order listener: add the new material order at the current inventory prices."""
+        self.add_order(shipment["id"], material_order_lines(shipment, self.rows), shipment["status"])
+
+    def on_shipment_received(self, shipment, missing):
+        """Closes a received shipment so its lines no longer count as committed."""
+        self.set_status(shipment["id"], shipment["status"])
+
+
+def material_order_lines(shipment, rows):
+    """
+    Returns a material order's (sku, quantity) lines as (sku, quantity, unit price) lines,
+    priced from the inventory rows (0 for SKUs that are not in the inventory).
+    """
+    index = sku_index_for(rows)
+    lines = []
+    for sku, quantity in shipment.get("lines", []):
+        position = index.lookup(sku)
+        lines.append((sku, quantity, rows[position][3] if position is not None else 0))
+    return lines
+
+
+def load_order_lines(shipments, rows):
+    """
+    Returns a line store holding the material orders (dicts like those in incoming_orders.orders),
+    attached so orders placed later are added too.
+    """
+    store = OrderLineStore()
+    for shipment in shipments:
+        store.add_order(shipment["id"], material_order_lines(shipment, rows), shipment["status"])
+    store.attach(rows)
+    return store
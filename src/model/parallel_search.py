@@ -0,0 +1,102 @@
+"""
+**parallel_search.py - Sharded inventory search across worker processes**
+
+**Purpose**
+- For very large catalogs, splits the inventory into N contiguous shards and searches them
+  in parallel in a process pool, merging the results back into original row order.
+- Workers map the on-disk snapshot (see inventory_snapshot.py) once when they start, so
+  rows are shared through the OS page cache and nothing is pickled per query except the
+  query text and the matching positions.
+- Catalogs below a size threshold are searched in-process, where pool overhead would dominate.
+
+**Usage**
+- Set ``CONTRACTOR_PLUS_SEARCH_SHARDS=<n>`` to enable it for snapshot-backed inventory searches.
+- ``python bench/benchmarks.py parallel-search --rows 2000000`` benchmarks 1..N shards on a synthetic catalog.
+"""
+import os
+
+from model.inventory_snapshot import InventorySnapshot
+from model.search_query import compile_query
+
+MIN_PARALLEL_ROWS = 200_000  # Below this, in-process search is faster than dispatching to workers
+
+_worker_snapshot = None  # Each worker process's mapping of the snapshot
+
+
+def _open_snapshot(path):
+    """Process-pool initializer: maps the snapshot once per worker."""
+    global _worker_snapshot
+    _worker_snapshot = InventorySnapshot(path)  # Checksum left to the parent
+
+
+def _search_shard(query, start, stop):
+    """Searches rows [start, stop) of the worker's snapshot. Returns matching positions."""
+    return compile_query(query, "inventory").filter_positions(_worker_snapshot, start, stop)
+
+
+class ShardedSearch:
+    def __init__(self, snapshot, shards=None, min_rows=MIN_PARALLEL_ROWS):
+        """
+        Prepares a sharded search over an open InventorySnapshot. The worker pool is started
+        on the first query large enough to need it.
+        """
+        self.snapshot = snapshot
+        self.shards = max(1, shards or os.cpu_count() or 1)
+        self.min_rows = min_rows
+        self._pool = None
+
+    def shard_bounds(self):
+        """Returns the (start, stop) row range of each shard."""
+        count = len(self.snapshot)
+        size = -(-count // self.shards)  # Ceiling division
+        return [(start, min(start + size, count)) for start in range(0, count, size)] if count else []
+
+    def search_positions(self, query):
+        """
+        Returns the positions of all matching rows, in original row order.
+        """
+        if self.shards == 1 or len(self.snapshot) < self.min_rows:
+            return compile_query(query, "inventory").filter_positions(self.snapshot)  # Small: stay in-process
+
+        if self._pool is None:
+            import multiprocessing  # Imported on first use: multiprocessing is slow to import
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Spawn, never fork: the GUI process already runs the journal writer, the model client's
+            # watcher and Qt's thread pool, and a forked child could inherit a lock one of them held.
+            # Workers only need the snapshot's path; the initializer maps it afresh.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.shards, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_open_snapshot, initargs=(self.snapshot.path,),
+            )
+        futures = [self._pool.submit(_search_shard, query, start, stop) for start, stop in self.shard_bounds()]
+
+        positions = []
+        for future in futures:  # Shards are contiguous and in order, so concatenation keeps row order
+            positions.extend(future.result())
+        return positions
+
+    def close(self):
+        """Shuts the worker pool down."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_sharded = {}  # Snapshot path -> ShardedSearch, for the configured shard count
+
+
+def sharded_search_for(rows):
+    """
+    Returns the ShardedSearch to use for a row sequence, or None when sharding is not enabled
+    (CONTRACTOR_PLUS_SEARCH_SHARDS unset) or the rows are not a snapshot on disk.
+    """
+    shards = int(os.environ.get("CONTRACTOR_PLUS_SEARCH_SHARDS", "0") or 0)
+    if shards < 2 or not isinstance(rows, InventorySnapshot):
+        return None
+    search = _sharded.get(rows.path)
+    if search is None or search.snapshot is not rows:
+        if search is not None:
+            search.close()
+        search = _sharded[rows.path] = ShardedSearch(rows, shards)
+    return search
@@ -0,0 +1,177 @@
+"""
+**report_export.py - Streaming CSV and XLSX export of inventory and order lists**
+
+**Purpose**
+- Writes report rows to CSV, or to a minimal XLSX workbook (zipped SpreadsheetML built with
+  the standard library only), pulling rows from a generator so the whole table is never
+  held in memory as text.
+- Reports progress every few thousand rows and stops early when cancelled; the output is
+  written to a temporary file and only renamed into place once it is complete.
+- Has no Qt dependency so it runs on a worker thread.
+
+**Usage**
+- ``python bench/benchmarks.py report-export --rows 1000000`` times a 1M-row export in both formats.
+"""
+import csv
+import os
+import zipfile
+from decimal import Decimal
+from html import escape as _escape
+
+from model.money import cents_to_decimal
+
+INVENTORY_HEADER = ["#", "Item Name", "Description", "SKU", "Price", "Quantity"]
+ORDER_HEADER = ["Order ID", "Date", "Shipping", "Price", "Status"]
+
+PROGRESS_EVERY = 5000  # Rows between progress callbacks
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled; no output file is left behind."""
+
+
+def inventory_report_rows(rows, positions):
+    """Yields one report row per inventory position, numbered like the inventory table."""
+    for number, position in enumerate(positions, start=1):
+        name, description, sku, price, quantity = rows[position]
+        yield [number, name, description, sku, cents_to_decimal(price), quantity]
+
+
+def order_report_rows(orders):
+    """Yields one report row per order, with the columns of the work-order table."""
+    for order in orders:
+        yield [order.order_id, order.date, order.shipping_type, cents_to_decimal(order.price), order.status]
+
+
+def _write_csv(file, header, rows, tick):
+    writer = csv.writer(file)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        tick(count)
+
+
+def escape(text):
+    """Escapes &, < and > for XML text (html.escape is much cheaper to import than xml.sax.saxutils)."""
+    return _escape(text, quote=False)
+
+
+def _column_name(index):
+    """0 -> A, 25 -> Z, 26 -> AA."""
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _xlsx_row(number, values, columns):
+    """One <row> of SpreadsheetML. Numbers are stored as numbers, everything else as inline strings."""
+    cells = []
+    for column, value in zip(columns, values):
+        ref = f"{column}{number}"
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+# Fixed parts of the package: just enough for Excel, LibreOffice and openpyxl to open it
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _workbook_xml(sheet_name):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _write_xlsx(path, header, rows, tick, sheet_name):
+    columns = [_column_name(index) for index in range(len(header))]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as package:
+        for name, xml in _XLSX_PARTS.items():
+            package.writestr(name, xml)
+        package.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+
+        # The sheet is streamed into the archive, one buffered chunk of rows at a time
+        with package.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            chunk = [_xlsx_row(1, header, columns)]
+            for count, row in enumerate(rows, start=1):
+                chunk.append(_xlsx_row(count + 1, row, columns))
+                if len(chunk) >= 1000:
+                    sheet.write("".join(chunk).encode("utf-8"))
+                    chunk = []
+                tick(count)
+            sheet.write("".join(chunk).encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+
+
+def export_rows(path, header, rows, progress=None, is_cancelled=None, sheet_name="Report"):
+    """
+    Writes the header and rows (any iterable, typically a generator) to path as CSV, or as
+    XLSX when the path ends in .xlsx. progress(count) is called every PROGRESS_EVERY rows;
+    is_cancelled() is checked at the same points and raises ExportCancelled when it is true.
+    Returns the number of rows written.
+    """
+    written = [0]
+
+    def tick(count):
+        written[0] = count
+        if count % PROGRESS_EVERY == 0:
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            if progress:
+                progress(count)
+
+    temporary = path + ".part"
+    try:
+        if path.lower().endswith(".xlsx"):
+            _write_xlsx(temporary, header, rows, tick, sheet_name)
+        else:
+            with open(temporary, "w", newline="", encoding="utf-8") as file:
+                _write_csv(file, header, rows, tick)
+        os.replace(temporary, path)  # Only a finished export appears under the real name
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return written[0]
+
@@ -0,0 +1,102 @@
+"""
+**rw_lock.py - Reader-writer lock for the shared inventory and order stores**
+
+**Purpose**
+- Lets any number of threads read a store at the same time (searches, reports, refreshes),
+  while a writer (status change, received shipment) gets the store to itself for the short
+  moment it takes to apply a change, so no reader ever sees half of a change.
+- Writers are preferred: once a writer is waiting, new readers queue behind it, so a steady
+  stream of searches cannot starve a status change.
+- Re-entrant: a thread may read again while reading, and read or write again while writing.
+  Upgrading a read to a write would deadlock, so it raises RuntimeError instead.
+
+**Usage**
+- ``with lock.read(): ...`` around code that must see a consistent store.
+- ``with lock.write(): ...`` around the mutation only; notify listeners after releasing it.
+"""
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    def __init__(self):
+        """Creates an unlocked lock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0  # Threads currently holding the read lock
+        self._writer = None  # Ident of the thread holding the write lock
+        self._writer_depth = 0  # Nested write() calls by that thread
+        self._waiting_writers = 0
+        self._local = threading.local()  # Per-thread read depth
+
+    def acquire_read(self):
+        """Blocks until no writer holds or is waiting for the lock, then takes a read hold."""
+        local = self._local
+        reads = getattr(local, "reads", 0)
+        if reads:
+            local.reads = reads + 1  # Nested read: this thread already holds it
+            return
+        counted = self._writer != threading.get_ident()  # Reading inside our own write needs no wait
+        if counted:
+            with self._condition:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        local.reads = 1
+        local.counted = counted
+
+    def release_read(self):
+        """Releases one read hold."""
+        local = self._local
+        local.reads -= 1
+        if local.reads == 0 and local.counted:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()  # A waiting writer may go now
+
+    def acquire_write(self):
+        """Blocks until no other thread reads or writes, then takes the lock exclusively."""
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if getattr(self._local, "reads", 0):
+            raise RuntimeError("cannot take the write lock while holding the read lock")
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            except BaseException:
+                self._waiting_writers -= 1
+                self._condition.notify_all()  # Readers held back for us may go
+                raise
+            self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        """Releases one write hold; the last one lets readers and writers in again."""
+        self._writer_depth -= 1
+        if self._writer_depth == 0:
+            with self._condition:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Context manager holding the read lock."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Context manager holding the write lock."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,113 @@
+"""
+**search_cache.py - Versioned LRU cache of search results**
+
+**Purpose**
+- Clerks repeat the same few searches all day; this keeps recent results so a repeated
+  search is a dictionary lookup instead of a rescan.
+- Entries are keyed by (data set, data version, normalized query). The model bumps its
+  version on every change, so a stale result can never be returned.
+- Bounded both by entry count and by approximate memory use, with hit/miss counters.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from model.search_query import compile_query
+
+
+class SearchCache:
+    def __init__(self, max_entries=256, max_bytes=4 * 1024 * 1024):
+        """
+        Creates an empty cache holding at most max_entries results and about max_bytes of them.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (result, size); least recently used first
+        self._lock = threading.Lock()  # Searches may run on worker threads
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the cached result for the key (marking it recently used), or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        """
+        Stores a result (a tuple of row positions), evicting least recently used entries to stay in bounds.
+        """
+        size = sys.getsizeof(result) + sys.getsizeof(key)  # Positions are small ints, mostly shared objects
+        if size > self.max_bytes:
+            return  # Too big to be worth caching
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (result, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _key, (_result, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Returns the counters as a dictionary, including the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+inventory_search_cache = SearchCache()  # Shared by every inventory search in the process
+order_search_cache = SearchCache()  # Shared by every work-order search in the process
+
+
+def normalize_query(query):
+    """
+    Normalizes a query for use in a cache key. Searches are case-insensitive, so case is folded;
+    spacing is kept because plain-text searches match it literally.
+    """
+    return query.lower()
+
+
+def cached_positions(cache, schema_name, query, rows, version, search=None):
+    """
+    Returns the positions of the rows matching the query, from the cache when possible.
+    version identifies the state of the rows; pass None for data without a version (not cached).
+    search, if given, is called as search(query) on a miss instead of scanning in-process.
+    """
+    if search is None:
+        search = lambda query: compile_query(query, schema_name).filter_positions(rows)
+    if version is None:
+        return search(query)
+
+    key = (schema_name, id(rows), version, normalize_query(query))
+    positions = cache.get(key)
+    if positions is None:
+        positions = tuple(search(query))  # Immutable, safe to share
+        cache.put(key, positions)
+    return positions
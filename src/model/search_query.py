@@ -0,0 +1,232 @@
+"""
+**search_query.py - Field-scoped search query language**
+
+**Purpose**
+- Compiles clerk queries such as ``sku:HAM- qty<5 price>=20`` or
+  ``status:pending shipping:express date>=2025-05-01`` into typed predicates over the row columns.
+- Any text that is not a ``field<op>value`` clause is matched the old way: a case-insensitive
+  substring of any field.
+
+**Syntax**
+- ``field:value``  substring match for text fields, prefix match for ``sku`` and ``date``,
+  equality for numbers.
+- ``field=value`` / ``field!=value``  exact (case-insensitive) equality.
+- ``field<value``, ``<=``, ``>``, ``>=``  typed comparison (numbers and ISO dates).
+- Values containing spaces can be quoted: ``desc:"claw hammer"``.
+"""
+import re
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+
+from model.money import format_money, to_cents
+from model.sku_index import sku_index_for
+
+# Matches one clause: field name, operator, then a quoted or bare value
+CLAUSE_PATTERN = re.compile(r'(?<!\S)([A-Za-z_]+)(<=|>=|!=|:|=|<|>)("[^"]*"|\S+)')
+
+DATE_PATTERN = re.compile(r"^\d{4}(-\d{2}){0,2}$")  # Full or partial ISO date (2025, 2025-05, 2025-05-01)
+
+
+def _inventory_text(row):
+    """Fields used for plain-text inventory matching (every column, as displayed)."""
+    name, description, sku, price, quantity = row
+    return [str(name), str(description), str(sku), format_money(price), str(quantity)]
+
+
+def _order_text(order):
+    """Fields used for plain-text order matching (the columns shown in the order table)."""
+    return [
+        str(order.order_id),
+        str(order.date),
+        str(order.shipping_type),
+        format_money(order.price),
+        str(order.status),
+    ]
+
+
+class QuerySchema:
+    def __init__(self, name, fields, text_fields, sku_column=None):
+        """
+        Describes how to query one kind of row.
+
+        fields maps each field name (and alias) to a (getter, kind) pair where kind is
+        'text', 'sku', 'date', 'int' or 'money'. text_fields returns the strings used for
+        plain-text matching. sku_column, if set, lets sku clauses use the SKU index.
+        """
+        self.name = name
+        self.fields = fields
+        self.text_fields = text_fields
+        self.sku_column = sku_column
+
+
+INVENTORY_SCHEMA = QuerySchema(
+    "inventory",
+    {
+        "name": (itemgetter(0), "text"),
+        "item": (itemgetter(0), "text"),
+        "desc": (itemgetter(1), "text"),
+        "description": (itemgetter(1), "text"),
+        "sku": (itemgetter(2), "sku"),
+        "price": (itemgetter(3), "money"),
+        "qty": (itemgetter(4), "int"),
+        "quantity": (itemgetter(4), "int"),
+    },
+    _inventory_text,
+    sku_column=2,
+)
+
+ORDER_SCHEMA = QuerySchema(
+    "orders",
+    {
+        "id": (attrgetter("order_id"), "text"),
+        "order": (attrgetter("order_id"), "text"),
+        "date": (attrgetter("date"), "date"),
+        "shipping": (attrgetter("shipping_type"), "text"),
+        "price": (attrgetter("price"), "money"),
+        "status": (attrgetter("status"), "text"),
+    },
+    _order_text,
+)
+
+SCHEMAS = {schema.name: schema for schema in (INVENTORY_SCHEMA, ORDER_SCHEMA)}
+
+# Relative cost of evaluating a predicate; cheap and selective clauses run first
+_COSTS = {"int": 1, "money": 1, "date": 2, "sku": 2, "text": 3}
+
+
+def _parse_value(kind, raw):
+    """
+    Converts a clause value to the column's type. Returns None if the value is not valid for it.
+    """
+    if kind == "int":
+        return int(raw) if re.fullmatch(r"-?\d+", raw) else None
+    if kind == "money":
+        try:
+            return to_cents(raw)  # Prices are stored in cents
+        except ValueError:
+            return None
+    if kind == "date":
+        return raw if DATE_PATTERN.match(raw) else None
+    return raw.lower()
+
+
+def _make_predicate(getter, kind, op, value):
+    """
+    Builds a predicate for one clause. Text comparisons are case-insensitive.
+    """
+    if kind in ("int", "money"):
+        compare = {
+            ":": lambda a: a == value, "=": lambda a: a == value, "!=": lambda a: a != value,
+            "<": lambda a: a < value, "<=": lambda a: a <= value,
+            ">": lambda a: a > value, ">=": lambda a: a >= value,
+        }[op]
+        return lambda row: compare(getter(row))
+
+    if kind in ("date", "sku") and op == ":":
+        return lambda row: str(getter(row)).lower().startswith(value.lower())  # Prefix match
+    if op == ":":
+        return lambda row: value in str(getter(row)).lower()  # Substring match
+
+    # Remaining operators compare the whole (lower-cased) string
+    compare = {
+        "=": lambda a: a == value.lower(), "!=": lambda a: a != value.lower(),
+        "<": lambda a: a < value.lower(), "<=": lambda a: a <= value.lower(),
+        ">": lambda a: a > value.lower(), ">=": lambda a: a >= value.lower(),
+    }[op]
+    return lambda row: compare(str(getter(row)).lower())
+
+
+class CompiledQuery:
+    def __init__(self, schema, clauses, text):
+        """
+        A parsed query: a list of (field, op, value, predicate) clauses plus any leftover plain text.
+        """
+        self.schema = schema
+        self.clauses = clauses  # Already ordered cheapest first
+        self.text = text  # Lower-cased plain text, or "" if there is none
+
+    def matches(self, row):
+        """
+        Returns True if the row satisfies every clause and contains the plain text.
+        """
+        for _field, _op, _value, predicate in self.clauses:
+            if not predicate(row):
+                return False
+        if self.text:
+            return any(self.text in field.lower() for field in self.schema.text_fields(row))
+        return True
+
+    def candidate_positions(self, rows):
+        """
+        Uses the SKU index for sku clauses when one applies.
+        Returns a sorted list of row positions to check, or None to scan every row.
+        """
+        if self.schema.sku_column is None:
+            return None
+        for field, op, value, _predicate in self.clauses:
+            if self.schema.fields[field][1] != "sku":
+                continue
+            index = sku_index_for(rows)
+            if op == "=":
+                position = index.lookup(value)
+                return [] if position is None else [position]
+            if op == ":":
+                return index.prefix(value)
+        return None
+
+    def filter_positions(self, rows, start=0, stop=None):
+        """
+        Returns the positions (in original order) of all rows that match the query.
+        start and stop limit the search to one slice of the rows (used by sharded search).
+        """
+        stop = len(rows) if stop is None else stop
+        if not self.clauses and not self.text:
+            return list(range(start, stop))  # Empty query matches everything
+
+        candidates = self.candidate_positions(rows)
+        if candidates is None:
+            candidates = range(start, stop)
+        elif start or stop != len(rows):
+            candidates = [position for position in candidates if start <= position < stop]
+        return [position for position in candidates if self.matches(rows[position])]
+
+    def filter(self, rows):
+        """
+        Returns the matching rows in their original order.
+        """
+        return [rows[position] for position in self.filter_positions(rows)]
+
+
+@lru_cache(maxsize=256)
+def compile_query(query, schema_name):
+    """
+    Parses a query string for the named schema ('inventory' or 'orders').
+    Compiled queries are cached, so repeated searches skip parsing entirely.
+    """
+    schema = SCHEMAS[schema_name]
+    clauses = []
+    leftover = []  # Pieces of the query that are plain text
+    last_end = 0
+
+    for match in CLAUSE_PATTERN.finditer(query):
+        field, op, raw = match.group(1).lower(), match.group(2), match.group(3)
+        if field not in schema.fields:
+            continue  # Not a known field, so it stays part of the plain text
+
+        getter, kind = schema.fields[field]
+        value = _parse_value(kind, raw.strip('"'))
+        if value is None or (kind == "sku" and op not in (":", "=", "!=")):
+            continue  # Invalid value for this column; treat it as plain text
+
+        leftover.append(query[last_end:match.start()])
+        last_end = match.end()
+        clauses.append((field, op, value, _make_predicate(getter, kind, op, value)))
+
+    if not clauses:
+        # No field clauses at all: keep the original any-field substring behaviour exactly
+        return CompiledQuery(schema, [], query.lower())
+
+    leftover.append(query[last_end:])
+    text = " ".join(" ".join(leftover).split()).lower()  # Collapse the gaps left by removed clauses
+    clauses.sort(key=lambda clause: _COSTS[schema.fields[clause[0]][1]])
+    return CompiledQuery(schema, clauses, text)
@@ -0,0 +1,186 @@
+"""
+**sku_catalog.py - Keystroke-speed SKU checks for the order form**
+
+**Purpose**
+- Tells the material order form, as each SKU is typed, whether it is badly formatted, not in
+  the inventory, out of stock, or fine, so a bad line is marked before the order is submitted.
+- ``LocalSkuCatalog`` answers from the SKU hash index over the inventory rows (one dict
+  lookup, whatever the catalog size or the number of lines checked) and reads the quantity
+  on hand from the row it finds.
+- ``RemoteSkuCatalog`` answers from a Bloom filter of the server's SKUs: a miss means the SKU
+  certainly does not exist, a hit means it very probably does. The filter is fetched on a
+  background thread and downloaded again only when the server's SKUs change, so a check never
+  waits on the network; until it arrives, or while the server is unreachable, only the format
+  is checked. The server still checks every line on submit, and stock is not known remotely.
+- Checks read shared caches (the SKU index, the inventory snapshot), so call them from the
+  GUI thread, not from workers.
+
+**Usage**
+- ``catalog = sku_catalog(model_client, load_inventory)`` picks the remote or local catalog.
+- ``sku_state("DRL-0008", catalog)`` returns SKU_OK, BAD_FORMAT, UNKNOWN_SKU or OUT_OF_STOCK.
+- ``python bench/benchmarks.py sku-catalog`` times checking order lines against a large catalog.
+"""
+import base64
+import hashlib
+import math
+import threading
+import time
+
+from model.order_entries import SKU_PATTERN
+from model.sku_index import sku_index_for
+
+SKU_OK = ""
+BAD_FORMAT = "bad format"
+UNKNOWN_SKU = "unknown SKU"
+OUT_OF_STOCK = "out of stock"
+
+FALSE_POSITIVE_RATE = 0.01  # Share of unknown SKUs a remote filter lets through (the server catches them)
+FILTER_RETRY_SECONDS = 5.0  # Wait after a failed filter fetch before asking the server again
+
+
+def sku_state(sku, catalog=None):
+    """
+    Returns the state of a typed SKU: BAD_FORMAT, UNKNOWN_SKU, OUT_OF_STOCK or SKU_OK. An empty
+    SKU is SKU_OK (blank lines are skipped on submit). Without a catalog only the format is checked.
+    """
+    if not sku:
+        return SKU_OK
+    if not SKU_PATTERN.fullmatch(sku):
+        return BAD_FORMAT
+    return catalog.state(sku) if catalog is not None else SKU_OK
+
+
+class LocalSkuCatalog:
+    def __init__(self, rows):
+        """
+        Checks SKUs against inventory rows. rows is a row list or a callable returning the
+        current rows (such as load_inventory), so received stock and new items are seen.
+        """
+        self.rows = rows
+        self.listeners = []  # Kept for interface compatibility; the rows are read directly, never fetched
+
+    def state(self, sku):
+        """Returns UNKNOWN_SKU, OUT_OF_STOCK or SKU_OK for a well-formed SKU."""
+        rows = self.rows() if callable(self.rows) else self.rows
+        position = sku_index_for(rows).lookup(sku)  # Rebuilt only when rows were added
+        if position is None:
+            return UNKNOWN_SKU
+        return OUT_OF_STOCK if rows[position][4] <= 0 else SKU_OK
+
+    def __contains__(self, sku):
+        rows = self.rows() if callable(self.rows) else self.rows
+        return sku in sku_index_for(rows)
+
+    def quantity(self, sku):
+        """Returns the quantity on hand, or None if the SKU is not in the inventory."""
+        rows = self.rows() if callable(self.rows) else self.rows
+        position = sku_index_for(rows).lookup(sku)
+        return None if position is None else rows[position][4]
+
+
+class RemoteSkuCatalog:
+    def __init__(self, client):
+        """
+        Checks SKUs against the shared server's Bloom filter (client is a ModelClient), and
+        starts fetching the filter in the background.
+        """
+        self.client = client
+        self.bloom = None  # Latest filter from the server; None until one arrives (format-only checks)
+        self.listeners = []  # Callbacks () run on the fetch thread when a new filter arrives
+        self._checked_version = None  # Server data version the filter was last confirmed at
+        self._fetching = False
+        self._retry_at = 0.0
+        self.refresh()
+
+    def refresh(self):
+        """
+        Asks the server for a newer filter on a background thread if its data changed since the
+        last check. Returns at once; does nothing while a fetch is running or just failed.
+        """
+        version = self.client.version
+        if self._fetching or version == self._checked_version or time.monotonic() < self._retry_at:
+            return
+        self._fetching = True
+        threading.Thread(target=self._fetch, args=(version,), name="sku-filter", daemon=True).start()
+
+    def _fetch(self, version):
+        bloom = self.bloom
+        try:
+            bloom = self.client.sku_filter()  # Only downloaded again if the server's SKUs changed
+            self._checked_version = version
+        except Exception:  # Server unreachable or failing: keep the last filter (or format-only checks)
+            self._retry_at = time.monotonic() + FILTER_RETRY_SECONDS
+        finally:
+            self._fetching = False
+        if bloom is not self.bloom:
+            self.bloom = bloom
+            for listener in self.listeners:
+                listener()
+
+    def state(self, sku):
+        """Returns UNKNOWN_SKU if the server certainly has no such SKU, otherwise SKU_OK."""
+        return SKU_OK if sku in self else UNKNOWN_SKU
+
+    def __contains__(self, sku):
+        self.refresh()
+        bloom = self.bloom
+        return bloom is None or sku.upper() in bloom
+
+    def quantity(self, sku):
+        """Stock is not known remotely; always None."""
+        return None
+
+
+def sku_catalog(client=None, rows=None):
+    """Returns the catalog for the shared server if there is a client, otherwise one over the rows."""
+    return RemoteSkuCatalog(client) if client else LocalSkuCatalog(rows)
+
+
+class BloomFilter:
+    def __init__(self, bits, hashes, data=None):
+        """
+        Creates an empty filter of the given number of bits and hash functions, or one holding
+        data (the bytes of a filter built elsewhere).
+        """
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_items(cls, items, false_positive_rate=FALSE_POSITIVE_RATE):
+        """Returns a filter sized for the items, holding all of them."""
+        items = list(items)
+        count = max(1, len(items))
+        bits = max(64, math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2))
+        bloom = cls(bits, max(1, round(bits / count * math.log(2))))
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + number * second) % self.bits for number in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.data[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        data = self.data
+        return all(data[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_dict(self):
+        """Returns the filter as JSON-ready data for the model server."""
+        return {"bits": self.bits, "hashes": self.hashes, "data": base64.b64encode(bytes(self.data)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(payload["bits"], payload["hashes"], base64.b64decode(payload["data"]))
+
+
+def sku_filter_for(rows):
+    """Returns a Bloom filter of the upper-cased SKUs in the inventory rows."""
+    return BloomFilter.for_items(sku_index_for(rows).positions)
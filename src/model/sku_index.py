@@ -0,0 +1,81 @@
+"""
+**sku_index.py - Hash and prefix index over inventory SKUs**
+
+**Purpose**
+- Answers "which row holds this SKU" in O(1) and "which rows start with this prefix" in O(log n + k)
+  so searches and validation do not have to walk the whole inventory.
+- The index belongs to the rows it was built for: a snapshot keeps its own index (and drops it
+  when it is released), and the one plain row list in use (inventory_data) has a single slot,
+  so replaced row sequences are never kept alive by the index.
+- Rows that repeat an earlier SKU are reported with a warning and listed in ``duplicates``.
+"""
+import warnings
+from bisect import bisect_left
+
+
+class SkuIndex:
+    def __init__(self, rows):
+        """
+        Builds the index for a list of inventory rows. SKU is at index 2 in each row.
+        """
+        self.rows = rows  # The row list this index was built from
+        self.size = len(rows)  # Row count at build time, used to detect appended rows
+        self.positions = {}  # Upper-case SKU -> row position
+        self.duplicates = []  # (SKU, position of the first row, position of the repeat)
+        positions = self.positions
+        for position, row in enumerate(rows):
+            sku = str(row[2]).upper()
+            first = positions.setdefault(sku, position)  # Lookups find the first row for a SKU
+            if first != position:
+                self.duplicates.append((sku, first, position))
+        self.sorted_skus = sorted(positions)  # Sorted SKUs for prefix lookups
+        if self.duplicates:
+            shown = ", ".join(f"{sku} (rows {first + 1} and {repeat + 1})" for sku, first, repeat in self.duplicates[:5])
+            more = f" and {len(self.duplicates) - 5} more" if len(self.duplicates) > 5 else ""
+            warnings.warn(f"{len(self.duplicates)} inventory rows repeat an earlier SKU: {shown}{more}", stacklevel=3)
+
+    def __contains__(self, sku):
+        """
+        Returns True if the SKU exists in the inventory.
+        """
+        return sku.upper() in self.positions
+
+    def lookup(self, sku):
+        """
+        Returns the row position of the SKU, or None if it does not exist.
+        """
+        return self.positions.get(sku.upper())
+
+    def prefix(self, prefix):
+        """
+        Returns the row positions (in row order) of every SKU starting with the prefix.
+        """
+        prefix = prefix.upper()
+        start = bisect_left(self.sorted_skus, prefix)  # First SKU that could match
+        matches = []
+        for sku in self.sorted_skus[start:]:
+            if not sku.startswith(prefix):
+                break  # Sorted order means no later SKU can match either
+            matches.append(self.positions[sku])
+        return sorted(matches)
+
+
+# Index of the plain row list indexed last (lists cannot carry an attribute of their own)
+_list_index = None
+
+
+def sku_index_for(rows):
+    """
+    Returns the SKU index for a row sequence, rebuilding it if rows were added since it was built.
+    Row sequences that accept attributes (InventorySnapshot) keep their index as rows.sku_index.
+    """
+    global _list_index
+    owned = not isinstance(rows, list)
+    index = getattr(rows, "sku_index", None) if owned else _list_index
+    if index is None or index.rows is not rows or index.size != len(rows):
+        index = SkuIndex(rows)
+        if owned:
+            rows.sku_index = index
+        else:
+            _list_index = index
+    return index
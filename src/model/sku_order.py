@@ -1,126 +1,66 @@
-from PyQt6.QtWidgets import QMessageBox, QLineEdit
+"""
+**sku_order.py - Material order validation and placement**
+
+**Purpose**
+- The steps of placing a material order that do not involve the screen: validating the
+  entries (locally or on the shared model server), flagging unusually large quantities,
+  and numbering and recording the order.
+- Has no Qt dependency, so the command line can validate order files with it; the
+  confirmation dialogs live in view/order_submission.py.
+"""
 from model.inventory_data import check_order_validity
+from model.incoming_orders import add_incoming_order
+from model.order_entries import entries_to_submit, parse_entry_lines
 
+HIGH_QUANTITY = 100  # Lines ordering at least this many units are confirmed separately
 
-def handle_order_submission(view):
-    # Extract the entries (SKU and quantity) from the view
-    entries = get_entries(view)
 
-    # If no entries are found, show a warning message and exit
-    if not entries:
-        show_custom_message(
-            view,
-            "Invalid Input",
-            "Please enter at least one valid SKU and quantity.",
-            icon=QMessageBox.Icon.Warning
-        )
-        return
-
-    # Validate SKUs and quantities using the model logic
-    errors, valid_entries = check_order_validity(entries)
-    if errors:
-        # If validation failed, show an error message with the issues
-        show_custom_message(
-            view,
-            "Order Validation Failed",
-            "\n".join(errors),
-            icon=QMessageBox.Icon.Critical
-        )
-        return
-
-    # Check for high quantity entries (>= 100) and ask for user confirmation
-    high_quantity_entries = [(sku, qty) for sku, qty in valid_entries if qty >= 100]
-    if high_quantity_entries:
-        # Prepare the message text for high quantity items
-        high_qty_text = "\n".join([f"{sku}: {qty}" for sku, qty in high_quantity_entries])
-        confirm = show_custom_message(
-            view,
-            "High Quantity Confirmation",
-            f"These SKUs have a quantity of 100 or more:\n\n{high_qty_text}\n\nProceed?",
-            icon=QMessageBox.Icon.Question,
-            buttons=QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-        if confirm != QMessageBox.StandardButton.Yes:
-            return
-
-    # Confirm final order details with the user before proceeding
-    order_summary = "\n".join([f"{sku}: {qty}" for sku, qty in valid_entries])
-    confirm = show_custom_message(
-        view,
-        "Confirm Order",
-        f"Do you want to place this order?\n\n{order_summary}",
-        icon=QMessageBox.Icon.Question,
-        buttons=QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-    )
-    if confirm != QMessageBox.StandardButton.Yes:
-        return
-
-    # Clear form inputs after successful submission
-    clear_entries(view)
-
-
-def get_entries(view):
+def validate_entries(entries, client=None):
     """
-    Extracts SKU and quantity entries from the view, returning a list of valid entries.
+    Validates (sku, quantity) entries against the inventory, on the shared server if a
+    client is given. Returns lists of errors and valid entries.
     """
-    entries = []
-    # Loop through each entry frame in the scroll layout
-    for i in range(view.scroll_layout.count()):
-        entry_frame = view.scroll_layout.itemAt(i).widget()
-        if not entry_frame:
-            continue
+    if client:
+        return client.validate_order(entries)
+    return check_order_validity(entries)
 
-        # Find all QLineEdit fields (expecting SKU and quantity)
-        line_edits = entry_frame.findChildren(QLineEdit)
-        if len(line_edits) >= 2:
-            sku = line_edits[0].text().strip()
-            qty_text = line_edits[1].text().strip()
 
-            # Only add the entry if SKU is filled and quantity is a valid number
-            if sku and qty_text.isdigit():
-                entries.append((sku, int(qty_text)))
+def high_quantity_entries(entries):
+    """Returns the entries ordering HIGH_QUANTITY units or more."""
+    return [(sku, qty) for sku, qty in entries if qty >= HIGH_QUANTITY]
 
-    return entries
 
+def order_summary(entries):
+    """Returns the entries as text, one "SKU: quantity" line each."""
+    return "\n".join(f"{sku}: {qty}" for sku, qty in entries)
 
-def clear_entries(view):
+
+def place_order(valid_entries, order_ids=None, client=None, user=None):
     """
-    Clears all entries in the form, except for the first one.
-    Resets the input fields in the first entry frame.
+    Places a validated material order. With a client the shared server numbers it;
+    otherwise order_ids (an OrderIdAllocator) does. The order is added to the incoming
+    orders (and recorded there, unless the server already recorded it). It is not demand:
+    the forecast only learns from stock actually used.
+    Returns (errors, order_id); order_id is None when the server rejected the order.
     """
-    # Remove all entries except the first one
-    for i in reversed(range(1, view.scroll_layout.count())):
-        widget = view.scroll_layout.itemAt(i).widget()
-        if widget:
-            widget.setParent(None)
-
-    # Clear the input fields in the first entry (if any)
-    first_widget = view.scroll_layout.itemAt(0).widget()
-    if first_widget:
-        line_edits = first_widget.findChildren(QLineEdit)
-        for le in line_edits:
-            le.clear()
+    if client:
+        errors, _, order_id = client.submit_order(valid_entries, user=user)
+        if errors:
+            return errors, None
+    else:
+        order_id = order_ids.allocate()  # No scan of existing orders needed
+    add_incoming_order(order_id, valid_entries, user=user, record=not client)
+    return [], order_id
 
 
-def show_custom_message(parent, title, text, icon=QMessageBox.Icon.Information, buttons=QMessageBox.StandardButton.Ok):
+def read_order_file(path):
     """
-    Utility function to display a styled message box with the specified parameters.
+    Reads an order file with one "SKU quantity" line each (comma, tab or space separated,
+    the same formats the order form accepts when pasting).
+    Returns (entries, line errors) where line errors are "line N: message" strings.
     """
-    msg = QMessageBox(parent)
-    msg.setIcon(icon)
-    msg.setWindowTitle(title)
-    msg.setText(text)
-    msg.setStandardButtons(buttons)
-    msg.setStyleSheet("""
-        QLabel {
-            color: black;
-            font-family: 'Roboto';
-            font-size: 14px;
-        }
-        QPushButton {
-            color: black;
-            font-family: 'Roboto';
-            font-size: 13px;
-        }
-    """)
-    return msg.exec()
+    with open(path, "r", encoding="utf-8") as file:
+        numbered = [(number, raw) for number, raw in enumerate(file, start=1) if raw.strip()]
+    lines = parse_entry_lines("\n".join(raw.strip() for _, raw in numbered))
+    line_errors = [f"line {number}: {line[2]}" for (number, _), line in zip(numbered, lines) if line[2]]
+    return entries_to_submit(lines), line_errors
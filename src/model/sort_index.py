@@ -0,0 +1,136 @@
+"""
+**sort_index.py - Cached per-column sort permutations**
+
+**Purpose**
+- Sorts table rows by any column without re-sorting the rows themselves: each column gets a
+  permutation (row positions in key order) computed with a typed key the first time it is used.
+- Permutations are patched in place when a row changes instead of being recomputed.
+- Sorting a search result is an intersection with the cached permutation, not a new sort.
+"""
+from bisect import bisect_left, insort
+
+
+class SortIndex:
+    def __init__(self, rows, keys):
+        """
+        rows is the row sequence being displayed; keys maps a column number to a function
+        returning that column's typed sort key for a row (e.g. int cents for prices).
+        """
+        self.rows = rows
+        self.keys = keys
+        self._sorted = {}  # column -> sorted list of (key, position) pairs
+        self._ranks = {}  # column -> list where ranks[position] is the row's place in sort order
+
+    def _entries(self, column):
+        """Returns the column's sorted (key, position) list, computing it on first use."""
+        entries = self._sorted.get(column)
+        if entries is None:
+            key = self.keys[column]
+            entries = sorted((key(row), position) for position, row in enumerate(self.rows))
+            self._sorted[column] = entries
+        return entries
+
+    def permutation(self, column):
+        """
+        Returns the row positions in ascending order of the column (ties keep row order).
+        """
+        return [position for _key, position in self._entries(column)]
+
+    def ranks(self, column):
+        """
+        Returns a list mapping each row position to its place in the column's sort order.
+        """
+        ranks = self._ranks.get(column)
+        if ranks is None:
+            ranks = [0] * len(self.rows)
+            for rank, (_key, position) in enumerate(self._entries(column)):
+                ranks[position] = rank
+            self._ranks[column] = ranks
+        return ranks
+
+    def sorted_positions(self, column, positions=None, descending=False):
+        """
+        Returns positions ordered by the column. With positions=None every row is returned;
+        otherwise only the given positions (e.g. a search result) are, using whichever is
+        cheaper: ordering them by rank, or walking the permutation and keeping members.
+        Ties keep row order in both directions.
+        """
+        if positions is None:
+            entries = self._entries(column)
+        elif len(positions) * 8 < len(self.rows):
+            ranks = self.ranks(column)  # Small result: sort just those rows by their cached rank
+            ordered = sorted(positions, key=ranks.__getitem__)
+            if not descending:
+                return ordered
+            key = self.keys[column]
+            entries = [(key(self.rows[position]), position) for position in ordered]
+        else:
+            wanted = set(positions)  # Large result: one pass over the permutation
+            entries = [entry for entry in self._entries(column) if entry[1] in wanted]
+
+        if not descending:
+            return [position for _key, position in entries]
+        # Walk the runs of equal keys from the last one back, each run in row order, so ties
+        # stay in row order like sorted(..., reverse=True) instead of being reversed too
+        result = []
+        end = len(entries)
+        while end:
+            start = end - 1
+            last_key = entries[start][0]
+            while start and entries[start - 1][0] == last_key:
+                start -= 1
+            result.extend(position for _key, position in entries[start:end])
+            end = start
+        return result
+
+    def update_row(self, position, old_row=None):
+        """
+        Moves one edited row to its new place in every cached permutation.
+        old_row is the row's previous values if the row object was replaced rather than edited.
+        """
+        row = self.rows[position]
+        for column, entries in self._sorted.items():
+            key = self.keys[column]
+            if old_row is not None:
+                old_index = bisect_left(entries, (key(old_row), position))
+            else:
+                # Row edited in place: its old key is unknown, so find the entry by position
+                old_index = next(i for i, (_key, pos) in enumerate(entries) if pos == position)
+            del entries[old_index]
+            insort(entries, (key(row), position))
+        self._ranks.clear()  # Ranks shift for every row between the old and new place
+
+    def append_row(self):
+        """
+        Adds the last row of the sequence (just appended) to every cached permutation.
+        """
+        position = len(self.rows) - 1
+        row = self.rows[position]
+        for column, entries in self._sorted.items():
+            insort(entries, (self.keys[column](row), position))
+        self._ranks.clear()
+
+
+def _text(value):
+    """Case-insensitive sort key for text columns."""
+    return str(value).lower()
+
+
+# Sort keys per InventoryWindow column: #, Item Name, Description, SKU, Price, Quantity
+INVENTORY_SORT_KEYS = {
+    0: lambda row: 0,  # "#" is the original row order, which is the tie-breaker anyway
+    1: lambda row: _text(row[0]),
+    2: lambda row: _text(row[1]),
+    3: lambda row: _text(row[2]),
+    4: lambda row: int(row[3]),
+    5: lambda row: int(row[4]),
+}
+
+# Sort keys per OrderWindow column: Order ID, Date, Shipping, Price, Status
+ORDER_SORT_KEYS = {
+    0: lambda order: _text(order.order_id),
+    1: lambda order: order.date,  # ISO dates sort correctly as strings
+    2: lambda order: _text(order.shipping_type),
+    3: lambda order: int(order.price),
+    4: lambda order: _text(order.status),
+}
@@ -0,0 +1,112 @@
+"""
+**startup_preload.py - Background preloading while the login window is shown**
+
+**Purpose**
+- The user spends a few seconds typing credentials; this uses them. Loading the order and
+  inventory stores, building indexes and decoding images start on worker threads as soon
+  as the login window appears, so a successful login can show the dashboard at once.
+- Records a startup trace: when each task ran, how long the login had to wait for
+  anything still running, and how much loading was hidden behind the login screen.
+- Has no Qt dependency; tasks are plain callables.
+- A task that fails is left out of the results (and recorded in ``failures``), so the caller
+  loads that piece itself as if nothing had been preloaded.
+
+**Usage**
+- Set ``CONTRACTOR_PLUS_STARTUP_TRACE=1`` to print the trace to stderr once the dashboard is shown.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StartupTrace:
+    def __init__(self):
+        """Starts the trace clock."""
+        self.started = time.perf_counter()
+        self.events = []  # (seconds since start, message)
+        self._lock = threading.Lock()
+
+    def mark(self, message):
+        """Records a timestamped event (callable from any thread)."""
+        with self._lock:
+            self.events.append((time.perf_counter() - self.started, message))
+
+    def report(self):
+        """Returns the trace as text, one event per line."""
+        with self._lock:
+            return "\n".join(f"[startup {elapsed * 1000:8.1f} ms] {message}" for elapsed, message in self.events)
+
+    def emit(self):
+        """Prints the trace to stderr when CONTRACTOR_PLUS_STARTUP_TRACE is set."""
+        if os.environ.get("CONTRACTOR_PLUS_STARTUP_TRACE"):
+            print(self.report(), file=sys.stderr)
+
+
+class Preloader:
+    def __init__(self, tasks, trace=None, workers=4):
+        """
+        Starts running the tasks (name -> callable) on worker threads right away.
+        Tasks given as (callable, dependency names) run after their dependencies, receiving
+        the dependencies' results as arguments.
+        """
+        self.trace = trace or StartupTrace()
+        self.listeners = []  # Callbacks (done, total, name) run on the worker thread as each task finishes
+        self._durations = {}  # Task name -> seconds it ran
+        self.failures = {}  # Task name -> exception it (or a task it depends on) raised
+        self._lock = threading.Lock()
+        self._total = len(tasks)
+        self.trace.mark(f"preload started: {', '.join(tasks)}")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preload")
+        self._futures = {}
+        for name, task in tasks.items():
+            function, dependencies = task if isinstance(task, tuple) else (task, ())
+            self._futures[name] = self._executor.submit(self._run, name, function, dependencies)
+        self._executor.shutdown(wait=False)  # Threads exit once the queued tasks are done
+
+    def _run(self, name, function, dependencies):
+        start = time.perf_counter()
+        try:
+            arguments = [self._futures[dependency].result() for dependency in dependencies]
+            start = time.perf_counter()  # Time the task itself, not the wait for its dependencies
+            return function(*arguments)
+        except Exception as error:
+            with self._lock:
+                self.failures[name] = error
+            raise
+        finally:
+            with self._lock:
+                self._durations[name] = time.perf_counter() - start
+                done = len(self._durations)
+                error = self.failures.get(name)
+            outcome = f"preloaded {name}" if error is None else f"preload of {name} failed ({error!r})"
+            self.trace.mark(f"{outcome} in {self._durations[name] * 1000:.1f} ms ({done}/{self._total})")
+            for listener in self.listeners:
+                listener(done, self._total, name)
+
+    def progress(self):
+        """Returns (finished tasks, total tasks)."""
+        with self._lock:
+            return len(self._durations), self._total
+
+    def results(self):
+        """
+        Waits for every task and returns name -> result, recording how long the caller
+        had to wait and how much preloading overlapped the time before it asked.
+        Tasks that failed are left out; their exceptions are in failures.
+        """
+        asked = time.perf_counter()
+        results = {}
+        for name, future in self._futures.items():
+            if future.exception() is None:  # Waits for the task
+                results[name] = future.result()
+        finished = time.perf_counter()
+
+        waited = finished - asked
+        busy = sum(self._durations.values())  # What loading one task after another at login would have cost
+        self.trace.mark(
+            f"preload complete: {busy * 1000:.1f} ms of loading, waited {waited * 1000:.1f} ms at login, "
+            f"saved {max(busy - waited, 0) * 1000:.1f} ms"
+        )
+        return results
@@ -0,0 +1,68 @@
+"""
+**storage.py - On-disk locations and safe file writes for the model layer**
+
+**Purpose**
+- Keeps every generated data file (snapshots, journals, logs) under one directory.
+- Provides an atomic write so a crash never leaves a half-written file behind.
+- Provides an inter-process file lock for files shared by several desktops.
+"""
+import os
+import tempfile
+
+try:
+    import fcntl
+
+    def lock_file(file):
+        """Blocks until this process holds an exclusive lock on the open file."""
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def unlock_file(file):
+        """Releases a lock taken with lock_file()."""
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def lock_file(file):
+        """Blocks until this process holds an exclusive lock on the open file."""
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def unlock_file(file):
+        """Releases a lock taken with lock_file()."""
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+DATA_DIR = os.environ.get("CONTRACTOR_PLUS_DATA_DIR", "data")  # Relative to the working directory, like resources/
+
+_UMASK = os.umask(0)  # Read once (it can only be read by setting it), so written files get the usual permissions
+os.umask(_UMASK)
+
+
+def data_path(name):
+    """
+    Returns the path of a file inside the data directory, creating the directory if needed.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+def atomic_write(path, data):
+    """
+    Writes bytes to a temporary file next to the target, syncs it, then renames it over the target.
+    Readers see either the old file or the new one, never a partial write. Every write gets its own
+    temporary file, so processes writing the same file at once never rename each other's half-written one.
+    """
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())  # Make sure the bytes are on disk before the rename
+        os.chmod(temp_path, 0o666 & ~_UMASK)  # mkstemp creates files readable by their owner only
+        os.replace(temp_path, path)  # Atomic on both POSIX and Windows
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass  # Already renamed or never created
+        raise
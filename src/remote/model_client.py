@@ -0,0 +1,270 @@
+"""
+**model_client.py - Client for the shared model server**
+
+**Purpose**
+- Talks to model_server.py over a small pool of keep-alive HTTP connections.
+- Caches read results locally; a background long-poll on ``/events`` clears the cache
+  as soon as the server reports a change, so clients never serve stale data for long.
+- RemoteOrderManager lets the existing windows use the server's orders unchanged.
+
+**Usage**
+- Set ``CONTRACTOR_PLUS_SERVER=127.0.0.1:8765`` before starting the app to use a running server.
+- ``python bench/benchmarks.py server-throughput --spawn-server --clients 8`` runs a throughput test.
+"""
+import http.client
+import json
+import os
+import queue
+import threading
+from urllib.parse import quote, urlencode
+
+from model.order import Order
+from model.sku_catalog import BloomFilter
+
+
+class ModelClientError(Exception):
+    """Raised when the server answers with an error status."""
+
+
+class ServerUnavailable(ConnectionError):
+    """Raised when the server cannot be reached or its answer cannot be read."""
+
+
+class ModelClient:
+    def __init__(self, host="127.0.0.1", port=8765, pool_size=4, watch=True, timeout=30.0):
+        """
+        Creates the connection pool. With watch=True a background thread long-polls the
+        server and clears the read cache whenever the data version changes.
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()  # Idle keep-alive connections, most recently used first
+        for _ in range(pool_size):
+            self._pool.put(None)  # Connections are opened lazily
+
+        self._cache = {}  # Request path -> response payload
+        self._cache_lock = threading.Lock()
+        self.version = 0  # Latest data version seen from the server
+        self.listeners = []  # Callbacks (version, changes) run on the watcher thread after each push
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.available = True  # False from a failed request until the next one succeeds
+        self.outages = 0  # Times the server stopped answering, so each outage is reported once
+        self._sku_filter = (None, None)  # (server's SKU set key, decoded filter) from the last download
+
+        self._closed = threading.Event()
+        self._watcher = None
+        if watch:
+            self._watcher = threading.Thread(target=self._watch, name="model-client-watch", daemon=True)
+            self._watcher.start()
+
+    def _request(self, method, path, payload=None, timeout=None):
+        """Sends one request on a pooled connection, retrying once if the connection went stale."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+        connection = self._pool.get()
+        try:
+            try:
+                for attempt in range(2):
+                    if connection is None:
+                        connection = http.client.HTTPConnection(self.host, self.port, timeout=timeout or self.timeout)
+                    try:
+                        connection.request(method, path, body=body, headers=headers)
+                        response = connection.getresponse()
+                        data = json.loads(response.read())
+                        break
+                    except (ConnectionError, http.client.HTTPException):
+                        connection.close()
+                        connection = None  # Server closed an idle connection; reconnect once
+                        if attempt:
+                            raise
+            except (OSError, http.client.HTTPException, ValueError) as error:
+                if self.available:
+                    self.available = False
+                    self.outages += 1
+                raise ServerUnavailable(f"Cannot reach the model server at {self.host}:{self.port} ({error})") from error
+        except BaseException:
+            if connection is not None:
+                connection.close()
+            self._pool.put(None)
+            raise
+        self._pool.put(connection)
+        self.available = True
+
+        if response.status != 200:
+            raise ModelClientError(data.get("error", f"HTTP {response.status}"))
+        self._see_version(data.get("version", 0))
+        return data
+
+    def _see_version(self, version):
+        """Drops cached reads if the server's data moved past the version they were read at."""
+        with self._cache_lock:
+            if version > self.version:
+                self.version = version
+                self._cache.clear()
+
+    def _cached_get(self, path):
+        """GET with the local read cache."""
+        with self._cache_lock:
+            if path in self._cache:
+                self.cache_hits += 1
+                return self._cache[path]
+            self.cache_misses += 1
+        data = self._request("GET", path)
+        with self._cache_lock:
+            if data.get("version", 0) == self.version:
+                self._cache[path] = data  # Only cache results that are still current
+        return data
+
+    def _watch(self):
+        """Long-polls /events and invalidates the cache on every pushed change."""
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        while not self._closed.is_set():
+            try:
+                connection.request("GET", f"/events?since={self.version}")
+                data = json.loads(connection.getresponse().read())
+            except (OSError, http.client.HTTPException, ValueError):
+                connection.close()
+                if self._closed.wait(1.0):  # Server unreachable; back off before retrying
+                    break
+                continue
+            if data["changes"]:
+                self._see_version(data["version"])
+                for listener in self.listeners:
+                    listener(data["version"], data["changes"])
+        connection.close()
+
+    # === Model operations ===
+
+    def search_inventory(self, query):
+        """Returns the inventory rows matching the query."""
+        return self._cached_get(f"/inventory/search?{urlencode({'q': query})}")["rows"]
+
+    def sku_filter(self):
+        """
+        Returns a Bloom filter of the server's SKUs. The filter is only downloaded again when the
+        server's SKUs changed; otherwise the server just confirms the one held. Blocks on the
+        network, so GUI code reaches it through RemoteSkuCatalog's background fetch.
+        """
+        key, bloom = self._sku_filter
+        data = self._request("GET", "/skus/filter" if key is None else f"/skus/filter?{urlencode({'key': key})}")
+        if "filter" in data:
+            key, bloom = data["key"], BloomFilter.from_dict(data["filter"])
+            self._sku_filter = (key, bloom)
+        return bloom
+
+    def validate_order(self, entries):
+        """Returns (errors, valid_entries) for a list of (sku, qty) entries."""
+        data = self._request("POST", "/skus/validate", {"entries": entries})
+        return data["errors"], [tuple(entry) for entry in data["valid"]]
+
+    def submit_order(self, entries, user=None):
+        """
+        Places a material order. Returns (errors, valid_entries, order_id); nothing is placed
+        (and order_id is None) if there are errors.
+        """
+        data = self._request("POST", "/orders/submit", {"entries": entries, "user": user})
+        return data["errors"], [tuple(entry) for entry in data["valid"]], data.get("order_id")
+
+    def get_material_orders(self):
+        """Returns the material orders (dicts like those in incoming_orders.orders), including every one placed."""
+        data = self._request("GET", "/material_orders")
+        return data["orders"]
+
+    def get_orders(self, query=""):
+        """Returns the work orders (newest first) as Order objects."""
+        data = self._cached_get(f"/orders?{urlencode({'q': query})}")
+        return [Order(**order) for order in data["orders"]]
+
+    def get_order(self, order_id, at=None):
+        """Returns (order, status at the timestamp) for one order."""
+        path = f"/orders/{quote(order_id)}" + (f"?at={at}" if at is not None else "")
+        data = self._request("GET", path)
+        return Order(**data["order"]), data["status_at"]
+
+    def change_order_status(self, order_id, new_status, user=None):
+        """Changes an order's status on the server."""
+        data = self._request("POST", f"/orders/{quote(order_id)}/status", {"status": new_status, "user": user})
+        return Order(**data["order"])
+
+    def close(self):
+        """Stops the watcher and closes pooled connections."""
+        self._closed.set()
+        while not self._pool.empty():
+            connection = self._pool.get_nowait()
+            if connection is not None:
+                connection.close()
+
+
+class RemoteOrderManager:
+    '''
+    Stand-in for OrderManager that reads and writes orders through a ModelClient,
+    so MainWindow and OrderWindow can run unchanged against the shared server.
+    The order list is converted once per server data version, so views that key caches on
+    the list's identity (the sort index) keep them until the data really changes.
+    If the server cannot be reached, reads return the last orders seen, writes return None
+    and error_listeners are told.
+    '''
+    def __init__(self, client: ModelClient):
+        self.client = client
+        self.listeners = []  # Kept for interface compatibility; the server journals changes
+        self.error_listeners = []  # Callbacks (message) when the server stops answering
+        self._orders = None  # Order objects for the data version below
+        self._orders_version = None
+
+    def _call(self, function, *args, fallback=None):
+        """Runs a client call, turning an unreachable server into the fallback and a report."""
+        try:
+            return function(*args)
+        except ServerUnavailable as error:
+            for listener in self.error_listeners:
+                listener(str(error))
+            return fallback
+
+    @property
+    def orders(self):
+        version = self.client.version  # Read first: a change during the fetch only costs one more fetch
+        if self._orders is None or version != self._orders_version:
+            orders = self._call(self.client.get_orders)
+            if orders is None:
+                return self._orders if self._orders is not None else []
+            self._orders, self._orders_version = orders, version
+        return self._orders
+
+    def get_orders(self):
+        return self.orders
+
+    def get_order_by_id(self, order_id):
+        try:
+            order = self._call(self.client.get_order, order_id, fallback=(None, None))[0]
+        except ModelClientError:
+            return None
+        if order is None:  # Unreachable: the last copy we have
+            return next((order for order in self._orders or [] if order.order_id == order_id), None)
+        return order
+
+    def change_order_status(self, order_id, new_status, user=None):
+        try:
+            return self._call(self.client.change_order_status, order_id, new_status, user)
+        except ModelClientError:
+            return None
+
+    def status_at(self, order_id, timestamp):
+        try:
+            return self._call(self.client.get_order, order_id, timestamp, fallback=(None, None))[1]
+        except ModelClientError:
+            return None
+
+
+def client_from_environment(watch=True):
+    """
+    Returns a ModelClient for the server named in CONTRACTOR_PLUS_SERVER ("host:port"), or None.
+    watch=False skips the change watcher, for short-lived command-line use.
+    """
+    address = os.environ.get("CONTRACTOR_PLUS_SERVER")
+    if not address:
+        return None
+    host, _, port = address.rpartition(":")
+    return ModelClient(host or "127.0.0.1", int(port), watch=watch)
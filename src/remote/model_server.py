@@ -0,0 +1,288 @@
+"""
+**model_server.py - Shared model server for several desktop clients**
+
+**Purpose**
+- Runs as its own process and owns the one copy of the inventory and orders, so every
+  desktop sees the same data instead of each seeding its own.
+- Speaks JSON over HTTP/1.1 with keep-alive, using only asyncio from the standard library.
+- Pushes changes to clients by long-poll: ``GET /events?since=N`` returns as soon as the
+  data version passes N (or after a timeout), so clients can drop stale cached reads.
+
+**Endpoints**
+- ``GET  /inventory/search?q=...``        matching inventory rows
+- ``POST /skus/validate``                 ``{"entries": [[sku, qty], ...]}`` -> errors and valid entries
+- ``GET  /orders?q=...``                  work orders, newest first
+- ``GET  /orders/<id>?at=<timestamp>``    one order, with its status at a point in time
+- ``POST /orders/<id>/status``            ``{"status": ..., "user": ...}``
+- ``POST /orders/submit``                 ``{"entries": [[sku, qty], ...], "user": ...}`` places a material order
+- ``GET  /material_orders``               material orders: the seed shipments and every one placed
+- ``GET  /events?since=N``                long-poll for data changes
+
+**Usage**
+- ``python src/remote/model_server.py --port 8765`` (run from the project root)
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the model package importable
+
+from model.change_log import ChangeCapture, ChangeLog
+from model.inventory import search_inventory
+from model.inventory_data import check_order_validity, inventory_data
+from model.order import search_orders
+from model.sku_catalog import sku_filter_for
+from model.order_journal import OrderJournal, load_order_manager
+from model.order_ids import OrderIdAllocator, highest_number
+from model.incoming_orders import add_incoming_order, load_placed_orders, orders as incoming_orders
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+LONG_POLL_TIMEOUT = 25.0  # Seconds an /events request waits before returning with no changes
+
+
+def order_to_dict(order):
+    """Converts an Order into the JSON form sent to clients."""
+    return {
+        "order_id": order.order_id,
+        "date": order.date,
+        "shipping_type": order.shipping_type,
+        "price": order.price,
+        "status": order.status,
+    }
+
+
+class HttpError(Exception):
+    """Raised by a handler to send an error status with a message."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ModelServer:
+    def __init__(self, journal=None):
+        """
+        Loads the shared model: inventory rows and the journal-backed OrderManager.
+        """
+        self.inventory = inventory_data
+        self.journal = journal or OrderJournal()
+        self.order_manager = load_order_manager(self.journal)
+        self.order_manager.listeners.append(self._on_status_change)
+        self.change_log = ChangeLog()  # Every change, for accounting and reporting tools to tail
+        ChangeCapture(self.change_log, self.inventory).attach(self.order_manager)
+        load_placed_orders()  # Material orders placed through /orders/submit in earlier runs
+        self._sku_filter = None  # Bloom filter payload of the SKUs, rebuilt when items are added
+        self._sku_filter_size = -1
+        self.order_ids = OrderIdAllocator(seed=lambda: highest_number(order["id"] for order in incoming_orders))
+
+        self.port = None  # Set once serve() is listening
+        self.version = 0  # Bumped on every mutation; clients key their caches on it
+        self.changes = deque(maxlen=1000)  # Recent (version, kind, key) changes for /events
+        self._changed = asyncio.Event()  # Set (and replaced) whenever the version moves
+
+    def _bump(self, kind, key):
+        """Records a change and wakes every long-polling client."""
+        self.version += 1
+        self.changes.append((self.version, kind, key))
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _on_status_change(self, order, old_status, new_status, user, timestamp):
+        """OrderManager listener: every status change is a data change for the clients."""
+        self._bump("order", order.order_id)
+
+    # === Request handlers ===
+
+    async def handle_search(self, query, body):
+        rows = search_inventory(query.get("q", [""])[0], self.inventory)
+        return {"version": self.version, "rows": rows}
+
+    async def handle_validate(self, query, body):
+        errors, valid_entries = check_order_validity(self._entries(body), self.inventory)
+        return {"version": self.version, "errors": errors, "valid": valid_entries}
+
+    async def handle_sku_filter(self, query, body):
+        if self._sku_filter_size != len(self.inventory):
+            size = len(self.inventory)
+            bloom = await asyncio.to_thread(sku_filter_for, self.inventory)  # Seconds for a 1M-SKU catalog
+            self._sku_filter, self._sku_filter_size = bloom.to_dict(), size
+        key = self._sku_filter_size  # Changes only when SKUs are added, not on every data change
+        if query.get("key", [""])[0] == str(key):
+            return {"version": self.version, "key": key}  # The client's filter is still current
+        return {"version": self.version, "key": key, "filter": self._sku_filter}
+
+    async def handle_orders(self, query, body):
+        orders = search_orders(query.get("q", [""])[0], self.order_manager.get_orders())
+        return {"version": self.version, "orders": [order_to_dict(order) for order in orders]}
+
+    async def handle_order(self, order_id, query, body):
+        order = self.order_manager.get_order_by_id(order_id)
+        if order is None:
+            raise HttpError(404, f"No order {order_id}")
+        at = self._number(query, "at", float, time.time())
+        return {"version": self.version, "order": order_to_dict(order), "status_at": self.order_manager.status_at(order_id, at)}
+
+    async def handle_status(self, order_id, query, body):
+        if self.order_manager.get_order_by_id(order_id) is None:
+            raise HttpError(404, f"No order {order_id}")
+        status = body.get("status")
+        if not isinstance(status, str) or not status:
+            raise HttpError(400, "status is required")
+        order = self.order_manager.change_order_status(order_id, status, user=body.get("user"))
+        return {"version": self.version, "order": order_to_dict(order)}
+
+    async def handle_submit(self, query, body):
+        errors, valid_entries = check_order_validity(self._entries(body), self.inventory)
+        order_id = None
+        if not errors and valid_entries:
+            order_id = self.order_ids.allocate()
+            add_incoming_order(order_id, valid_entries, user=body.get("user"))  # Journaled, and logged by the change capture
+            self._bump("material_order", order_id)
+        return {"version": self.version, "errors": errors, "valid": valid_entries, "order_id": order_id}
+
+    async def handle_material_orders(self, query, body):
+        return {"version": self.version, "orders": incoming_orders}
+
+    async def handle_events(self, query, body):
+        since = self._number(query, "since", int, 0)
+        if self.version <= since:
+            try:
+                await asyncio.wait_for(self._changed.wait(), LONG_POLL_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass  # No changes; the client simply polls again
+        changes = [list(change) for change in self.changes if change[0] > since]
+        return {"version": self.version, "changes": changes}
+
+    def _number(self, query, name, kind, default):
+        """Reads a numeric query parameter, answering 400 if it is not a finite number."""
+        raw = query.get(name, [None])[0]
+        if raw is None:
+            return default
+        try:
+            value = kind(raw)
+        except ValueError:
+            raise HttpError(400, f"{name} must be a number")
+        if not math.isfinite(value):
+            raise HttpError(400, f"{name} must be a finite number")
+        return value
+
+    def _entries(self, body):
+        """Validates the [[sku, qty], ...] list sent by a client."""
+        entries = body.get("entries")
+        if not isinstance(entries, list):
+            raise HttpError(400, "entries must be a list of [sku, qty] pairs")
+        try:
+            return [(str(sku), int(qty)) for sku, qty in entries]
+        except (TypeError, ValueError):
+            raise HttpError(400, "entries must be a list of [sku, qty] pairs")
+
+    async def dispatch(self, method, target, raw_body):
+        """Routes one request to its handler. Returns (status, payload)."""
+        url = urlsplit(target)
+        path = [unquote(part) for part in url.path.strip("/").split("/")]
+        query = parse_qs(url.query)
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError:
+            return 400, {"error": "Body is not valid JSON"}
+
+        routes = {
+            ("GET", ("inventory", "search")): self.handle_search,
+            ("POST", ("skus", "validate")): self.handle_validate,
+            ("GET", ("skus", "filter")): self.handle_sku_filter,
+            ("GET", ("orders",)): self.handle_orders,
+            ("POST", ("orders", "submit")): self.handle_submit,
+            ("GET", ("material_orders",)): self.handle_material_orders,
+            ("GET", ("events",)): self.handle_events,
+        }
+        try:
+            handler = routes.get((method, tuple(path)))
+            if handler is not None:
+                return 200, await handler(query, body)
+            if len(path) == 2 and path[0] == "orders" and method == "GET":
+                return 200, await self.handle_order(path[1], query, body)
+            if len(path) == 3 and path[0] == "orders" and path[2] == "status" and method == "POST":
+                return 200, await self.handle_status(path[1], query, body)
+            return 404, {"error": f"No route for {method} {url.path}"}
+        except HttpError as error:
+            return error.status, {"error": str(error)}
+
+    # === HTTP plumbing ===
+
+    async def handle_connection(self, reader, writer):
+        """Serves requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break  # Client closed the connection
+                method, target, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                raw_body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.dispatch(method, target, raw_body)
+                except Exception as error:  # Keep serving other requests if a handler breaks
+                    status, payload = 500, {"error": str(error)}
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # Malformed request or dropped client; just close the connection
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """
+        Serves until cancelled. If ready is a threading.Event it is set once the port is open;
+        self.port is then the port listened on (the one the system picked if port is 0).
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared Contractor Plus model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    async def run():
+        await ModelServer().serve(args.host, args.port)
+
+    print(f"Model server listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import threading
+
+from PyQt6.QtWidgets import QFileDialog, QProgressDialog, QMessageBox
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from model.report_export import export_rows, ExportCancelled
+
+
+class ExportSignals(QObject):
+    progress = pyqtSignal(int)  # Rows written so far
+    finished = pyqtSignal(int)  # Total rows written
+    failed = pyqtSignal(str)  # Error message
+    cancelled = pyqtSignal()
+
+
+class ExportWorker(QRunnable):
+    '''
+    Streams report rows to a file on a thread-pool thread, reporting progress through signals.
+    '''
+    def __init__(self, path: str, header, rows, sheet_name: str) -> None:
+        super().__init__()
+        self.path = path
+        self.header = header
+        self.rows = rows
+        self.sheet_name = sheet_name
+        self.cancel_event = threading.Event()
+        self.signals = ExportSignals()
+
+    def run(self) -> None:
+        try:
+            count = export_rows(
+                self.path, self.header, self.rows,
+                progress=self.signals.progress.emit,
+                is_cancelled=self.cancel_event.is_set,
+                sheet_name=self.sheet_name,
+            )
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:  # Disk errors, or a bad row: reported, never lost on the pool thread
+            self.signals.failed.emit(str(error) or type(error).__name__)
+        else:
+            self.signals.finished.emit(count)
+
+
+def ask_export_path(parent, title: str, default_name: str) -> str:
+    """Asks where to save an export. Returns "" if the user cancelled."""
+    path, chosen_filter = QFileDialog.getSaveFileName(parent, title, default_name, "CSV (*.csv);;Excel Workbook (*.xlsx)")
+    if path and not path.lower().endswith((".csv", ".xlsx")):
+        path += ".xlsx" if "xlsx" in chosen_filter else ".csv"
+    return path
+
+
+class ExportProgress(QProgressDialog):
+    '''
+    Exports in the background with a progress bar and a Cancel button.
+    The dialog is not modal, so the window stays usable while a long export runs.
+    '''
+    def __init__(self, parent, title: str, path: str, header, rows, total: int) -> None:
+        super().__init__(f"Exporting {total:,} rows...", "Cancel", 0, max(total, 1), parent)
+        self.setWindowTitle(title)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.setStyleSheet("QLabel, QPushButton { color: black; }")
+        self.path = path
+
+        self.worker = ExportWorker(self.path, header, rows, title)
+        self.worker.signals.progress.connect(self.setValue)  # Delivered on the GUI thread
+        self.worker.signals.finished.connect(self.on_finished)
+        self.worker.signals.failed.connect(self.on_failed)
+        self.worker.signals.cancelled.connect(self.close)
+        self.canceled.connect(self.worker.cancel_event.set)
+        self.worker.setAutoDelete(False)  # Keep its signals alive until the dialog goes away
+        QThreadPool.globalInstance().start(self.worker)
+        self.show()
+
+    def on_finished(self, count: int) -> None:
+        self.setValue(self.maximum())
+        self.setLabelText(f"Exported {count:,} rows to {os.path.basename(self.path)}")
+        self.setCancelButtonText("Close")
+        self.canceled.disconnect()
+        self.canceled.connect(self.close)
+
+    def on_failed(self, message: str) -> None:
+        self.close()
+        QMessageBox.warning(self.parentWidget(), "Export Failed", message)
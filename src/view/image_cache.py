@@ -0,0 +1,22 @@
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtCore import Qt
+
+# (path, height) -> decoded and scaled QImage. QImage (unlike QPixmap) may be built off the GUI thread.
+_images = {}
+
+
+def preload_image(path: str, height: int = 0) -> None:
+    """Decodes (and optionally scales) an image so cached_pixmap() can skip the work later."""
+    image = QImage(path)
+    if height and not image.isNull():
+        image = image.scaledToHeight(height, Qt.TransformationMode.SmoothTransformation)
+    _images[(path, height)] = image
+
+
+def cached_pixmap(path: str, height: int = 0) -> QPixmap:
+    """Returns the image as a QPixmap, from the preloaded copy when there is one."""
+    image = _images.get((path, height))
+    if image is None:
+        preload_image(path, height)  # Not preloaded; decode it now
+        image = _images[(path, height)]
+    return QPixmap.fromImage(image)
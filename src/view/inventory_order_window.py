@@ -1,19 +1,23 @@
 # --- Standard PyQt6 imports for UI widgets, layouts, styling, and core functionality ---
 from PyQt6.QtWidgets import (
     QFrame, QVBoxLayout, QWidget, QLabel,
-    QHBoxLayout, QApplication, QPushButton, QLineEdit,
-    QScrollArea, QMessageBox, QTableWidget, QTableWidgetItem
+    QHBoxLayout, QApplication, QPushButton,
+    QScrollArea, QTableWidget, QTableWidgetItem
 )
 from PyQt6.QtGui import QFont, QColor
 from PyQt6.QtCore import Qt
-import re
 
 # Import sidebar and mock incoming order data
 from sidebar import *
-from model.incoming_orders import orders
+from model.incoming_orders import orders, incoming_order_listeners
+from model.inventory_data import inventory_data, inventory_listeners
+from model.inventory_snapshot import load_inventory
+from model.sku_catalog import sku_catalog
+from view.order_entry_grid import OrderEntryGrid
+from view.view_lifecycle import ManagedView
 
 # Main class for the Inventory Order Window
-class InventoryOrderWindow(QWidget):
+class InventoryOrderWindow(ManagedView, QWidget):
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
@@ -29,8 +33,6 @@ class InventoryOrderWindow(QWidget):
 
         self.setStyleSheet('background-color: #FAF9F6;')  # Light background
 
-        self.entry_count = 0  # Track number of SKU entries
-
         # Top-level layout: horizontal split between sidebar and content
         main_layout = QHBoxLayout()
         self.setLayout(main_layout)
@@ -101,14 +103,8 @@ class InventoryOrderWindow(QWidget):
         self.order_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
 
         # Fill the order table with data from the model
-        self.order_table.setRowCount(len(orders))
-        font = QFont("Roboto", 10)
-        for row_index, order in enumerate(orders):
-            for col_index, value in enumerate([order["id"], order["arrival"], order["status"], str(order["items"])]):
-                item = QTableWidgetItem(value)
-                item.setForeground(QColor('black'))
-                item.setFont(font)
-                self.order_table.setItem(row_index, col_index, item)
+        for order in orders:
+            self.add_order_row(order)
 
         self.order_table.setAlternatingRowColors(True)
         order_table_layout.addWidget(self.order_table)
@@ -120,9 +116,57 @@ class InventoryOrderWindow(QWidget):
         order_scroll.setFixedHeight(200)
         scroll_split_layout.addWidget(order_scroll)
 
-        # --- "+ Add" Button (Below Table) ---
+        # --- Line Buttons (Below Table) ---
         add_button_layout = QHBoxLayout()
+        self.paste_status = QLabel("Tip: paste SKU<TAB>quantity lines from a spreadsheet with Ctrl+V")
+        self.paste_status.setStyleSheet("color: black;")
+        add_button_layout.addWidget(self.paste_status)
         add_button_layout.addStretch()
+
+        # Barcode scanners: each scan adds one to its SKU's line instead of needing "+" and typing
+        self.scan_button = QPushButton("Scan Mode")
+        self.scan_button.setCheckable(True)
+        self.scan_button.setFixedHeight(50)
+        self.scan_button.toggled.connect(self.toggle_scan_mode)
+        self.scan_button.setStyleSheet("""
+            QPushButton {
+                background-color: #228B22;
+                color: white;
+                font-size: 16px;
+                border-radius: 8px;
+                padding: 0 12px;
+            }
+            QPushButton:checked {
+                background-color: #145214;
+            }
+        """)
+        add_button_layout.addWidget(self.scan_button)
+
+        self.suggest_button = QPushButton("Suggest Quantities")
+        self.suggest_button.setFixedHeight(50)
+        self.suggest_button.clicked.connect(self.suggest_quantities)
+        self.suggest_button.setStyleSheet("""
+            background-color: #228B22;
+            color: white;
+            font-size: 16px;
+            border-radius: 8px;
+            padding: 0 12px;
+        """)
+        add_button_layout.addWidget(self.suggest_button)
+
+        self.remove_button = QPushButton("-")
+        self.remove_button.setFixedSize(50, 50)
+        self.remove_button.clicked.connect(self.remove_selected_entries)
+        self.remove_button.setStyleSheet("""
+            background-color: red;
+            color: white;
+            font-size: 30px;
+            font: bold;
+            border-radius: 8px;
+            border: none;
+        """)
+        add_button_layout.addWidget(self.remove_button)
+
         self.add_button = QPushButton("+")
         self.add_button.setFixedSize(50, 50)
         self.add_button.clicked.connect(self.add_entry)
@@ -137,17 +181,31 @@ class InventoryOrderWindow(QWidget):
         add_button_layout.addWidget(self.add_button)
         scroll_split_layout.addLayout(add_button_layout)
 
-        # --- Scrollable Entry Form Section ---
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-
-        self.scroll_content = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_content)
-        self.scroll_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-
-        self.scroll_area.setWidget(self.scroll_content)
-        self.scroll_area.setMinimumHeight(400)
-        scroll_split_layout.addWidget(self.scroll_area)
+        # --- Order Entry Grid (one model row per line, no widgets per line) ---
+        self.entry_grid = OrderEntryGrid()
+        self.entry_model = self.entry_grid.entry_model
+        self.entry_grid.on_paste_done = self.on_paste_done
+        self.entry_grid.on_scan_done = self.on_scan_done
+        self.entry_grid.scan_rows = load_inventory  # Scans are checked against the current inventory
+        # Typed and pasted SKUs are checked for existence and stock as they are entered
+        self.entry_model.set_catalog(sku_catalog(self.controller.model_client, load_inventory))
+        self.entry_grid.setMinimumHeight(400)
+        self.entry_grid.setStyleSheet("""
+            QTableView {
+                alternate-background-color: #f0f0f0;
+                background-color: white;
+                color: black;
+            }
+            QHeaderView::section {
+                background-color: #228B22;
+                color: black;
+                padding: 6px;
+                font-family: Roboto;
+                font-size: 9pt;
+                font-weight: bold;
+            }
+        """)
+        scroll_split_layout.addWidget(self.entry_grid)
 
         # Add container to main layout
         content_layout.addWidget(scroll_split_container)
@@ -159,7 +217,7 @@ class InventoryOrderWindow(QWidget):
         submit_layout.addStretch()
 
         submit_button = QPushButton("Submit")
-        submit_button.clicked.connect(lambda: self.controller.handle_submit(self))
+        submit_button.clicked.connect(self.submit_order)
         submit_button.setFixedSize(120, 40)
         submit_button.setStyleSheet("""
             background-color: #228B22;
@@ -170,132 +228,90 @@ class InventoryOrderWindow(QWidget):
         submit_layout.addWidget(submit_button)
         content_layout.addWidget(submit_container)
 
-        # Add first entry row by default
-        self.add_entry()
+        # Keep the shipping status column current as shipments are received
+        self.listen(self.controller.arrival_scheduler.listeners, self.on_shipment_received)
+        self.listen(incoming_order_listeners, self.add_order_row)  # Newly placed orders appear at once
+        self.listen(inventory_listeners, self.on_inventory_changed)  # Re-check form lines whose stock changed
 
-    # --- Dynamically Add Entry Fields ---
-    def add_entry(self):
-        self.entry_count += 1
-        entry_frame = QFrame()
+        # Start with the forecast's suggested reorder quantities (or one blank line if nothing is needed)
+        self.entry_model.add_blank_line()
+        self.suggest_quantities()
+
+    # --- Submit the order form through the controller ---
+    def submit_order(self):
+        self.controller.handle_submit(self)
 
-        # Alternate background for every other entry
-        if self.entry_count % 2 == 0:
-            entry_frame.setStyleSheet("background-color: #F0F0F0; border: 1px solid #CCCCCC; border-radius: 8px;")
+    # --- Add a blank entry line and start editing its SKU ---
+    def add_entry(self):
+        row = self.entry_model.add_blank_line()
+        index = self.entry_model.index(row, 0)
+        self.entry_grid.setCurrentIndex(index)
+        self.entry_grid.edit(index)
+
+    # Fill the form with reorder quantities forecast from stock consumption (less what is already on order)
+    def suggest_quantities(self):
+        self.controller.demand_history.catch_up()  # Stock used since launch, here or on another desktop
+        suggestions = self.controller.demand_forecaster.recommendations(
+            load_inventory(), on_order=self.controller.order_lines.committed
+        )
+        if not suggestions:
+            self.paste_status.setText("No reorders suggested - stock covers the forecast lead time")
+            return
+        self.entry_model.set_lines([[sku, str(qty), ""] for sku, qty in suggestions])
+        self.paste_status.setText(f"Suggested {len(suggestions)} lines from the demand forecast - edit or remove before submitting")
+        self.paste_status.setStyleSheet("color: black;")
+
+    # Append one incoming order to the order table
+    def add_order_row(self, order):
+        row_index = self.order_table.rowCount()
+        self.order_table.insertRow(row_index)
+        font = QFont("Roboto", 10)
+        for col_index, value in enumerate([order["id"], order["arrival"], order["status"], str(order["items"])]):
+            item = QTableWidgetItem(value)
+            item.setForeground(QColor('black'))
+            item.setFont(font)
+            self.order_table.setItem(row_index, col_index, item)
+
+    # Show a received shipment as Delivered
+    def on_shipment_received(self, shipment, missing):
+        row = orders.index(shipment)
+        self.order_table.item(row, 2).setText(shipment["status"])
+
+    # Re-check the entry lines for an inventory row whose stock changed or that was added
+    def on_inventory_changed(self, position, old_row):
+        self.entry_model.recheck_sku(inventory_data[position][2])
+
+    # Remove the selected entry lines
+    def remove_selected_entries(self):
+        rows = {index.row() for index in self.entry_grid.selectionModel().selectedRows()}
+        if not rows and self.entry_grid.currentIndex().isValid():
+            rows = {self.entry_grid.currentIndex().row()}
+        self.entry_model.remove_rows(rows)
+
+    # Switch barcode scan mode on or off
+    def toggle_scan_mode(self, enabled):
+        self.entry_grid.set_scan_mode(enabled)
+        if enabled:
+            self.paste_status.setText("Scan mode: scan items into the order - typed keys are ignored")
         else:
-            entry_frame.setStyleSheet("background-color: transparent;")
-
-        entry_layout = QVBoxLayout(entry_frame)
-        entry_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
-        entry_layout.setSpacing(10)
-
-        # SKU Input Row
-        sku_row = QHBoxLayout()
-        sku_label = QLabel("SKU:")
-        sku_label.setFont(QFont("Roboto", 10, QFont.Weight.Bold))
-        sku_label.setStyleSheet("color: black;")
-
-        sku_input = QLineEdit()
-        sku_input.setPlaceholderText("ABC-1234")
-        sku_input.setFixedWidth(200)
-        sku_input.setMaxLength(8)
-        sku_input.setStyleSheet("""
-            background-color: #E0E0E0;
-            border: 2px solid #228B22;
-            border-radius: 4px;
-            padding: 5px;
-            color: black;
-        """)
-        sku_input.textChanged.connect(lambda text: self.validate_sku(text, sku_input))
-        sku_row.addWidget(sku_label)
-        sku_row.addWidget(sku_input)
-        sku_row.addStretch()
-
-        # Quantity Input Row
-        quantity_row = QHBoxLayout()
-        quantity_label = QLabel("Quantity:")
-        quantity_label.setFont(QFont("Roboto", 10, QFont.Weight.Bold))
-        quantity_label.setStyleSheet("color: black;")
-
-        quantity_input = QLineEdit()
-        quantity_input.setPlaceholderText("Enter Quantity")
-        quantity_input.setFixedWidth(200)
-        quantity_input.setMaxLength(5)
-        quantity_input.setStyleSheet("""
-            background-color: #E0E0E0;
-            border: 2px solid #228B22;
-            border-radius: 4px;
-            padding: 5px;
-            color: black;
-        """)
-        quantity_input.textChanged.connect(lambda text: self.validate_quantity(text, quantity_input))
-        quantity_row.addWidget(quantity_label)
-        quantity_row.addWidget(quantity_input)
-        quantity_row.addStretch()
-
-        # Add "-" remove button for all entries after the first one
-        if self.entry_count > 1:
-            remove_button = QPushButton("-")
-            remove_button.setFixedSize(30, 30)
-            remove_button.setStyleSheet("""
-                background-color: red;
-                color: white;
-                font-size: 16px;
-                font: bold;
-                border-radius: 15px;
-                border: none;
-            """)
-            remove_button.clicked.connect(lambda: self.remove_entry(entry_frame))
-
-            remove_button_layout = QHBoxLayout()
-            remove_button_layout.addStretch()
-            remove_button_layout.addWidget(remove_button)
-            entry_layout.addLayout(remove_button_layout)
-
-        # Add SKU and Quantity rows to the entry
-        entry_layout.addLayout(sku_row)
-        entry_layout.addLayout(quantity_row)
-        self.scroll_layout.addWidget(entry_frame)
-
-    # Remove a SKU entry section
-    def remove_entry(self, entry_frame):
-        self.scroll_layout.removeWidget(entry_frame)
-        entry_frame.deleteLater()
-
-    # Live validate SKU format
-    def validate_sku(self, text, input_box):
-        pattern = r"^[A-Z]{3}-\d{4}$"
-        if text and not re.fullmatch(pattern, text):
-            input_box.setStyleSheet("""
-                background-color: #E0E0E0;
-                border: 2px solid red;
-                border-radius: 4px;
-                padding: 5px;
-                color: black;
-            """)
+            self.paste_status.setText("Scan mode off")
+        self.paste_status.setStyleSheet("color: black;")
+
+    # Report scans applied to the grid (called at most once per frame)
+    def on_scan_done(self, scans, added, updated, bad):
+        total = self.entry_grid.scan_detector.scans
+        if bad:
+            self.paste_status.setText(f"Scanned {total} items - {bad} not recognised (highlighted in red)")
+            self.paste_status.setStyleSheet("color: red;")
         else:
-            input_box.setStyleSheet("""
-                background-color: #E0E0E0;
-                border: 2px solid #228B22;
-                border-radius: 4px;
-                padding: 5px;
-                color: black;
-            """)
-
-    # Live validate quantity is numeric
-    def validate_quantity(self, text, input_box):
-        if text and not text.isdigit():
-            input_box.setStyleSheet("""
-                background-color: #E0E0E0;
-                border: 2px solid red;
-                border-radius: 4px;
-                padding: 5px;
-                color: black;
-            """)
+            self.paste_status.setText(f"Scanned {total} items")
+            self.paste_status.setStyleSheet("color: black;")
+
+    # Report the result of a clipboard paste
+    def on_paste_done(self, added, bad):
+        if bad:
+            self.paste_status.setText(f"Pasted {added} lines - {bad} need fixing (highlighted in red)")
+            self.paste_status.setStyleSheet("color: red;")
         else:
-            input_box.setStyleSheet("""
-                background-color: #E0E0E0;
-                border: 2px solid #228B22;
-                border-radius: 4px;
-                padding: 5px;
-                color: black;
-            """)
+            self.paste_status.setText(f"Pasted {added} lines")
+            self.paste_status.setStyleSheet("color: black;")
@@ -0,0 +1,68 @@
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from model.money import format_money
+
+
+class InventoryTableModel(QAbstractTableModel):
+    '''
+    Read-only table model showing inventory rows through a list of row positions (a search
+    result in sort order, or a range over the whole catalog).
+    The view asks only for the visible cells, so showing the full catalog creates no items
+    and re-filtering or re-sorting swaps a position list instead of rebuilding the table.
+    '''
+    HEADERS = ["#", "Item Name", "Description", "SKU", "Price", "Quantity"]
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.rows = []  # Inventory rows: [name, description, sku, price_cents, qty]
+        self.positions = []  # Row positions shown, top to bottom
+        self.quantity = None  # Optional function row -> quantity shown instead of the row's total
+        self.headers = list(self.HEADERS)
+        self.font = QFont()
+        self.font.setPointSize(10)
+        self.font.setBold(True)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.positions)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return str(index.row() + 1)  # Row number in the current result
+            row = self.rows[self.positions[index.row()]]
+            if column == 4:
+                return format_money(row[3])  # Price is stored in cents (formatted once per price)
+            if column == 5 and self.quantity is not None:
+                return str(self.quantity(row))
+            return str(row[column - 1])
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return Qt.GlobalColor.darkGreen
+        if role == Qt.ItemDataRole.FontRole:
+            return self.font
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == 0:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def show_rows(self, rows, positions, quantity=None) -> None:
+        """Shows the rows at the given positions, in that order."""
+        self.beginResetModel()
+        self.rows = rows
+        self.positions = positions
+        self.quantity = quantity
+        self.endResetModel()
+
+    def set_quantity_header(self, text: str) -> None:
+        self.headers[5] = text
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 5, 5)
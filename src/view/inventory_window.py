@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import (
     QFrame, QVBoxLayout, QWidget, QLabel, QHeaderView,
-    QHBoxLayout, QApplication, QTableWidget, QTableWidgetItem,
-    QLineEdit, QPushButton
+    QHBoxLayout, QApplication, QTableView, QAbstractItemView,
+    QLineEdit, QPushButton, QTreeWidget, QTreeWidgetItem, QComboBox
 )
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
@@ -9,9 +9,19 @@ from PyQt6.QtCore import Qt
 from sidebar import *  
 from model.inventory import *  
 from model.inventory_data import * 
-
-
-class InventoryWindow(QWidget):
+from model.inventory_snapshot import load_inventory
+from model.sort_index import SortIndex, INVENTORY_SORT_KEYS
+from model.inventory_groups import GroupIndex
+from model.money import format_money
+from model.sku_index import sku_index_for
+from model.report_export import INVENTORY_HEADER, inventory_report_rows
+from view.inventory_table import InventoryTableModel
+from view.export_progress import ExportProgress, ask_export_path
+from view.view_lifecycle import ManagedView
+from remote.model_client import ServerUnavailable
+
+
+class InventoryWindow(ManagedView, QWidget):
     '''
     Inventory (Search) Window using same layout style as the OrderWindow.
     Displays inventory items with a search bar and sidebar navigation.
@@ -33,7 +43,15 @@ class InventoryWindow(QWidget):
         # Set background color
         self.setStyleSheet('background-color: #FAF9F6;')
 
-        self.inventory_data = inventory_data  # Load dataset from model
+        self.inventory_data = load_inventory()  # Memory-mapped snapshot of the model's dataset
+        self.sort_index = SortIndex(self.inventory_data, INVENTORY_SORT_KEYS)  # Per-column permutations, built on first click
+        self.sort_column = None  # None keeps the inventory's own order
+        self.sort_descending = False
+        self.group_index = None  # Category aggregates, built the first time the grouped view is shown
+        self.group_items = {}  # Category name -> its top-level QTreeWidgetItem
+        self.listen(inventory_listeners, self.on_inventory_changed)  # Keep indexes current on quantity/price edits
+        self.location = None  # Yard or truck the table is filtered to; None shows every location's total
+        self.listen(self.controller.location_stock.listeners, self.on_stock_changed)  # Transfers leave totals unchanged
 
         # === Main Layouts ===
         main_layout = QHBoxLayout()  # Horizontal layout to hold sidebar + content
@@ -90,19 +108,59 @@ class InventoryWindow(QWidget):
             padding: 5px;
         """)
 
-        # Add search box and button to layout
+        # Grouped view toggle
+        self.group_button = QPushButton("Group by Category", self)
+        self.group_button.setCheckable(True)
+        self.group_button.setFixedWidth(160)
+        self.group_button.toggled.connect(self.toggle_grouped_view)
+        self.group_button.setStyleSheet("""
+            background-color: #228B22;
+            color: white;
+            border-radius: 4px;
+            padding: 5px;
+        """)
+
+        # Export button
+        self.export_button = QPushButton("Export", self)
+        self.export_button.setFixedWidth(80)
+        self.export_button.clicked.connect(self.export_inventory)
+        self.export_button.setStyleSheet("""
+            background-color: #228B22;
+            color: white;
+            border-radius: 4px;
+            padding: 5px;
+        """)
+        self.export_dialog = None  # Progress dialog of the running export, if any
+
+        # Location filter: all locations, or only what one yard or truck carries
+        self.location_filter = QComboBox(self)
+        self.location_filter.addItem("All Locations")
+        self.location_filter.addItems(self.controller.location_stock.locations)
+        self.location_filter.setFixedWidth(150)
+        self.location_filter.setEnabled(not self.controller.model_client)  # Locations are tracked by this desktop
+        self.location_filter.currentIndexChanged.connect(self.on_location_changed)
+        self.location_filter.setStyleSheet("""
+            border: 2px solid #228B22;
+            border-radius: 4px;
+            padding: 5px;
+            color: black;
+        """)
+
+        # Add search box and buttons to layout
         self.search_layout.addWidget(self.search_box)
         self.search_layout.addWidget(self.clear_button)
+        self.search_layout.addWidget(self.location_filter)
+        self.search_layout.addWidget(self.group_button)
+        self.search_layout.addWidget(self.export_button)
         self.search_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
 
         content_layout.addLayout(self.search_layout)
 
         # === Inventory Table ===
-        self.inventory_table = QTableWidget()
-        self.inventory_table.setColumnCount(6)  # 6 columns total
-        self.inventory_table.setHorizontalHeaderLabels([
-            "#", "Item Name", "Description", "SKU", "Price", "Quantity"
-        ])
+        # Backed by a model over row positions: only the visible rows are ever drawn
+        self.inventory_table = QTableView()
+        self.inventory_model = InventoryTableModel(self)  # "#", Item Name, Description, SKU, Price, Quantity
+        self.inventory_table.setModel(self.inventory_model)
 
         # Header style
         header = self.inventory_table.horizontalHeader()
@@ -112,17 +170,18 @@ class InventoryWindow(QWidget):
         header.setFont(font)
 
         # Table behavior
-        self.inventory_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.inventory_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.inventory_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.inventory_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.inventory_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.inventory_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.inventory_table.verticalHeader().setVisible(False)
         self.inventory_table.horizontalHeader().setStretchLastSection(True)
         self.inventory_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.inventory_table.horizontalHeader().sectionClicked.connect(self.on_sort)  # Click a header to sort by it
 
         # Row styling
         self.inventory_table.setAlternatingRowColors(True)
         self.inventory_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 alternate-background-color: #f0f0f0;
                 background-color: white;
             }
@@ -139,62 +198,217 @@ class InventoryWindow(QWidget):
         # Add table to content layout
         content_layout.addWidget(self.inventory_table)
 
+        # === Grouped (tree) view, hidden until toggled ===
+        self.group_tree = QTreeWidget()
+        self.group_tree.setColumnCount(6)
+        self.group_tree.setHeaderLabels([
+            "Category / Item", "SKUs / Description", "SKU", "Stock Value / Price", "Units / Quantity", "Out of Stock"
+        ])
+        self.group_tree.header().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.group_tree.setAlternatingRowColors(True)
+        self.group_tree.setStyleSheet(self.inventory_table.styleSheet())
+        self.group_tree.itemExpanded.connect(self.load_group_children)  # Children are created on first expand
+        self.group_tree.hide()
+        content_layout.addWidget(self.group_tree)
+
         # Populate table with data
         self.populate_inventory()
 
     def populate_inventory(self):
-        """Fill the table with all inventory items."""
-        self.inventory_table.setRowCount(len(self.inventory_data))
-
-        for row, item_data in enumerate(self.inventory_data):
-            # Row number (column 0)
-            number_item = QTableWidgetItem(str(row + 1))
-            number_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self._style_item(number_item)
-            self.inventory_table.setItem(row, 0, number_item)
-
-            # Data columns (columns 1–5)
-            for col, value in enumerate(item_data, start=1):
-                item = QTableWidgetItem(str(value))
-                self._style_item(item)
-                self.inventory_table.setItem(row, col, item)
+        """Show all inventory items (a range over the rows: nothing is copied or created per row)."""
+        self.inventory_model.show_rows(self.inventory_data, range(len(self.inventory_data)))
 
     def on_search(self):
         """Trigger search filtering as user types."""
         query = self.search_box.text()  # Get input
-        filtered_data = search_inventory(query, self.inventory_data)  # Search logic from model
-        self.populate_filtered_inventory(filtered_data)
+        if self.controller.model_client:
+            try:
+                filtered_data = self.controller.model_client.search_inventory(query)  # Search on the shared server
+            except ServerUnavailable as error:
+                self.controller.show_server_error(str(error))
+                return  # Keep showing the last results
+            if self.sort_column is not None:
+                key = INVENTORY_SORT_KEYS[self.sort_column]
+                filtered_data = sorted(filtered_data, key=key, reverse=self.sort_descending)
+            self.populate_filtered_inventory(filtered_data)
+        else:
+            # Local rows are shown through their positions; the location's quantity is looked up per visible cell
+            quantity = None
+            if self.location is not None:
+                stock, location = self.controller.location_stock, self.location
+                quantity = lambda row: stock.quantity(row[2], location)
+            self.inventory_model.show_rows(self.inventory_data, self.displayed_positions(query), quantity)
+
+    def displayed_positions(self, query):
+        """Row positions matching the query, in the current sort order."""
+        # Search logic from model, as row positions so the sort permutation can be applied to them
+        positions = None
+        if query:
+            positions = search_inventory_positions(query, self.inventory_data)
+        if self.location is not None:
+            positions = self.location_positions(positions)
+        if self.sort_column == 5 and self.location is not None:
+            # Sort by the quantity at the location rather than the total
+            stock = self.controller.location_stock
+            positions = sorted(positions, key=lambda position: stock.quantity(self.inventory_data[position][2], self.location),
+                               reverse=self.sort_descending)
+        elif self.sort_column is not None:
+            positions = self.sort_index.sorted_positions(self.sort_column, positions, self.sort_descending)
+        elif positions is None:
+            positions = range(len(self.inventory_data))
+        return positions
+
+    def location_positions(self, positions):
+        """
+        Narrow positions (None for every row) to the SKUs the selected location carries,
+        looked up through the location's own index rather than by scanning the rows.
+        """
+        index = sku_index_for(self.inventory_data)
+        carried = {index.lookup(sku) for sku in self.controller.location_stock.skus_at(self.location)}
+        carried.discard(None)
+        if positions is None:
+            return sorted(carried)
+        return [position for position in positions if position in carried]
+
+    def display_row(self, position):
+        """The row at a position as shown: with the selected location's quantity instead of the total."""
+        row = self.inventory_data[position]
+        if self.location is None:
+            return row
+        return list(row[:4]) + [self.controller.location_stock.quantity(row[2], self.location)]
+
+    def on_location_changed(self, index):
+        """Filter the table to one location (index 0 is All Locations)."""
+        self.location = self.location_filter.itemText(index) if index > 0 else None
+        quantity_header = "Quantity" if self.location is None else f"Qty at {self.location}"
+        self.inventory_model.set_quantity_header(quantity_header)
+        self.on_search()
+
+    def on_stock_changed(self, sku, location, old_quantity, new_quantity):
+        """Location stock listener: refresh when the location being shown changed."""
+        if location == self.location and not self.group_button.isChecked():
+            self.on_search()
+
+    def export_inventory(self, path=""):
+        """
+        Export the stock list matching the current search, as displayed, to CSV or XLSX.
+        Rows are generated and written on a worker thread.
+        """
+        path = path or ask_export_path(self, "Export Inventory", "inventory.csv")
+        if not path:
+            return
+        query = self.search_box.text()
+        if self.controller.model_client:
+            try:
+                rows = self.controller.model_client.search_inventory(query)  # The server's rows, already a list
+            except ServerUnavailable as error:
+                self.controller.show_server_error(str(error))
+                return
+            positions = range(len(rows))
+        elif self.location is not None:
+            rows = [self.display_row(position) for position in self.displayed_positions(query)]  # Location quantities
+            positions = range(len(rows))
+        else:
+            rows, positions = self.inventory_data, self.displayed_positions(query)
+        self.export_dialog = ExportProgress(
+            self, "Export Inventory", path, INVENTORY_HEADER, inventory_report_rows(rows, positions), len(positions)
+        )
+
+    def on_sort(self, column):
+        """Sort by the clicked column; clicking it again reverses the order."""
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+
+        header = self.inventory_table.horizontalHeader()
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(column, Qt.SortOrder.DescendingOrder if self.sort_descending else Qt.SortOrder.AscendingOrder)
+        self.on_search()  # Redisplay with the current filter
 
     def populate_filtered_inventory(self, filtered_data):
-        """Display only filtered search results in table."""
-        self.inventory_table.setRowCount(len(filtered_data))
-
-        for row, item_data in enumerate(filtered_data):
-            # Row number
-            number_item = QTableWidgetItem(str(row + 1))
-            number_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self._style_item(number_item)
-            self.inventory_table.setItem(row, 0, number_item)
-
-            # Item columns
-            for col, value in enumerate(item_data, start=1):
-                if col == 4:  # Price column — format as currency
-                    formatted_price = f"${value:.2f}"
-                    item = QTableWidgetItem(formatted_price)
-                else:
-                    item = QTableWidgetItem(str(value))
-                self._style_item(item)
-                self.inventory_table.setItem(row, col, item)
-
-    def _style_item(self, item):
-        """Style table cell item with consistent font and color."""
-        item.setForeground(Qt.GlobalColor.darkGreen)
-        font = item.font()
-        font.setPointSize(10)
+        """Display only filtered search results (rows already fetched, e.g. from the model server) in table."""
+        self.inventory_model.show_rows(filtered_data, range(len(filtered_data)))
+
+    def toggle_grouped_view(self, grouped):
+        """Switch between the flat table and the category tree."""
+        if grouped and self.group_index is None:
+            self.group_index = GroupIndex(self.inventory_data)  # One pass over the rows
+            self.populate_groups()
+        self.group_tree.setVisible(grouped)
+        self.inventory_table.setVisible(not grouped)
+        self.search_box.setEnabled(not grouped)  # Search and the location filter apply to the flat table
+        self.location_filter.setEnabled(not grouped and not self.controller.model_client)
+
+    def populate_groups(self):
+        """Add one collapsed top-level item per category; items are loaded when expanded."""
+        self.group_tree.clear()
+        self.group_items = {}
+        for group in self.group_index.groups.values():
+            group_item = QTreeWidgetItem()
+            group_item.setData(0, Qt.ItemDataRole.UserRole, group.name)
+            group_item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+            self.group_items[group.name] = group_item
+            self._update_group_item(group)
+            self.group_tree.addTopLevelItem(group_item)
+
+    def _update_group_item(self, group):
+        """Write a group's aggregates into its tree item."""
+        group_item = self.group_items[group.name]
+        values = [group.name, f"{len(group.positions)} SKUs", "", format_money(group.value, grouped=True), str(group.units), str(group.out_of_stock)]
+        for col, value in enumerate(values):
+            group_item.setText(col, value)
+            group_item.setForeground(col, Qt.GlobalColor.darkGreen)
+        font = group_item.font(0)
         font.setBold(True)
-        item.setFont(font)
+        group_item.setFont(0, font)
+
+    def load_group_children(self, group_item):
+        """Create the item rows of a category the first time it is expanded."""
+        if group_item.childCount():
+            return  # Already loaded
+        group = self.group_index.groups[group_item.data(0, Qt.ItemDataRole.UserRole)]
+        children = []
+        for position in group.positions:
+            name, description, sku, price, quantity = self.inventory_data[position]
+            child = QTreeWidgetItem([name, description, sku, format_money(price), str(quantity), ""])
+            child.setData(0, Qt.ItemDataRole.UserRole, position)
+            children.append(child)
+        group_item.addChildren(children)  # One insert for the whole group
+
+    def on_inventory_changed(self, position, old_row):
+        """Model listener: a row's price or quantity changed, or a row was added."""
+        if self.inventory_data is not inventory_data:
+            # Showing the snapshot, which no longer matches; switch to the live rows
+            self.inventory_data = inventory_data
+            self.sort_index.rows = inventory_data
+            if self.group_index is not None:
+                self.group_index.rows = inventory_data
+
+        if old_row is None:
+            self.sort_index.append_row()
+        else:
+            self.sort_index.update_row(position, old_row)
+
+        if self.group_index is not None:
+            changed = self.group_index.update_row(position, old_row, inventory_data[position])
+            for name in changed:
+                group = self.group_index.groups[name]
+                if name not in self.group_items:
+                    self.populate_groups()  # A brand new category appeared
+                    break
+                self._update_group_item(group)
+                group_item = self.group_items[name]
+                group_item.takeChildren()  # Reload lazily on the next expand
+                if group_item.isExpanded():
+                    self.load_group_children(group_item)
+
+        if not self.group_button.isChecked():
+            self.on_search()  # Refresh the flat table
 
     def clear_search(self):
-        """Clear the search bar and repopulate full inventory list."""
+        """Clear the search bar and show every row, keeping the sort and location filter."""
+        self.search_box.blockSignals(True)  # Search once below rather than once per textChanged too
         self.search_box.clear()
-        self.populate_inventory()
+        self.search_box.blockSignals(False)
+        self.on_search()
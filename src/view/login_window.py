@@ -2,11 +2,28 @@ from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QMessageBox,
     QLineEdit, QPushButton, QVBoxLayout
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont, QPixmap
 
-from view.main_window import MainWindow  
+from view.main_window import BANNER_IMAGE, BANNER_HEIGHT
+from view.image_cache import preload_image
 import controller.controller as ctr 
+from model.inventory_data import inventory_data
+from model.inventory_snapshot import load_inventory, verify_inventory
+from model.sku_index import sku_index_for
+from model.startup_preload import Preloader
+from remote.model_client import client_from_environment
+
+
+def preload_inventory():
+    """
+    Opens (or rebuilds) the inventory snapshot, checks its checksum and builds the SKU indexes
+    used by search and validation.
+    """
+    rows = verify_inventory(load_inventory())
+    sku_index_for(rows)
+    sku_index_for(inventory_data)
+    return rows
 
 
 class LoginWindow(QWidget):
@@ -39,9 +56,15 @@ class LoginWindow(QWidget):
         # === Main vertical layout ===
         layout: QVBoxLayout = QVBoxLayout()
 
-        # === Create controller and initialize the main dashboard window ===
-        controller: ctr.Controller = ctr.Controller()
-        self.main_window: MainWindow = MainWindow(controller)
+        # === Start loading the data stores, indexes and images while the user logs in ===
+        self.model_client = client_from_environment()
+        self.preloader: Preloader = Preloader({
+            "orders": lambda: ctr.load_order_store(self.model_client),
+            "inventory": preload_inventory,
+            "demand": ctr.load_demand_forecast,  # Consumption read from the change log
+            "images": lambda: preload_image(BANNER_IMAGE, BANNER_HEIGHT),
+        })
+        self.controller = None  # Created on login from the preloaded data
 
         # === Logo Display ===
         logo_label: QLabel = QLabel()  # QLabel to hold the logo image
@@ -88,9 +111,28 @@ class LoginWindow(QWidget):
         self.login_button.clicked.connect(self.handle_login)            # Connect button to login logic
         layout.addWidget(self.login_button)
 
+        # === Preload progress ===
+        self.preload_label: QLabel = QLabel()
+        self.preload_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preload_label.setStyleSheet("color: gray; font-size: 11px;")
+        layout.addWidget(self.preload_label)
+        self.preload_timer: QTimer = QTimer(self)
+        self.preload_timer.timeout.connect(self.show_preload_progress)
+        self.preload_timer.start(100)
+        self.show_preload_progress()
+
         # Set the layout to the window
         self.setLayout(layout)
 
+    def show_preload_progress(self) -> None:
+        """
+        Show how much of the background preload has finished.
+        """
+        done, total = self.preloader.progress()
+        self.preload_label.setText("Ready" if done == total else f"Loading data... {done}/{total}")
+        if done == total:
+            self.preload_timer.stop()
+
     def handle_login(self) -> None:
         """
         Check login credentials and either show the main window or show an error dialog.
@@ -101,7 +143,13 @@ class LoginWindow(QWidget):
         # === Check credentials ===
         if username == "admin" and password == "1234":
             # If correct, open the main window and close login
-            self.main_window.show()
+            # Build the dashboard from the preloaded stores (waiting only for anything still loading);
+            # the controller loads anything that failed to preload itself
+            self.controller = ctr.Controller(self.model_client, self.preloader.results())
+            self.controller.current_user = username  # Recorded with each order status change
+            self.controller.open_home()  # The controller owns (and later replaces) the dashboard window
+            self.preloader.trace.mark("dashboard shown")
+            self.preloader.trace.emit()
             self.close()
         else:
             # If incorrect, show a warning message
@@ -3,16 +3,20 @@ from PyQt6.QtWidgets import (
     QMainWindow, QVBoxLayout, QWidget, QLabel, QFrame,
     QHBoxLayout, QApplication, QScrollArea, QStackedLayout
 )
-from PyQt6.QtGui import QFont, QPixmap
-from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer
 
 from sidebar import Sidebar
-from model.order import OrderManager
-from model.inventory_data import inventory_data
+from view.image_cache import cached_pixmap
+from view.view_lifecycle import ManagedView
 from model.incoming_orders import orders
 
 
-class MainWindow(QMainWindow):
+BANNER_IMAGE = "resources/home-banner.jpg"
+BANNER_HEIGHT = 390
+
+
+class MainWindow(ManagedView, QMainWindow):
     """
     Main dashboard window for the inventory system application.
     Displays:
@@ -28,8 +32,7 @@ class MainWindow(QMainWindow):
         self.resize(1700, 1000)  # Default window size
 
         # === Initialize order data ===
-        self.order_manager = OrderManager()
-        self.order_manager.seed_orders()  # Populate with dummy orders
+        self.order_manager = self.controller.order_manager  # Shared, journal-backed orders
 
         # === Center the window on the screen ===
         screen = QApplication.primaryScreen()
@@ -71,11 +74,7 @@ class MainWindow(QMainWindow):
 
         # Background image label
         banner_image_label = QLabel()
-        banner_image_label.setPixmap(
-            QPixmap("resources/home-banner.jpg").scaledToHeight(
-                390, Qt.TransformationMode.SmoothTransformation
-            )
-        )
+        banner_image_label.setPixmap(cached_pixmap(BANNER_IMAGE, BANNER_HEIGHT))  # Usually decoded during login
         banner_image_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
 
         banner_layout = QStackedLayout()
@@ -122,10 +121,23 @@ class MainWindow(QMainWindow):
         dashboard_layout.addWidget(self.low_inventory_box)
         self.populate_low_inventory()  # Fill in low stock items
 
+        # === Live updates: received shipments and stock changes refresh only their cards ===
+        self.low_inventory_refresh_pending = False
+        # (listen() removes each callback again when the window closes)
+        self.listen(self.controller.arrival_scheduler.listeners, self.on_shipment_received)
+        self.listen(self.controller.location_stock.listeners, self.on_stock_changed)
+        self.listen(self.controller.refresher.listeners, self.on_orders_refreshed)  # Orders changed by other desktops
+
     def populate_pending_orders(self) -> None:
         """
         Populate the 'Pending Orders' card with order entries that need approval.
         """
+        # Remove the previous list (everything below the card title) when refreshing
+        while self.pending_orders_layout.count() > 1:
+            item = self.pending_orders_layout.takeAt(1)
+            if item.widget():
+                item.widget().deleteLater()
+
         orders_container = QWidget()  # Container for the scroll area
         orders_layout = QVBoxLayout(orders_container)
 
@@ -165,6 +177,12 @@ class MainWindow(QMainWindow):
         """
         arriving_soon_orders = [order for order in orders if order["status"] == "Shipped"]
 
+        # Remove the previous list (everything below the card title) when refreshing
+        while self.arriving_orders_layout.count() > 1:
+            item = self.arriving_orders_layout.takeAt(1)
+            if item.widget():
+                item.widget().deleteLater()
+
         container = QWidget()  # Scrollable container widget
         layout = QVBoxLayout(container)
 
@@ -187,14 +205,24 @@ class MainWindow(QMainWindow):
 
     def populate_low_inventory(self) -> None:
         """
-        Populate the 'Low Inventory Alerts' card with SKUs that have zero quantity.
+        Populate the 'Low Inventory Alerts' card with SKUs that have zero quantity anywhere,
+        then the SKUs running low at each yard or truck (read from the stock's indexes, not a scan).
         """
-        low_inventory_items = [item for item in inventory_data if item[4] == 0]
+        stock = self.controller.location_stock
+        self.shown_alerts_version = stock.alerts_version
+        low_inventory_items = sorted(stock.out_of_stock)
+
+        # Per-location alerts: SKUs still in stock elsewhere, so a transfer can cover them
+        location_alerts = []
+        for location in stock.locations:
+            low_here = [f"{sku} ({quantity})" for sku, quantity in stock.low_stock_at(location) if sku not in stock.out_of_stock]
+            if low_here:
+                location_alerts.append((location, low_here))
 
         container = QWidget()
         container_layout = QVBoxLayout(container)
 
-        if not low_inventory_items:
+        if not low_inventory_items and not location_alerts:
             # If no items are low, show a positive message
             no_label = QLabel("No items need to be reordered.")
             no_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -202,12 +230,20 @@ class MainWindow(QMainWindow):
             container_layout.addWidget(no_label)
 
         # For each item with 0 quantity, display a warning
-        for item in low_inventory_items:
-            sku_label = QLabel(f"SKU: {item[2]} needs to be reordered!")
+        for sku in low_inventory_items:
+            sku_label = QLabel(f"SKU: {sku} needs to be reordered!")
             sku_label.setStyleSheet("font-size: 18px; color: black;")
             sku_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
             container_layout.addWidget(sku_label)
 
+        # One line per location that is running low
+        for location, low_here in location_alerts:
+            location_label = QLabel(f"Low at {location}: {', '.join(low_here)}")
+            location_label.setStyleSheet("font-size: 16px; color: #5D4037;")
+            location_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+            location_label.setWordWrap(True)
+            container_layout.addWidget(location_label)
+
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
         scroll_area.setWidget(container)
@@ -228,6 +264,33 @@ class MainWindow(QMainWindow):
             layout.addWidget(title_label)
             layout.addWidget(scroll_area)
 
+    def on_shipment_received(self, shipment, missing) -> None:
+        """
+        A shipment was received into inventory: refresh the arriving card (its stock changes
+        reach the low inventory card through on_inventory_changed).
+        """
+        self.populate_arriving_soon_orders()
+
+    def on_orders_refreshed(self, changes) -> None:
+        """Refresh the pending card when another desktop changed an order to or from Pending."""
+        if any(order.status == "Pending" or old_status in ("Pending", None) for order, old_status in changes):
+            self.populate_pending_orders()
+
+    def on_stock_changed(self, sku, location, old_quantity, new_quantity) -> None:
+        """
+        Refresh the low inventory card when an item runs out, comes back in stock, or starts or
+        stops being low somewhere. Several changes in one batch are coalesced into a single refresh.
+        """
+        if self.controller.location_stock.alerts_version == self.shown_alerts_version:
+            return  # No alert appeared or went away; the card is unchanged
+        if not self.low_inventory_refresh_pending:
+            self.low_inventory_refresh_pending = True
+            QTimer.singleShot(0, self.refresh_low_inventory)
+
+    def refresh_low_inventory(self) -> None:
+        self.low_inventory_refresh_pending = False
+        self.populate_low_inventory()
+
     def create_info_box(self, title: str, color: str, background: str) -> QFrame:
         """
         Creates a styled information box with a colored background and title.
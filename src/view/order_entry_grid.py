@@ -0,0 +1,317 @@
+from PyQt6.QtWidgets import QTableView, QHeaderView, QApplication, QAbstractItemView
+from PyQt6.QtGui import QColor, QKeySequence
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from model.barcode_scan import ScanDetector, coalesce_scans, validate_scans
+from model.order_entries import parse_entry_lines, validate_line, entries_to_submit
+from model.sku_catalog import sku_state, BAD_FORMAT, UNKNOWN_SKU, OUT_OF_STOCK
+
+FRAME_MS = 16  # Scans are applied to the grid at most once per frame (~60 Hz)
+
+# SKU cell (background, text) colours for each SKU state; out of stock is a warning, not an error
+SKU_STATE_COLORS = {
+    BAD_FORMAT: ("#FDECEA", "red"),
+    UNKNOWN_SKU: ("#FFE8CC", "#B35900"),
+    OUT_OF_STOCK: ("#FFF8D6", "#8A6D00"),
+}
+
+
+class OrderEntryModel(QAbstractTableModel):
+    '''
+    Table model holding the material order lines as plain [sku, qty_text, error] lists.
+    The view draws only the visible rows, so thousands of lines cost no widgets.
+    SKU states are worked out when lines change, so painting a cell only reads them.
+    '''
+    HEADERS = ["SKU", "Quantity"]
+    catalog_refreshed = pyqtSignal()  # The catalog has new data; emitted from its fetch thread
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.lines = []  # [sku, qty_text, error] per order line
+        self.catalog = None  # SKU catalog for existence and stock checks (see sku_catalog.py)
+        self.sku_states = {}  # SKU -> sku_state for every SKU in the form, read when cells are painted
+        self.catalog_refreshed.connect(self.recheck)  # Queued onto the GUI thread
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.lines)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.HEADERS[section]
+            return str(section + 1)  # Line numbers down the side
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        line = self.lines[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return line[index.column()]
+        if role not in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+
+        # The SKU cell shows the state found when the line last changed (recheck_sku() keeps it current)
+        state = self.sku_states.get(line[0]) if index.column() == 0 else None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if line[2]:
+                return line[2]
+            return f"{line[0]} is out of stock - this order restocks it" if state == OUT_OF_STOCK else None
+        if state in SKU_STATE_COLORS:
+            background, text = SKU_STATE_COLORS[state]
+            return QColor(background if role == Qt.ItemDataRole.BackgroundRole else text)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return QColor("#FDECEA") if line[2] else None  # Highlight bad lines
+        return QColor("red") if line[2] else QColor("black")
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        line = self.lines[index.row()]
+        value = str(value).strip()
+        line[index.column()] = value.upper() if index.column() == 0 else value
+        line[2] = validate_line(line[0], line[1], self.catalog)  # Live validation of the edited line
+        self.sku_states[line[0]] = sku_state(line[0], self.catalog)
+        self.dataChanged.emit(self.index(index.row(), 0), self.index(index.row(), 1))
+        return True
+
+    def set_catalog(self, catalog) -> None:
+        """Checks SKUs against the catalog from now on, and re-checks every line already in the form."""
+        if self.catalog is not None:
+            self.catalog.listeners.remove(self.catalog_refreshed.emit)
+        self.catalog = catalog
+        if catalog is not None:
+            catalog.listeners.append(self.catalog_refreshed.emit)  # A remote filter arrives later
+        self.recheck()
+
+    def recheck(self) -> None:
+        """Re-checks every line against the catalog, such as when a remote SKU filter arrives."""
+        for line in self.lines:
+            line[2] = validate_line(line[0], line[1], self.catalog)
+        self.sku_states = {}
+        self._note_states(self.lines)
+        if self.lines:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.lines) - 1, 1))
+
+    def recheck_sku(self, sku) -> None:
+        """Re-checks the lines holding one SKU after its inventory row changed (stock received, item added)."""
+        if sku not in self.sku_states:
+            return  # Not in the form
+        self.sku_states[sku] = sku_state(sku, self.catalog)
+        for row, line in enumerate(self.lines):
+            if line[0] == sku:
+                line[2] = validate_line(line[0], line[1], self.catalog)
+                self.dataChanged.emit(self.index(row, 0), self.index(row, 1))
+
+    def check_lines(self, lines) -> None:
+        """Adds catalog errors to parsed lines that have none yet (pastes are parsed without the catalog)."""
+        for line in lines:
+            line[2] = line[2] or validate_line(line[0], line[1], self.catalog)
+
+    def _note_states(self, lines) -> None:
+        for sku in {line[0] for line in lines}:
+            self.sku_states[sku] = sku_state(sku, self.catalog)
+
+    def add_blank_line(self) -> int:
+        """Appends an empty line and returns its row."""
+        return self.append_lines([["", "", ""]])
+
+    def append_lines(self, lines) -> int:
+        """Appends already-validated lines in one insert. Returns the first new row."""
+        first = len(self.lines)
+        if lines:
+            self._note_states(lines)
+            self.beginInsertRows(QModelIndex(), first, first + len(lines) - 1)
+            self.lines.extend(lines)
+            self.endInsertRows()
+        return first
+
+    def drop_lone_blank(self) -> None:
+        """Removes the form's single blank line, so added lines do not sit below it."""
+        if len(self.lines) == 1 and self.lines[0] == ["", "", ""]:
+            self.beginResetModel()
+            self.lines.clear()
+            self.endResetModel()
+
+    def merge_quantities(self, lines):
+        """
+        Adds [sku, qty_text, error] lines, increasing the quantity of a line that already has
+        the SKU instead of repeating it. Returns (rows added, rows updated).
+        """
+        self.drop_lone_blank()
+        rows = {line[0]: row for row, line in enumerate(self.lines) if line[0]}
+        new_lines = []
+        updated = []
+        for sku, qty_text, error in lines:
+            row = rows.get(sku)
+            if row is None or not self.lines[row][1].isdigit():
+                rows[sku] = len(self.lines) + len(new_lines)
+                new_lines.append([sku, qty_text, error])
+            elif row >= len(self.lines):
+                line = new_lines[row - len(self.lines)]
+                line[1] = str(int(line[1]) + int(qty_text))
+            else:
+                line = self.lines[row]
+                line[1] = str(int(line[1]) + int(qty_text))
+                line[2] = line[2] or error
+                updated.append(row)
+        if updated:
+            self.dataChanged.emit(self.index(min(updated), 0), self.index(max(updated), 1))
+        self.append_lines(new_lines)
+        return len(new_lines), len(updated)
+
+    def remove_rows(self, rows) -> None:
+        """Removes the given rows, keeping at least one (blank) line in the form."""
+        self.beginResetModel()
+        drop = set(rows)
+        self.lines = [line for row, line in enumerate(self.lines) if row not in drop]
+        self.endResetModel()
+        if not self.lines:
+            self.add_blank_line()
+
+    def set_lines(self, lines) -> None:
+        """Replaces every line with the given [sku, qty_text, error] lines."""
+        self.beginResetModel()
+        self.lines = lines or [["", "", ""]]
+        for line in self.lines:
+            line[2] = line[2] or validate_line(line[0], line[1], self.catalog)
+        self.sku_states = {}
+        self._note_states(self.lines)
+        self.endResetModel()
+
+    def clear(self) -> None:
+        """Resets the form to a single blank line."""
+        self.beginResetModel()
+        self.lines = [["", "", ""]]
+        self.sku_states = {}
+        self.endResetModel()
+
+    def entries(self):
+        """Returns (sku, quantity) pairs ready to submit."""
+        return entries_to_submit(self.lines)
+
+    def error_count(self) -> int:
+        return sum(1 for line in self.lines if line[2])
+
+
+class PasteSignals(QObject):
+    parsed = pyqtSignal(list)  # Parsed [sku, qty_text, error] lines
+
+
+class PasteWorker(QRunnable):
+    '''
+    Parses pasted text and checks its format on a thread-pool thread so the UI stays responsive.
+    The catalog is not touched here: its caches and the server client belong to the GUI thread,
+    which checks the parsed lines against it (see OrderEntryModel.check_lines()).
+    '''
+    def __init__(self, text: str) -> None:
+        super().__init__()
+        self.text = text
+        self.signals = PasteSignals()
+
+    def run(self) -> None:
+        self.signals.parsed.emit(parse_entry_lines(self.text))
+
+
+class OrderEntryGrid(QTableView):
+    '''
+    Editable grid for material order lines. Ctrl+V pastes "SKU<TAB>qty" lines from the clipboard.
+    In scan mode, barcode scans (fast bursts of keys ending in Enter) add to the quantities instead.
+    '''
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.entry_model = OrderEntryModel(self)
+        self.setModel(self.entry_model)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setAlternatingRowColors(True)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self._paste_jobs = []  # Keeps running workers' signal objects alive
+        self.on_paste_done = None  # Optional callback (added, bad) after a paste finishes
+
+        # --- Barcode scan mode ---
+        self.scan_mode = False
+        self.scan_detector = ScanDetector()
+        self.scan_rows = None  # Callable returning the inventory rows scans are checked against
+        self.key_clock = lambda event: event.timestamp()  # Key time in ms; replays substitute their own
+        self.on_scan_done = None  # Optional callback (scans, added, updated, bad) after scans are applied
+        self._pending_scans = []
+        self._edit_triggers = self.editTriggers()  # Restored when scan mode ends
+        self.scan_timer = QTimer(self)  # Batches everything scanned within one frame
+        self.scan_timer.setSingleShot(True)
+        self.scan_timer.setInterval(FRAME_MS)
+        self.scan_timer.timeout.connect(self.apply_scans)
+
+    def set_scan_mode(self, enabled: bool) -> None:
+        """Turns scan mode on or off. Cells cannot be edited while it is on."""
+        if enabled == self.scan_mode:
+            return
+        self.scan_mode = enabled
+        self.scan_detector = ScanDetector()
+        if enabled:
+            self._edit_triggers = self.editTriggers()
+            self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.setFocus()  # Also commits a cell that was being edited
+        else:
+            self.apply_scans()
+            self.setEditTriggers(self._edit_triggers)
+
+    def keyPressEvent(self, event) -> None:
+        if self.scan_mode:
+            text = "\r" if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter) else event.text()
+            if text:
+                self.scan_key(text, self.key_clock(event))
+            return
+        if event.matches(QKeySequence.StandardKey.Paste):
+            self.paste_clipboard()
+            return
+        super().keyPressEvent(event)
+
+    def scan_key(self, text: str, timestamp: float) -> None:
+        """Feeds one key to the scan detector; a completed scan is applied on the next frame."""
+        code = self.scan_detector.feed(text, timestamp)
+        if code:
+            self._pending_scans.append(code)
+            if not self.scan_timer.isActive():
+                self.scan_timer.start()
+
+    def apply_scans(self) -> None:
+        """Validates the scans received since the last frame as one batch and merges them into the grid."""
+        scans, self._pending_scans = self._pending_scans, []
+        if not scans:
+            return
+        lines = validate_scans(coalesce_scans(scans), self.scan_rows())
+        added, updated = self.entry_model.merge_quantities(lines)
+        self.scrollTo(self.entry_model.index(self.entry_model.rowCount() - 1, 0))
+        if self.on_scan_done:
+            self.on_scan_done(len(scans), added, updated, sum(1 for line in lines if line[2]))
+
+    def paste_clipboard(self) -> None:
+        """Parses the clipboard text in the background and appends the lines."""
+        self.paste_text(QApplication.clipboard().text())
+
+    def paste_text(self, text: str) -> None:
+        """Parses text in the background and appends the lines when done."""
+        if not text.strip():
+            return
+        worker = PasteWorker(text)
+        worker.signals.parsed.connect(self._on_parsed)  # Delivered on the GUI thread
+        self._paste_jobs.append(worker.signals)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_parsed(self, lines) -> None:
+        self._paste_jobs.remove(self.sender())  # This paste's signals; others may still be running
+        # Replace a lone blank line rather than leaving it above the pasted block
+        self.entry_model.drop_lone_blank()
+        self.entry_model.check_lines(lines)  # One hash lookup per line
+        first = self.entry_model.append_lines(lines)
+        bad = sum(1 for line in lines if line[2])
+        if lines:
+            self.scrollTo(self.entry_model.index(first, 0))
+        if self.on_paste_done:
+            self.on_paste_done(len(lines), bad)
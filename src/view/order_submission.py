@@ -0,0 +1,119 @@
+from PyQt6.QtWidgets import QMessageBox
+
+from model.sku_order import validate_entries, high_quantity_entries, order_summary, place_order
+from remote.model_client import ServerUnavailable
+
+
+def handle_order_submission(view):
+    # Extract the entries (SKU and quantity) from the view
+    entries = get_entries(view)
+
+    # If no entries are found, show a warning message and exit
+    if not entries:
+        show_custom_message(
+            view,
+            "Invalid Input",
+            "Please enter at least one valid SKU and quantity.",
+            icon=QMessageBox.Icon.Warning
+        )
+        return
+
+    # Validate SKUs and quantities using the model logic (on the shared server if there is one)
+    client = getattr(view.controller, "model_client", None)
+    try:
+        errors, valid_entries = validate_entries(entries, client)
+    except ServerUnavailable as error:
+        show_custom_message(view, "Server Unavailable", str(error), icon=QMessageBox.Icon.Critical)
+        return
+    if errors:
+        # If validation failed, show an error message with the issues
+        show_custom_message(
+            view,
+            "Order Validation Failed",
+            "\n".join(errors),
+            icon=QMessageBox.Icon.Critical
+        )
+        return
+
+    # Check for high quantity entries (>= 100) and ask for user confirmation
+    high_quantity = high_quantity_entries(valid_entries)
+    if high_quantity:
+        confirm = show_custom_message(
+            view,
+            "High Quantity Confirmation",
+            f"These SKUs have a quantity of 100 or more:\n\n{order_summary(high_quantity)}\n\nProceed?",
+            icon=QMessageBox.Icon.Question,
+            buttons=QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+
+    # Confirm final order details with the user before proceeding
+    confirm = show_custom_message(
+        view,
+        "Confirm Order",
+        f"Do you want to place this order?\n\n{order_summary(valid_entries)}",
+        icon=QMessageBox.Icon.Question,
+        buttons=QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+    )
+    if confirm != QMessageBox.StandardButton.Yes:
+        return
+
+    # Place the order (on the shared server so other desktops see it, if there is one)
+    try:
+        errors, order_id = place_order(
+            valid_entries,
+            order_ids=view.controller.order_ids,
+            client=client,
+            user=view.controller.current_user,
+        )
+    except ServerUnavailable as error:
+        # The form is left as it is so the order can be submitted again once the server is back
+        show_custom_message(view, "Server Unavailable", f"The order was not placed.\n\n{error}", icon=QMessageBox.Icon.Critical)
+        return
+    if errors:
+        show_custom_message(view, "Order Validation Failed", "\n".join(errors), icon=QMessageBox.Icon.Critical)
+        return
+
+    # Clear form inputs after successful submission
+    clear_entries(view)
+    show_custom_message(view, "Order Placed", f"Material order {order_id} has been placed.")
+
+
+def get_entries(view):
+    """
+    Extracts SKU and quantity entries from the view's entry grid, returning a list of valid entries.
+    """
+    # Only lines with a SKU and a numeric quantity are submitted
+    return view.entry_model.entries()
+
+
+def clear_entries(view):
+    """
+    Clears all entries in the form, leaving a single blank line.
+    """
+    view.entry_model.clear()
+
+
+def show_custom_message(parent, title, text, icon=QMessageBox.Icon.Information, buttons=QMessageBox.StandardButton.Ok):
+    """
+    Utility function to display a styled message box with the specified parameters.
+    """
+    msg = QMessageBox(parent)
+    msg.setIcon(icon)
+    msg.setWindowTitle(title)
+    msg.setText(text)
+    msg.setStandardButtons(buttons)
+    msg.setStyleSheet("""
+        QLabel {
+            color: black;
+            font-family: 'Roboto';
+            font-size: 14px;
+        }
+        QPushButton {
+            color: black;
+            font-family: 'Roboto';
+            font-size: 13px;
+        }
+    """)
+    return msg.exec()
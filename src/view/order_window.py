@@ -3,15 +3,23 @@ from PyQt6.QtWidgets import (
     QHBoxLayout, QApplication, QTableWidget, QTableWidgetItem,
     QComboBox, QLineEdit, QPushButton
 )
-from PyQt6.QtGui import QFont
+from PyQt6.QtGui import QFont, QKeySequence, QShortcut
 from PyQt6.QtCore import Qt
 
 from sidebar import *
-from model.order import OrderManager
-from typing import List
-
-
-class OrderWindow(QWidget):
+from model.order import Order, OrderManager
+from model.money import format_money
+from model.search_cache import cached_positions, order_search_cache
+from model.report_export import ORDER_HEADER, order_report_rows
+from view.export_progress import ExportProgress, ask_export_path
+from view.view_lifecycle import ManagedView
+from model.sort_index import SortIndex, ORDER_SORT_KEYS
+from typing import List, Optional, Tuple
+from copy import copy
+import time
+
+
+class OrderWindow(ManagedView, QWidget):
     '''
     The main window for managing work orders in the inventory system.
     Displays a sidebar for navigation, a searchable table of orders,
@@ -30,8 +38,14 @@ class OrderWindow(QWidget):
         self.setWindowTitle("Inventory System")  # Set the window title
         self.resize(1700, 1000)  # Set the default window size
 
-        self.order_manager: OrderManager = OrderManager()  # Manager handling all order-related logic
-        self.order_manager.seed_orders()  # Populate with initial order data
+        self.order_manager: OrderManager = self.controller.order_manager  # Shared manager handling all order-related logic
+        self.undo_stack: List[Tuple[str, str, str]] = []  # (order_id, old_status, new_status) changes made in this window
+        self.redo_stack: List[Tuple[str, str, str]] = []  # Changes undone and available to redo
+        self.sort_index: Optional[SortIndex] = None  # Cached per-column sort permutations of the orders
+        self.sort_column: int = 1  # Sort by date...
+        self.sort_descending: bool = True  # ...newest first, like OrderManager.get_orders()
+        self.listen(self.order_manager.listeners, self.on_order_status_changed)  # Keep sort permutations current
+        self.listen(self.controller.refresher.listeners, self.on_orders_refreshed)  # Changes made by other desktops
 
         screen = QApplication.primaryScreen()  # Get the primary screen object
         screen_geometry = screen.availableGeometry()  # Get the available screen geometry
@@ -91,8 +105,36 @@ class OrderWindow(QWidget):
         """)
         self.clear_button.clicked.connect(self.clear_search)  # Connect button to clear action
 
+        self.undo_button = QPushButton("Undo", self)  # Button to undo the last status change
+        self.redo_button = QPushButton("Redo", self)  # Button to redo the last undone change
+        for button in (self.undo_button, self.redo_button):
+            button.setFixedWidth(80)  # Set fixed width
+            button.setStyleSheet("""
+                background-color: #228B22;
+                color: white;
+                border-radius: 4px;
+                padding: 5px;
+            """)
+        self.undo_button.clicked.connect(self.undo_status_change)  # Connect button to undo action
+        self.redo_button.clicked.connect(self.redo_status_change)  # Connect button to redo action
+        self.export_button = QPushButton("Export", self)  # Button to export the listed orders
+        self.export_button.setFixedWidth(80)
+        self.export_button.setStyleSheet("""
+            background-color: #228B22;
+            color: white;
+            border-radius: 4px;
+            padding: 5px;
+        """)
+        self.export_button.clicked.connect(self.export_orders)  # Connect button to export action
+        self.export_dialog = None  # Progress dialog of the running export, if any
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo_status_change)  # Ctrl+Z
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.redo_status_change)  # Ctrl+Y / Ctrl+Shift+Z
+
         self.search_layout.addWidget(self.search_box)  # Add search box to layout
         self.search_layout.addWidget(self.clear_button)  # Add clear button to layout
+        self.search_layout.addWidget(self.undo_button)  # Add undo button to layout
+        self.search_layout.addWidget(self.redo_button)  # Add redo button to layout
+        self.search_layout.addWidget(self.export_button)  # Add export button to layout
         self.search_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)  # Align left
 
         content_layout.addLayout(self.search_layout)  # Add search layout to content
@@ -120,16 +162,78 @@ class OrderWindow(QWidget):
         self.order_table.verticalHeader().setVisible(False)  # Hide row numbers
         self.order_table.horizontalHeader().setStretchLastSection(True)  # Stretch last column
         self.order_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)  # Stretch columns evenly
+        self.order_table.horizontalHeader().setSortIndicatorShown(True)  # Show which column is sorted
+        self.order_table.horizontalHeader().setSortIndicator(self.sort_column, Qt.SortOrder.DescendingOrder)
+        self.order_table.horizontalHeader().sectionClicked.connect(self.on_sort)  # Click a header to sort by it
         content_layout.addWidget(self.order_table)  # Add table to layout
 
         self.populate_orders()  # Fill table with data
+        self.update_undo_buttons()  # Nothing to undo yet
 
 
     def populate_orders(self) -> None:
         """
         Populates the order table with all available orders.
         """
-        self.populate_filtered_orders(self.order_manager.get_orders())
+        self.populate_filtered_orders(self.sorted_orders())
+
+
+    def sorted_orders(self, query: str = "") -> List[Order]:
+        """
+        Returns the orders matching the query, in the current sort order.
+        Sorting reuses the cached permutation for the column; a search only picks rows out of it.
+
+        Args:
+            query (str): Search text; empty means every order.
+        """
+        rows = self.order_manager.orders
+        if self.sort_index is None or self.sort_index.rows is not rows:
+            self.sort_index = SortIndex(rows, ORDER_SORT_KEYS)  # First use, or a remote manager sent a fresh list
+
+        positions = None
+        if query:
+            version = getattr(self.order_manager, "version", None)  # Remote managers have their own cache
+            positions = cached_positions(order_search_cache, "orders", query, rows, version)
+        ordered = self.sort_index.sorted_positions(self.sort_column, positions, self.sort_descending)
+        return [rows[position] for position in ordered]
+
+
+    def on_sort(self, column: int) -> None:
+        """
+        Sorts the table by the clicked column; clicking the same column again reverses the order.
+
+        Args:
+            column (int): The header section that was clicked.
+        """
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+        order = Qt.SortOrder.DescendingOrder if self.sort_descending else Qt.SortOrder.AscendingOrder
+        self.order_table.horizontalHeader().setSortIndicator(column, order)
+        self.on_search()  # Redisplay with the current filter
+
+
+    def on_order_status_changed(self, order: Order, old_status: str, new_status: str, user, timestamp) -> None:
+        """
+        OrderManager listener: moves the changed order within the cached sort permutations.
+        """
+        if self.sort_index is None or self.sort_index.rows is not self.order_manager.orders:
+            return  # Nothing cached yet, or the cache will be rebuilt anyway
+        old_order = copy(order)
+        old_order.status = old_status  # The row as it was sorted before the change
+        self.sort_index.update_row(self.order_manager.position_of(order.order_id), old_order)
+
+
+    def on_orders_refreshed(self, changes: List[Tuple[Order, Optional[str]]]) -> None:
+        """
+        DataRefresher listener: applies orders changed elsewhere to the cached sort
+        permutations, then redisplays the table with the current filter and sort.
+        """
+        for order, old_status in changes:
+            if old_status is not None:
+                self.on_order_status_changed(order, old_status, order.status, None, None)
+        self.on_search()
 
 
     def populate_filtered_orders(self, orders) -> None:
@@ -143,7 +247,7 @@ class OrderWindow(QWidget):
         self.order_table.setRowCount(len(orders))  # Set new row count
 
         for row, order in enumerate(orders):
-            data = [order.order_id, order.date, order.shipping_type, f"${order.price:.2f}"]  # Order details
+            data = [order.order_id, order.date, order.shipping_type, format_money(order.price)]  # Order details
 
             for col, value in enumerate(data):
                 item = QTableWidgetItem(str(value))  # Create table cell item
@@ -189,31 +293,78 @@ class OrderWindow(QWidget):
         order = self.order_manager.get_order_by_id(order_id)  # Retrieve order object
 
         if order and order.status != new_status:
-            order.change_status(new_status)  # Update status
+            self.undo_stack.append((order_id, order.status, new_status))  # Remember how to undo it
+            self.redo_stack.clear()  # A new change invalidates anything undone before it
+            self.order_manager.change_order_status(order_id, new_status, user=self.controller.current_user)  # Update and journal status
             self.populate_orders()  # Refresh table
+        self.update_undo_buttons()
+
+
+    def undo_status_change(self) -> None:
+        """
+        Reverts the most recent status change made in this window.
+        The revert is itself a new change, so it is journaled and kept in the order history.
+        """
+        if self._apply_history_step(self.undo_stack, self.redo_stack, undo=True):
+            self.on_search()  # Refresh table, keeping the current filter
+
+
+    def redo_status_change(self) -> None:
+        """
+        Re-applies the most recently undone status change.
+        """
+        if self._apply_history_step(self.redo_stack, self.undo_stack, undo=False):
+            self.on_search()  # Refresh table, keeping the current filter
+
+
+    def _apply_history_step(self, source: List[Tuple[str, str, str]], target: List[Tuple[str, str, str]], undo: bool) -> bool:
+        """
+        Pops a change from one stack, applies it (or its reverse) and pushes it onto the other.
+        Changes whose order has since moved to another status are skipped rather than overwritten.
+        """
+        applied = False
+        while source and not applied:
+            order_id, old_status, new_status = source.pop()
+            expected, target_status = (new_status, old_status) if undo else (old_status, new_status)
+            if self.order_manager.status_at(order_id, time.time()) != expected:
+                continue  # Someone else changed this order since; leave their change alone
+            self.order_manager.change_order_status(order_id, target_status, user=self.controller.current_user)
+            target.append((order_id, old_status, new_status))
+            applied = True
+        self.update_undo_buttons()
+        return applied
+
+
+    def update_undo_buttons(self) -> None:
+        """
+        Enables the undo/redo buttons only when there is something to undo or redo.
+        """
+        self.undo_button.setEnabled(bool(self.undo_stack))
+        self.redo_button.setEnabled(bool(self.redo_stack))
 
 
     def on_search(self) -> None:
         """
         Filters the displayed orders based on the search query.
         """
-        query = self.search_box.text().lower()  # Get lowercase search query
-        filtered_orders = []  # List to hold matched orders
-
-        for order in self.order_manager.get_orders():
-            row_data = [
-                str(order.order_id),
-                str(order.date),
-                str(order.shipping_type),
-                f"${order.price:.2f}",
-                str(order.status)
-            ]
-            if any(query in field.lower() for field in row_data):
-                filtered_orders.append(order)  # Add matching order
+        query = self.search_box.text()  # Get search query
+        filtered_orders = self.sorted_orders(query)  # Search logic from model, in the current sort order
 
         self.populate_filtered_orders(filtered_orders)  # Display matched orders
 
 
+    def export_orders(self, path: str = "") -> None:
+        """
+        Exports the orders matching the current search, in the displayed order, to CSV or XLSX.
+        Rows are generated and written on a worker thread.
+        """
+        path = path or ask_export_path(self, "Export Work Orders", "work_orders.csv")
+        if not path:
+            return
+        orders = self.sorted_orders(self.search_box.text())  # References to the orders, not copies
+        self.export_dialog = ExportProgress(self, "Export Work Orders", path, ORDER_HEADER, order_report_rows(orders), len(orders))
+
+
     def clear_search(self) -> None:
         """
         Clears the search box and resets the order table view.
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import tracemalloc
+
+from PyQt6.QtWidgets import QApplication
+
+
+class ManagedView:
+    '''
+    Mixin for the top-level views. Callbacks registered on long-lived model objects through
+    listen() are removed again when the window closes, so a closed window is neither kept
+    alive nor called back by the model.
+    '''
+    def listen(self, listeners: list, callback) -> None:
+        """Appends callback to a model listener list, remembering it for release()."""
+        listeners.append(callback)
+        if not hasattr(self, "_subscriptions"):
+            self._subscriptions = []
+        self._subscriptions.append((listeners, callback))
+
+    def release(self) -> None:
+        """Removes every callback added with listen(). Safe to call more than once."""
+        subscriptions, self._subscriptions = getattr(self, "_subscriptions", []), []
+        for listeners, callback in subscriptions:
+            try:
+                listeners.remove(callback)
+            except ValueError:
+                pass  # Already gone
+
+    def closeEvent(self, event) -> None:
+        self.release()
+        super().closeEvent(event)
+
+
+def close_view(view) -> None:
+    """Tears down a replaced view: removes its model callbacks, closes it and deletes it."""
+    view.release()
+    view.close()
+    view.deleteLater()  # Frees the window and its tables once control returns to the event loop
+
+
+class NavigationTrace:
+    '''
+    Debug mode (CONTRACTOR_PLUS_DEBUG_VIEWS=1): after every navigation, prints the number of
+    live widgets and windows and how much Python memory changed since the previous one,
+    so a view that is never freed shows up as a steadily growing count.
+    '''
+    def __init__(self) -> None:
+        self.enabled = bool(os.environ.get("CONTRACTOR_PLUS_DEBUG_VIEWS"))
+        self.navigations = 0
+        self.last_memory = 0
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def record(self, name: str) -> None:
+        """Reports the state after opening the named view (only in debug mode)."""
+        if not self.enabled:
+            return
+        self.navigations += 1
+        widgets = len(QApplication.allWidgets())
+        windows = sum(1 for widget in QApplication.topLevelWidgets() if widget.isVisible())
+        memory, peak = tracemalloc.get_traced_memory()
+        delta, self.last_memory = memory - self.last_memory, memory
+        print(
+            f"[views {time.strftime('%H:%M:%S')}] #{self.navigations} {name}: {widgets} widgets, "
+            f"{windows} visible windows, {memory / 1024:.0f} KiB traced ({delta / 1024:+.0f} KiB), "
+            f"peak {peak / 1024:.0f} KiB",
+            file=sys.stderr,
+        )
@@ -0,0 +1,55 @@
+"""
+Shared test setup: an offscreen Qt display, a fresh data directory for every test (the real
+data/ is never touched) and a controller whose model callbacks are removed again afterwards.
+Run the tests from the repository root, like main.py, so resources/ is found.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # No windows on screen
+os.environ.pop("CONTRACTOR_PLUS_SERVER", None)  # Always test the local stores
+os.environ["CONTRACTOR_PLUS_REFRESH_MS"] = "0"  # No polling for other desktops
+
+import model.storage as storage
+from model.incoming_orders import incoming_order_listeners
+import model.inventory_data as inventory_model
+from model.inventory_data import inventory_data, inventory_listeners
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Points the data directory at a temporary one for the test."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path / "data"))
+    return tmp_path / "data"
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def controller(qapp):
+    """A logged-in controller over the test's data directory, shut down after the test."""
+    import controller.controller as ctr
+
+    saved_inventory, saved_incoming = list(inventory_listeners), list(incoming_order_listeners)
+    app_controller = ctr.Controller()
+    yield app_controller
+    app_controller.exit_app()
+    # Later tests must not call into this closed controller's journal, change log or views
+    inventory_listeners[:] = saved_inventory
+    incoming_order_listeners[:] = saved_incoming
+
+
+@pytest.fixture
+def restore_inventory(monkeypatch):
+    """Puts the shared rows (and their version, which decides whether the snapshot is used) back."""
+    monkeypatch.setattr(inventory_model, "inventory_version", inventory_model.inventory_version)
+    saved = [list(row) for row in inventory_data]
+    yield
+    for row, old in zip(inventory_data, saved):
+        row[:] = old
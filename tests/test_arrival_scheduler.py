@@ -0,0 +1,105 @@
+"""
+Arrival scheduler: due shipments are received once, in arrival order, and never again: not
+after a restart, and not by another desktop sharing the data directory, even when several
+receive at the same moment.
+"""
+import copy
+import datetime
+import json
+import threading
+
+import pytest
+
+import model.arrival_scheduler as arrival_scheduler
+from model.arrival_scheduler import ArrivalScheduler
+
+
+def day(offset):
+    return (datetime.date.today() + datetime.timedelta(days=offset)).isoformat()
+
+
+SHIPMENTS = [
+    {"id": "ORD-101", "arrival": day(-2), "status": "Shipped", "items": 1, "lines": [("HAM-0001", 5)]},
+    {"id": "ORD-102", "arrival": day(-1), "status": "Shipped", "items": 1, "lines": [("SAW-0002", 3)]},
+    {"id": "ORD-103", "arrival": day(5), "status": "Shipped", "items": 1, "lines": [("HAM-0001", 1)]},
+    {"id": "ORD-104", "arrival": day(-3), "status": "Pending", "items": 1, "lines": [("HAM-0001", 9)]},
+]
+
+
+@pytest.fixture
+def receipts(monkeypatch):
+    """Records the lines received into stock instead of changing the inventory."""
+    lines = []
+    lock = threading.Lock()
+
+    def receive_quantities(shipment_lines):
+        with lock:
+            lines.extend(shipment_lines)
+        return []
+
+    monkeypatch.setattr(arrival_scheduler, "receive_quantities", receive_quantities)
+    return lines
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "received_shipments.json")
+
+
+def desktop(path):
+    """A scheduler over this desktop's own copy of the shipments, like each process has."""
+    shipments = copy.deepcopy(SHIPMENTS)
+    return ArrivalScheduler(shipments, path), {shipment["id"]: shipment for shipment in shipments}
+
+
+def test_due_shipments_are_received_in_arrival_order(path, receipts):
+    scheduler, shipments = desktop(path)
+    heard = []
+    scheduler.listeners.append(lambda shipment, missing: heard.append(shipment["id"]))
+    received = scheduler.receive_due()
+    assert [shipment["id"] for shipment in received] == heard == ["ORD-101", "ORD-102"]
+    assert receipts == [("HAM-0001", 5), ("SAW-0002", 3)]
+    assert shipments["ORD-103"]["status"] == "Shipped" and shipments["ORD-104"]["status"] == "Pending"
+    assert scheduler.receive_due() == []
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file)["received"] == {"ORD-101": day(-2), "ORD-102": day(-1)}
+
+
+def test_a_restart_does_not_receive_again(path, receipts):
+    desktop(path)[0].receive_due()
+    restarted, shipments = desktop(path)
+    assert shipments["ORD-101"]["status"] == "Delivered"
+    assert restarted.receive_due() == []
+    assert len(receipts) == 2
+
+
+def test_another_desktops_receipt_is_not_repeated(path, receipts):
+    first, _ = desktop(path)
+    second, second_shipments = desktop(path)  # Both started before anything was received
+    assert len(first.receive_due()) == 2
+    assert second.receive_due() == []
+    assert second_shipments["ORD-101"]["status"] == "Delivered"
+    assert len(receipts) == 2
+
+    due_later = datetime.datetime.now().timestamp() + 10 * 86400
+    assert [shipment["id"] for shipment in second.receive_due(now=due_later)] == ["ORD-103"]
+    assert first.receive_due(now=due_later) == []
+    assert sorted(json.load(open(path, encoding="utf-8"))["received"]) == ["ORD-101", "ORD-102", "ORD-103"]
+
+
+def test_simultaneous_desktops_receive_each_shipment_once(path, receipts):
+    desktops = [desktop(path)[0] for _ in range(8)]
+    start = threading.Barrier(len(desktops))
+    results = []
+
+    def receive(scheduler):
+        start.wait()
+        results.append(scheduler.receive_due())
+
+    threads = [threading.Thread(target=receive, args=(scheduler,)) for scheduler in desktops]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(shipment["id"] for result in results for shipment in result) == ["ORD-101", "ORD-102"]
+    assert sorted(receipts) == [("HAM-0001", 5), ("SAW-0002", 3)]
@@ -0,0 +1,52 @@
+"""
+Change log checks across launches: starting the application must not append anything to
+the change log, and a shipment received in one run is logged once, not again by later runs.
+Each launch is a separate process over the same data directory, like a user restarting.
+"""
+import os
+import subprocess
+import sys
+import time
+
+from model.change_log import CHANGE_LOG_NAME, read_changes
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+LAUNCH = """
+import sys, time
+from PyQt6.QtWidgets import QApplication
+app = QApplication([])
+import controller.controller as ctr
+controller = ctr.Controller()
+app.processEvents()
+if "--receive" in sys.argv:  # Let a month pass: every shipped order arrives
+    controller.arrival_scheduler.receive_due(now=time.time() + 30 * 86400)
+controller.exit_app()
+"""
+
+
+def launch(data_dir, *args):
+    """Starts and exits the application once in a new process."""
+    environment = dict(os.environ, CONTRACTOR_PLUS_DATA_DIR=str(data_dir), PYTHONPATH=SRC)
+    subprocess.run([sys.executable, "-c", LAUNCH, *args], env=environment, check=True, timeout=120)
+
+
+def logged(data_dir):
+    return list(read_changes(0, str(data_dir / CHANGE_LOG_NAME)))
+
+
+def test_startup_logs_nothing(data_dir):
+    launch(data_dir)
+    launch(data_dir)
+    assert logged(data_dir) == []
+
+
+def test_received_shipments_are_logged_once(data_dir):
+    launch(data_dir, "--receive")
+    received = [change["order_id"] for change in logged(data_dir) if change["type"] == "material_order.status"]
+    assert received, "no shipment was received"
+
+    launch(data_dir)
+    launch(data_dir, "--receive")  # Nothing is left to arrive
+    again = [change["order_id"] for change in logged(data_dir) if change["type"] == "material_order.status"]
+    assert again == received
@@ -0,0 +1,158 @@
+"""
+Data refresher: quantities another desktop saves to the shared location stock file reach
+this desktop's store (keeping its own unsaved changes) and an open inventory window, without
+being logged again; and changed orders on the model server are fetched off the ticking
+thread and delivered back on the GUI thread.
+"""
+import threading
+import time
+
+from controller.controller import RefreshSignals
+from model.change_log import read_changes
+from model.data_refresher import DataRefresher, LocationStockSource, ServerEventSource
+from model.inventory_data import inventory_data
+from model.inventory_locations import LocationStock, LocationStockFile
+
+
+def open_store(path):
+    """One desktop's location stock over the shared file (not mirrored into any rows)."""
+    stock = LocationStock()
+    stock_file = LocationStockFile(str(path), save_delay=30.0)
+    stock_file.load(stock)
+    stock_file.attach(stock)
+    return stock, stock_file
+
+
+def test_saved_quantities_reach_the_other_desktop(tmp_path):
+    path = tmp_path / "location_stock.json"
+    first, first_file = open_store(path)
+    first.set_quantity("HAM-0001", "Main Yard", 10)
+    first.set_quantity("HAM-0001", "Truck 1", 2)
+    first_file.flush()
+
+    second, second_file = open_store(path)
+    refresher = DataRefresher()
+    refresher.add_source(LocationStockSource(second_file))
+    heard = []
+    second.listeners.append(lambda *change: heard.append(change))
+    assert refresher.tick() == 0 and heard == []  # Nothing saved since it loaded
+
+    second.adjust("HAM-0001", "Main Yard", -3)  # Not saved yet
+    first.transfer("HAM-0001", "Main Yard", "North Yard", 4)
+    first.set_quantity("SAW-0002", "Truck 2", 1)  # A SKU the second desktop has never seen
+    first_file.flush()
+    heard.clear()
+    refresher.tick()
+    assert second.quantity("HAM-0001", "Main Yard") == 3  # 10 - 3 here - 4 moved there
+    assert second.quantity("HAM-0001", "North Yard") == 4
+    assert second.quantity("SAW-0002", "Truck 2") == 1
+    assert second.total("HAM-0001") == 9
+    assert sorted(change[:2] for change in heard) == [("HAM-0001", "Main Yard"), ("HAM-0001", "North Yard"), ("SAW-0002", "Truck 2")]
+    assert second_file._timer is not None  # Only the change made here is waiting to be saved
+    assert first_file._timer is None and not second.applying_saved
+
+
+def shown_quantity(view, sku):
+    model = view.inventory_model
+    skus = [model.data(model.index(row, 3)) for row in range(model.rowCount())]
+    return int(model.data(model.index(skus.index(sku), 5)))
+
+
+def test_another_desktops_stock_reaches_an_open_window(controller, restore_inventory):
+    controller.open_inventory()
+    view = controller.inventory_view
+    sku = inventory_data[0][2]
+    before = shown_quantity(view, sku)
+
+    other, other_file = open_store(controller.location_stock.file.path)  # Another desktop, same data directory
+    other.adjust(sku, "Main Yard", 5)
+    other_file.flush()
+    logged = len(list(read_changes(directory=controller.change_log.directory)))
+    controller.refresher.tick()
+
+    assert controller.location_stock.total(sku) == before + 5
+    assert shown_quantity(view, sku) == before + 5
+    assert len(list(read_changes(directory=controller.change_log.directory))) == logged  # Logged by the other desktop
+
+
+class SlowClient:
+    """ModelClient stand-in whose order fetches wait until the test releases them."""
+    def __init__(self):
+        self.listeners = []
+        self.released = threading.Event()
+        self.down = False
+        self.fetched = []
+
+    def get_order(self, order_id):
+        self.released.wait(5)
+        if self.down:
+            raise ConnectionError("Cannot reach the model server")
+        self.fetched.append(order_id)
+        return f"order {order_id}", None
+
+    def push(self, *order_ids):
+        for listener in self.listeners:
+            listener(1, [(1, "order", order_id) for order_id in order_ids])
+
+
+def wait_for(condition, pump=lambda: None):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        pump()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_server_changes_are_fetched_off_the_ticking_thread():
+    client = SlowClient()
+    source = ServerEventSource(client)
+    refresher = DataRefresher()
+    refresher.add_source(source)
+    delivered = []
+    source.listeners.append(refresher.deliver)
+    refresher.listeners.append(delivered.append)
+
+    client.push("ORD141", "ORD150", "ORD141")
+    start = time.monotonic()
+    assert refresher.tick() == 0  # Returns at once although the server is slow
+    assert time.monotonic() - start < 1
+    client.push("ORD153")  # Reported while the fetch is running: fetched by the same thread
+    assert refresher.tick() == 0
+    client.released.set()
+    assert wait_for(lambda: delivered)
+    assert client.fetched == ["ORD141", "ORD150", "ORD153"]
+    assert [order for order, _old in delivered[0]] == ["order ORD141", "order ORD150", "order ORD153"]
+
+
+def test_unreachable_server_is_retried_on_a_later_tick():
+    client = SlowClient()
+    client.released.set()
+    client.down = True
+    source = ServerEventSource(client)
+    refresher = DataRefresher()
+    refresher.add_source(source)
+    delivered = []
+    source.listeners.append(delivered.append)
+
+    client.push("ORD141")
+    refresher.tick()
+    assert wait_for(lambda: not source._fetching)
+    assert delivered == []
+    client.down = False
+    refresher.tick()  # The failed fetch moved the stamp, so this tick tries again
+    assert wait_for(lambda: delivered)
+    assert client.fetched == ["ORD141"]
+
+
+def test_fetched_changes_are_delivered_on_the_gui_thread(qapp):
+    refresher = DataRefresher()
+    threads = []
+    refresher.listeners.append(lambda changes: threads.append(threading.current_thread()))
+    signals = RefreshSignals()
+    signals.fetched.connect(refresher.deliver)
+    worker = threading.Thread(target=signals.fetched.emit, args=([("order", None)],))
+    worker.start()
+    worker.join()
+    assert threads == []  # Queued, not run on the worker
+    assert wait_for(lambda: threads, qapp.processEvents)
+    assert threads == [threading.main_thread()]
@@ -0,0 +1,144 @@
+"""
+Demand forecast: events are binned into the right day columns, a clean weekly pattern gives
+matching seasonal factors, forecasts are refitted only when the history changes, suggestions
+count what is already on order, and the demand read from the change log is consumption only
+(material orders and receipts are not demand) and survives a restart.
+"""
+import math
+import os
+
+import numpy as np
+import pytest
+
+from model.change_log import ChangeLog, segment_paths
+from model.demand_forecast import ConsumptionHistory, DemandForecaster, DemandHistory, day_number, demand_matrix, fit_seasonal_smoothing
+
+WEEKLY = [6, 5, 4, 5, 7, 2, 1]  # Units per weekday, Monday first
+
+
+def weekday_of(day):
+    return (day + 3) % 7  # Day 0 (1970-01-01) was a Thursday
+
+
+def weekly_history(sku="HAM-0001", days=84, end_day=None):
+    end_day = day_number() if end_day is None else end_day
+    history = DemandHistory()
+    for day in range(end_day - days + 1, end_day + 1):
+        history.record(sku, WEEKLY[weekday_of(day)], day)
+    return history
+
+
+def test_events_are_binned_by_sku_and_day():
+    history = DemandHistory()
+    end = 20_000
+    history.record("A", 3, end - 2)
+    history.record("A", 2, end - 2)  # Same day: summed
+    history.record("A", 1, end)
+    history.record("A", 9, end - 5)  # Before the window
+    history.record("A", 9, end + 1)  # After it
+    history.record("B", 4, end - 4)  # First day of the window
+    matrix = demand_matrix(history, 5, end)
+    assert matrix.tolist() == [[0, 0, 5, 0, 1], [4, 0, 0, 0, 0]]
+
+
+def test_seasonal_factors_follow_a_weekly_pattern():
+    end = 20_000
+    history = weekly_history(end_day=end)
+    demand = demand_matrix(history, 84, end)
+    level, seasonal, sigma = fit_seasonal_smoothing(demand, weekday_of(end - 83))
+    mean = sum(WEEKLY) / 7
+    assert level[0] == pytest.approx(mean)
+    assert seasonal[0] == pytest.approx([units / mean for units in WEEKLY])
+    assert sigma[0] == pytest.approx(0, abs=1e-9)
+
+    # A week of demand is the same whatever weekday the lead time starts on
+    assert DemandForecaster(weekly_history(), lead_time_days=7).targets()[0] == pytest.approx(sum(WEEKLY))
+
+
+def test_targets_are_cached_until_the_history_changes():
+    history = weekly_history()
+    forecaster = DemandForecaster(history)
+    first = forecaster.targets()
+    assert forecaster.targets() is first
+    history.record("HAM-0001", 50)
+    second = forecaster.targets()
+    assert second is not first and second[0] > first[0]
+    assert forecaster.targets(lead_time_days=14) is not second  # Another lead time is another fit
+
+
+def test_recommendations_count_what_is_on_order():
+    history = weekly_history("HAM-0001")
+    for day in range(day_number() - 83, day_number() + 1):
+        history.record("SAW-0002", 1, day)
+    rows = [
+        ["Hammer", "", "HAM-0001", 1499, 10],  # Uses about 30 a week
+        ["Saw", "", "SAW-0002", 3250, 100],  # Covered
+        ["Level", "", "LVL-0003", 999, 0],  # No demand recorded: never suggested
+    ]
+    forecaster = DemandForecaster(history, lead_time_days=7)
+    target = forecaster.targets()[history.sku_ids["HAM-0001"]]
+    assert target == pytest.approx(sum(WEEKLY))
+    need = math.ceil(target - 10)
+    assert forecaster.recommendations(rows) == [("HAM-0001", need)]
+    on_order = {"HAM-0001": 15}
+    assert forecaster.recommendations(rows, on_order=lambda sku: on_order.get(sku, 0)) == [("HAM-0001", need - 15)]
+    on_order["HAM-0001"] = need
+    assert forecaster.recommendations(rows, on_order=lambda sku: on_order.get(sku, 0)) == []
+    assert DemandForecaster(DemandHistory()).recommendations(rows) == []
+
+
+@pytest.fixture
+def log(tmp_path):
+    change_log = ChangeLog(str(tmp_path / "changes"))
+    yield change_log
+    change_log.close()
+
+
+def stock_change(log, sku, old_quantity, quantity, old_price=100, price=100):
+    log.append("inventory.changed", sku=sku, price=price, quantity=quantity, old_price=old_price, old_quantity=old_quantity)
+
+
+def test_only_consumption_is_demand(log):
+    stock_change(log, "HAM-0001", 10, 7)  # 3 used
+    stock_change(log, "HAM-0001", 7, 27)  # Shipment received
+    stock_change(log, "SAW-0002", 5, 5, old_price=100, price=120)  # Price change only
+    log.append("material_order.added", order_id="MO-1", user="clerk", lines=[["HAM-0001", 50]])  # Reorder placed
+    stock_change(log, "SAW-0002", 5, 1)  # 4 used
+
+    history = ConsumptionHistory(log.directory)
+    assert history.catch_up() == 2
+    codes, days, quantities = history.demand_arrays()
+    assert [(history.skus[code], int(quantity)) for code, quantity in zip(codes, quantities)] == [("HAM-0001", 3), ("SAW-0002", 4)]
+    assert set(days.tolist()) == {day_number()}
+    assert history.catch_up() == 0
+
+
+def test_consumption_survives_a_restart_and_arrives_incrementally(log):
+    stock_change(log, "HAM-0001", 10, 7)
+    history = ConsumptionHistory(log.directory)
+    history.catch_up()
+    forecaster = DemandForecaster(history)
+    before = forecaster.targets()
+
+    stock_change(log, "HAM-0001", 7, 2)  # Used later, on this desktop or another
+    version = history.version
+    assert history.catch_up() == 1 and history.version == version + 1
+    assert forecaster.targets() is not before
+
+    restarted = ConsumptionHistory(log.directory)
+    restarted.catch_up()
+    assert np.array_equal(restarted.demand_arrays()[2], history.demand_arrays()[2])
+
+
+def test_expired_segments_are_skipped(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes"), segment_bytes=300)
+    for number in range(20):
+        stock_change(log, f"SKU-{number:04d}", 10, 9)
+    log.close()
+    segments = segment_paths(log.directory)
+    os.remove(segments[0][1])  # Removed by retention before this history ever read it
+
+    history = ConsumptionHistory(log.directory)
+    added = history.catch_up()
+    assert 0 < added < 20
+    assert history.skus[-1] == "SKU-0019"
@@ -0,0 +1,65 @@
+"""
+Import graph: every model module (and the model client) imports without pulling in PyQt6,
+each checked in a fresh interpreter so modules imported by other tests cannot hide it, and
+importing the command line entry point stays well within its startup budget.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cli import SELFCHECK_PACKAGES, SRC_DIR, STARTUP_BUDGET_MS
+
+PROBE = """
+import sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(",".join(sorted(name for name in sys.modules if name.split(".")[0] in ("PyQt6", "numpy"))))
+print(elapsed)
+"""
+
+
+def model_modules():
+    return [f"{package}.{filename[:-3]}"
+            for package in SELFCHECK_PACKAGES
+            for filename in sorted(os.listdir(os.path.join(SRC_DIR, package)))
+            if filename.endswith(".py") and filename != "__init__.py"]
+
+
+def import_fresh(module):
+    """Imports the module in a new interpreter. Returns (heavy packages it loaded, import time in ms)."""
+    environment = dict(os.environ)
+    environment.pop("CONTRACTOR_PLUS_SERVER", None)
+    result = subprocess.run([sys.executable, "-c", PROBE.format(src=SRC_DIR, module=module)],
+                            capture_output=True, text=True, env=environment, timeout=60)
+    assert result.returncode == 0, result.stderr
+    loaded, elapsed = result.stdout.splitlines()
+    return set(filter(None, loaded.split(","))), float(elapsed)
+
+
+def test_every_model_module_is_listed():
+    modules = model_modules()
+    assert "model.inventory_data" in modules and "remote.model_client" in modules
+    assert not any(module.startswith(("view.", "controller.")) for module in modules)
+
+
+@pytest.mark.parametrize("module", model_modules())
+def test_model_module_does_not_import_qt(module):
+    loaded, _elapsed = import_fresh(module)
+    assert not any(name.startswith("PyQt6") for name in loaded)
+
+
+def test_cli_import_stays_light():
+    loaded, elapsed = min((import_fresh("cli") for _ in range(3)), key=lambda run: run[1])
+    assert loaded == set()  # Neither Qt nor numpy until a command needs them
+    assert elapsed < STARTUP_BUDGET_MS  # Best of three, so a busy machine does not fail it
+
+
+@pytest.mark.slow
+def test_cli_command_finishes_within_the_budget():
+    result = subprocess.run([sys.executable, os.path.join(SRC_DIR, "cli.py"), "selfcheck", "--runs", "5"],
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,50 @@
+"""
+Placed material orders: recorded in the journal under the data directory, loaded back after
+a restart (by this desktop, another one, or the model server) exactly once each, and an
+order cut short by a crash mid-write is skipped rather than breaking the load.
+"""
+import json
+
+import pytest
+
+from model.incoming_orders import PLACED_ORDERS_NAME, add_incoming_order, load_placed_orders, orders
+
+
+@pytest.fixture
+def restore_orders():
+    """Puts the shared material order list back after the test."""
+    saved = list(orders)
+    yield
+    orders[:] = saved
+
+
+def restart(placed):
+    """Forgets the placed orders, as a new process that only has the seed shipments would."""
+    for order in placed:
+        orders.remove(order)
+
+
+def test_placed_orders_survive_a_restart(data_dir, restore_orders):
+    first = add_incoming_order("ORD-501", [("HAM-0001", 2), ("DRL-0008", 3)], user="clerk")
+    second = add_incoming_order("ORD-502", [["SAW-0002", 1]])
+    restart([first, second])
+
+    loaded = load_placed_orders()
+    assert loaded == [first, second]
+    assert loaded[0]["lines"] == [("HAM-0001", 2), ("DRL-0008", 3)] and loaded[0]["user"] == "clerk"
+    assert orders[-2:] == loaded
+    assert load_placed_orders() == []  # Already there: never added twice
+
+
+def test_orders_recorded_elsewhere_are_not_recorded_again(data_dir, restore_orders):
+    add_incoming_order("ORD-503", [("HAM-0001", 1)], record=False)
+    assert not (data_dir / PLACED_ORDERS_NAME).exists()
+    assert load_placed_orders() == []
+
+
+def test_an_order_cut_short_is_skipped(data_dir, restore_orders):
+    placed = add_incoming_order("ORD-504", [("HAM-0001", 1)])
+    with open(data_dir / PLACED_ORDERS_NAME, "a", encoding="utf-8") as file:
+        file.write(json.dumps({"id": "ORD-505", "lines": []})[:20])  # Crashed mid-write
+    restart([placed])
+    assert [order["id"] for order in load_placed_orders()] == ["ORD-504"]
@@ -0,0 +1,67 @@
+"""
+Category groups: the aggregates kept up to date row by row (price and quantity edits, new
+rows, a row moving category) always equal the aggregates of a GroupIndex built from scratch.
+"""
+import random
+
+import pytest
+
+from model.inventory_groups import GroupIndex
+
+CATEGORIES = ["Hammer", "Drill", "Saw", "Level"]
+
+
+def random_rows(seed, count=200):
+    rng = random.Random(seed)
+    return [[rng.choice(CATEGORIES), "", f"SKU-{number:04d}", rng.choice([0, 199, 1499]), rng.randint(0, 4)]
+            for number in range(count)]
+
+
+def aggregates(index):
+    return {name: (group.positions, group.units, group.value, group.out_of_stock)
+            for name, group in index.groups.items() if group.positions}
+
+
+def brute_force(rows):
+    """The aggregates computed directly from the rows."""
+    result = {}
+    for position, (name, _description, _sku, price, quantity) in enumerate(rows):
+        positions, units, value, out_of_stock = result.get(name, ([], 0, 0, 0))
+        result[name] = (positions + [position], units + quantity, value + price * quantity, out_of_stock + (quantity == 0))
+    return result
+
+
+def test_groups_are_built_in_one_pass():
+    rows = [["Saw", "", "SAW-1", 1000, 2], ["Drill", "", "DRL-1", 500, 0], ["Saw", "", "SAW-2", 250, 4]]
+    index = GroupIndex(rows)
+    assert list(index.groups) == ["Saw", "Drill"]  # First-seen order
+    saw = index.groups["Saw"]
+    assert (saw.positions, saw.units, saw.value, saw.out_of_stock) == ([0, 2], 6, 3000, 0)
+    drill = index.groups["Drill"]
+    assert (drill.units, drill.value, drill.out_of_stock) == (0, 0, 1)
+    assert aggregates(index) == brute_force(rows)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_updates_match_a_fresh_build(seed):
+    rows = random_rows(seed)
+    index = GroupIndex(rows)
+    rng = random.Random(seed)
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.1:
+            rows.append([rng.choice(CATEGORIES + ["Clamp"]), "", "NEW", rng.choice([0, 999]), rng.randint(0, 3)])
+            changed = index.update_row(len(rows) - 1, None, rows[-1])
+            assert changed == [rows[-1][0]]
+            continue
+        position = rng.randrange(len(rows))
+        old_row = list(rows[position])
+        if action < 0.2:
+            rows[position][0] = rng.choice(CATEGORIES)  # Moves category
+        elif action < 0.6:
+            rows[position][4] = rng.choice([0, 0, 1, 7])
+        else:
+            rows[position][3] = rng.choice([0, 199, 2500])
+        changed = index.update_row(position, old_row, rows[position])
+        assert set(changed) == {old_row[0], rows[position][0]}
+    assert aggregates(index) == aggregates(GroupIndex(rows)) == brute_force(rows)
@@ -0,0 +1,176 @@
+"""
+Location stock: the per-location, low stock and out-of-stock indexes and the totals always
+equal a recomputation from the quantities, the totals are mirrored into the inventory rows,
+and desktops saving the shared file at the same time all keep their changes.
+"""
+import json
+import random
+import threading
+
+import pytest
+
+import model.inventory_locations as inventory_locations
+from model.inventory_data import inventory_data, inventory_listeners, update_inventory_item
+from model.inventory_locations import RECEIVING_LOCATION, LocationStock, LocationStockFile
+
+
+def check_indexes(stock):
+    """Compares every index with what a full scan of by_sku gives."""
+    by_location = {location: {} for location in stock.locations}
+    for sku, held in stock.by_sku.items():
+        for location, quantity in held.items():
+            by_location[location][sku] = quantity
+    assert stock.by_location == by_location
+    assert stock.totals == {sku: sum(held.values()) for sku, held in stock.by_sku.items()}
+    assert stock.out_of_stock == {sku for sku, total in stock.totals.items() if total == 0}
+    for location in stock.locations:
+        low = {sku for sku, quantity in by_location[location].items() if stock.is_low(location, quantity)}
+        assert stock.low[location] == low
+        assert stock.low_stock_at(location) == sorted((sku, by_location[location][sku]) for sku in low)
+
+
+def test_indexes_follow_every_change():
+    stock = LocationStock()
+    stock.set_quantity("ham-0001", "Main Yard", 10)  # SKUs are kept upper case
+    stock.set_quantity("HAM-0001", "Truck 1", 1)
+    stock.set_quantity("SAW-0002", "North Yard", 0)
+    assert stock.skus_at("Main Yard") == {"HAM-0001": 10}
+    assert stock.where_available("HAM-0001") == [("Main Yard", 10), ("Truck 1", 1)]
+    assert stock.low_stock_at("Truck 1") == [("HAM-0001", 1)]
+    assert stock.out_of_stock == {"SAW-0002"}
+    check_indexes(stock)
+
+    alerts = stock.alerts_version
+    stock.transfer("HAM-0001", "Main Yard", "Truck 1", 4)
+    assert stock.total("HAM-0001") == 11 and stock.low_stock_at("Truck 1") == []
+    assert stock.alerts_version > alerts  # The Truck 1 alert went away
+    stock.adjust("SAW-0002", "North Yard", 2)
+    assert stock.out_of_stock == set() and stock.low_stock_at("North Yard") == [("SAW-0002", 2)]
+    with pytest.raises(ValueError):
+        stock.transfer("SAW-0002", "North Yard", "Truck 2", 3)
+    with pytest.raises(ValueError):
+        stock.adjust("SAW-0002", "North Yard", -5)
+    with pytest.raises(KeyError):
+        stock.set_quantity("SAW-0002", "Basement", 1)
+    check_indexes(stock)
+
+    generator = random.Random(3)
+    for _ in range(2000):
+        sku = f"SKU-{generator.randrange(40):04d}"
+        location = generator.choice(stock.locations)
+        if generator.random() < 0.3 and stock.quantity(sku, location):
+            stock.transfer(sku, location, generator.choice(stock.locations), generator.randint(1, stock.quantity(sku, location)))
+        else:
+            stock.set_quantity(sku, location, generator.randint(0, 6))
+    check_indexes(stock)
+
+
+@pytest.fixture
+def attached(restore_inventory):
+    """A store over the shared rows, holding each row's quantity at the receiving yard."""
+    saved_listeners = list(inventory_listeners)
+    stock = LocationStock()
+    for row in inventory_data[:20]:
+        stock.set_quantity(row[2], RECEIVING_LOCATION, row[4])
+    stock.attach(inventory_data)
+    yield stock
+    inventory_listeners[:] = saved_listeners
+
+
+def test_totals_are_mirrored_into_the_rows(attached):
+    stock = attached
+    first = inventory_data[0]
+    sku, quantity = first[2], first[4]
+    stock.set_quantity(sku, "Truck 2", 2)
+    assert first[4] == quantity + 2 == stock.total(sku)
+
+    stock.transfer(sku, RECEIVING_LOCATION, "North Yard", 1)
+    assert first[4] == quantity + 2  # Moving stock does not change the total
+
+    update_inventory_item(0, quantity=quantity + 10)  # A change made to the row itself, e.g. a shipment
+    assert stock.quantity(sku, RECEIVING_LOCATION) == quantity - 1 + 8 and stock.total(sku) == quantity + 10
+    update_inventory_item(0, quantity=1)  # Stock used without a location: the receiving yard first, then in location order
+    assert stock.where_available(sku) == [("Truck 2", 1)]
+    assert stock.total(sku) == first[4] == 1
+    update_inventory_item(0, quantity=0)
+    assert sku in stock.out_of_stock
+    check_indexes(stock)
+
+
+def open_store(path):
+    stock = LocationStock()
+    stock_file = LocationStockFile(str(path), save_delay=30.0)
+    stock_file.load(stock)
+    stock_file.attach(stock)
+    return stock, stock_file
+
+
+def saved_quantities(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["stock"]
+
+
+def test_desktops_saving_at_once_keep_both_changes(tmp_path):
+    path = tmp_path / "location_stock.json"
+    first, first_file = open_store(path)
+    first.set_quantity("HAM-0001", "Main Yard", 10)
+    first.set_quantity("SAW-0002", "Main Yard", 5)
+    first_file.flush()
+
+    second, second_file = open_store(path)
+    first.adjust("HAM-0001", "Main Yard", -3)
+    first.set_quantity("LVL-0003", "Truck 1", 2)  # A SKU new to the file
+    second.adjust("HAM-0001", "Main Yard", -4)  # The same quantity, changed on both desktops
+    second.transfer("SAW-0002", "Main Yard", "North Yard", 5)
+    first_file.flush()
+    second_file.flush()  # Saved last, but does not overwrite the first desktop's changes
+
+    assert saved_quantities(path) == {
+        "HAM-0001": {"Main Yard": 3},
+        "SAW-0002": {"Main Yard": 0, "North Yard": 5},
+        "LVL-0003": {"Truck 1": 2},
+    }
+    first_file.reload()
+    second_file.reload()
+    for stock in (first, second):
+        assert stock.by_sku == saved_quantities(path)
+    assert first_file.reload() == second_file.reload() == 0
+
+
+def test_a_save_without_changes_does_not_write(tmp_path, monkeypatch):
+    stock, stock_file = open_store(tmp_path / "location_stock.json")
+    stock.set_quantity("HAM-0001", "Main Yard", 4)
+    writes = []
+    write = inventory_locations.atomic_write
+    monkeypatch.setattr(inventory_locations, "atomic_write", lambda path, data: writes.append(data) or write(path, data))
+    assert stock_file.save() and stock_file.save()
+    assert len(writes) == 1  # The first save wrote the change; the second had nothing to write
+
+
+def test_many_desktops_saving_at_the_same_moment(tmp_path):
+    path = tmp_path / "location_stock.json"
+    seed, seed_file = open_store(path)
+    seed.set_quantity("HAM-0001", "Main Yard", 100)
+    seed_file.flush()
+
+    desktops = [open_store(path) for _ in range(8)]
+    for number, (stock, _stock_file) in enumerate(desktops):
+        stock.adjust("HAM-0001", "Main Yard", -(number + 1))
+        stock.set_quantity(f"SKU-{number:04d}", "Truck 2", number)
+    start = threading.Barrier(len(desktops))
+
+    saved = []
+
+    def save(stock_file):
+        start.wait()
+        saved.append(stock_file.save())
+
+    threads = [threading.Thread(target=save, args=(stock_file,)) for _stock, stock_file in desktops]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert saved == [True] * len(desktops)
+    saved = saved_quantities(path)
+    assert saved["HAM-0001"] == {"Main Yard": 100 - sum(range(1, 9))}
+    assert all(saved[f"SKU-{number:04d}"] == {"Truck 2": number} for number in range(8))
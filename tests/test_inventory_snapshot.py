@@ -0,0 +1,128 @@
+"""
+Inventory snapshot: rows survive a write/open round trip field for field, damaged files are
+caught (and rebuilt by load_inventory), a changed source rebuilds a stale snapshot, and an
+inventory edited in memory is served live instead of from the file.
+"""
+import os
+
+import pytest
+
+import model.inventory_data as inventory_model
+import model.inventory_snapshot as inventory_snapshot
+from model.inventory_snapshot import HEADER, InventorySnapshot, SnapshotError, load_inventory, verify_inventory, write_snapshot
+
+ROWS = [
+    ["Hammer", "16oz claw hammer", "HAM-0001", 1499, 25],
+    ["Säge", "Japanese pull saw – 240mm", "SAW-0002", 3250, 0],
+    ["", "", "EMP-0003", 0, -4],
+    ["Big", "x" * 5000, "BIG-0004", 2**40, 2**40],
+]
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """A stand-in inventory source file whose stamp the tests can change."""
+    path = tmp_path / "inventory_data.py"
+    path.write_text("rows = []\n")
+    monkeypatch.setattr(inventory_snapshot, "SOURCE_FILE", str(path))
+    return path
+
+
+def test_round_trip_keeps_every_field(tmp_path):
+    path = str(tmp_path / "inventory.snap")
+    write_snapshot(ROWS, path, (123456789, 4321))
+    snapshot = InventorySnapshot(path, verify=True)
+    assert len(snapshot) == len(ROWS)
+    assert [snapshot[i] for i in range(len(ROWS))] == ROWS
+    assert snapshot[-1] == ROWS[-1]
+    assert snapshot[1:3] == ROWS[1:3]
+    assert snapshot.source_stamp == (123456789, 4321)
+    prices, quantities = snapshot.numeric_columns()
+    assert prices.tolist() == [row[3] for row in ROWS]
+    assert quantities.tolist() == [row[4] for row in ROWS]
+    with pytest.raises(IndexError):
+        snapshot[len(ROWS)]
+    snapshot.close()
+
+
+def test_empty_inventory_round_trips(tmp_path):
+    path = str(tmp_path / "inventory.snap")
+    write_snapshot([], path, (1, 2))
+    snapshot = InventorySnapshot(path, verify=True)
+    assert len(snapshot) == 0 and list(snapshot) == []
+    snapshot.close()
+
+
+def test_flipped_byte_fails_the_checksum(tmp_path):
+    path = str(tmp_path / "inventory.snap")
+    write_snapshot(ROWS, path, (1, 2))
+    data = bytearray(open(path, "rb").read())
+    data[-10] ^= 0x01  # Inside the string region: opening does not notice, the checksum does
+    open(path, "wb").write(data)
+
+    snapshot = InventorySnapshot(path)
+    with pytest.raises(SnapshotError):
+        snapshot.verify()
+    snapshot.close()
+    with pytest.raises(SnapshotError):
+        InventorySnapshot(path, verify=True)
+
+
+@pytest.mark.parametrize("keep", [0, 10, HEADER.size - 1, HEADER.size + 5])
+def test_truncated_file_is_rejected(tmp_path, keep):
+    path = str(tmp_path / "inventory.snap")
+    write_snapshot(ROWS, path, (1, 2))
+    data = open(path, "rb").read()
+    open(path, "wb").write(data[:keep])
+    with pytest.raises(SnapshotError):
+        InventorySnapshot(path)
+
+
+def test_load_inventory_rebuilds_a_damaged_snapshot(tmp_path, source):
+    path = str(tmp_path / "inventory.snap")
+    open(path, "wb").write(b"CPINVSNP\x02")  # Truncated header
+    rows = load_inventory(path)
+    assert isinstance(rows, InventorySnapshot)
+    assert rows.verified
+    assert list(rows) == inventory_model.inventory_data
+
+
+def test_verify_inventory_rebuilds_a_corrupt_snapshot(tmp_path, source):
+    path = str(tmp_path / "inventory.snap")
+    rows = load_inventory(path)
+    rows.verified = False  # As if opened by another launch without a full check
+    data = bytearray(open(path, "rb").read())
+    data[-1] ^= 0xFF
+    rows.close()
+    open(path, "wb").write(data)
+    damaged = InventorySnapshot(path)
+
+    fresh = verify_inventory(damaged, path)
+    assert fresh is not damaged
+    fresh.verify()
+    assert list(fresh) == inventory_model.inventory_data
+
+
+def test_stale_snapshot_is_rebuilt_when_the_source_changes(tmp_path, source):
+    path = str(tmp_path / "inventory.snap")
+    first = load_inventory(path)
+    assert load_inventory(path) is first  # Still current: the open snapshot is shared
+
+    source.write_text("rows = [1]\n")  # Size changes
+    second = load_inventory(path)
+    assert second is not first
+    assert second.source_stamp == inventory_snapshot.source_stamp()
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # Only the mtime changes
+    third = load_inventory(path)
+    assert third is not second
+    assert third.source_stamp == inventory_snapshot.source_stamp()
+    assert InventorySnapshot(path).source_stamp == third.source_stamp  # Written back to disk too
+
+
+def test_edited_inventory_is_served_live(tmp_path, source, monkeypatch):
+    path = str(tmp_path / "inventory.snap")
+    assert isinstance(load_inventory(path), InventorySnapshot)
+    monkeypatch.setattr(inventory_model, "inventory_version", 1)
+    assert load_inventory(path) is inventory_model.inventory_data
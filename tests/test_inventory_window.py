@@ -0,0 +1,48 @@
+"""
+Inventory window's flat table: a model over row positions shows the whole catalog without
+an item per cell, and searching, sorting and the location filter only swap what it points at.
+"""
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QTableView
+
+from model.money import format_money
+
+
+def shown(view, column):
+    model = view.inventory_model
+    return [model.data(model.index(row, column)) for row in range(model.rowCount())]
+
+
+def test_full_catalog_is_shown_through_the_model(controller):
+    controller.open_inventory()
+    view = controller.inventory_view
+    rows = list(view.inventory_data)
+    assert isinstance(view.inventory_table, QTableView)
+    assert view.inventory_model.rowCount() == len(rows)
+    assert shown(view, 0) == [str(number) for number in range(1, len(rows) + 1)]
+    assert shown(view, 3) == [row[2] for row in rows]
+    assert shown(view, 4) == [format_money(row[3]) for row in rows]
+    assert shown(view, 5) == [str(row[4]) for row in rows]
+
+
+def test_search_and_sort_show_the_matching_rows(controller):
+    controller.open_inventory()
+    view = controller.inventory_view
+    view.search_box.setText("qty<5")
+    quantities = [int(quantity) for quantity in shown(view, 5)]
+    assert quantities and all(quantity < 5 for quantity in quantities)
+    view.on_sort(5)
+    assert [int(quantity) for quantity in shown(view, 5)] == sorted(quantities)
+    assert shown(view, 0)[:3] == ["1", "2", "3"]  # Numbered in display order
+
+
+def test_location_filter_shows_the_locations_quantities(controller):
+    controller.open_inventory()
+    view = controller.inventory_view
+    stock = controller.location_stock
+    view.location_filter.setCurrentText("Truck 1")
+    model = view.inventory_model
+    assert model.headerData(5, Qt.Orientation.Horizontal) == "Qty at Truck 1"
+    skus = shown(view, 3)
+    assert sorted(skus) == sorted(stock.skus_at("Truck 1"))
+    assert shown(view, 5) == [str(stock.quantity(sku, "Truck 1")) for sku in skus]
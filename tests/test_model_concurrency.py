@@ -0,0 +1,249 @@
+"""
+Concurrency checks for the inventory and order stores.
+
+- The stress test runs inventory searches, order searches, stock imports (received shipments
+  and new items) and order status changes at the same time on a thread pool, with the
+  interpreter switching threads far more often than normal so races show up quickly. Readers
+  check, under the read locks, that they never see half of a change: every import adds to a
+  whole group of SKUs at once, and the order statuses always agree with the status history.
+  At the end the journal is replayed into a fresh OrderManager, which must match the live one,
+  the stock must add up to everything imported, and the stores' read locks must have been held
+  by several searches at once (counted by an instrumented lock, not by the lock itself).
+- The compaction test holds the journal's writer thread between taking a batch and writing
+  it while another thread changes the same order and compacts, the window in which a batch
+  could once land in the journal after the snapshot that already replaced it.
+"""
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import model.inventory_data as inventory_model
+from model.inventory import search_inventory_positions, stock_value
+from model.order import search_orders
+from model.order_history import STATUSES
+from model.order_journal import OrderJournal, load_order_manager
+from model.rw_lock import ReadWriteLock
+
+GROUP = [row[2] for row in inventory_model.inventory_data[:10]]  # Every import adds to all of these at once
+INVENTORY_QUERIES = ["ham", "qty<5", "price>=20 qty>0", "sku:DRL-", "stress", "saw blade"]
+ORDER_QUERIES = ["status:pending", "express", "date>=2025-05-01", "status:shipped air"]
+
+
+class CountingLock(ReadWriteLock):
+    """ReadWriteLock that records the most threads holding the read lock at once."""
+
+    def __init__(self):
+        super().__init__()
+        self._count_lock = threading.Lock()
+        self.readers = 0
+        self.max_readers = 0
+
+    def acquire_read(self):
+        super().acquire_read()
+        if self._local.reads == 1 and self._local.counted:  # Outermost read, shared with other threads
+            with self._count_lock:
+                self.readers += 1
+                self.max_readers = max(self.max_readers, self.readers)
+
+    def release_read(self):
+        if self._local.reads == 1 and self._local.counted:
+            with self._count_lock:
+                self.readers -= 1
+        super().release_read()
+
+
+class Stress:
+    def __init__(self, journal):
+        self.manager = load_order_manager(journal)
+        self.order_ids = [order.order_id for order in self.manager.orders]
+        self.baseline = {sku: self.quantity(sku) for sku in GROUP}
+        self.imports = itertools.count()  # next() is atomic; the final value is the number of imports
+        self.new_items = itertools.count()
+        self.failures = []
+        self.operations = Counter()
+        self._counter_lock = threading.Lock()
+
+    def quantity(self, sku):
+        return next(row[4] for row in inventory_model.inventory_data if row[2] == sku)
+
+    def fail(self, message):
+        with self._counter_lock:
+            self.failures.append(message)
+
+    def count(self, operation):
+        with self._counter_lock:
+            self.operations[operation] += 1
+
+    # --- Readers ---
+    def search_inventory(self, rng):
+        search_inventory_positions(rng.choice(INVENTORY_QUERIES), inventory_model.inventory_data)
+        with inventory_model.inventory_lock.read():
+            deltas = {self.quantity(sku) - self.baseline[sku] for sku in GROUP}
+        if len(deltas) != 1:
+            self.fail(f"torn import: group quantities moved by {sorted(deltas)}")
+        stock_value(inventory_model.inventory_data)
+        self.count("inventory search")
+
+    def search_orders(self, rng):
+        search_orders(rng.choice(ORDER_QUERIES), self.manager.get_orders())
+        with self.manager.lock.read():
+            statuses = Counter(order.status for order in self.manager.orders)
+            history = self.manager.count_by_status_at(float("inf"))
+        if +Counter(history) != statuses:
+            self.fail(f"torn status change: orders say {dict(statuses)}, history says {history}")
+        self.count("order search")
+
+    # --- Writers ---
+    def import_stock(self, rng):
+        if rng.random() < 0.02:
+            number = next(self.new_items)
+            inventory_model.add_inventory_item("Stress Item", "Added by the stress test", f"STR-{number:04d}", 100, 1)
+            self.count("new item")
+            return
+        next(self.imports)
+        inventory_model.receive_quantities([(sku, 1) for sku in GROUP])
+        self.count("stock import")
+
+    def change_status(self, rng):
+        self.manager.change_order_status(rng.choice(self.order_ids), rng.choice(STATUSES), user="stress")
+        self.count("status change")
+
+    def worker(self, seed, deadline):
+        rng = random.Random(seed)
+        tasks = [self.search_inventory, self.search_orders, self.import_stock, self.change_status]
+        weights = [4, 4, 1, 2]  # Mostly reads, like the application
+        while time.monotonic() < deadline and len(self.failures) < 20:
+            task = rng.choices(tasks, weights)[0]
+            try:
+                task(rng)
+            except Exception as error:  # A torn read can also surface as an exception
+                self.fail(f"{task.__name__} raised {error!r}")
+
+
+def test_stores_under_concurrency(tmp_path, monkeypatch, threads=8, seconds=2.0, seed=265):
+    journal = OrderJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "orders.json"),
+                           compact_every=250)  # Compact often so snapshots are taken mid-run
+    inventory_lock = CountingLock()
+    monkeypatch.setattr(inventory_model, "inventory_lock", inventory_lock)
+    run = Stress(journal)
+    run.manager.lock = order_lock = CountingLock()
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # Switch threads every 10 us instead of every 5 ms
+    try:
+        deadline = time.monotonic() + seconds
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for future in [pool.submit(run.worker, seed + slot, deadline) for slot in range(threads)]:
+                future.result()
+    finally:
+        sys.setswitchinterval(switch_interval)
+        journal.close()
+
+    imports = next(run.imports)
+    for sku in GROUP:
+        if run.quantity(sku) - run.baseline[sku] != imports:
+            run.fail(f"{sku} gained {run.quantity(sku) - run.baseline[sku]} units from {imports} imports")
+
+    # The journal (snapshot plus changes since) must rebuild exactly the live statuses
+    reopened = OrderJournal(journal.path, journal.snapshot_path)
+    replayed = load_order_manager(reopened)
+    reopened.close()
+    live = {order.order_id: order.status for order in run.manager.orders}
+    rebuilt = {order.order_id: order.status for order in replayed.orders}
+    if live != rebuilt:
+        wrong = sorted(order_id for order_id in live if live[order_id] != rebuilt.get(order_id))
+        run.fail(f"journal replay disagrees with the live orders for {wrong[:5]}")
+
+    assert not run.failures, "\n".join(run.failures[:20])
+    assert run.operations["status change"] > 250, "no compaction happened during the run"
+    assert inventory_lock.readers == order_lock.readers == 0
+    assert max(inventory_lock.max_readers, order_lock.max_readers) > 1, "searches never shared a read lock"
+
+
+def test_readers_share_the_lock_and_writers_wait():
+    lock = CountingLock()
+    readers = 4
+    inside = threading.Barrier(readers + 1)
+    leave = threading.Event()
+    written = threading.Event()
+
+    def read():
+        with lock.read():
+            with lock.read():  # Nested: still one reader
+                inside.wait(5)
+                leave.wait(5)
+
+    def write():
+        with lock.write():
+            written.set()
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    inside.wait(5)  # Every reader holds the lock at the same time
+    assert lock.readers == lock.max_readers == readers
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert not written.wait(0.2)  # The writer waits for the readers
+    leave.set()
+    writer.join(5)
+    for thread in threads:
+        thread.join(5)
+    assert written.is_set() and lock.readers == 0 and lock.max_readers == readers
+
+
+class GatedLock:
+    """Wraps a lock so one thread stops before acquiring it until the gate is opened."""
+
+    def __init__(self, lock, thread):
+        self.lock = lock
+        self.thread = thread
+        self.reached = threading.Event()  # Set when the thread is held at the gate
+        self.gate = threading.Event()
+
+    def acquire(self, *args):
+        if threading.current_thread() is self.thread and not self.gate.is_set():
+            self.reached.set()
+            self.gate.wait(5)
+        return self.lock.acquire(*args)
+
+    def release(self):
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def test_compaction_never_loses_a_batch_in_flight(tmp_path):
+    journal = OrderJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "orders.json"), flush_interval=0.01)
+    manager = load_order_manager(journal)
+    order_id = manager.orders[0].order_id
+    gated = journal._io_lock = GatedLock(journal._io_lock, journal._writer)
+
+    manager.change_order_status(order_id, "Shipped")
+    assert gated.reached.wait(5), "the writer never took the batch"  # "Shipped" is taken but not written
+
+    def change_and_compact():
+        manager.change_order_status(order_id, "Delivered")
+        journal.compact(manager)
+
+    other = threading.Thread(target=change_and_compact)
+    other.start()
+    other.join(0.5)  # Finishes here only if compaction can run while a batch is in flight
+    gated.gate.set()
+    other.join(5)
+    journal.flush()
+    journal.close()
+
+    reopened = OrderJournal(journal.path, journal.snapshot_path)
+    replayed = load_order_manager(reopened)
+    reopened.close()
+    assert manager.get_order_by_id(order_id).status == "Delivered"
+    assert replayed.get_order_by_id(order_id).status == "Delivered", "a batch was written after the snapshot"
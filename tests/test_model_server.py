@@ -0,0 +1,175 @@
+"""
+Model server and client: search, validation and submit round trips, long-polled change
+events, the client's read cache dropping stale results, and bad requests answered with 400.
+The server runs on a free port in a background event loop, over the test's data directory.
+"""
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from model.inventory import search_inventory
+from model.incoming_orders import incoming_order_listeners, orders as incoming_orders
+from model.inventory_data import check_order_validity, inventory_data, inventory_listeners
+from remote.model_client import ModelClient, ModelClientError
+from remote.model_server import ModelServer
+
+
+@pytest.fixture
+def server():
+    saved_inventory, saved_incoming = list(inventory_listeners), list(incoming_order_listeners)
+    model_server = ModelServer()
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    task = loop.create_task(model_server.serve("127.0.0.1", 0, ready))
+
+    def run():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass  # Stopped by the test
+        finally:
+            connections = asyncio.all_tasks(loop)  # Keep-alive and long-poll handlers still waiting
+            for connection in connections:
+                connection.cancel()
+            loop.run_until_complete(asyncio.gather(*connections, return_exceptions=True))
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(10)
+    yield model_server
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(10)
+    model_server.journal.close()
+    model_server.change_log.close()
+    # Later tests must not append to this closed server's change log
+    inventory_listeners[:] = saved_inventory
+    incoming_order_listeners[:] = saved_incoming
+
+
+@pytest.fixture
+def client(server):
+    model_client = ModelClient("127.0.0.1", server.port)
+    yield model_client
+    model_client.close()
+
+
+def get(server, path):
+    """Sends one raw GET and returns (status, payload)."""
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=30)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def wait_for(condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.parametrize("query", ["drill", "sku:HAM-", "qty<5 price>=20", "nothing like it"])
+def test_search_matches_the_local_search(client, query):
+    assert client.search_inventory(query) == search_inventory(query, inventory_data)
+
+
+def test_validate_and_submit(client, server):
+    entries = [["HAM-0001", 2], ["ZZZ-9999", 1], ["DRL-0008", 3]]
+    errors, valid = client.validate_order(entries)
+    assert (errors, valid) == check_order_validity([tuple(entry) for entry in entries], inventory_data)
+    assert valid == [("HAM-0001", 2), ("DRL-0008", 3)]
+
+    errors, valid, order_id = client.submit_order(entries, user="clerk")
+    assert errors and order_id is None  # Nothing is placed while a line is wrong
+    errors, valid, order_id = client.submit_order([["HAM-0001", 2], ["DRL-0008", 3]], user="clerk")
+    assert errors == [] and order_id
+    assert valid == [("HAM-0001", 2), ("DRL-0008", 3)]
+    second = client.submit_order([["HAM-0001", 1]], user="clerk")[2]
+    assert second != order_id
+
+
+def test_submitted_orders_are_served_and_survive_a_restart(client, server):
+    order_id = client.submit_order([["HAM-0001", 2]], user="clerk")[2]
+    served = {order["id"]: order for order in client.get_material_orders()}
+    assert served[order_id]["lines"] == [["HAM-0001", 2]] and served[order_id]["user"] == "clerk"
+    assert "ORD-001" in served  # The seed shipments too
+
+    incoming_orders[:] = [order for order in incoming_orders if order["id"] != order_id]  # As after a restart
+    restarted = ModelServer()
+    try:
+        assert [order["lines"] for order in incoming_orders if order["id"] == order_id] == [[("HAM-0001", 2)]]
+        assert restarted.order_ids.allocate() != order_id
+    finally:
+        restarted.journal.close()
+        restarted.change_log.close()
+
+
+def test_status_change_round_trip(client):
+    before = time.time()
+    order = client.change_order_status("ORD141", "Shipped", user="clerk")
+    assert order.status == "Shipped"
+    order, status_then = client.get_order("ORD141", at=before - 1)
+    assert order.status == "Shipped" and status_then == "Pending"
+    with pytest.raises(ModelClientError):
+        client.get_order("NOPE")
+
+
+def test_events_wake_on_a_status_change(client, server):
+    version = server.version
+    answer = {}
+
+    def poll():
+        start = time.monotonic()
+        answer["reply"] = get(server, f"/events?since={version}")
+        answer["seconds"] = time.monotonic() - start
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.2)  # The poll is waiting
+    assert "reply" not in answer
+    client.change_order_status("ORD150", "Processing", user="clerk")
+    poller.join(10)
+    status, payload = answer["reply"]
+    assert status == 200 and answer["seconds"] < 5  # Well before the long-poll timeout
+    assert payload["version"] == version + 1
+    assert payload["changes"] == [[version + 1, "order", "ORD150"]]
+
+
+def test_cache_is_dropped_when_the_data_changes(client, server):
+    orders = client.get_orders("ORD153")
+    assert [order.status for order in orders] == ["Pending"]
+    client.get_orders("ORD153")
+    assert client.cache_hits == 1
+
+    other = ModelClient("127.0.0.1", server.port, watch=False)  # Another desktop
+    other.change_order_status("ORD153", "Shipped", user="other clerk")
+    other.close()
+    assert wait_for(lambda: client.version == server.version)  # Pushed through the watcher
+
+    misses = client.cache_misses
+    assert [order.status for order in client.get_orders("ORD153")] == ["Shipped"]
+    assert client.cache_misses == misses + 1
+
+
+@pytest.mark.parametrize("path", ["/orders/ORD141?at=yesterday", "/orders/ORD141?at=nan", "/events?since=soon", "/events?since=1.5"])
+def test_bad_numbers_are_bad_requests(server, path):
+    status, payload = get(server, path)
+    assert status == 400
+    assert "must be" in payload["error"]
+
+
+def test_unknown_routes_and_bad_bodies(server):
+    assert get(server, "/nowhere")[0] == 404
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    connection.request("POST", "/skus/validate", body=b"{not json", headers={"Content-Type": "application/json"})
+    assert connection.getresponse().status == 400
+    connection.close()
@@ -0,0 +1,83 @@
+"""
+Money: amounts convert to cents rounding half up (away from zero for negative amounts), with
+no binary floating-point surprises; display strings are exact; and the vectorized totals equal
+a plain Python sum of the same cents.
+"""
+import random
+from decimal import Decimal
+
+import pytest
+
+from model.inventory import stock_value, stock_value_by_category
+from model.inventory_data import inventory_data
+from model.money import cents_to_decimal, format_money, group_codes, grouped_totals, to_cents, valuation
+from model.order import Order, totals_by_status
+
+
+@pytest.mark.parametrize("amount, cents", [
+    ("0.005", 1),
+    ("0.004", 0),
+    ("19.995", 2000),
+    ("19.994", 1999),
+    ("-0.005", -1),  # Half up means away from zero
+    ("-19.995", -2000),
+    ("-0.004", 0),
+    (1.005, 101),  # The float 1.005 is just below it in binary; what was typed is rounded
+    (14.99, 1499),
+    (Decimal("2.675"), 268),
+    (7, 700),
+    (" $1,234.50 ", 123450),
+    ("$0", 0),
+    ("-$1,234.505", -123451),
+])
+def test_to_cents_rounds_half_up(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("amount", ["", "abc", "1.2.3", "$", float("inf"), float("nan"), "1e999999999"])
+def test_to_cents_rejects_non_amounts(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+
+
+@pytest.mark.parametrize("cents, plain, grouped", [
+    (1499, "$14.99", "$14.99"),
+    (0, "$0.00", "$0.00"),
+    (5, "$0.05", "$0.05"),
+    (-5, "-$0.05", "-$0.05"),
+    (123450, "$1234.50", "$1,234.50"),
+    (-123456789, "-$1234567.89", "-$1,234,567.89"),
+])
+def test_format_money(cents, plain, grouped):
+    assert format_money(cents) == plain
+    assert format_money(cents, grouped=True) == grouped
+    assert to_cents(grouped) == cents  # What is shown reads back as the same amount
+    assert cents_to_decimal(cents) == Decimal(cents) / 100
+
+
+def test_grouped_totals_match_a_plain_sum():
+    generator = random.Random(7)
+    keys = [generator.choice("ABCDE") for _ in range(5000)]
+    amounts = [generator.randint(-10**9, 10**12) for _ in keys]  # Totals far beyond float precision
+    names, codes = group_codes(keys)
+    assert names == list(dict.fromkeys(keys))
+    expected = {name: 0 for name in names}
+    for key, amount in zip(keys, amounts):
+        expected[key] += amount
+    assert dict(zip(names, grouped_totals(codes, amounts, len(names)).tolist())) == expected
+    assert grouped_totals([], [], 3).tolist() == [0, 0, 0]  # Groups with nothing in them total zero
+
+    quantities = [generator.randint(0, 1000) for _ in amounts]
+    assert valuation(amounts, quantities) == sum(amount * quantity for amount, quantity in zip(amounts, quantities))
+
+
+def test_report_totals_match_a_plain_sum():
+    assert stock_value(inventory_data) == sum(row[3] * row[4] for row in inventory_data)
+    by_category = {}
+    for name, _description, _sku, price, quantity in inventory_data:
+        by_category[name] = by_category.get(name, 0) + price * quantity
+    assert stock_value_by_category(inventory_data) == by_category
+
+    orders = [Order(f"ORD{number}", "2025-05-01", "Ground", 1999 * number, status)
+              for number, status in enumerate(["Pending", "Shipped", "Pending", "Delivered", "Pending"])]
+    assert totals_by_status(orders) == {"Pending": 1999 * (0 + 2 + 4), "Shipped": 1999, "Delivered": 1999 * 3}
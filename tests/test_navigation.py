@@ -0,0 +1,62 @@
+"""
+Navigation leak checks: opening the four views over and over, the way a clerk clicks through
+the sidebar all day, must not leave replaced windows alive. Live widgets return to the same
+level after every round and traced Python memory stops growing once the caches are warm.
+"""
+import gc
+import tracemalloc
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication, QEvent
+
+NAVIGATIONS = ["open_home", "open_order", "open_search", "open_inventory"]
+
+
+def settle():
+    """Runs pending events, including the deferred deletes of replaced windows."""
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+    QApplication.processEvents()
+
+
+def navigate(controller, navigations, warmup):
+    """
+    Navigates the given number of times. Returns (most live widgets above the level after
+    warm-up, traced memory growth in KiB since warm-up).
+    """
+    warmup -= warmup % len(NAVIGATIONS)  # The baseline is taken after a whole round
+    tracemalloc.start()
+    baseline_widgets = baseline_memory = None
+    worst_widgets = 0
+    try:
+        for count in range(1, navigations + 1):
+            getattr(controller, NAVIGATIONS[count % len(NAVIGATIONS)])()
+            settle()
+
+            if count % len(NAVIGATIONS):
+                continue  # Measure only after whole rounds, when every kind of view is open once
+            widgets = len(QApplication.allWidgets())
+            if count == warmup:
+                gc.collect()  # Count only what is still reachable, not cycles waiting for the collector
+                baseline_widgets, baseline_memory = widgets, tracemalloc.get_traced_memory()[0]
+            elif baseline_widgets is not None:
+                worst_widgets = max(worst_widgets, widgets - baseline_widgets)
+
+        settle()
+        gc.collect()
+        return worst_widgets, (tracemalloc.get_traced_memory()[0] - baseline_memory) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def test_replaced_windows_are_freed(controller):
+    worst_widgets, growth_kib = navigate(controller, navigations=120, warmup=40)
+    assert worst_widgets == 0, f"live widgets grew by up to {worst_widgets} after warm-up"
+    assert growth_kib < 1024, f"traced memory grew {growth_kib:.0f} KiB after warm-up"
+
+
+@pytest.mark.slow
+def test_soak_10k_navigations(controller):
+    worst_widgets, growth_kib = navigate(controller, navigations=10_000, warmup=200)
+    assert worst_widgets == 0, f"live widgets grew by up to {worst_widgets} after warm-up"
+    assert growth_kib < 2048, f"traced memory grew {growth_kib:.0f} KiB after warm-up"
@@ -0,0 +1,113 @@
+"""
+Order form SKU checks: painting a cell never asks the catalog anything, a slow or unreachable
+model server never blocks the form, and received stock is reflected in the lines.
+"""
+import threading
+import time
+
+from PyQt6.QtCore import Qt
+
+from model.sku_catalog import OUT_OF_STOCK, SKU_OK, UNKNOWN_SKU, BloomFilter, RemoteSkuCatalog
+from remote.model_client import ServerUnavailable
+from view.order_entry_grid import OrderEntryModel
+
+PAINT_ROLES = (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole, Qt.ItemDataRole.ToolTipRole)
+
+
+class SlowClient:
+    '''ModelClient stand-in whose filter download waits until the test releases it.'''
+    def __init__(self, skus):
+        self.version = 1
+        self.bloom = BloomFilter.for_items(skus)
+        self.released = threading.Event()
+        self.fail = False
+        self.downloads = 0
+
+    def sku_filter(self):
+        self.released.wait(5)
+        self.downloads += 1
+        if self.fail:
+            raise ServerUnavailable("Cannot reach the model server")
+        return self.bloom
+
+
+def wait_for(qapp, condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def paint(model):
+    for row in range(model.rowCount()):
+        for role in PAINT_ROLES:
+            model.data(model.index(row, 0), role)
+
+
+def test_remote_filter_never_blocks_the_form(qapp):
+    client = SlowClient(["HAM-0001"])
+    model = OrderEntryModel()
+    model.set_catalog(RemoteSkuCatalog(client))
+    model.set_lines([["HAM-0001", "1", ""], ["ZZZ-9999", "1", ""]])
+    # The filter has not arrived: only the format is checked, and nothing waits for it
+    assert model.error_count() == 0
+    assert model.sku_states == {"HAM-0001": SKU_OK, "ZZZ-9999": SKU_OK}
+
+    client.released.set()
+    assert wait_for(qapp, lambda: model.sku_states["ZZZ-9999"] == UNKNOWN_SKU)
+    assert model.lines[1][2] == "'ZZZ-9999' is not in the inventory"
+
+    client.version = 2  # Other data changed; the server keeps the filter, nothing new to apply
+    model.setData(model.index(0, 1), "3")
+    assert wait_for(qapp, lambda: client.downloads == 2)
+    paint(model)
+    assert client.downloads == 2
+
+
+def test_unreachable_server_falls_back_to_format_checks(qapp):
+    client = SlowClient(["HAM-0001"])
+    client.fail = True
+    client.released.set()
+    catalog = RemoteSkuCatalog(client)
+    assert wait_for(qapp, lambda: client.downloads == 1 and not catalog._fetching)
+    model = OrderEntryModel()
+    model.set_catalog(catalog)
+    model.set_lines([["ZZZ-9999", "1", ""], ["ABC-12", "1", ""]])
+    assert model.lines[0][2] == ""
+    assert model.lines[1][2] == "'ABC-12' is not a valid SKU (expected ABC-1234)"
+    assert client.downloads == 1  # Not asked again straight away
+
+
+class CountingCatalog:
+    '''Local catalog stand-in over one SKU -> quantity dict, counting the questions asked.'''
+    def __init__(self, stock):
+        self.stock = stock
+        self.listeners = []
+        self.calls = 0
+
+    def state(self, sku):
+        self.calls += 1
+        if sku not in self.stock:
+            return UNKNOWN_SKU
+        return OUT_OF_STOCK if self.stock[sku] <= 0 else SKU_OK
+
+    def __contains__(self, sku):
+        self.calls += 1
+        return sku in self.stock
+
+
+def test_painting_reads_stored_states_and_stock_changes_are_rechecked(qapp):
+    catalog = CountingCatalog({"HAM-0001": 0, "DRL-0008": 4})
+    model = OrderEntryModel()
+    model.set_catalog(catalog)
+    model.set_lines([["HAM-0001", "2", ""], ["DRL-0008", "1", ""]])
+    calls = catalog.calls
+    paint(model)
+    assert catalog.calls == calls
+    assert model.data(model.index(0, 0), Qt.ItemDataRole.ToolTipRole) == "HAM-0001 is out of stock - this order restocks it"
+
+    catalog.stock["HAM-0001"] = 12  # A shipment arrived
+    model.recheck_sku("HAM-0001")
+    assert model.sku_states["HAM-0001"] == SKU_OK
+    assert model.data(model.index(0, 0), Qt.ItemDataRole.ToolTipRole) is None
@@ -0,0 +1,132 @@
+"""
+Order status history: point-in-time statuses and counts agree with a brute-force replay of
+the changes, also when changes arrive out of time order, and the Orders window's undo/redo
+leaves alone an order someone else changed since.
+"""
+import random
+
+import pytest
+
+from model.order_history import STATUSES, StatusHistory
+
+
+def brute_force_counts(changes, timestamp):
+    """Status counts at the timestamp, from the last change of each order at or before it."""
+    latest = {}
+    for order_id, status, changed_at in sorted(changes, key=lambda change: change[2]):
+        if changed_at <= timestamp:
+            latest[order_id] = status
+    counts = dict.fromkeys(STATUSES, 0)
+    for status in latest.values():
+        counts[status] += 1
+    return counts
+
+
+def random_changes(seed, orders=40, changes_per_order=6):
+    rng = random.Random(seed)
+    changes = []
+    for number in range(orders):
+        moment = rng.uniform(0, 1000)
+        for _ in range(rng.randint(1, changes_per_order)):
+            changes.append((f"ORD{number}", rng.choice(STATUSES), moment))
+            moment += rng.uniform(1, 100)
+    return changes
+
+
+def test_status_before_between_and_after_changes():
+    history = StatusHistory()
+    history.record("ORD1", "Pending", 100.0)
+    history.record("ORD1", "Shipped", 200.0)
+    history.record("ORD1", "Delivered", 300.0)
+    assert history.status_at("ORD1", 99.9) is None  # Did not exist yet
+    assert history.status_at("ORD1", 100.0) == "Pending"
+    assert history.status_at("ORD1", 150.0) == "Pending"
+    assert history.status_at("ORD1", 200.0) == "Shipped"
+    assert history.status_at("ORD1", 299.0) == "Shipped"
+    assert history.status_at("ORD1", 1e12) == "Delivered"
+    assert history.status_at("ORD2", 150.0) is None  # Unknown order
+    assert history.transitions("ORD1") == [(100.0, "Pending"), (200.0, "Shipped"), (300.0, "Delivered")]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_counts_match_a_brute_force_count(seed):
+    changes = random_changes(seed)
+    history = StatusHistory()
+    for order_id, status, changed_at in sorted(changes, key=lambda change: change[2]):
+        history.record(order_id, status, changed_at)
+    probes = [-1.0, 0.0] + [changed_at for *_, changed_at in changes] + [random.Random(seed).uniform(0, 2000) for _ in range(50)]
+    for timestamp in probes:
+        assert history.count_by_status_at(timestamp) == brute_force_counts(changes, timestamp)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_out_of_order_changes_rebuild_the_index(seed):
+    changes = random_changes(seed)
+    shuffled = list(changes)
+    random.Random(seed).shuffle(shuffled)  # Old journal entries and backdated changes arrive late
+    history = StatusHistory()
+    for order_id, status, changed_at in shuffled:
+        history.record(order_id, status, changed_at)
+
+    in_order = StatusHistory()
+    for order_id, status, changed_at in sorted(changes, key=lambda change: change[2]):
+        in_order.record(order_id, status, changed_at)
+
+    for timestamp in sorted({changed_at for *_, changed_at in changes}) + [5000.0]:
+        assert history.count_by_status_at(timestamp) == brute_force_counts(changes, timestamp)
+        assert history.count_by_status_at(timestamp) == in_order.count_by_status_at(timestamp)
+    for order_id in {change[0] for change in changes}:
+        assert history.transitions(order_id) == in_order.transitions(order_id)
+
+
+def test_new_statuses_get_their_own_counts():
+    history = StatusHistory()
+    history.record("ORD1", "Pending", 1.0)
+    history.record("ORD1", "On Hold", 2.0)
+    history.record("ORD2", "Pending", 3.0)
+    assert history.count_by_status_at(2.5) == {"Pending": 0, "Processing": 0, "Shipped": 0, "Delivered": 0, "On Hold": 1}
+    assert history.count_by_status_at(3.0)["Pending"] == 1
+
+
+def test_history_round_trips_through_a_dict():
+    changes = random_changes(7)
+    history = StatusHistory()
+    for change in changes:
+        history.record(*change)
+    restored = StatusHistory()
+    restored.load_dict(history.to_dict())
+    for timestamp in (0.0, 250.0, 500.0, 5000.0):
+        assert restored.count_by_status_at(timestamp) == history.count_by_status_at(timestamp)
+
+
+def order_row(view, order_id):
+    return next(row for row in range(view.order_table.rowCount()) if view.order_table.item(row, 0).text() == order_id)
+
+
+def test_undo_and_redo_in_the_orders_window(controller):
+    controller.open_order()
+    view = controller.order_view
+    manager = controller.order_manager
+
+    view.change_order_status(order_row(view, "ORD141"), "Shipped")
+    view.undo_status_change()
+    assert manager.get_order_by_id("ORD141").status == "Pending"
+    view.redo_status_change()
+    assert manager.get_order_by_id("ORD141").status == "Shipped"
+    assert [status for _, status in manager.history.transitions("ORD141")][-3:] == ["Shipped", "Pending", "Shipped"]
+
+
+def test_undo_skips_an_order_someone_else_changed(controller):
+    controller.open_order()
+    view = controller.order_view
+    manager = controller.order_manager
+
+    view.change_order_status(order_row(view, "ORD150"), "Processing")
+    view.change_order_status(order_row(view, "ORD141"), "Shipped")
+    manager.change_order_status("ORD141", "Delivered", user="another clerk")  # Since the window's change
+
+    view.undo_status_change()  # ORD141 is no longer Shipped: left alone, ORD150 is undone instead
+    assert manager.get_order_by_id("ORD141").status == "Delivered"
+    assert manager.get_order_by_id("ORD150").status == "Pending"
+    assert view.undo_stack == [] and not view.undo_button.isEnabled()
+    assert view.redo_stack == [("ORD150", "Pending", "Processing")]
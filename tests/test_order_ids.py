@@ -0,0 +1,70 @@
+"""
+Order ID allocation: every ID is unique, whether the allocations come from many threads of
+one desktop or from several desktops (separate processes) sharing the data directory, and
+each thread's IDs are strictly increasing.
+"""
+import os
+import subprocess
+import sys
+import threading
+
+from model.order_ids import OrderIdAllocator
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+ALLOCATE = """
+import sys
+from model.order_ids import OrderIdAllocator
+allocator = OrderIdAllocator(path=sys.argv[1], block_size=7)
+sys.stdin.readline()  # Start together with the other process
+print("\\n".join(allocator.allocate() for _ in range(int(sys.argv[2]))))
+"""
+
+
+def allocate_on_threads(allocators, threads=8, ids=400):
+    start = threading.Barrier(threads)
+    allocated = [[] for _ in range(threads)]
+
+    def allocate(number):
+        allocator = allocators[number % len(allocators)]
+        start.wait()
+        allocated[number].extend(allocator.allocate_number() for _ in range(ids))
+
+    workers = [threading.Thread(target=allocate, args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return allocated
+
+
+def test_ids_are_unique_across_threads(tmp_path):
+    allocator = OrderIdAllocator(path=str(tmp_path / "order_ids.hwm"), block_size=5, seed=lambda: 10)
+    allocated = allocate_on_threads([allocator])
+    numbers = [number for per_thread in allocated for number in per_thread]
+    assert len(set(numbers)) == len(numbers) == 8 * 400
+    assert min(numbers) == 11  # Seeded from the orders that already exist
+    assert all(per_thread == sorted(set(per_thread)) for per_thread in allocated)
+    assert allocator.format(7) == "ORD-007" and allocator.format(1234) == "ORD-1234"
+
+
+def test_allocators_sharing_a_file_never_collide(tmp_path):
+    path = str(tmp_path / "order_ids.hwm")
+    allocated = allocate_on_threads([OrderIdAllocator(path=path, block_size=3) for _ in range(3)], threads=9, ids=200)
+    numbers = [number for per_thread in allocated for number in per_thread]
+    assert len(set(numbers)) == len(numbers)
+
+
+def test_ids_are_unique_across_processes(tmp_path):
+    path = str(tmp_path / "order_ids.hwm")
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    desktops = [subprocess.Popen([sys.executable, "-c", ALLOCATE, path, "300"], env=env, text=True,
+                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE) for _ in range(2)]
+    for desktop in desktops:
+        desktop.stdin.write("go\n")
+        desktop.stdin.flush()
+    outputs = [desktop.communicate(timeout=60)[0].split() for desktop in desktops]
+    assert all(desktop.returncode == 0 for desktop in desktops)
+    assert [len(ids) for ids in outputs] == [300, 300]
+    assert not set(outputs[0]) & set(outputs[1])
+    assert all(ids == sorted(ids) for ids in outputs)
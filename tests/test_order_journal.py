@@ -0,0 +1,154 @@
+"""
+Order journal: status changes survive a restart, a torn last line is skipped, compaction bumps
+the generation (and another desktop sharing the file picks the compaction up), and close()
+commits every change still waiting for a group commit.
+"""
+import json
+import time
+
+import pytest
+
+from model.order import OrderManager
+from model.order_journal import OrderJournal, load_order_manager
+
+CHANGES = [("ORD141", "Processing"), ("ORD142", "Delivered"), ("ORD141", "Shipped"), ("ORD155", "Processing")]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "orders.journal"), str(tmp_path / "orders.snapshot.json")
+
+
+def open_journal(paths, **options):
+    return OrderJournal(*paths, flush_interval=0.01, **options)
+
+
+def statuses(manager):
+    return {order.order_id: order.status for order in manager.orders}
+
+
+def journal_lines(paths):
+    with open(paths[0], "rb") as file:
+        return file.read().splitlines()
+
+
+def test_changes_are_replayed_after_a_restart(paths):
+    journal = open_journal(paths)
+    manager = load_order_manager(journal)
+    for order_id, status in CHANGES:
+        manager.change_order_status(order_id, status, user="clerk")
+    journal.close()
+
+    reopened = open_journal(paths)
+    restarted = OrderManager()
+    restarted.seed_orders()
+    assert reopened.replay(restarted) == len(CHANGES)
+    assert statuses(restarted) == statuses(manager)
+    assert restarted.history.transitions("ORD141") == manager.history.transitions("ORD141")  # Original timestamps
+    reopened.close()
+
+
+def test_torn_last_line_is_skipped(paths):
+    journal = open_journal(paths)
+    manager = load_order_manager(journal)
+    manager.change_order_status("ORD141", "Shipped")
+    journal.close()
+    with open(paths[0], "ab") as file:
+        file.write(b'{"ts":1,"user":null,"order_id":"ORD150","fr')  # Crash in the middle of a write
+
+    reopened = open_journal(paths)
+    restarted = load_order_manager(reopened)
+    assert restarted.get_order_by_id("ORD141").status == "Shipped"
+    assert restarted.get_order_by_id("ORD150").status == "Pending"
+    reopened.close()
+
+
+def test_catch_up_waits_for_the_rest_of_a_line(paths):
+    reader = open_journal(paths)
+    manager = load_order_manager(reader)
+    line = json.dumps({"ts": time.time(), "user": None, "order_id": "ORD150", "from": "Pending", "to": "Shipped", "writer": "other"})
+    with open(paths[0], "ab") as file:
+        file.write(line[:20].encode())
+    assert reader.catch_up(manager) == []
+    with open(paths[0], "ab") as file:
+        file.write(line[20:].encode() + b"\n")
+    changes = reader.catch_up(manager)
+    assert [(order.order_id, old) for order, old in changes] == [("ORD150", "Pending")]
+    assert manager.get_order_by_id("ORD150").status == "Shipped"
+    reader.close()
+
+
+def test_compaction_bumps_the_generation(paths):
+    journal = open_journal(paths)
+    manager = load_order_manager(journal)
+    for order_id, status in CHANGES:
+        manager.change_order_status(order_id, status)
+    journal.flush()
+    journal.compact(manager)
+    assert journal.generation == journal.snapshot_generation == 1
+    assert journal_lines(paths) == [b'{"generation":1}']
+    with open(paths[1], encoding="utf-8") as file:
+        assert json.load(file)["generation"] == 1
+
+    manager.change_order_status("ORD153", "Shipped")  # Continues the new generation
+    journal.close()
+    reopened = open_journal(paths)
+    restarted = load_order_manager(reopened)
+    assert reopened.generation == 1
+    assert statuses(restarted) == statuses(manager)
+    reopened.close()
+
+
+def test_a_journal_older_than_the_snapshot_is_not_replayed(paths):
+    journal = open_journal(paths)
+    manager = load_order_manager(journal)
+    manager.change_order_status("ORD141", "Shipped")
+    journal.flush()
+    stale = open(paths[0], "rb").read()  # The journal as it was before compaction
+    manager.change_order_status("ORD141", "Delivered")
+    journal.compact(manager)
+    journal.close()
+    with open(paths[0], "wb") as file:
+        file.write(stale)  # As if the process stopped between the snapshot and emptying the journal
+
+    reopened = open_journal(paths)
+    restarted = load_order_manager(reopened)
+    assert restarted.get_order_by_id("ORD141").status == "Delivered"
+    assert reopened.generation == 1 and journal_lines(paths) == [b'{"generation":1}']
+    reopened.close()
+
+
+def test_another_desktops_compaction_is_picked_up(paths):
+    first, second = open_journal(paths), open_journal(paths)
+    first_manager, second_manager = load_order_manager(first), load_order_manager(second)
+
+    first_manager.change_order_status("ORD141", "Processing")  # Not yet read by the second desktop
+    first.flush()
+    second_manager.change_order_status("ORD150", "Shipped")
+    second.compact(second_manager)  # Catches up with the first desktop's line before emptying the file
+    assert second_manager.get_order_by_id("ORD141").status == "Processing"
+    assert [(order.order_id, old) for order, old in second.catch_up(second_manager)] == [("ORD141", "Pending")]
+
+    changes = first.catch_up(first_manager)  # Finds generation 1: applies the snapshot
+    assert [(order.order_id, old) for order, old in changes] == [("ORD150", "Pending")]
+    assert first.generation == first.snapshot_generation == 1
+    assert statuses(first_manager) == statuses(second_manager)
+
+    first_manager.change_order_status("ORD153", "Shipped")  # Lines after the compaction still arrive
+    first.flush()
+    assert [order.order_id for order, _old in second.catch_up(second_manager)] == ["ORD153"]
+    first.close()
+    second.close()
+
+
+def test_close_commits_every_queued_change(paths):
+    journal = OrderJournal(*paths, flush_interval=30.0, max_batch=100_000)  # Would wait 30 s for a batch
+    for number in range(500):
+        journal.record(f"ORD{number}", "Pending", "Shipped", "clerk")
+    start = time.monotonic()
+    journal.close()
+    assert time.monotonic() - start < 5
+    entries = [json.loads(line) for line in journal_lines(paths)[1:]]
+    assert [entry["order_id"] for entry in entries] == [f"ORD{number}" for number in range(500)]
+    with pytest.raises(ValueError):
+        journal.record("ORD1", "Pending", "Shipped", "clerk")
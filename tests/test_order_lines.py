@@ -0,0 +1,115 @@
+"""
+Order line store: the forward index (order -> lines), the reverse index (SKU -> lines), the
+order totals and the committed quantities always equal a recomputation from the shipments,
+after orders are loaded, placed through the incoming order listeners, and received.
+"""
+import datetime
+
+import pytest
+
+import model.arrival_scheduler as arrival_scheduler
+from model.arrival_scheduler import ArrivalScheduler
+from model.incoming_orders import add_incoming_order, incoming_order_listeners, orders
+from model.order_lines import OPEN_STATUSES, OrderLineStore, load_order_lines
+
+ROWS = [
+    ["Hammer", "", "HAM-0001", 1499, 10],
+    ["Saw", "", "SAW-0002", 3250, 4],
+    ["Level", "", "LVL-0003", 999, 0],
+]
+PRICES = {row[2]: row[3] for row in ROWS}
+
+
+def day(offset):
+    return (datetime.date.today() + datetime.timedelta(days=offset)).isoformat()
+
+
+def seed_shipments():
+    return [
+        {"id": "ORD-101", "arrival": day(-4), "status": "Delivered", "items": 2, "lines": [("HAM-0001", 5), ("SAW-0002", 1)]},
+        {"id": "ORD-102", "arrival": day(-1), "status": "Shipped", "items": 2, "lines": [("HAM-0001", 3), ("LVL-0003", 2)]},
+        {"id": "ORD-103", "arrival": day(2), "status": "Shipped", "items": 1, "lines": [("SAW-0002", 7)]},
+        {"id": "ORD-104", "arrival": day(9), "status": "Pending", "items": 2, "lines": [("ZZZ-9999", 4), ("HAM-0001", 1)]},  # Not in the inventory
+    ]
+
+
+def check_against(store, shipments):
+    """Compares every index and running total with a recomputation from the shipments."""
+    skus = {sku for shipment in shipments for sku, _quantity in shipment["lines"]}
+    assert set(store.order_ids) == {shipment["id"] for shipment in shipments}
+    assert set(store.skus) == skus
+    assert len(store) == sum(len(shipment["lines"]) for shipment in shipments)
+    for shipment in shipments:
+        priced = [(sku, quantity, PRICES.get(sku, 0)) for sku, quantity in shipment["lines"]]
+        assert store.lines_for(shipment["id"]) == priced
+        assert store.order_total(shipment["id"]) == sum(quantity * price for _sku, quantity, price in priced)
+    for sku in skus:
+        expected = [(shipment["id"], quantity, PRICES.get(sku, 0))
+                    for shipment in shipments for line_sku, quantity in shipment["lines"] if line_sku == sku]
+        assert store.lines_with(sku) == expected
+        assert store.orders_with(sku) == list(dict.fromkeys(order_id for order_id, _quantity, _price in expected))
+        assert store.committed(sku) == sum(quantity for shipment in shipments if shipment["status"] in OPEN_STATUSES
+                                           for line_sku, quantity in shipment["lines"] if line_sku == sku)
+        delivered = [shipment["id"] for shipment in shipments if shipment["status"] == "Delivered"
+                     and any(line_sku == sku for line_sku, _quantity in shipment["lines"])]
+        assert store.orders_with(sku, "Delivered") == delivered
+    assert store.committed("NOT-A-SKU") == 0 and store.lines_with("NOT-A-SKU") == []
+
+
+@pytest.fixture
+def placed(monkeypatch):
+    """Puts the shared material orders and their listeners back; receiving leaves the stock alone."""
+    saved_orders, saved_listeners = list(orders), list(incoming_order_listeners)
+    monkeypatch.setattr(arrival_scheduler, "receive_quantities", lambda lines: [])
+    yield
+    orders[:] = saved_orders
+    incoming_order_listeners[:] = saved_listeners
+
+
+def test_loaded_orders_match_a_recomputation():
+    shipments = seed_shipments()
+    store = load_order_lines(shipments, ROWS)
+    check_against(store, shipments)
+    assert store.committed("HAM-0001") == 4 and store.committed("ZZZ-9999") == 4
+    assert store.orders_with("HAM-0001", "Pending") == ["ORD-104"]
+    with pytest.raises(ValueError):
+        store.add_order("ORD-101", [])
+
+
+def test_placed_and_received_orders_stay_in_step(placed, tmp_path):
+    shipments = seed_shipments()
+    store = load_order_lines(shipments, ROWS)
+    scheduler = ArrivalScheduler(shipments, str(tmp_path / "received.json"))
+    scheduler.listeners.append(store.on_shipment_received)  # As the controller wires them
+
+    for order_id, entries in [("ORD-201", [("SAW-0002", 2), ("HAM-0001", 6)]), ("ORD-202", [("LVL-0003", 1)])]:
+        shipments.append(add_incoming_order(order_id, entries, record=False))  # Reaches the store through the listeners
+        check_against(store, shipments)
+    assert store.committed("HAM-0001") == 10
+
+    assert [shipment["id"] for shipment in scheduler.receive_due()] == ["ORD-102"]
+    check_against(store, shipments)
+    assert store.committed("HAM-0001") == 7 and store.status("ORD-102") == "Delivered"
+
+    shipments[-2]["status"] = "Shipped"  # ORD-201 is on its way
+    scheduler.schedule(shipments[-2])
+    due_later = datetime.datetime.now().timestamp() + 30 * 86400
+    assert [shipment["id"] for shipment in scheduler.receive_due(now=due_later)] == ["ORD-103", "ORD-201"]
+    check_against(store, shipments)
+    assert store.committed("SAW-0002") == 0 and store.orders_with("SAW-0002", "Delivered") == ["ORD-101", "ORD-103", "ORD-201"]
+
+
+def test_status_changes_move_committed_quantities():
+    store = OrderLineStore()
+    store.add_order("A", [("HAM-0001", 3, 100), ("HAM-0001", 2, 100)], "Pending")
+    store.add_order("B", [("HAM-0001", 4, 90)], "Delivered")
+    assert store.committed("HAM-0001") == 5
+    version = store.version
+    assert store.set_status("A", "Shipped")  # Still open: nothing moves
+    assert store.committed("HAM-0001") == 5 and store.version == version + 1
+    store.set_status("A", "Cancelled")
+    assert store.committed("HAM-0001") == 0
+    store.set_status("B", "Pending")  # Reopened
+    assert store.committed("HAM-0001") == 4
+    assert store.orders_with("HAM-0001") == ["A", "B"]  # One entry per order, however many lines
+    assert not store.set_status("C", "Delivered")
@@ -0,0 +1,62 @@
+"""
+Sharded search: three worker processes over a small snapshot return exactly what the
+in-process search returns, in the same row order, and catalogs below the threshold never
+start a pool.
+"""
+import pytest
+
+from model.inventory_data import inventory_data
+from model.inventory_snapshot import InventorySnapshot, write_snapshot
+import model.parallel_search as parallel_search
+from model.parallel_search import ShardedSearch, sharded_search_for
+from model.search_query import compile_query
+
+QUERIES = ["drill", "sku:HAM-", "qty<5 price>=20", "saw qty>0", "nothing like it", ""]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "inventory.snap")
+    write_snapshot(inventory_data[:50], path, (1, 2))  # 50 rows: shards of 17, 17 and 16
+    snapshot = InventorySnapshot(path, verify=True)
+    yield snapshot
+    snapshot.close()
+
+
+def in_process(query, rows):
+    return list(compile_query(query, "inventory").filter_positions(rows))
+
+
+def test_shards_cover_every_row_once(snapshot):
+    search = ShardedSearch(snapshot, shards=3, min_rows=0)
+    assert search.shard_bounds() == [(0, 17), (17, 34), (34, 50)]
+
+
+def test_sharded_results_equal_the_in_process_search(snapshot):
+    search = ShardedSearch(snapshot, shards=3, min_rows=0)
+    try:
+        for query in QUERIES:
+            assert list(search.search_positions(query)) == in_process(query, snapshot)
+        assert search._pool is not None  # Really went through the workers
+    finally:
+        search.close()
+    assert any(in_process(query, snapshot) for query in QUERIES)  # Not all trivially empty
+
+
+def test_small_catalogs_stay_in_process(snapshot):
+    search = ShardedSearch(snapshot, shards=3)  # Default threshold, far above 50 rows
+    for query in QUERIES:
+        assert list(search.search_positions(query)) == in_process(query, snapshot)
+    assert search._pool is None
+    assert list(ShardedSearch(snapshot, shards=1, min_rows=0).search_positions("drill")) == in_process("drill", snapshot)
+
+
+def test_sharding_is_off_unless_configured(snapshot, monkeypatch):
+    monkeypatch.setattr(parallel_search, "_sharded", {})
+    monkeypatch.delenv("CONTRACTOR_PLUS_SEARCH_SHARDS", raising=False)
+    assert sharded_search_for(snapshot) is None
+    monkeypatch.setenv("CONTRACTOR_PLUS_SEARCH_SHARDS", "3")
+    assert sharded_search_for(inventory_data) is None  # Live rows are not on disk
+    search = sharded_search_for(snapshot)
+    assert search.shards == 3 and sharded_search_for(snapshot) is search
+    search.close()
@@ -0,0 +1,113 @@
+"""
+Report export: CSV and XLSX files read back to the rows that were written, a cancelled
+export leaves neither the file nor its temporary part behind, and the export worker reports
+any error, not just disk errors.
+"""
+import csv
+import os
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+from model.report_export import INVENTORY_HEADER, PROGRESS_EVERY, ExportCancelled, export_rows, inventory_report_rows
+from view.export_progress import ExportWorker
+
+ROWS = [
+    ["Hammer", "16oz claw hammer", "HAM-0001", 1499, 25],
+    ["Säge", 'Pull saw, 240mm "fine" <cut> & trim', "SAW-0002", 3250, 0],
+    ["Level", "Line one\nline two", "LVL-0003", 5, 7],
+]
+EXPECTED = [
+    ["1", "Hammer", "16oz claw hammer", "HAM-0001", "14.99", "25"],
+    ["2", "Säge", 'Pull saw, 240mm "fine" <cut> & trim', "SAW-0002", "32.50", "0"],
+    ["3", "Level", "Line one\nline two", "LVL-0003", "0.05", "7"],
+]
+NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def test_csv_round_trip(tmp_path):
+    path = str(tmp_path / "inventory.csv")
+    assert export_rows(path, INVENTORY_HEADER, inventory_report_rows(ROWS, range(len(ROWS)))) == 3
+    with open(path, newline="", encoding="utf-8") as file:
+        assert list(csv.reader(file)) == [INVENTORY_HEADER] + EXPECTED
+    assert os.listdir(tmp_path) == ["inventory.csv"]
+
+
+def sheet_values(path):
+    """Reads the XLSX back: (cell type, text) per cell, row by row."""
+    with zipfile.ZipFile(path) as package:
+        assert package.testzip() is None
+        for part in ("[Content_Types].xml", "_rels/.rels", "xl/workbook.xml", "xl/_rels/workbook.xml.rels"):
+            ElementTree.fromstring(package.read(part))  # Every part is well-formed XML
+        workbook = ElementTree.fromstring(package.read("xl/workbook.xml"))
+        sheet = ElementTree.fromstring(package.read("xl/worksheets/sheet1.xml"))
+    names = [element.get("name") for element in workbook.iter(f"{{{NS['s']}}}sheet")]
+    rows = []
+    for row in sheet.iterfind("s:sheetData/s:row", NS):
+        cells = []
+        for cell in row.iterfind("s:c", NS):
+            if cell.get("t") == "inlineStr":
+                cells.append(("text", cell.find("s:is/s:t", NS).text or ""))
+            else:
+                cells.append(("number", cell.find("s:v", NS).text))
+        rows.append(cells)
+    return names, rows
+
+
+def test_xlsx_opens_and_reads_back(tmp_path):
+    path = str(tmp_path / "inventory.xlsx")
+    export_rows(path, INVENTORY_HEADER, inventory_report_rows(ROWS, range(len(ROWS))), sheet_name="Export Inventory")
+    names, rows = sheet_values(path)
+    assert names == ["Export Inventory"]
+    assert [text for _kind, text in rows[0]] == INVENTORY_HEADER
+    assert [[text for _kind, text in row] for row in rows[1:]] == EXPECTED
+    assert [kind for kind, _text in rows[1]] == ["number", "text", "text", "text", "number", "number"]
+
+
+def many_rows(count):
+    for number in range(count):
+        yield [number, "Hammer", "", "HAM-0001", 1, 1]
+
+
+@pytest.mark.parametrize("name", ["big.csv", "big.xlsx"])
+def test_cancelled_export_leaves_nothing_behind(tmp_path, name):
+    path = str(tmp_path / name)
+    progress = []
+    with pytest.raises(ExportCancelled):
+        export_rows(path, INVENTORY_HEADER, many_rows(PROGRESS_EVERY * 4), progress=progress.append,
+                    is_cancelled=lambda: len(progress) >= 2)
+    assert progress == [PROGRESS_EVERY, PROGRESS_EVERY * 2]
+    assert os.listdir(tmp_path) == []
+
+
+def test_cancelling_keeps_an_existing_file(tmp_path):
+    path = tmp_path / "inventory.csv"
+    path.write_text("previous export\n")
+    with pytest.raises(ExportCancelled):
+        export_rows(str(path), INVENTORY_HEADER, many_rows(PROGRESS_EVERY * 2), is_cancelled=lambda: True)
+    assert path.read_text() == "previous export\n"
+    assert os.listdir(tmp_path) == ["inventory.csv"]
+
+
+def broken_rows():
+    yield [1, "Hammer", "", "HAM-0001", 1, 1]
+    raise ValueError("row 2 could not be read")
+
+
+def run_worker(path, rows):
+    worker = ExportWorker(path, INVENTORY_HEADER, rows, "Export Inventory")
+    outcome = []
+    worker.signals.finished.connect(lambda count: outcome.append(("finished", count)))
+    worker.signals.failed.connect(lambda message: outcome.append(("failed", message)))
+    worker.signals.cancelled.connect(lambda: outcome.append(("cancelled",)))
+    worker.run()  # On this thread, so the signals arrive at once
+    return outcome
+
+
+def test_worker_reports_every_kind_of_error(qapp, tmp_path):
+    path = str(tmp_path / "inventory.csv")
+    assert run_worker(path, broken_rows()) == [("failed", "row 2 could not be read")]
+    assert os.listdir(tmp_path) == []
+    assert run_worker(str(tmp_path / "missing" / "inventory.csv"), many_rows(1))[0][0] == "failed"
+    assert run_worker(path, many_rows(3)) == [("finished", 3)]
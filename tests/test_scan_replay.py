@@ -0,0 +1,78 @@
+"""
+Barcode scan replay: a synthetic key stream goes into the Order Material grid in scan mode,
+with scanner bursts (a few ms per key, then Enter) mixed with slow hand typing, repeated
+SKUs, unknown SKUs and malformed barcodes. Every scan must land on its SKU's line with the
+right quantity, typed keys must be ignored, bad scans flagged, and the grid updated at most
+once per frame.
+"""
+import random
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QKeyEvent
+from PyQt6.QtCore import QEvent, Qt
+
+from model.barcode_scan import coalesce_scans, scan_events, typed_events
+from model.inventory_snapshot import load_inventory
+from view.order_entry_grid import FRAME_MS
+
+BAD_CODES = ["ZZZ-9999", "12345678"]  # Not in the inventory / not a SKU at all
+
+
+def build_stream(scans, sku_count, seed):
+    """Returns (events, expected (code, count) pairs) for a mixed scanner and typing session."""
+    rng = random.Random(seed)
+    skus = [row[2] for row in load_inventory()[:sku_count]]
+    codes = [rng.choice(BAD_CODES) if rng.random() < 0.02 else rng.choice(skus) for _ in range(scans)]
+
+    events = []
+    now = 0
+    for number, code in enumerate(codes):
+        burst = scan_events([code], start_ms=now, jitter_ms=3, seed=seed + number)
+        events.extend(burst)
+        now = burst[-1][0] + rng.randint(250, 1500)
+        if number % 25 == 0:
+            typed = typed_events(rng.choice(skus) + "\n", start_ms=now)  # Someone types a SKU by hand
+            events.extend(typed)
+            now = typed[-1][0] + 500
+    return events, coalesce_scans(codes)
+
+
+def key_event(text):
+    """Returns the key press a keyboard-emulating scanner sends for one character (or Enter)."""
+    if text == "\r":
+        return QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_Return, Qt.KeyboardModifier.NoModifier, text)
+    return QKeyEvent(QEvent.Type.KeyPress, ord(text.upper()), Qt.KeyboardModifier.NoModifier, text)
+
+
+def test_scans_land_on_their_lines(controller, qapp):
+    controller.open_search()
+    window = controller.search_view
+    grid = window.entry_grid
+    window.entry_model.clear()
+    window.scan_button.setChecked(True)
+
+    applied = []
+    report = grid.on_scan_done
+    grid.on_scan_done = lambda *counts: (applied.append(counts), report(*counts))
+    clock = [0]
+    grid.key_clock = lambda event: clock[0]  # Replay the stream's own key timing
+
+    events, expected = build_stream(scans=400, sku_count=60, seed=265)
+    start = time.perf_counter()
+    for timestamp, text in events:
+        clock[0] = timestamp
+        QApplication.sendEvent(grid, key_event(text))
+        qapp.processEvents()
+    while grid.scan_timer.isActive():
+        qapp.processEvents()
+    frames = (time.perf_counter() - start) * 1000 / FRAME_MS
+
+    lines = {sku: (int(qty_text), error) for sku, qty_text, error in window.entry_model.lines}
+    assert len(lines) == len(window.entry_model.lines), "a SKU appears on more than one line"
+    for code, count in expected:
+        quantity, error = lines.pop(code, (0, ""))
+        assert quantity == count, f"{code}: expected {count}, grid has {quantity}"
+        assert (code in BAD_CODES) == bool(error), f"{code}: flagged {error!r}"
+    assert not lines, f"unexpected lines from typed keys: {sorted(lines)}"
+    assert len(applied) <= frames + 1, f"grid updated {len(applied)} times in {frames:.0f} frames"
@@ -0,0 +1,97 @@
+"""
+Search cache: a repeated query is answered from the cache, a change to the orders (a new
+OrderManager.version) misses, the cache stays within its entry and byte bounds by dropping
+the least recently used results, and data without a version is never cached.
+"""
+import sys
+
+from model.order import OrderManager
+from model.search_cache import SearchCache, cached_positions
+from model.search_query import compile_query
+
+
+def order_manager():
+    manager = OrderManager()
+    manager.seed_orders()
+    return manager
+
+
+class CountingSearch:
+    """Search function that counts how often the cache had to run it."""
+    def __init__(self, rows, schema_name="orders"):
+        self.rows = rows
+        self.schema_name = schema_name
+        self.calls = 0
+
+    def __call__(self, query):
+        self.calls += 1
+        return compile_query(query, self.schema_name).filter_positions(self.rows)
+
+
+def test_repeated_query_is_a_hit():
+    manager = order_manager()
+    cache = SearchCache()
+    search = CountingSearch(manager.orders)
+    first = cached_positions(cache, "orders", "status:pending", manager.orders, manager.version, search)
+    again = cached_positions(cache, "orders", "STATUS:Pending", manager.orders, manager.version, search)  # Case folded
+    assert again is first and search.calls == 1
+    assert list(first) == list(compile_query("status:pending", "orders").filter_positions(manager.orders))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_a_status_change_misses():
+    manager = order_manager()
+    cache = SearchCache()
+    search = CountingSearch(manager.orders)
+    before = cached_positions(cache, "orders", "status:shipped", manager.orders, manager.version, search)
+
+    version = manager.version
+    manager.change_order_status("ORD141", "Shipped")
+    assert manager.version != version
+    after = cached_positions(cache, "orders", "status:shipped", manager.orders, manager.version, search)
+    assert search.calls == 2 and cache.misses == 2
+    assert manager.position_of("ORD141") in after and manager.position_of("ORD141") not in before
+
+
+def test_eviction_by_entry_count_drops_the_least_recently_used():
+    cache = SearchCache(max_entries=3)
+    for name in "abc":
+        cache.put(name, (1, 2, 3))
+    cache.get("a")  # Now "b" is the least recently used
+    cache.put("d", (4,))
+    assert cache.get("b") is None
+    assert [cache.get(name) for name in "acd"] == [(1, 2, 3), (1, 2, 3), (4,)]
+    assert cache.stats()["entries"] == 3 and cache.evictions == 1
+
+
+def test_eviction_by_size_keeps_the_bytes_in_bounds():
+    result = tuple(range(1000))
+    size = sys.getsizeof(result) + sys.getsizeof("k0")
+    cache = SearchCache(max_entries=100, max_bytes=size * 3)
+    for number in range(10):
+        cache.put(f"k{number}", result)
+        assert cache.bytes <= cache.max_bytes
+    assert cache.stats()["entries"] == 3 and cache.evictions == 7
+    assert [cache.get(f"k{number}") is not None for number in range(10)] == [False] * 7 + [True] * 3
+
+    cache.put("huge", tuple(range(100_000)))  # Bigger than the whole cache: not stored, nothing evicted
+    assert cache.get("huge") is None and cache.evictions == 7
+
+
+def test_replacing_an_entry_does_not_count_it_twice():
+    cache = SearchCache()
+    cache.put("k", (1, 2))
+    size = cache.bytes
+    cache.put("k", (1, 2))
+    assert cache.bytes == size and cache.stats()["entries"] == 1
+
+
+def test_no_version_bypasses_the_cache():
+    manager = order_manager()
+    cache = SearchCache()
+    search = CountingSearch(manager.orders)
+    for _ in range(3):
+        positions = cached_positions(cache, "orders", "status:pending", manager.orders, None, search)
+    assert search.calls == 3
+    assert cache.stats()["entries"] == 0 and (cache.hits, cache.misses) == (0, 0)
+    assert list(positions) == list(search("status:pending"))
@@ -0,0 +1,80 @@
+"""
+Search query language: clauses are parsed into typed predicates (cheapest first), plain
+text keeps the old any-field substring results, and sliced searches add up to the whole.
+"""
+import pytest
+
+from model.inventory_data import inventory_data
+from model.money import format_money
+from model.search_query import compile_query
+
+ROWS = [list(row) for row in inventory_data]
+
+
+def displayed_substring(query, rows):
+    """The original search: rows where any displayed field contains the query, ignoring case."""
+    query = query.lower()
+    return [
+        position for position, (name, description, sku, price, quantity) in enumerate(rows)
+        if any(query in field.lower() for field in (name, description, sku, format_money(price), str(quantity)))
+    ]
+
+
+def test_clauses_are_typed_and_ordered_cheapest_first():
+    query = compile_query("sku:HAM- qty<5 price>=20", "inventory")
+    assert [(field, op, value) for field, op, value, _ in query.clauses] == [
+        ("qty", "<", 5), ("price", ">=", 2000), ("sku", ":", "ham-"),
+    ]
+    assert query.text == ""
+    expected = [
+        position for position, row in enumerate(ROWS)
+        if row[2].startswith("HAM-") and row[4] < 5 and row[3] >= 2000
+    ]
+    assert query.filter_positions(ROWS) == expected
+
+
+def test_sku_clauses_use_the_index():
+    hammers = [position for position, row in enumerate(ROWS) if row[2].startswith("HAM-")]
+    assert compile_query("sku:ham-", "inventory").candidate_positions(ROWS) == hammers
+    assert compile_query("sku=HAM-0002", "inventory").candidate_positions(ROWS) == [1]
+    assert compile_query("sku=ZZZ-0000", "inventory").candidate_positions(ROWS) == []
+    assert compile_query("qty<5", "inventory").candidate_positions(ROWS) is None  # Scans every row
+    assert compile_query("sku=HAM-0002", "inventory").filter_positions(ROWS) == [1]
+
+
+@pytest.mark.parametrize("text", ["hammer", "HAMMER", "14.99", "$14", "0", "drill bit", "HAM-000", "set (", "nothing like it", ""])
+def test_plain_text_matches_the_original_search(text):
+    query = compile_query(text, "inventory")
+    assert query.clauses == []
+    assert query.filter_positions(ROWS) == displayed_substring(text, ROWS)
+
+
+@pytest.mark.parametrize("text", ["qty<abc", "price>=x", "sku<HAM", "colour:red", "date>=2025"])
+def test_malformed_clauses_are_plain_text(text):
+    query = compile_query(text, "inventory")
+    assert query.clauses == []
+    assert query.text == text.lower()
+    assert query.filter_positions(ROWS) == displayed_substring(text, ROWS)
+
+
+def test_leftover_text_still_has_to_match():
+    query = compile_query("qty<10 drill", "inventory")
+    assert [field for field, *_ in query.clauses] == ["qty"]
+    assert query.text == "drill"
+    assert query.filter_positions(ROWS) == [
+        position for position in displayed_substring("drill", ROWS) if ROWS[position][4] < 10
+    ]
+
+
+@pytest.mark.parametrize("text", ["", "hammer", "qty<20 price>=10", "sku:DRL-", "sku=WRN-0011"])
+def test_slices_add_up_to_the_whole_search(text):
+    query = compile_query(text, "inventory")
+    whole = query.filter_positions(ROWS)
+    for shards in (1, 2, 3, 7):
+        bounds = [len(ROWS) * shard // shards for shard in range(shards + 1)]
+        sliced = []
+        for start, stop in zip(bounds, bounds[1:]):
+            part = query.filter_positions(ROWS, start, stop)
+            assert all(start <= position < stop for position in part)
+            sliced.extend(part)
+        assert sliced == whole
@@ -0,0 +1,101 @@
+"""
+Sort index: cached permutations agree with a plain stable sort in both directions (ties keep
+row order), sorting a search result matches sorting just those rows whichever path is taken,
+and patching a changed row leaves the same order as sorting from scratch.
+"""
+import random
+
+import pytest
+
+from model.sort_index import INVENTORY_SORT_KEYS, SortIndex
+
+
+def random_rows(seed, count=300):
+    rng = random.Random(seed)
+    return [
+        [rng.choice(["Hammer", "saw", "Drill", "hammer"]), f"item {rng.randint(0, 20)}", f"SKU-{rng.randint(0, 50):04d}",
+         rng.choice([199, 1499, 1499, 3250]), rng.randint(0, 5)]
+        for _ in range(count)
+    ]
+
+
+def fresh_sort(rows, column, positions=None, descending=False):
+    """Positions sorted by a plain stable sort, the reference the index must match."""
+    key = INVENTORY_SORT_KEYS[column]
+    positions = range(len(rows)) if positions is None else positions
+    return sorted(positions, key=lambda position: key(rows[position]), reverse=descending)
+
+
+@pytest.mark.parametrize("column", sorted(INVENTORY_SORT_KEYS))
+@pytest.mark.parametrize("descending", [False, True])
+def test_every_row_sorted_with_stable_ties(column, descending):
+    rows = random_rows(column)
+    index = SortIndex(rows, INVENTORY_SORT_KEYS)
+    assert index.sorted_positions(column, descending=descending) == fresh_sort(rows, column, descending=descending)
+    if not descending:
+        assert index.permutation(column) == fresh_sort(rows, column)
+
+
+def test_ties_keep_row_order_in_both_directions():
+    rows = [["b", "", "", 5, 0], ["a", "", "", 5, 0], ["c", "", "", 1, 0], ["d", "", "", 5, 0]]
+    index = SortIndex(rows, INVENTORY_SORT_KEYS)
+    assert index.sorted_positions(4) == [2, 0, 1, 3]
+    assert index.sorted_positions(4, descending=True) == [0, 1, 3, 2]
+
+
+@pytest.mark.parametrize("size", [5, 30, 200])  # Below and above the rank/walk switch at 1/8 of the rows
+@pytest.mark.parametrize("descending", [False, True])
+def test_a_filtered_subset_is_sorted_like_those_rows_alone(size, descending):
+    rows = random_rows(size)
+    index = SortIndex(rows, INVENTORY_SORT_KEYS)
+    subset = random.Random(size).sample(range(len(rows)), size)
+    for column in (1, 3, 4, 5):
+        expected = fresh_sort(rows, column, sorted(subset), descending)
+        assert index.sorted_positions(column, subset, descending) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_updated_rows_match_a_fresh_sort(seed):
+    rows = random_rows(seed)
+    index = SortIndex(rows, INVENTORY_SORT_KEYS)
+    for column in (1, 4, 5):
+        index.permutation(column)  # Cache them before the edits
+    index.ranks(5)
+    rng = random.Random(seed)
+    for _ in range(100):
+        position = rng.randrange(len(rows))
+        if rng.random() < 0.5:
+            old_row = rows[position]
+            rows[position] = old_row[:3] + [rng.choice([199, 1499, 9999]), old_row[4]]  # Replaced row
+            index.update_row(position, old_row)
+        else:
+            rows[position][4] = rng.randint(0, 5)  # Edited in place
+            index.update_row(position)
+    rows.append(["Anvil", "new", "ANV-0001", 1499, 3])
+    index.append_row()
+
+    fresh = SortIndex(rows, INVENTORY_SORT_KEYS)
+    for column in (1, 4, 5):
+        assert index.permutation(column) == fresh.permutation(column) == fresh_sort(rows, column)
+        assert index.ranks(column) == fresh.ranks(column)
+        subset = list(range(0, len(rows), 17))
+        assert index.sorted_positions(column, subset, True) == fresh_sort(rows, column, subset, True)
+
+
+def shown_skus(view):
+    model = view.inventory_model
+    return [model.data(model.index(row, 3)) for row in range(model.rowCount())]
+
+
+def test_clearing_the_search_keeps_the_sort(controller):
+    controller.open_inventory()
+    view = controller.inventory_view
+    view.on_sort(5)
+    view.on_sort(5)  # Quantity, descending
+    expected = shown_skus(view)
+    view.search_box.setText("drill")
+    assert len(shown_skus(view)) < len(expected)
+
+    view.clear_search()
+    assert view.search_box.text() == ""
+    assert shown_skus(view) == expected
@@ -0,0 +1,51 @@
+"""
+Atomic writes: concurrent writers of one file each rename their own complete temporary file,
+so the target always holds one whole payload and no temporary files are left behind.
+"""
+import os
+import stat
+import threading
+
+import pytest
+
+from model.storage import atomic_write
+
+
+def test_concurrent_writers_never_clash(tmp_path):
+    path = str(tmp_path / "shared.json")
+    payloads = [bytes([number]) * 200_000 for number in range(8)]
+    errors = []
+
+    def writer(payload):
+        try:
+            for _ in range(20):
+                atomic_write(path, payload)
+                assert open(path, "rb").read() in payloads  # Never a mix of two writes
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=writer, args=(payload,)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert open(path, "rb").read() in payloads
+    assert os.listdir(tmp_path) == ["shared.json"]
+
+
+def test_failed_write_leaves_the_old_file(tmp_path):
+    path = str(tmp_path / "shared.json")
+    atomic_write(path, b"old")
+    with pytest.raises(TypeError):
+        atomic_write(path, "not bytes")
+    assert open(path, "rb").read() == b"old"
+    assert os.listdir(tmp_path) == ["shared.json"]
+
+
+def test_written_files_get_the_usual_permissions(tmp_path):
+    path = str(tmp_path / "shared.json")
+    atomic_write(path, b"{}")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask